@@ -4,8 +4,10 @@ from pydantic import BaseModel, Field
 from typing import Dict, Any, List, Optional
 import logging
 
+from core.config import settings
 from core.security import get_current_user_id
 from services.optimization_service import OptimizationService
+from services.optimization_store import get_shared_optimization_store
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +28,17 @@ class OptimizationRequest(BaseModel):
     objective: str = Field(default="sharpe_ratio", description="优化目标")
     maximize: bool = Field(default=True, description="是否最大化")
     n_jobs: int = Field(default=1, description="并行任务数")
+    executor: str = Field(default="auto", description="评估后端 (auto, serial, thread, process, distributed)")
+    distributed_chunk_size: Optional[int] = Field(
+        default=None, gt=0, description="分布式评估每个任务的参数组合数，默认按在线工作者数拆分每批参数"
+    )
+    run_id: Optional[str] = Field(default=None, description="运行ID（为空时生成新ID，重复使用同一ID会覆盖运行记录）")
+    warm_start: bool = Field(default=True, description="是否用历史评估结果热启动遗传算法和贝叶斯优化")
+    
+    # 网格搜索参数
+    adaptive: Optional[bool] = Field(default=False, description="是否使用由粗到细的自适应网格")
+    coarse_points: Optional[int] = Field(default=5, ge=2, description="自适应网格第一轮每个数值参数的取值数")
+    top_k: Optional[int] = Field(default=3, ge=1, description="自适应网格每轮细分的最优点数")
     
     # 遗传算法参数
     population_size: Optional[int] = Field(default=50, description="种群大小")
@@ -33,11 +46,29 @@ class OptimizationRequest(BaseModel):
     crossover_rate: Optional[float] = Field(default=0.8, description="交叉概率")
     mutation_rate: Optional[float] = Field(default=0.1, description="变异概率")
     elitism_rate: Optional[float] = Field(default=0.1, description="精英保留比例")
+    n_islands: Optional[int] = Field(default=1, ge=1, description="岛数，大于1时各子种群在独立进程中进化")
+    migration_interval: Optional[int] = Field(default=5, ge=1, description="迁移间隔（代）")
+    migration_size: Optional[int] = Field(default=2, ge=0, description="每次从每个岛迁出的个体数")
     
     # 贝叶斯优化参数
     n_iter: Optional[int] = Field(default=100, description="迭代次数")
     n_init: Optional[int] = Field(default=10, description="初始采样次数")
     acquisition: Optional[str] = Field(default="EI", description="采集函数")
+    
+    # Hyperband参数
+    eta: Optional[int] = Field(default=3, ge=2, description="每级保留1/eta的参数，窗口加长eta倍")
+    min_bars: Optional[int] = Field(default=None, gt=0, description="最短评估窗口（K线数）")
+    n_candidates: Optional[int] = Field(default=None, gt=0, description="初始候选参数数，默认全部网格组合")
+    n_brackets: Optional[int] = Field(default=1, gt=0, description="Hyperband组数，1为逐级淘汰，为空时运行全部组")
+    seed: Optional[int] = Field(default=None, description="Hyperband抽取候选参数的随机种子，固定后结果可复现")
+
+
+class WalkForwardRequest(OptimizationRequest):
+    """滚动前推优化请求"""
+    train_bars: int = Field(..., gt=0, description="训练窗口长度（K线数）")
+    test_bars: int = Field(..., gt=0, description="测试窗口长度（K线数）")
+    step_bars: Optional[int] = Field(default=None, gt=0, description="窗口前推步长，默认等于测试窗口")
+    anchored: bool = Field(default=False, description="是否锚定训练起点")
 
 
 class ParallelOptimizationRequest(BaseModel):
@@ -54,6 +85,7 @@ class OptimizationResponse(BaseModel):
     optimization_time: float = Field(..., description="优化时间（秒）")
     iterations: int = Field(..., description="迭代次数")
     convergence_curve: List[float] = Field(default=[], description="收敛曲线")
+    stats: Dict[str, Any] = Field(default={}, description="优化器统计信息")
 
 
 # 优化服务实例（全局）
@@ -65,9 +97,13 @@ def get_optimization_service() -> OptimizationService:
     global optimization_service
     if optimization_service is None:
         # TODO: 从依赖注入获取
-        from services.backtest_service import BacktestService
-        backtest_service = BacktestService()
-        optimization_service = OptimizationService(backtest_service)
+        from services.backtest_service import BacktestEngine
+        backtest_service = BacktestEngine()
+        optimization_service = OptimizationService(
+            backtest_service,
+            store=get_shared_optimization_store(),
+            broker_url=settings.OPTIMIZATION_BROKER_URL
+        )
     return optimization_service
 
 
@@ -83,6 +119,7 @@ async def grid_search(
     遍历所有参数组合，找到最优解。
     适合参数空间较小的情况。
     保证找到全局最优解。
+    adaptive=true 时由粗到细只细分最优区域，评估次数远少于完整网格。
     """
     try:
         logger.info(f"用户 {user_id} 请求网格搜索优化")
@@ -98,7 +135,14 @@ async def grid_search(
             param_ranges=request.param_ranges,
             objective=request.objective,
             maximize=request.maximize,
-            n_jobs=request.n_jobs
+            n_jobs=request.n_jobs,
+            run_id=request.run_id,
+            warm_start=request.warm_start,
+            executor=request.executor,
+            distributed_chunk_size=request.distributed_chunk_size,
+            adaptive=request.adaptive,
+            coarse_points=request.coarse_points,
+            top_k=request.top_k
         )
         
         return OptimizationResponse(
@@ -107,7 +151,8 @@ async def grid_search(
             all_results=result.all_results,
             optimization_time=result.optimization_time,
             iterations=result.iterations,
-            convergence_curve=result.convergence_curve
+            convergence_curve=result.convergence_curve,
+            stats=result.stats
         )
         
     except Exception as e:
@@ -143,11 +188,18 @@ async def genetic_optimization(
             objective=request.objective,
             maximize=request.maximize,
             n_jobs=request.n_jobs,
+            run_id=request.run_id,
+            warm_start=request.warm_start,
             population_size=request.population_size,
             generations=request.generations,
             crossover_rate=request.crossover_rate,
             mutation_rate=request.mutation_rate,
-            elitism_rate=request.elitism_rate
+            elitism_rate=request.elitism_rate,
+            executor=request.executor,
+            distributed_chunk_size=request.distributed_chunk_size,
+            n_islands=request.n_islands,
+            migration_interval=request.migration_interval,
+            migration_size=request.migration_size
         )
         
         return OptimizationResponse(
@@ -156,7 +208,8 @@ async def genetic_optimization(
             all_results=result.all_results,
             optimization_time=result.optimization_time,
             iterations=result.iterations,
-            convergence_curve=result.convergence_curve
+            convergence_curve=result.convergence_curve,
+            stats=result.stats
         )
         
     except Exception as e:
@@ -191,9 +244,13 @@ async def bayesian_optimization(
             objective=request.objective,
             maximize=request.maximize,
             n_jobs=request.n_jobs,
+            run_id=request.run_id,
+            warm_start=request.warm_start,
             n_iter=request.n_iter,
             n_init=request.n_init,
-            acquisition=request.acquisition
+            acquisition=request.acquisition,
+            executor=request.executor,
+            distributed_chunk_size=request.distributed_chunk_size
         )
         
         return OptimizationResponse(
@@ -202,7 +259,8 @@ async def bayesian_optimization(
             all_results=result.all_results,
             optimization_time=result.optimization_time,
             iterations=result.iterations,
-            convergence_curve=result.convergence_curve
+            convergence_curve=result.convergence_curve,
+            stats=result.stats
         )
         
     except Exception as e:
@@ -210,6 +268,131 @@ async def bayesian_optimization(
         raise HTTPException(status_code=500, detail=f"优化失败: {str(e)}")
 
 
+@router.post("/hyperband")
+async def hyperband_optimization(
+    request: OptimizationRequest,
+    user_id: int = Depends(get_current_user_id),
+    service: OptimizationService = Depends(get_optimization_service)
+):
+    """
+    Hyperband 优化
+    
+    先在最近的一小段行情上评估大量参数组合，只让排名靠前的参数进入更长的行情，
+    以远少于网格搜索的模拟K线数找到接近网格最优的参数。
+    """
+    try:
+        logger.info(f"用户 {user_id} 请求Hyperband优化")
+        
+        result = await service.run_optimization(
+            strategy_type=request.strategy_type,
+            stock_code=request.stock_code,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            frequency=request.frequency,
+            initial_capital=request.initial_capital,
+            optimization_method='hyperband',
+            param_ranges=request.param_ranges,
+            objective=request.objective,
+            maximize=request.maximize,
+            n_jobs=request.n_jobs,
+            run_id=request.run_id,
+            warm_start=request.warm_start,
+            eta=request.eta,
+            min_bars=request.min_bars,
+            n_candidates=request.n_candidates,
+            n_brackets=request.n_brackets,
+            seed=request.seed,
+            executor=request.executor,
+            distributed_chunk_size=request.distributed_chunk_size
+        )
+        
+        return OptimizationResponse(
+            best_params=result.best_params,
+            best_score=result.best_score,
+            all_results=result.all_results,
+            optimization_time=result.optimization_time,
+            iterations=result.iterations,
+            convergence_curve=result.convergence_curve,
+            stats=result.stats
+        )
+        
+    except Exception as e:
+        logger.error(f"Hyperband优化失败: {e}")
+        raise HTTPException(status_code=500, detail=f"优化失败: {str(e)}")
+
+
+@router.post("/walk-forward")
+async def walk_forward_optimization(
+    request: WalkForwardRequest,
+    user_id: int = Depends(get_current_user_id),
+    service: OptimizationService = Depends(get_optimization_service)
+):
+    """
+    滚动前推优化
+    
+    将区间划分为滚动的训练/测试窗口，每个窗口在训练段上优化参数、在测试段上检验，
+    各窗口在独立进程中并行执行，返回拼接后的样本外净值曲线。
+    用于检验参数是否过拟合。
+    """
+    try:
+        logger.info(f"用户 {user_id} 请求滚动前推优化")
+        
+        optimizer_kwargs = {}
+        if request.optimization_method == 'grid_search':
+            optimizer_kwargs = {
+                'adaptive': request.adaptive,
+                'coarse_points': request.coarse_points,
+                'top_k': request.top_k
+            }
+        elif request.optimization_method == 'genetic':
+            optimizer_kwargs = {
+                'population_size': request.population_size,
+                'generations': request.generations,
+                'crossover_rate': request.crossover_rate,
+                'mutation_rate': request.mutation_rate,
+                'elitism_rate': request.elitism_rate
+            }
+        elif request.optimization_method == 'bayesian':
+            optimizer_kwargs = {
+                'n_iter': request.n_iter,
+                'n_init': request.n_init,
+                'acquisition': request.acquisition
+            }
+        elif request.optimization_method == 'hyperband':
+            optimizer_kwargs = {
+                'eta': request.eta,
+                'min_bars': request.min_bars,
+                'n_candidates': request.n_candidates,
+                'n_brackets': request.n_brackets,
+                'seed': request.seed
+            }
+        
+        return await service.run_walk_forward_optimization(
+            strategy_type=request.strategy_type,
+            stock_code=request.stock_code,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            train_bars=request.train_bars,
+            test_bars=request.test_bars,
+            step_bars=request.step_bars,
+            anchored=request.anchored,
+            frequency=request.frequency,
+            initial_capital=request.initial_capital,
+            optimization_method=request.optimization_method,
+            param_ranges=request.param_ranges,
+            objective=request.objective,
+            maximize=request.maximize,
+            n_jobs=request.n_jobs,
+            **optimizer_kwargs
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"滚动前推优化失败: {e}")
+        raise HTTPException(status_code=500, detail=f"优化失败: {str(e)}")
+
+
 @router.post("/parallel")
 async def parallel_optimization(
     request: ParallelOptimizationRequest,
@@ -253,6 +436,94 @@ async def parallel_optimization(
         raise HTTPException(status_code=500, detail=f"优化失败: {str(e)}")
 
 
+@router.get("/runs")
+async def list_optimization_runs(
+    status: Optional[str] = None,
+    limit: int = 50,
+    user_id: int = Depends(get_current_user_id),
+    service: OptimizationService = Depends(get_optimization_service)
+):
+    """
+    列出优化运行记录
+    
+    状态为 running 且 active 为 false 的运行在服务重启前被中断，可以恢复。
+    """
+    try:
+        runs = service.list_optimization_runs(status, limit)
+        return {
+            'total': len(runs),
+            'runs': runs
+        }
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取优化运行记录失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
+
+
+@router.get("/runs/{run_id}")
+async def get_optimization_run(
+    run_id: str,
+    user_id: int = Depends(get_current_user_id),
+    service: OptimizationService = Depends(get_optimization_service)
+):
+    """
+    获取优化运行记录
+    """
+    try:
+        run = service.get_optimization_run(run_id)
+        
+        if run is None:
+            raise HTTPException(status_code=404, detail="优化运行不存在")
+        
+        return run
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取优化运行记录失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
+
+
+@router.post("/runs/{run_id}/resume")
+async def resume_optimization(
+    run_id: str,
+    user_id: int = Depends(get_current_user_id),
+    service: OptimizationService = Depends(get_optimization_service)
+):
+    """
+    恢复优化
+    
+    按运行记录中的配置重新运行，已持久化的评估结果直接复用，不再重复回测。
+    """
+    try:
+        logger.info(f"用户 {user_id} 请求恢复优化: {run_id}")
+        
+        if service.get_optimization_run(run_id) is None:
+            raise HTTPException(status_code=404, detail="优化运行不存在")
+        
+        result = await service.resume_optimization(run_id)
+        
+        return OptimizationResponse(
+            best_params=result.best_params,
+            best_score=result.best_score,
+            all_results=result.all_results,
+            optimization_time=result.optimization_time,
+            iterations=result.iterations,
+            convergence_curve=result.convergence_curve,
+            stats=result.stats
+        )
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"恢复优化失败: {e}")
+        raise HTTPException(status_code=500, detail=f"优化失败: {str(e)}")
+
+
 @router.get("/results/{result_id}")
 async def get_optimization_result(
     result_id: int,
@@ -1,10 +1,16 @@
 """策略API"""
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
 from loguru import logger
-from services.backtest_service import BacktestEngine
+from services.backtest_service import BacktestEngine, RESULT_FORMATS, MEMORY_MODES
+from services.backtest_jobs import JOB_PRIORITIES, get_backtest_job_queue
+from services.monte_carlo import monte_carlo_analysis, MONTE_CARLO_METHODS
+from services.backtest_data_provider import STORAGE_FREQ_MAP
+from services.universe_backtest import get_universe_backtest_service
+from strategies import FormulaError, compile_formula, get_strategy_templates
 
 router = APIRouter()
 
@@ -46,6 +52,45 @@ STRATEGY_TEMPLATES = {
         }
     }
 }
+# 已注册的向量化策略插件
+STRATEGY_TEMPLATES.update(get_strategy_templates())
+
+
+def build_strategy_params(strategy_type: str, custom_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """根据策略模板默认值和自定义参数构建策略参数"""
+    # 获取策略模板
+    strategy_template = STRATEGY_TEMPLATES.get(strategy_type, STRATEGY_TEMPLATES['MA'])
+    
+    # 构建策略参数
+    strategy_params = {
+        'type': strategy_type,
+        'name': strategy_template['name'],
+        'description': strategy_template['description']
+    }
+    
+    # 添加默认参数
+    for param_name, param_config in strategy_template['params'].items():
+        strategy_params[param_name] = param_config['default']
+    
+    # 如果有自定义参数，覆盖默认值
+    if custom_params:
+        strategy_params.update(custom_params)
+    
+    return strategy_params
+
+
+def convert_frequency(frequency: str) -> str:
+    """转换频率参数：将前端格式转换为数据获取器期望的格式"""
+    freq_mapping = {
+        'daily': '1d',
+        '60min': '60min',
+        '30min': '30min',
+        '15min': '15min',
+        '5min': '5min'
+    }
+    freq = freq_mapping.get(frequency, frequency)
+    logger.info(f"频率参数转换: {frequency} -> {freq}")
+    return freq
 
 
 class StrategyCreate(BaseModel):
@@ -73,8 +118,48 @@ class BacktestRequest(BaseModel):
     initial_capital: float = 100000.0
     strategy_type: str = "MA"
     custom_params: Optional[Dict[str, Any]] = None
+    result_format: str = "rows"  # rows: 每行一个字典; columnar: 每个字段一个数组
+    memory_mode: str = "standard"  # standard: 完整明细; lean: float32分块计算，适合长周期分钟线
+
+
+class BacktestJobRequest(BacktestRequest):
+    """异步回测任务请求"""
+    priority: str = "interactive"  # interactive: 交互式，优先执行; bulk: 批量扫描
+
+
+class MonteCarloRequest(BacktestRequest):
+    """蒙特卡洛稳健性分析请求"""
+    n_paths: int = 10000
+    method: str = "bootstrap"  # bootstrap: 有放回抽样; shuffle: 打乱收益顺序
+    block_size: int = 1
+    confidence: float = 0.95
+    seed: Optional[int] = None
+
+
+class UniverseBacktestRequest(BaseModel):
+    """全市场回测请求（同一策略逐只回测本地已下载的所有股票）"""
+    start_date: date
+    end_date: date
+    frequency: str = "daily"
+    initial_capital: float = 100000.0
+    strategy_type: str = "MA"
+    custom_params: Optional[Dict[str, Any]] = None
+    stock_codes: Optional[List[str]] = None  # 默认全部已下载股票
+    batch_size: int = 200
+    n_jobs: Optional[int] = None  # 默认CPU核数
 
 
+class PortfolioBacktestRequest(BaseModel):
+    """组合回测请求（多标的共享现金）"""
+    stock_codes: List[str]
+    start_date: date
+    end_date: date
+    frequency: str = "daily"
+    initial_capital: float = 1000000.0
+    strategy_type: str = "MA"
+    custom_params: Optional[Dict[str, Any]] = None
+    include_symbol_curves: bool = False  # 每个标的一条完整曲线，标的多时响应很大
+
 @router.get("")
 async def get_strategies():
     """获取策略列表"""
@@ -245,63 +330,320 @@ async def run_backtest(strategy_id: int, request: BacktestRequest):
     try:
         logger.info(f"运行回测: strategy_id={strategy_id}, stock={request.stock_code}")
 
-        # 获取策略模板
-        strategy_template = STRATEGY_TEMPLATES.get(request.strategy_type, STRATEGY_TEMPLATES['MA'])
+        if request.result_format not in RESULT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"不支持的结果格式: {request.result_format}")
+        if request.memory_mode not in MEMORY_MODES:
+            raise HTTPException(status_code=400, detail=f"不支持的内存模式: {request.memory_mode}")
+
+        strategy_params = build_strategy_params(request.strategy_type, request.custom_params)
+        if request.strategy_type == 'FORMULA':
+            # 提前编译公式，语法错误直接返回400，不进入任务队列
+            try:
+                compile_formula(strategy_params['formula'])
+            except FormulaError as e:
+                raise HTTPException(status_code=400, detail=f"公式错误: {e}")
+        freq = convert_frequency(request.frequency)
         
-        # 构建策略参数
-        strategy_params = {
-            'type': request.strategy_type,
-            'name': strategy_template['name'],
-            'description': strategy_template['description']
+        # 在任务队列的工作进程中运行回测，等待期间不阻塞事件循环
+        result = await get_backtest_job_queue().run(
+            stock_code=request.stock_code,
+            start_date=datetime.combine(request.start_date, datetime.min.time()),
+            end_date=datetime.combine(request.end_date, datetime.max.time()),
+            freq=freq,
+            strategy_params=strategy_params,
+            initial_capital=request.initial_capital,
+            commission=0.0003,  # 万三手续费
+            slippage=0.001,  # 千一滑点
+            data_source='auto',
+            result_format=request.result_format,
+            memory_mode=request.memory_mode
+        )
+        
+        return {
+            "code": 200,
+            "message": "回测完成",
+            "data": result
         }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"运行回测失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"运行回测失败: {str(e)}"
+        )
+
+
+@router.post("/{strategy_id}/backtest/jobs")
+async def submit_backtest_job(strategy_id: int, request: BacktestJobRequest):
+    """提交异步回测任务，返回job_id；进度和结果通过 /ws 订阅（subscribe_job）或轮询获取"""
+    try:
+        logger.info(f"提交回测任务: strategy_id={strategy_id}, stock={request.stock_code}, 优先级={request.priority}")
+
+        if request.priority not in JOB_PRIORITIES:
+            raise HTTPException(status_code=400, detail=f"不支持的任务优先级: {request.priority}")
+        if request.result_format not in RESULT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"不支持的结果格式: {request.result_format}")
+        if request.memory_mode not in MEMORY_MODES:
+            raise HTTPException(status_code=400, detail=f"不支持的内存模式: {request.memory_mode}")
+
+        strategy_params = build_strategy_params(request.strategy_type, request.custom_params)
+        if request.strategy_type == 'FORMULA':
+            try:
+                compile_formula(strategy_params['formula'])
+            except FormulaError as e:
+                raise HTTPException(status_code=400, detail=f"公式错误: {e}")
+        freq = convert_frequency(request.frequency)
+        
+        queue = get_backtest_job_queue()
+        job_id = queue.submit(
+            stock_code=request.stock_code,
+            start_date=datetime.combine(request.start_date, datetime.min.time()),
+            end_date=datetime.combine(request.end_date, datetime.max.time()),
+            freq=freq,
+            strategy_params=strategy_params,
+            initial_capital=request.initial_capital,
+            commission=0.0003,  # 万三手续费
+            slippage=0.001,  # 千一滑点
+            data_source='auto',
+            result_format=request.result_format,
+            memory_mode=request.memory_mode,
+            priority=request.priority
+        )
+        
+        return {
+            "code": 200,
+            "message": "回测任务已提交",
+            "data": queue.get_job(job_id)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"提交回测任务失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"提交回测任务失败: {str(e)}"
+        )
+
+
+@router.get("/backtest-jobs/{job_id}")
+async def get_backtest_job(job_id: str):
+    """获取回测任务状态，已完成的任务附带回测结果"""
+    queue = get_backtest_job_queue()
+    job = queue.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="回测任务不存在")
+    return {
+        "code": 200,
+        "message": "success",
+        "data": {
+            **job,
+            "result": queue.get_result(job_id)
+        }
+    }
+
+
+@router.delete("/backtest-jobs/{job_id}")
+async def cancel_backtest_job(job_id: str):
+    """取消排队中的回测任务"""
+    queue = get_backtest_job_queue()
+    if queue.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="回测任务不存在")
+    if not queue.cancel(job_id):
+        raise HTTPException(status_code=400, detail="只能取消排队中的回测任务")
+    return {
+        "code": 200,
+        "message": "回测任务已取消",
+        "data": queue.get_job(job_id)
+    }
+
+
+@router.post("/{strategy_id}/backtest/monte-carlo")
+async def run_monte_carlo(strategy_id: int, request: MonteCarloRequest):
+    """运行回测并对收益序列做蒙特卡洛重采样，返回夏普、最大回撤和总收益的置信区间"""
+    try:
+        logger.info(f"运行蒙特卡洛分析: strategy_id={strategy_id}, stock={request.stock_code}, 路径数={request.n_paths}")
+
+        if request.method not in MONTE_CARLO_METHODS:
+            raise HTTPException(status_code=400, detail=f"不支持的重采样方法: {request.method}")
+        if not 1 <= request.n_paths <= 100000:
+            raise HTTPException(status_code=400, detail="路径数必须在1到100000之间")
+
+        strategy_params = build_strategy_params(request.strategy_type, request.custom_params)
+        freq = convert_frequency(request.frequency)
         
-        # 添加默认参数
-        for param_name, param_config in strategy_template['params'].items():
-            strategy_params[param_name] = param_config['default']
+        # 回测在任务队列的工作进程中运行，重采样在线程中运行，均不阻塞事件循环
+        result = await get_backtest_job_queue().run(
+            stock_code=request.stock_code,
+            start_date=datetime.combine(request.start_date, datetime.min.time()),
+            end_date=datetime.combine(request.end_date, datetime.max.time()),
+            freq=freq,
+            strategy_params=strategy_params,
+            initial_capital=request.initial_capital,
+            commission=0.0003,  # 万三手续费
+            slippage=0.001,  # 千一滑点
+            data_source='auto',
+            result_format='columnar'
+        )
         
-        # 如果有自定义参数，覆盖默认值
-        if request.custom_params:
-            strategy_params.update(request.custom_params)
+        monte_carlo = await asyncio.to_thread(
+            monte_carlo_analysis,
+            result['equity_curve']['total_value'],
+            n_paths=request.n_paths,
+            method=request.method,
+            block_size=request.block_size,
+            confidence=request.confidence,
+            seed=request.seed
+        )
         
-        # 转换频率参数：将前端格式转换为数据获取器期望的格式
-        freq_mapping = {
-            'daily': '1d',
-            '60min': '60min',
-            '30min': '30min',
-            '15min': '15min',
-            '5min': '5min'
+        return {
+            "code": 200,
+            "message": "蒙特卡洛分析完成",
+            "data": {
+                "stock_code": request.stock_code,
+                "metrics": result['metrics'],
+                "monte_carlo": monte_carlo
+            }
         }
-        freq = freq_mapping.get(request.frequency, request.frequency)
-        logger.info(f"频率参数转换: {request.frequency} -> {freq}")
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"蒙特卡洛分析失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"蒙特卡洛分析失败: {str(e)}"
+        )
+
+
+@router.post("/{strategy_id}/portfolio-backtest")
+async def run_portfolio_backtest(strategy_id: int, request: PortfolioBacktestRequest):
+    """运行组合回测：多只股票对齐到统一时间轴，共享一个现金账户"""
+    try:
+        logger.info(f"运行组合回测: strategy_id={strategy_id}, 股票数={len(request.stock_codes)}")
+
+        if not request.stock_codes:
+            raise HTTPException(status_code=400, detail="股票代码列表不能为空")
+
+        strategy_params = build_strategy_params(request.strategy_type, request.custom_params)
+        freq = convert_frequency(request.frequency)
         
-        # 创建回测引擎
         engine = BacktestEngine(
             initial_capital=request.initial_capital,
             commission=0.0003,  # 万三手续费
             slippage=0.001  # 千一滑点
         )
         
-        # 运行回测
-        result = await engine.run_backtest(
-            stock_code=request.stock_code,
+        result = await engine.run_portfolio_backtest(
+            stock_codes=request.stock_codes,
             start_date=datetime.combine(request.start_date, datetime.min.time()),
             end_date=datetime.combine(request.end_date, datetime.max.time()),
             freq=freq,
             strategy_params=strategy_params,
-            data_source='auto'
+            data_source='auto',
+            include_symbol_curves=request.include_symbol_curves
         )
         
         return {
             "code": 200,
-            "message": "回测完成",
+            "message": "组合回测完成",
             "data": result
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"运行回测失败: {e}")
+        logger.error(f"运行组合回测失败: {e}")
         raise HTTPException(
             status_code=500,
-            detail=f"运行回测失败: {str(e)}"
+            detail=f"运行组合回测失败: {str(e)}"
+        )
+
+
+@router.post("/{strategy_id}/universe-backtest")
+async def start_universe_backtest(strategy_id: int, request: UniverseBacktestRequest):
+    """在后台启动全市场回测，返回run_id用于查询进度和排名结果"""
+    try:
+        logger.info(f"启动全市场回测: strategy_id={strategy_id}, 策略={request.strategy_type}")
+
+        if request.batch_size < 1:
+            raise HTTPException(status_code=400, detail="batch_size必须大于0")
+
+        strategy_params = build_strategy_params(request.strategy_type, request.custom_params)
+        freq = convert_frequency(request.frequency)
+        
+        run_id = get_universe_backtest_service().start(
+            strategy_params=strategy_params,
+            start_date=datetime.combine(request.start_date, datetime.min.time()),
+            end_date=datetime.combine(request.end_date, datetime.max.time()),
+            frequency=STORAGE_FREQ_MAP.get(freq, freq),
+            stock_codes=request.stock_codes,
+            initial_capital=request.initial_capital,
+            commission=0.0003,  # 万三手续费
+            slippage=0.001,  # 千一滑点
+            batch_size=request.batch_size,
+            n_jobs=request.n_jobs
+        )
+        
+        return {
+            "code": 200,
+            "message": "全市场回测已启动",
+            "data": {"run_id": run_id}
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"启动全市场回测失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"启动全市场回测失败: {str(e)}"
+        )
+
+
+@router.get("/universe-backtest/{run_id}/progress")
+async def get_universe_backtest_progress(run_id: str):
+    """获取全市场回测进度"""
+    progress = get_universe_backtest_service().get_progress(run_id)
+    if progress.get('status') == 'not_found':
+        raise HTTPException(status_code=404, detail="回测任务不存在")
+    return {
+        "code": 200,
+        "message": "success",
+        "data": progress
+    }
+
+
+@router.get("/universe-backtest/{run_id}/results")
+async def get_universe_backtest_results(
+    run_id: str,
+    order_by: str = Query("sharpe_ratio"),
+    ascending: bool = Query(False),
+    limit: int = Query(100, ge=1, le=10000)
+):
+    """按指标排名查询全市场回测结果"""
+    try:
+        results = get_universe_backtest_service().get_results(run_id, order_by, ascending, limit)
+        return {
+            "code": 200,
+            "message": "success",
+            "data": {
+                "run_id": run_id,
+                "progress": get_universe_backtest_service().get_progress(run_id),
+                "results": results
+            }
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"查询全市场回测结果失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"查询全市场回测结果失败: {str(e)}"
         )
 
 
@@ -3,11 +3,16 @@ from typing import Set, Dict
 import json
 import asyncio
 from fastapi import WebSocket, WebSocketDisconnect, APIRouter
+from fastapi.encoders import jsonable_encoder
 from loguru import logger
 import datetime
+from services.backtest_jobs import get_backtest_job_queue
 
 router = APIRouter()
 
+# 回测任务的结束状态，之后不会再有事件
+JOB_FINAL_STATUSES = ("completed", "failed", "cancelled")
+
 
 class ConnectionManager:
     """WebSocket连接管理器"""
@@ -19,6 +24,8 @@ class ConnectionManager:
         self.subscriptions: Dict[str, Set[str]] = {}
         # 连接ID映射 {connection_id: (websocket, stock_codes)}
         self.connection_info: Dict[str, tuple] = {}
+        # 回测任务订阅关系 {job_id: set(connection_ids)}
+        self.job_subscriptions: Dict[str, Set[str]] = {}
     
     async def connect(self, websocket: WebSocket, connection_id: str):
         """建立连接"""
@@ -36,6 +43,8 @@ class ConnectionManager:
                 for stock_code in stock_codes:
                     if stock_code in self.subscriptions:
                         self.subscriptions[stock_code].discard(connection_id)
+            for subscribers in self.job_subscriptions.values():
+                subscribers.discard(connection_id)
             
             del self.active_connections[connection_id]
             if connection_id in self.connection_info:
@@ -74,6 +83,47 @@ class ConnectionManager:
         logger.info(f"连接 {connection_id} 取消订阅: {stock_codes}")
         return True
     
+    async def subscribe_jobs(self, connection_id: str, job_ids: list):
+        """订阅回测任务的进度和结果"""
+        if connection_id not in self.connection_info:
+            return False
+        
+        for job_id in job_ids:
+            self.job_subscriptions.setdefault(job_id, set()).add(connection_id)
+        
+        logger.info(f"连接 {connection_id} 订阅回测任务: {job_ids}")
+        return True
+    
+    async def broadcast_job_event(self, event: dict):
+        """推送回测任务事件，任务结束后清除订阅"""
+        job_id = event["job_id"]
+        subscribers = self.job_subscriptions.get(job_id)
+        if not subscribers:
+            return
+        
+        message = self._encode_job_event(event)
+        for connection_id in list(subscribers):
+            await self.send_personal_message(message, connection_id)
+        
+        if event["data"]["status"] in JOB_FINAL_STATUSES:
+            self.job_subscriptions.pop(job_id, None)
+    
+    async def send_job_event(self, event: dict, connection_id: str):
+        """向单个连接推送回测任务事件（订阅时的当前状态），任务已结束时清除该连接的订阅"""
+        await self.send_personal_message(self._encode_job_event(event), connection_id)
+        
+        if event["data"]["status"] in JOB_FINAL_STATUSES:
+            subscribers = self.job_subscriptions.get(event["job_id"])
+            if subscribers is not None:
+                subscribers.discard(connection_id)
+                if not subscribers:
+                    del self.job_subscriptions[event["job_id"]]
+    
+    @staticmethod
+    def _encode_job_event(event: dict) -> dict:
+        # 回测结果与HTTP接口使用同样的编码（日期、numpy标量等）
+        return jsonable_encoder({**event, "timestamp": datetime.datetime.now().isoformat()})
+    
     async def broadcast_quote(self, stock_code: str, quote_data: dict):
         """广播行情数据"""
         if stock_code not in self.subscriptions:
@@ -166,6 +216,24 @@ async def websocket_endpoint(websocket: WebSocket):
                     "message": f"取消订阅: {', '.join(stock_codes)}"
                 }, connection_id)
             
+            elif msg_type == "subscribe_job":
+                # 订阅回测任务进度，订阅时先推送一次当前状态
+                job_ids = data.get("job_ids", [])
+                await manager.subscribe_jobs(connection_id, job_ids)
+                await manager.send_personal_message({
+                    "type": "subscribe_job_result",
+                    "success": True,
+                    "job_ids": job_ids
+                }, connection_id)
+                queue = get_backtest_job_queue()
+                for job_id in job_ids:
+                    job = queue.get_job(job_id)
+                    if job is not None:
+                        event = {"type": "backtest_job", "job_id": job_id, "data": job}
+                        if job["status"] == "completed":
+                            event["result"] = queue.get_result(job_id)
+                        await manager.send_job_event(event, connection_id)
+            
             elif msg_type == "ping":
                 # 心跳
                 await manager.send_personal_message({
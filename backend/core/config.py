@@ -30,6 +30,9 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
 
+    # 参数优化任务代理地址（配置后可用 executor="distributed" 把评估分发给远程工作者）
+    OPTIMIZATION_BROKER_URL: Optional[str] = None
+
     # AI服务配置
     GLM_API_KEY: str = ""
     GLM_API_BASE: str = "https://open.bigmodel.cn/api/paas/v4/"
@@ -0,0 +1,30 @@
+"""技术指标模块"""
+from .incremental import (
+    RollingMean,
+    RollingStd,
+    EMA,
+    RSI,
+    BollingerBands,
+    MACD,
+)
+from .graph import (
+    IndicatorGraph,
+    IndicatorGraphCache,
+    register_indicator,
+    get_indicator_graph_cache,
+)
+from . import kernels
+
+__all__ = [
+    'RollingMean',
+    'RollingStd',
+    'EMA',
+    'RSI',
+    'BollingerBands',
+    'MACD',
+    'IndicatorGraph',
+    'IndicatorGraphCache',
+    'register_indicator',
+    'get_indicator_graph_cache',
+    'kernels',
+]
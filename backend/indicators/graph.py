@@ -0,0 +1,268 @@
+"""
+指标计算图
+
+每个指标节点用元组表示，如 ('SMA', 'close', 20)、('EMA', ('DIF', 'close', 12, 26), 9)，
+节点的输入可以是数据列名，也可以是另一个节点。同一张图上每个节点只计算一次，
+多个策略、行情接口和优化器的多次评估共享同一份结果。
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+Node = Tuple
+Source = Union[str, Node]
+
+# 节点类型名 -> 计算函数 fn(graph, *args) -> np.ndarray
+INDICATOR_FUNCTIONS: Dict[str, Callable[..., np.ndarray]] = {}
+
+
+def register_indicator(name: str):
+    """注册指标节点类型，计算函数通过 graph.get/series 声明依赖的节点"""
+    def decorator(func: Callable[..., np.ndarray]):
+        INDICATOR_FUNCTIONS[name] = func
+        return func
+    return decorator
+
+
+class IndicatorGraph:
+    """
+    指标计算图（带记忆化）
+
+    节点结果以只读NumPy数组缓存，compute_counts 记录每个节点实际计算的次数，
+    hits 记录命中缓存的次数。
+    """
+
+    def __init__(self, data: Union[pd.DataFrame, Dict[str, np.ndarray]]):
+        """
+        初始化指标计算图
+
+        Args:
+            data: 已按时间排序的K线数据（DataFrame或列名到数组的字典）
+        """
+        if isinstance(data, pd.DataFrame):
+            columns = {col: data[col].to_numpy(dtype=np.float64) for col in data.columns
+                       if col in ('open', 'high', 'low', 'close', 'volume')}
+        else:
+            columns = {col: np.asarray(values, dtype=np.float64) for col, values in data.items()}
+        self._columns = columns
+        self._values: Dict[Node, np.ndarray] = {}
+        self.compute_counts: Dict[Node, int] = {}
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(next(iter(self._columns.values()))) if self._columns else 0
+
+    def has_column(self, name: str) -> bool:
+        return name in self._columns
+
+    def column(self, name: str) -> np.ndarray:
+        """获取原始数据列"""
+        if name not in self._columns:
+            raise KeyError(f"数据中没有列: {name}")
+        return self._columns[name]
+
+    def get(self, *node) -> np.ndarray:
+        """
+        获取节点的值，未计算过时按注册的函数计算并缓存
+
+        Args:
+            node: 节点元组，如 get('SMA', 'close', 20)
+        """
+        if node in self._values:
+            self.hits += 1
+            return self._values[node]
+
+        name, *args = node
+        if name not in INDICATOR_FUNCTIONS:
+            raise KeyError(f"未注册的指标: {name}")
+        values = np.asarray(INDICATOR_FUNCTIONS[name](self, *args), dtype=np.float64)
+        values.flags.writeable = False
+        self._values[node] = values
+        self.compute_counts[node] = self.compute_counts.get(node, 0) + 1
+        return values
+
+    def series(self, source: Source) -> pd.Series:
+        """把列名或节点转为pandas Series，供滚动/指数加权计算使用"""
+        if isinstance(source, tuple):
+            return pd.Series(self.get(*source))
+        return pd.Series(self.column(source))
+
+    def require(self, nodes: Iterable[Node]):
+        """预先计算一组节点（策略声明的依赖）"""
+        for node in nodes:
+            self.get(*node)
+
+    # 常用节点的快捷方法
+    def sma(self, window: int, source: Source = 'close') -> np.ndarray:
+        return self.get('SMA', source, window)
+
+    def std(self, window: int, source: Source = 'close') -> np.ndarray:
+        return self.get('STD', source, window)
+
+    def ema(self, span: int, source: Source = 'close') -> np.ndarray:
+        return self.get('EMA', source, span)
+
+    def rsi(self, window: int, source: Source = 'close') -> np.ndarray:
+        return self.get('RSI', source, window)
+
+    def boll(self, window: int, num_std: float, source: Source = 'close') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """返回 (中轨, 上轨, 下轨)"""
+        return (
+            self.sma(window, source),
+            self.get('BOLL_UPPER', source, window, num_std),
+            self.get('BOLL_LOWER', source, window, num_std)
+        )
+
+    def macd(self, fast: int, slow: int, signal: int, source: Source = 'close') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """返回 (DIF, DEA, DIF-DEA)"""
+        return (
+            self.get('DIF', source, fast, slow),
+            self.get('DEA', source, fast, slow, signal),
+            self.get('MACD_HIST', source, fast, slow, signal)
+        )
+
+
+@register_indicator('SMA')
+def _sma(graph: IndicatorGraph, source: Source, window: int) -> np.ndarray:
+    return graph.series(source).rolling(window=window).mean().to_numpy()
+
+
+@register_indicator('STD')
+def _std(graph: IndicatorGraph, source: Source, window: int) -> np.ndarray:
+    return graph.series(source).rolling(window=window).std().to_numpy()
+
+
+@register_indicator('EMA')
+def _ema(graph: IndicatorGraph, source: Source, span: int) -> np.ndarray:
+    return graph.series(source).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+@register_indicator('EMA_ADJ')
+def _ema_adjusted(graph: IndicatorGraph, source: Source, span: int) -> np.ndarray:
+    """指数移动平均（adjust=True，pandas默认口径）"""
+    return graph.series(source).ewm(span=span).mean().to_numpy()
+
+
+@register_indicator('HHV')
+def _hhv(graph: IndicatorGraph, source: Source, window: int) -> np.ndarray:
+    """滚动最高值"""
+    return graph.series(source).rolling(window=window).max().to_numpy()
+
+
+@register_indicator('LLV')
+def _llv(graph: IndicatorGraph, source: Source, window: int) -> np.ndarray:
+    """滚动最低值"""
+    return graph.series(source).rolling(window=window).min().to_numpy()
+
+
+@register_indicator('RATIO')
+def _ratio(graph: IndicatorGraph, numerator: Source, denominator: Source) -> np.ndarray:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return graph.series(numerator).to_numpy() / graph.series(denominator).to_numpy()
+
+
+@register_indicator('ATR')
+def _atr(graph: IndicatorGraph, period: int) -> np.ndarray:
+    """平均真实波幅（首根K线的真实波幅为最高价减最低价）"""
+    high, low, close = graph.column('high'), graph.column('low'), graph.column('close')
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    return pd.Series(true_range).rolling(window=period).mean().to_numpy()
+
+
+@register_indicator('DIFF')
+def _diff(graph: IndicatorGraph, source: Source) -> np.ndarray:
+    return graph.series(source).diff().to_numpy()
+
+
+@register_indicator('GAIN')
+def _gain(graph: IndicatorGraph, source: Source) -> np.ndarray:
+    """上涨幅度（首根K线记为0）"""
+    delta = graph.series(('DIFF', source))
+    return delta.where(delta > 0, 0).to_numpy()
+
+
+@register_indicator('LOSS')
+def _loss(graph: IndicatorGraph, source: Source) -> np.ndarray:
+    """下跌幅度（首根K线记为0）"""
+    delta = graph.series(('DIFF', source))
+    return (-delta.where(delta < 0, 0)).to_numpy()
+
+
+@register_indicator('RSI')
+def _rsi(graph: IndicatorGraph, source: Source, window: int) -> np.ndarray:
+    gain = graph.get('SMA', ('GAIN', source), window)
+    loss = graph.get('SMA', ('LOSS', source), window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 - (100 / (1 + gain / loss))
+
+
+@register_indicator('BOLL_UPPER')
+def _boll_upper(graph: IndicatorGraph, source: Source, window: int, num_std: float) -> np.ndarray:
+    return graph.sma(window, source) + num_std * graph.std(window, source)
+
+
+@register_indicator('BOLL_LOWER')
+def _boll_lower(graph: IndicatorGraph, source: Source, window: int, num_std: float) -> np.ndarray:
+    return graph.sma(window, source) - num_std * graph.std(window, source)
+
+
+@register_indicator('DIF')
+def _dif(graph: IndicatorGraph, source: Source, fast: int, slow: int) -> np.ndarray:
+    return graph.ema(fast, source) - graph.ema(slow, source)
+
+
+@register_indicator('DEA')
+def _dea(graph: IndicatorGraph, source: Source, fast: int, slow: int, signal: int) -> np.ndarray:
+    return graph.ema(signal, ('DIF', source, fast, slow))
+
+
+@register_indicator('MACD_HIST')
+def _macd_hist(graph: IndicatorGraph, source: Source, fast: int, slow: int, signal: int) -> np.ndarray:
+    return graph.get('DIF', source, fast, slow) - graph.get('DEA', source, fast, slow, signal)
+
+
+class IndicatorGraphCache:
+    """
+    指标计算图缓存
+
+    以 (股票代码, 频率, 时间范围, 数据指纹) 等可哈希的键保存计算图，按LRU淘汰。
+    同一份数据上的回测、行情指标查询和参数优化的多次评估复用同一张图。
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._graphs: "OrderedDict[Hashable, IndicatorGraph]" = OrderedDict()
+
+    def get(self, key: Hashable, data: Union[pd.DataFrame, Dict[str, np.ndarray]]) -> IndicatorGraph:
+        """获取键对应的计算图，不存在时用data创建"""
+        graph = self._graphs.get(key)
+        if graph is not None:
+            self._graphs.move_to_end(key)
+            return graph
+
+        graph = IndicatorGraph(data)
+        self._graphs[key] = graph
+        while len(self._graphs) > self.max_entries:
+            self._graphs.popitem(last=False)
+        return graph
+
+    def clear(self):
+        self._graphs.clear()
+
+    def __len__(self) -> int:
+        return len(self._graphs)
+
+
+_shared_graph_cache: Optional[IndicatorGraphCache] = None
+
+
+def get_indicator_graph_cache() -> IndicatorGraphCache:
+    """获取进程内共享的指标计算图缓存"""
+    global _shared_graph_cache
+    if _shared_graph_cache is None:
+        _shared_graph_cache = IndicatorGraphCache()
+    return _shared_graph_cache
@@ -0,0 +1,166 @@
+"""
+增量技术指标
+
+每个指标保存O(1)的滚动状态，通过 update(value) 逐根K线更新并返回当前值。
+窗口未满时返回 NaN，与 pandas rolling/ewm 的结果保持一致。
+"""
+import math
+from typing import Tuple
+
+
+NAN = float('nan')
+
+
+class RollingMean:
+    """滚动均值（补偿求和，长序列上不累积浮点误差）"""
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError("window必须大于0")
+        self.window = window
+        self._buffer = [0.0] * window
+        self._pos = 0
+        self._count = 0
+        self._sum = 0.0
+        self._comp = 0.0
+        self.value = NAN
+
+    def _add(self, x: float):
+        # Neumaier补偿求和
+        total = self._sum + x
+        if abs(self._sum) >= abs(x):
+            self._comp += (self._sum - total) + x
+        else:
+            self._comp += (x - total) + self._sum
+        self._sum = total
+
+    def update(self, x: float) -> float:
+        """加入新值并返回当前均值"""
+        if self._count == self.window:
+            self._add(-self._buffer[self._pos])
+        else:
+            self._count += 1
+        self._buffer[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+        self._add(x)
+
+        self.value = (self._sum + self._comp) / self.window if self._count == self.window else NAN
+        return self.value
+
+
+class RollingStd:
+    """滚动样本标准差（Welford增删更新，ddof=1）"""
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError("window必须大于0")
+        self.window = window
+        self._buffer = [0.0] * window
+        self._pos = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        """加入新值并返回当前标准差"""
+        if self._count == self.window:
+            old = self._buffer[self._pos]
+            # 用新值替换旧值：均值和二阶矩一步更新
+            delta = x - old
+            old_mean = self._mean
+            self._mean += delta / self.window
+            self._m2 += delta * (x - self._mean + old - old_mean)
+        else:
+            self._count += 1
+            delta = x - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (x - self._mean)
+        self._buffer[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+
+        if self._count == self.window and self.window > 1:
+            self.value = math.sqrt(max(self._m2, 0.0) / (self.window - 1))
+        else:
+            self.value = NAN
+        return self.value
+
+
+class EMA:
+    """指数移动平均（与 pandas ewm(span, adjust=False) 一致）"""
+
+    def __init__(self, span: int):
+        if span < 1:
+            raise ValueError("span必须大于0")
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        """加入新值并返回当前EMA"""
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+
+class RSI:
+    """相对强弱指标（涨跌幅的简单滚动均值，第一根K线涨跌记为0）"""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self._gain = RollingMean(window)
+        self._loss = RollingMean(window)
+        self._prev = None
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        """加入新收盘价并返回当前RSI"""
+        delta = 0.0 if self._prev is None else close - self._prev
+        self._prev = close
+        gain = self._gain.update(delta if delta > 0 else 0.0)
+        loss = self._loss.update(-delta if delta < 0 else 0.0)
+
+        if math.isnan(gain) or math.isnan(loss) or (gain == 0 and loss == 0):
+            self.value = NAN
+        elif loss == 0:
+            self.value = 100.0
+        else:
+            self.value = 100 - 100 / (1 + gain / loss)
+        return self.value
+
+
+class BollingerBands:
+    """布林带"""
+
+    def __init__(self, window: int = 20, num_std: float = 2):
+        self.num_std = num_std
+        self._mid = RollingMean(window)
+        self._std = RollingStd(window)
+        self.mid = self.upper = self.lower = NAN
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        """加入新收盘价并返回 (中轨, 上轨, 下轨)"""
+        self.mid = self._mid.update(close)
+        std = self._std.update(close)
+        self.upper = self.mid + self.num_std * std
+        self.lower = self.mid - self.num_std * std
+        return self.mid, self.upper, self.lower
+
+
+class MACD:
+    """MACD指标"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self.macd = self.signal = self.hist = NAN
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        """加入新收盘价并返回 (MACD, 信号线, 柱状图)"""
+        self.macd = self._fast.update(close) - self._slow.update(close)
+        self.signal = self._signal.update(self.macd)
+        self.hist = self.macd - self.signal
+        return self.macd, self.signal, self.hist
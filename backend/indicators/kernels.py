@@ -0,0 +1,296 @@
+"""
+MyTT兼容的高性能指标内核
+
+函数名、参数和返回值与 3rdparty/Ashare/MyTT.py 一致，输入可以是列表、数组或Series，
+返回NumPy数组。滚动窗口含NaN时结果为NaN（与 pandas rolling 的默认口径一致）。
+
+- SUM/MA：分块累计和相减，O(n)且与窗口长度无关
+- HHV/LLV：van Herk/Gil-Werman 块内前缀/后缀极值，O(n)且与窗口长度无关
+- 滚动回归斜率：固定权重的一次卷积
+- AVEDEV：绝对偏差依赖每个窗口自身的均值，没有精确的累计和形式，
+  在分块的滑动窗口视图上一次性向量化计算
+- EMA/SMA 是递推滤波，无法精确向量化；STD 用累计平方和相减会在价格水平远大于
+  波动时丢失精度。这三个函数直接使用 pandas 的C实现（同样是O(n)）
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# 滑动求和时每块的K线数
+SUM_CHUNK_SIZE = 65536
+
+# AVEDEV 每次处理的窗口元素数上限
+AVEDEV_CHUNK_ELEMENTS = 1 << 20
+
+
+def _as_float(S) -> np.ndarray:
+    return np.asarray(S, dtype=np.float64)
+
+
+def _window_nan_mask(x: np.ndarray, N: int) -> np.ndarray:
+    """长度为 n-N+1 的布尔数组，标记包含NaN的窗口"""
+    nan_count = np.concatenate(([0], np.cumsum(np.isnan(x))))
+    return (nan_count[N:] - nan_count[:-N]) > 0
+
+
+def _blocks(values: np.ndarray, N: int, fill: float) -> np.ndarray:
+    """按窗口长度N切分为 (块数, N) 的矩阵，末尾不足一块的部分用fill补齐"""
+    pad = (-len(values)) % N
+    return np.concatenate((values, np.full(pad, fill))).reshape(-1, N)
+
+
+def _rolling_sum(S, N: int) -> np.ndarray:
+    """
+    滑动窗口求和，前 N-1 个位置为NaN
+
+    分块做累计和再相减，每块只向前多取 N-1 个值，累计和的量级受块长限制，
+    长序列上不积累误差；布尔和整数输入的结果是精确的。
+    """
+    x = _as_float(S)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if N <= 0 or N > n:
+        return out
+
+    nan_mask = np.isnan(x)
+    has_nan = nan_mask.any()
+    values = np.where(nan_mask, 0.0, x) if has_nan else x
+    for start in range(N - 1, n, SUM_CHUNK_SIZE):
+        stop = min(start + SUM_CHUNK_SIZE, n)
+        csum = np.cumsum(values[start - N + 1:stop])
+        window = out[start:stop]
+        window[0] = csum[N - 1]
+        np.subtract(csum[N:], csum[:-N], out=window[1:])
+    if has_nan:
+        out[N - 1:][_window_nan_mask(x, N)] = np.nan
+    return out
+
+
+def _rolling_extreme(S, N: int, func, fill: float) -> np.ndarray:
+    """滚动最大/最小值（van Herk/Gil-Werman），含NaN的窗口为NaN"""
+    x = _as_float(S)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if N <= 0 or N > n:
+        return out
+
+    nan_mask = np.isnan(x)
+    blocks = _blocks(np.where(nan_mask, fill, x), N, fill)
+    prefix = func.accumulate(blocks, axis=1).ravel()
+    suffix = func.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    # 窗口 [i-N+1, i] 最多跨两个块：左块的后缀极值与右块的前缀极值
+    out[N - 1:] = func(suffix[:n - N + 1], prefix[N - 1:n])
+    if nan_mask.any():
+        out[N - 1:][_window_nan_mask(x, N)] = np.nan
+    return out
+
+
+def _slope_weights(N: int) -> np.ndarray:
+    """最小二乘斜率的权重 (k - k̄) / Σ(k - k̄)²，k = 0..N-1"""
+    k = np.arange(N, dtype=np.float64)
+    centered = k - k.mean()
+    return centered / np.sum(centered * centered)
+
+
+#------------------ 0级：核心工具函数 --------------------------------------------
+def RD(N, D=3):
+    return np.round(N, D)
+
+
+def RET(S, N=1):
+    return np.asarray(S)[-N]
+
+
+def ABS(S):
+    return np.abs(S)
+
+
+def MAX(S1, S2):
+    return np.maximum(S1, S2)
+
+
+def MIN(S1, S2):
+    return np.minimum(S1, S2)
+
+
+def MA(S, N):
+    """N日简单移动平均"""
+    return _rolling_sum(S, N) / N
+
+
+def REF(S, N=1):
+    """整体下移N（N为负时上移），空出的位置为NaN"""
+    x = _as_float(S)
+    out = np.full(len(x), np.nan)
+    if N == 0:
+        out[:] = x
+    elif 0 < N < len(x):
+        out[N:] = x[:-N]
+    elif 0 < -N < len(x):
+        out[:N] = x[-N:]
+    return out
+
+
+def DIFF(S, N=1):
+    """与N根K线前的差值"""
+    x = _as_float(S)
+    return x - REF(x, N)
+
+
+def STD(S, N):
+    """N日总体标准差（ddof=0）"""
+    return pd.Series(_as_float(S)).rolling(N).std(ddof=0).to_numpy()
+
+
+def IF(S_BOOL, S_TRUE, S_FALSE):
+    return np.where(S_BOOL, S_TRUE, S_FALSE)
+
+
+def SUM(S, N):
+    """N日累计和"""
+    return _rolling_sum(S, N)
+
+
+def HHV(S, N):
+    """N日最高值"""
+    return _rolling_extreme(S, N, np.maximum, -np.inf)
+
+
+def LLV(S, N):
+    """N日最低值"""
+    return _rolling_extreme(S, N, np.minimum, np.inf)
+
+
+def EMA(S, N):
+    """指数移动平均"""
+    return pd.Series(_as_float(S)).ewm(span=N, adjust=False).mean().to_numpy()
+
+
+def SMA(S, N, M=1):
+    """中国式SMA，alpha = M/N"""
+    return pd.Series(_as_float(S)).ewm(alpha=M / N, adjust=False).mean().to_numpy()
+
+
+def AVEDEV(S, N):
+    """N日平均绝对偏差"""
+    x = _as_float(S)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if N <= 0 or N > n:
+        return out
+
+    windows = sliding_window_view(x, N)
+    rows = max(1, AVEDEV_CHUNK_ELEMENTS // N)
+    for start in range(0, len(windows), rows):
+        block = windows[start:start + rows]
+        mean = block.mean(axis=1)
+        out[N - 1 + start:N - 1 + start + len(block)] = np.abs(block - mean[:, None]).mean(axis=1)
+    return out
+
+
+def ROLLING_SLOPE(S, N):
+    """N日滚动线性回归斜率（每根K线一个值）"""
+    x = _as_float(S)
+    out = np.full(len(x), np.nan)
+    if 1 < N <= len(x):
+        out[N - 1:] = np.convolve(x, _slope_weights(N)[::-1], mode='valid')
+    return out
+
+
+def ROLLING_FORCAST(S, N):
+    """N日滚动线性回归对下一根K线的预测值"""
+    return MA(S, N) + ROLLING_SLOPE(S, N) * (N + 1) / 2
+
+
+def SLOPE(S, N, RS=False):
+    """序列最后N个值的线性回归斜率（RS为True时同时返回回归直线）"""
+    y = _as_float(S)[-N:]
+    k = float(np.dot(_slope_weights(N), y))
+    if RS:
+        return k, (y.mean() - k * (N - 1) / 2) + k * np.arange(N)
+    return k
+
+
+def FORCAST(S, N):
+    """序列最后N个值线性回归后对下一个值的预测"""
+    k, Y = SLOPE(S, N, RS=True)
+    return Y[-1] + k
+
+
+#------------------   1级：应用层函数 ----------------------------------
+def COUNT(S_BOOL, N):
+    """最近N天条件成立的天数"""
+    return SUM(S_BOOL, N)
+
+
+def EVERY(S_BOOL, N):
+    """最近N天条件是否都成立"""
+    return IF(COUNT(S_BOOL, N) == N, True, False)
+
+
+def EXIST(S_BOOL, N=5):
+    """最近N天是否存在条件成立的一天"""
+    return IF(COUNT(S_BOOL, N) > 0, True, False)
+
+
+def CROSS(S1, S2):
+    """
+    上穿：上一根K线 S1 不在 S2 之上，当前K线 S1 在 S2 之上
+
+    MyTT 2.x 的 CROSS 用 COUNT(S1>S2, 2)==1 判断，上穿和下穿都会返回True，
+    这里采用 MyTT 后续版本修正后的定义。
+    """
+    above = np.asarray(np.greater(S1, S2))
+    if above.ndim == 0:
+        return np.False_
+    result = above.copy()
+    result[0] = False
+    result[1:] &= ~above[:-1]
+    return result
+
+
+#------------------   2级：技术指标函数 ------------------------------
+def MACD(CLOSE, SHORT=12, LONG=26, M=9):
+    DIF = EMA(CLOSE, SHORT) - EMA(CLOSE, LONG)
+    DEA = EMA(DIF, M)
+    MACD = (DIF - DEA) * 2
+    return RD(DIF), RD(DEA), RD(MACD)
+
+
+def KDJ(CLOSE, HIGH, LOW, N=9, M1=3, M2=3):
+    LL = LLV(LOW, N)
+    RSV = (_as_float(CLOSE) - LL) / (HHV(HIGH, N) - LL) * 100
+    K = EMA(RSV, (M1 * 2 - 1))
+    D = EMA(K, (M2 * 2 - 1))
+    J = K * 3 - D * 2
+    return K, D, J
+
+
+def RSI(CLOSE, N=24):
+    DIF = DIFF(CLOSE)
+    return RD(SMA(MAX(DIF, 0), N) / SMA(ABS(DIF), N) * 100)
+
+
+def WR(CLOSE, HIGH, LOW, N=10, N1=6):
+    close = _as_float(CLOSE)
+    WR = (HHV(HIGH, N) - close) / (HHV(HIGH, N) - LLV(LOW, N)) * 100
+    WR1 = (HHV(HIGH, N1) - close) / (HHV(HIGH, N1) - LLV(LOW, N1)) * 100
+    return RD(WR), RD(WR1)
+
+
+def BOLL(CLOSE, N=20, P=2):
+    MID = MA(CLOSE, N)
+    band = STD(CLOSE, N) * P
+    return RD(MID + band), RD(MID), RD(MID - band)
+
+
+def CCI(CLOSE, HIGH, LOW, N=14):
+    TP = (_as_float(HIGH) + _as_float(LOW) + _as_float(CLOSE)) / 3
+    return (TP - MA(TP, N)) / (0.015 * AVEDEV(TP, N))
+
+
+def ATR(CLOSE, HIGH, LOW, N=20):
+    high, low, prev_close = _as_float(HIGH), _as_float(LOW), REF(CLOSE, 1)
+    TR = MAX(MAX((high - low), ABS(prev_close - high)), ABS(prev_close - low))
+    return MA(TR, N)
@@ -50,6 +50,11 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Redis连接失败: {e}")
         logger.warning("继续启动...")
 
+    # 回测任务的进度和结果通过 /ws 推送
+    from api.websocket import manager
+    from services.backtest_jobs import get_backtest_job_queue
+    get_backtest_job_queue().add_listener(manager.broadcast_job_event)
+
     yield
 
     # 关闭时执行
@@ -58,6 +63,7 @@ async def lifespan(app: FastAPI):
     try:
         # 断开Redis连接
         await cache_service.disconnect()
+        get_backtest_job_queue().shutdown()
         logger.info("已清理")
     except Exception as e:
         logger.error(f"关闭时出错: {e}")
@@ -3,6 +3,17 @@ from .base_optimizer import BaseOptimizer, OptimizationResult
 from .grid_search import GridSearchOptimizer
 from .genetic import GeneticOptimizer
 from .bayesian import BayesianOptimizer
+from .hyperband import HyperbandOptimizer
+from .evaluation_store import EvaluationStore, MemoryEvaluationStore
+from .executors import (
+    EXECUTOR_BACKENDS,
+    BatchObjective,
+    EvaluationExecutor,
+    SerialExecutor,
+    ThreadExecutor,
+    ProcessPoolEvaluator,
+    create_executor,
+)
 
 __all__ = [
     'BaseOptimizer',
@@ -10,4 +21,14 @@ __all__ = [
     'GridSearchOptimizer',
     'GeneticOptimizer',
     'BayesianOptimizer',
+    'HyperbandOptimizer',
+    'EvaluationStore',
+    'MemoryEvaluationStore',
+    'EXECUTOR_BACKENDS',
+    'BatchObjective',
+    'EvaluationExecutor',
+    'SerialExecutor',
+    'ThreadExecutor',
+    'ProcessPoolEvaluator',
+    'create_executor',
 ]
\ No newline at end of file
@@ -1,14 +1,33 @@
 """优化器基类"""
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Dict, Any, List, Callable, Optional
+from typing import Dict, Any, List, Callable, Optional, Union
 from datetime import datetime
-import asyncio
+import functools
 import logging
+import math
+
+from .evaluation_store import EvaluationStore
+from .executors import EvaluationExecutor, create_executor
 
 logger = logging.getLogger(__name__)
 
 
+# 热启动时最多从评估存储中取出的历史最优点数
+WARM_START_LIMIT = 200
+
+
+def _closing_executor(optimize):
+    """包装 optimize，结束时关闭执行器，避免出错时进程池和临时目录残留到垃圾回收"""
+    @functools.wraps(optimize)
+    async def wrapper(self, *args, **kwargs):
+        try:
+            return await optimize(self, *args, **kwargs)
+        finally:
+            self._close_executor()
+    return wrapper
+
+
 @dataclass
 class OptimizationResult:
     """优化结果"""
@@ -19,6 +38,7 @@ class OptimizationResult:
     iterations: int = 0  # 迭代次数
     convergence_curve: List[float] = field(default_factory=list)  # 收敛曲线
     timestamp: datetime = field(default_factory=datetime.now)  # 时间戳
+    stats: Dict[str, Any] = field(default_factory=dict)  # 优化器统计信息（如模拟K线数）
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -29,7 +49,8 @@ class OptimizationResult:
             'optimization_time': self.optimization_time,
             'iterations': self.iterations,
             'convergence_curve': self.convergence_curve,
-            'timestamp': self.timestamp.isoformat()
+            'timestamp': self.timestamp.isoformat(),
+            'stats': self.stats
         }
 
 
@@ -40,7 +61,8 @@ class BaseOptimizer(ABC):
         self,
         objective: str = 'sharpe_ratio',
         maximize: bool = True,
-        n_jobs: int = 1
+        n_jobs: int = 1,
+        executor: Union[str, EvaluationExecutor] = 'auto'
     ):
         """
         初始化优化器
@@ -49,13 +71,42 @@ class BaseOptimizer(ABC):
             objective: 优化目标（sharpe_ratio, total_return, max_drawdown等）
             maximize: 是否最大化（True）或最小化（False）
             n_jobs: 并行任务数
+            executor: 评估后端（auto, serial, thread, process）或执行器实例
         """
         self.objective = objective
         self.maximize = maximize
         self.n_jobs = n_jobs
+        self.executor = executor
+        self._executor: Optional[EvaluationExecutor] = None
         self.best_score = float('-inf') if maximize else float('inf')
         self.best_params = {}
         self.convergence_curve = []
+        self.evaluation_store: Optional[EvaluationStore] = None
+        self.warm_start = False
+        self._store_hits = 0
+        self._warm_start_points_used = 0
+    
+    def __init_subclass__(cls, **kwargs):
+        """子类的 optimize 结束（包括抛出异常）时释放本优化器创建的执行器"""
+        super().__init_subclass__(**kwargs)
+        if 'optimize' in cls.__dict__:
+            cls.optimize = _closing_executor(cls.optimize)
+    
+    def attach_store(self, store: EvaluationStore, warm_start: bool = True):
+        """
+        绑定评估结果存储
+        
+        全预算评估前先查询存储，已存储的参数组合不再评估，新的得分写回存储；
+        warm_start 为 True 时支持热启动的优化器用存储中的历史最优点初始化搜索。
+        
+        Args:
+            store: 评估结果存储
+            warm_start: 是否热启动
+        """
+        self.evaluation_store = store
+        self.warm_start = warm_start
+        self._store_hits = 0
+        self._warm_start_points_used = 0
         
     @abstractmethod
     async def optimize(
@@ -118,7 +169,8 @@ class BaseOptimizer(ABC):
     async def _evaluate_params(
         self,
         objective_func: Callable,
-        params_list: List[Dict[str, Any]]
+        params_list: List[Dict[str, Any]],
+        budget: Optional[int] = None
     ) -> List[float]:
         """
         评估参数列表
@@ -126,35 +178,81 @@ class BaseOptimizer(ABC):
         Args:
             objective_func: 目标函数
             params_list: 参数列表
+            budget: 评估预算（None表示使用全部数据）
             
         Returns:
             List[float]: 得分列表
         """
-        scores = []
+        if self._executor is None:
+            self._executor = create_executor(self.executor, self.n_jobs, objective_func)
         
-        if self.n_jobs == 1:
-            # 串行执行
-            for params in params_list:
-                try:
-                    score = await objective_func(params)
-                    scores.append(score)
-                except Exception as e:
-                    logger.error(f"评估参数失败: {params}, 错误: {e}")
-                    scores.append(float('-inf') if self.maximize else float('inf'))
-        else:
-            # 并行执行
-            tasks = [objective_func(params) for params in params_list]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for result in results:
-                if isinstance(result, Exception):
-                    logger.error(f"评估参数失败: {result}")
-                    scores.append(float('-inf') if self.maximize else float('inf'))
-                else:
-                    scores.append(result)
+        worst = float('-inf') if self.maximize else float('inf')
+        full_budget = budget is None or budget == getattr(objective_func, 'max_budget', None)
+        if self.evaluation_store is None or not full_budget or not params_list:
+            return await self._executor.evaluate(objective_func, params_list, worst, budget)
         
+        # 只评估存储中没有的参数组合，新得分写回存储。评估失败记为最差得分（±inf），
+        # 可能只是暂时的错误，不写入存储，已存储的非有限得分也重新评估
+        scores = self.evaluation_store.lookup(params_list)
+        missing = [i for i, score in enumerate(scores) if score is None or not math.isfinite(score)]
+        self._store_hits += len(params_list) - len(missing)
+        if missing:
+            missing_params = [params_list[i] for i in missing]
+            new_scores = await self._executor.evaluate(objective_func, missing_params, worst, budget)
+            finite = [(params, score) for params, score in zip(missing_params, new_scores) if math.isfinite(score)]
+            if finite:
+                self.evaluation_store.save([params for params, _ in finite], [score for _, score in finite])
+            for i, score in zip(missing, new_scores):
+                scores[i] = score
         return scores
     
+    def _warm_start_points(
+        self,
+        param_ranges: Dict[str, Dict[str, Any]],
+        limit: int = WARM_START_LIMIT
+    ) -> List[Dict[str, Any]]:
+        """
+        从评估存储中取出落在当前参数范围内的历史最优点
+        
+        Args:
+            param_ranges: 参数范围字典
+            limit: 最多返回的点数
+            
+        Returns:
+            List[Dict[str, Any]]: [{'params': ..., 'score': ...}]，按得分从优到劣
+        """
+        if self.evaluation_store is None or not self.warm_start or limit <= 0:
+            return []
+        
+        points = []
+        for record in self.evaluation_store.best(WARM_START_LIMIT, self.maximize):
+            if math.isfinite(record['score']) and self._in_ranges(record['params'], param_ranges):
+                points.append(record)
+            if len(points) == limit:
+                break
+        self._warm_start_points_used = max(self._warm_start_points_used, len(points))
+        return points
+    
+    @staticmethod
+    def _in_ranges(params: Dict[str, Any], param_ranges: Dict[str, Dict[str, Any]]) -> bool:
+        """参数组合是否与参数范围的参数名一致且每个取值都在范围内"""
+        if set(params) != set(param_ranges):
+            return False
+        for param_name, param_config in param_ranges.items():
+            value = params[param_name]
+            if param_config.get('type') == 'choice':
+                if value not in param_config['choices']:
+                    return False
+            elif not param_config['min'] <= value <= param_config['max']:
+                return False
+        return True
+    
+    def _close_executor(self):
+        """释放本优化器创建的执行器（外部传入的执行器由调用方管理）"""
+        if self._executor is not None and self._executor is not self.executor:
+            self._executor.close()
+        self._executor = None
+    
     def _validate_param_ranges(self, param_ranges: Dict[str, Dict[str, Any]]) -> bool:
         """
         验证参数范围
@@ -298,7 +396,8 @@ class BaseOptimizer(ABC):
     def _create_result(
         self,
         all_results: List[Dict[str, Any]],
-        optimization_time: float
+        optimization_time: float,
+        stats: Optional[Dict[str, Any]] = None
     ) -> OptimizationResult:
         """
         创建优化结果对象
@@ -306,15 +405,22 @@ class BaseOptimizer(ABC):
         Args:
             all_results: 所有结果列表
             optimization_time: 优化时间
+            stats: 优化器统计信息
             
         Returns:
             OptimizationResult: 优化结果
         """
+        self._close_executor()
+        stats = dict(stats or {})
+        if self.evaluation_store is not None:
+            stats['store_hits'] = self._store_hits
+            stats['warm_start_points'] = self._warm_start_points_used
         return OptimizationResult(
             best_params=self.best_params,
             best_score=self.best_score,
             all_results=all_results,
             optimization_time=optimization_time,
             iterations=len(all_results),
-            convergence_curve=self.convergence_curve
+            convergence_curve=self.convergence_curve,
+            stats=stats
         )
\ No newline at end of file
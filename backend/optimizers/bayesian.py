@@ -1,21 +1,32 @@
 """贝叶斯优化器"""
 import time
-import random
-from typing import Dict, Any, List, Callable, Tuple
+import math
+from typing import Dict, Any, List, Callable, Union
 import logging
 
+import numpy as np
+from scipy.special import ndtr
+
 from .base_optimizer import BaseOptimizer, OptimizationResult
+from .executors import EvaluationExecutor
+from .gaussian_process import GaussianProcess
 
 logger = logging.getLogger(__name__)
 
 
+# 初始采样后按边际似然选择的RBF核长度尺度（归一化参数空间）
+LENGTH_SCALE_GRID = (0.05, 0.1, 0.2, 0.4, 0.8)
+
+
 class BayesianOptimizer(BaseOptimizer):
     """贝叶斯优化器
-    
-    基于概率模型的优化方法，通过构建代理模型来预测函数值。
+
+    以高斯过程为代理模型，用采集函数在随机候选点中挑选下一批参数。
+    每轮用常数谎言（constant liar）法建议 n_jobs 个点：选出一个点后以当前最差得分
+    作为其虚拟观测加入模型，再选下一个，使同一批的点彼此分散，整批并行评估。
     样本效率高，适合评估成本高的情况。
     """
-    
+
     def __init__(
         self,
         objective: str = 'sharpe_ratio',
@@ -23,24 +34,35 @@ class BayesianOptimizer(BaseOptimizer):
         n_jobs: int = 1,
         n_iter: int = 100,
         n_init: int = 10,
-        acquisition: str = 'EI'
+        acquisition: str = 'EI',
+        executor: Union[str, EvaluationExecutor] = 'auto',
+        n_candidates: int = 1000,
+        xi: float = 0.01,
+        kappa: float = 2.576
     ):
         """
         初始化贝叶斯优化器
-        
+
         Args:
             objective: 优化目标
             maximize: 是否最大化
-            n_jobs: 并行任务数
-            n_iter: 迭代次数
+            n_jobs: 并行任务数（每轮建议的点数）
+            n_iter: 迭代次数（初始采样之后的总评估次数）
             n_init: 初始采样次数
             acquisition: 采集函数 (EI, PI, UCB)
+            executor: 评估后端
+            n_candidates: 每轮选点时采样的候选点数
+            xi: EI/PI 的探索裕量（相对于得分标准差）
+            kappa: UCB 的置信系数
         """
-        super().__init__(objective, maximize, n_jobs)
+        super().__init__(objective, maximize, n_jobs, executor)
         self.n_iter = n_iter
         self.n_init = n_init
         self.acquisition = acquisition
-    
+        self.n_candidates = n_candidates
+        self.xi = xi
+        self.kappa = kappa
+
     async def optimize(
         self,
         objective_func: Callable,
@@ -50,225 +72,219 @@ class BayesianOptimizer(BaseOptimizer):
     ) -> OptimizationResult:
         """
         执行贝叶斯优化
-        
+
         Args:
             objective_func: 目标函数
             param_ranges: 参数范围字典
             verbose: 是否打印进度
             **kwargs: 其他参数
-            
+
         Returns:
             OptimizationResult: 优化结果
         """
         start_time = time.time()
-        
+
         # 验证参数范围
         if not self._validate_param_ranges(param_ranges):
             raise ValueError("参数范围无效")
-        
+
         if verbose:
-            logger.info(f"贝叶斯优化开始，迭代次数: {self.n_iter}, 初始采样: {self.n_init}")
-        
-        # 初始随机采样
-        X_init = self._sample_params(param_ranges, self.n_init)
-        y_init = await self._evaluate_params(objective_func, X_init)
-        
-        # 记录初始结果
-        X = [x.copy() for x in X_init]
-        y = y_init.copy()
+            logger.info(f"贝叶斯优化开始，迭代次数: {self.n_iter}, 初始采样: {self.n_init}, 每轮: {self.n_jobs}")
+
         all_results = []
-        
-        for i, (params, score) in enumerate(zip(X_init, y_init)):
-            result = {'params': params, 'score': score}
-            all_results.append(result)
-            self._update_best(params, score)
-        
-        # 贝叶斯优化迭代
-        for iteration in range(self.n_iter):
-            if verbose and iteration % 10 == 0:
+        seen = set()
+
+        # 热启动：评估存储中的历史最优点直接作为观测，随机初始采样相应减少
+        prior = self._warm_start_points(param_ranges)
+        X_prior = [point['params'] for point in prior]
+        seen.update(self._param_key(params) for params in X_prior)
+        self._record(X_prior, [point['score'] for point in prior], all_results)
+
+        # 初始随机采样
+        X_init = self._sample_unseen(param_ranges, max(self.n_init - len(prior), 0 if prior else 1), seen)
+        if X_init:
+            y_init = await self._evaluate_params(objective_func, X_init)
+            self._record(X_init, y_init, all_results)
+
+        # 初始样本上按边际似然选择长度尺度，之后只做增量更新
+        gp = self._fit_gp(param_ranges, X_prior + X_init, all_results)
+
+        # 贝叶斯优化迭代（每轮建议 n_jobs 个点并行评估，n_iter 为总评估次数）
+        iteration = 0
+        while iteration < self.n_iter:
+            if verbose and iteration % 10 < max(1, self.n_jobs):
                 logger.info(f"第 {iteration} 次迭代，最优得分: {self.best_score:.4f}")
-            
-            # 构建代理模型（简化版：使用最近邻）
-            next_params = self._suggest_next_params(X, y, param_ranges)
-            
-            # 评估新参数
-            score = await objective_func(next_params)
-            
-            # 记录结果
-            X.append(next_params)
-            y.append(score)
-            all_results.append({'params': next_params, 'score': score})
-            self._update_best(next_params, score)
-        
+
+            batch = self._suggest_batch(gp, param_ranges, min(max(1, self.n_jobs), self.n_iter - iteration), seen)
+            if not batch:
+                # 离散参数空间已全部评估
+                break
+
+            scores = await self._evaluate_params(objective_func, batch)
+            self._record(batch, scores, all_results)
+            for params, score in zip(batch, scores):
+                gp.add(self._encode(params, param_ranges), self._model_score(score, all_results))
+            iteration += len(batch)
+
         optimization_time = time.time() - start_time
-        
+
         if verbose:
             logger.info(f"贝叶斯优化完成，用时 {optimization_time:.2f} 秒")
             logger.info(f"最优参数: {self.best_params}")
             logger.info(f"最优得分: {self.best_score:.4f}")
-        
-        return self._create_result(all_results, optimization_time)
-    
-    def _suggest_next_params(
+
+        return self._create_result(all_results, optimization_time, stats={'length_scale': gp.length_scale})
+
+    def _record(self, params_list: List[Dict[str, Any]], scores: List[float], all_results: List[Dict[str, Any]]):
+        """记录评估结果并更新最优解"""
+        for params, score in zip(params_list, scores):
+            all_results.append({'params': params, 'score': score})
+            self._update_best(params, score)
+
+    def _model_score(self, score: float, all_results: List[Dict[str, Any]]) -> float:
+        """
+        转换为代理模型的观测值（统一为越大越好）
+
+        评估失败的±inf得分按已有的最差有限得分处理，避免破坏模型。
+        """
+        if not math.isfinite(score):
+            finite = [r['score'] for r in all_results if math.isfinite(r['score'])] or [0.0]
+            score = min(finite) if self.maximize else max(finite)
+        return score if self.maximize else -score
+
+    def _fit_gp(
         self,
+        param_ranges: Dict[str, Dict[str, Any]],
         X: List[Dict[str, Any]],
-        y: List[float],
-        param_ranges: Dict[str, Dict[str, Any]]
-    ) -> Dict[str, Any]:
+        all_results: List[Dict[str, Any]]
+    ) -> GaussianProcess:
+        """用初始样本建立高斯过程，长度尺度取对数边际似然最大者"""
+        encoded = np.array([self._encode(params, param_ranges) for params in X]).reshape(len(X), len(param_ranges))
+        targets = np.array([self._model_score(r['score'], all_results) for r in all_results])
+
+        best_gp, best_likelihood = None, float('-inf')
+        for length_scale in LENGTH_SCALE_GRID:
+            gp = GaussianProcess(len(param_ranges), length_scale=length_scale)
+            gp.fit(encoded, targets)
+            likelihood = gp.log_marginal_likelihood() if gp.n > 1 else 0.0
+            if best_gp is None or likelihood > best_likelihood:
+                best_gp, best_likelihood = gp, likelihood
+        return best_gp
+
+    def _suggest_batch(
+        self,
+        gp: GaussianProcess,
+        param_ranges: Dict[str, Dict[str, Any]],
+        n_points: int,
+        seen: set
+    ) -> List[Dict[str, Any]]:
         """
-        建议下一个采样点
-        
+        建议一批采样点（常数谎言法）
+
+        选出采集函数最大的候选点后，以当前最差观测值作为其虚拟观测加入模型
+        （增量更新），再在同一批候选中选下一个；选完后撤销虚拟观测。
+
         Args:
-            X: 历史参数列表
-            y: 历史得分列表
+            gp: 代理模型
             param_ranges: 参数范围
-            
+            n_points: 建议点数
+            seen: 已评估/已建议的参数键（会被更新）
+
         Returns:
-            Dict[str, Any]: 建议的参数
+            List[Dict[str, Any]]: 建议的参数列表
         """
-        # 简化版：结合探索和利用
-        n_samples = 100
-        candidates = self._sample_params(param_ranges, n_samples)
-        
-        # 评估候选点
-        best_candidate = None
-        best_acquisition = float('-inf') if self.maximize else float('inf')
-        
-        for candidate in candidates:
-            # 计算采集函数值
-            acquisition_value = self._acquisition_function(
-                candidate, X, y, param_ranges
-            )
-            
-            if self.maximize:
-                if acquisition_value > best_acquisition:
-                    best_acquisition = acquisition_value
-                    best_candidate = candidate
-            else:
-                if acquisition_value < best_acquisition:
-                    best_acquisition = acquisition_value
-                    best_candidate = candidate
-        
-        return best_candidate
-    
-    def _acquisition_function(
-        self,
-        candidate: Dict[str, Any],
-        X: List[Dict[str, Any]],
-        y: List[float],
-        param_ranges: Dict[str, Dict[str, Any]]
-    ) -> float:
+        candidates = self._sample_unseen(param_ranges, self.n_candidates, set(seen))
+        if not candidates:
+            return []
+        encoded = np.array([self._encode(params, param_ranges) for params in candidates])
+
+        n_observed = gp.n
+        lie = float(gp.y.min()) if gp.n else 0.0
+        available = np.ones(len(candidates), dtype=bool)
+        batch = []
+
+        for _ in range(min(n_points, len(candidates))):
+            values = self._acquisition_function(gp, encoded) if gp.n else np.zeros(len(candidates))
+            values[~available] = -np.inf
+            best = int(np.argmax(values))
+            available[best] = False
+            batch.append(candidates[best])
+            seen.add(self._param_key(candidates[best]))
+            gp.add(encoded[best], lie)
+
+        gp.truncate(n_observed)
+        return batch
+
+    def _acquisition_function(self, gp: GaussianProcess, X: np.ndarray) -> np.ndarray:
         """
-        采集函数
-        
+        采集函数（模型观测已统一为越大越好）
+
         Args:
-            candidate: 候选参数
-            X: 历史参数
-            y: 历史得分
-            param_ranges: 参数范围
-            
+            gp: 代理模型
+            X: 归一化后的候选点
+
         Returns:
-            float: 采集函数值
+            np.ndarray: 各候选点的采集函数值
         """
-        # 找到最近的邻居
-        distances = []
-        for x in X:
-            distance = self._param_distance(candidate, x, param_ranges)
-            distances.append(distance)
-        
-        k = min(5, len(distances))  # k近邻
-        nearest_indices = sorted(range(len(distances)), key=lambda i: distances[i])[:k]
-        
-        # 计算均值和标准差
-        nearest_scores = [y[i] for i in nearest_indices]
-        mu = sum(nearest_scores) / len(nearest_scores)
-        sigma = (sum((s - mu) ** 2 for s in nearest_scores) / len(nearest_scores)) ** 0.5 if len(nearest_scores) > 1 else 0
-        
-        # 采集函数
-        if self.acquisition == 'EI':
-            # Expected Improvement
-            if self.maximize:
-                xi = mu - self.best_score
-                if sigma == 0:
-                    return xi
-                from math import erf, sqrt, exp
-                z = xi / sigma
-                return xi * (0.5 + 0.5 * erf(z / sqrt(2))) + sigma * exp(-0.5 * z * z) / sqrt(2 * 3.14159)
-            else:
-                xi = self.best_score - mu
-                if sigma == 0:
-                    return xi
-                from math import erf, sqrt, exp
-                z = xi / sigma
-                return xi * (0.5 + 0.5 * erf(z / sqrt(2))) + sigma * exp(-0.5 * z * z) / sqrt(2 * 3.14159)
-        
-        elif self.acquisition == 'PI':
-            # Probability of Improvement
-            if self.maximize:
-                if sigma == 0:
-                    return 1.0 if mu > self.best_score else 0.0
-                from math import erf, sqrt
-                z = (mu - self.best_score) / sigma
-                return 0.5 + 0.5 * erf(z / sqrt(2))
-            else:
-                if sigma == 0:
-                    return 1.0 if mu < self.best_score else 0.0
-                from math import erf, sqrt
-                z = (self.best_score - mu) / sigma
-                return 0.5 + 0.5 * erf(z / sqrt(2))
-        
-        elif self.acquisition == 'UCB':
+        mu, sigma = gp.predict(X)
+        y = gp.y
+        margin = self.xi * (y.std() or 1.0)
+
+        if self.acquisition == 'UCB':
             # Upper Confidence Bound
-            kappa = 2.576  # 99%置信区间
-            if self.maximize:
-                return mu + kappa * sigma
-            else:
-                return mu - kappa * sigma
-        
-        else:
-            # 默认使用EI
-            if self.maximize:
-                return mu - self.best_score + sigma
-            else:
-                return self.best_score - mu + sigma
-    
-    def _param_distance(
+            return mu + self.kappa * sigma
+
+        improvement = mu - y.max() - margin
+        z = improvement / sigma
+        if self.acquisition == 'PI':
+            # Probability of Improvement
+            return ndtr(z)
+
+        # Expected Improvement（默认）
+        return improvement * ndtr(z) + sigma * np.exp(-0.5 * z * z) / math.sqrt(2 * math.pi)
+
+    def _sample_unseen(
+        self,
+        param_ranges: Dict[str, Dict[str, Any]],
+        n_samples: int,
+        seen: set
+    ) -> List[Dict[str, Any]]:
+        """随机采样未评估过的参数（离散空间较小时可能少于 n_samples 个）"""
+        samples = []
+        for params in self._sample_params(param_ranges, n_samples * 2):
+            key = self._param_key(params)
+            if key not in seen:
+                seen.add(key)
+                samples.append(params)
+            if len(samples) == n_samples:
+                break
+        return samples
+
+    @staticmethod
+    def _param_key(params: Dict[str, Any]) -> tuple:
+        return tuple(sorted(params.items()))
+
+    def _encode(
         self,
-        params1: Dict[str, Any],
-        params2: Dict[str, Any],
+        params: Dict[str, Any],
         param_ranges: Dict[str, Dict[str, Any]]
-    ) -> float:
+    ) -> List[float]:
         """
-        计算参数之间的距离（归一化欧氏距离）
-        
+        把参数归一化到[0, 1]（离散选择按其序号归一化）
+
         Args:
-            params1: 参数1
-            params2: 参数2
+            params: 参数
             param_ranges: 参数范围
-            
+
         Returns:
-            float: 距离
+            List[float]: 归一化后的参数向量
         """
-        distance = 0.0
-        
-        for param_name in param_ranges.keys():
-            val1 = params1[param_name]
-            val2 = params2[param_name]
-            param_config = param_ranges[param_name]
-            
-            # 归一化到[0, 1]
-            if param_config['type'] == 'int':
-                norm_val1 = (val1 - param_config['min']) / (param_config['max'] - param_config['min'])
-                norm_val2 = (val2 - param_config['min']) / (param_config['max'] - param_config['min'])
-                distance += (norm_val1 - norm_val2) ** 2
-                
-            elif param_config['type'] == 'float':
-                norm_val1 = (val1 - param_config['min']) / (param_config['max'] - param_config['min'])
-                norm_val2 = (val2 - param_config['min']) / (param_config['max'] - param_config['min'])
-                distance += (norm_val1 - norm_val2) ** 2
-                
-            elif param_config['type'] == 'choice':
-                # 对于离散选择，距离为0（相同）或1（不同）
-                distance += 0.0 if val1 == val2 else 1.0
-        
-        return distance ** 0.5
\ No newline at end of file
+        vector = []
+        for param_name, param_config in param_ranges.items():
+            value = params[param_name]
+            if param_config['type'] in ('int', 'float'):
+                vector.append((value - param_config['min']) / (param_config['max'] - param_config['min']))
+            else:
+                choices = param_config['choices']
+                vector.append(choices.index(value) / max(1, len(choices) - 1))
+        return vector
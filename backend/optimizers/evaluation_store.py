@@ -0,0 +1,47 @@
+"""参数评估结果存储接口 - 跨次运行复用已评估的参数组合"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class EvaluationStore(ABC):
+    """
+    参数评估结果存储
+
+    一个存储实例对应一个“研究”（同一策略、行情和优化目标），保存全预算下
+    参数组合到得分的映射。优化器评估前先查询存储，只评估未存储的参数并写回，
+    中断后重新运行同一研究不会重复评估；best 提供历史最优点用于热启动。
+    """
+
+    @abstractmethod
+    def lookup(self, params_list: Sequence[Dict[str, Any]]) -> List[Optional[float]]:
+        """查询得分，未存储的参数返回None"""
+
+    @abstractmethod
+    def save(self, params_list: Sequence[Dict[str, Any]], scores: Sequence[float]):
+        """写入（覆盖）参数组合的得分"""
+
+    @abstractmethod
+    def best(self, limit: int, maximize: bool = True) -> List[Dict[str, Any]]:
+        """按得分从优到劣返回至多 limit 条记录 {'params': ..., 'score': ...}"""
+
+
+class MemoryEvaluationStore(EvaluationStore):
+    """进程内的评估结果存储（不持久化，用于测试或单次会话）"""
+
+    def __init__(self):
+        self.records: Dict[tuple, Dict[str, Any]] = {}
+
+    def lookup(self, params_list: Sequence[Dict[str, Any]]) -> List[Optional[float]]:
+        results = []
+        for params in params_list:
+            record = self.records.get(tuple(sorted(params.items())))
+            results.append(None if record is None else record['score'])
+        return results
+
+    def save(self, params_list: Sequence[Dict[str, Any]], scores: Sequence[float]):
+        for params, score in zip(params_list, scores):
+            self.records[tuple(sorted(params.items()))] = {'params': dict(params), 'score': score}
+
+    def best(self, limit: int, maximize: bool = True) -> List[Dict[str, Any]]:
+        ranked = sorted(self.records.values(), key=lambda r: r['score'], reverse=maximize)
+        return [dict(r) for r in ranked[:limit]]
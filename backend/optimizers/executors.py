@@ -0,0 +1,334 @@
+"""参数评估执行器 - 串行、线程池、进程池三种后端"""
+import asyncio
+import inspect
+import logging
+import math
+import os
+import shutil
+import tempfile
+import weakref
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# 支持的评估后端（auto：BatchObjective 在 n_jobs>1 时用进程池，其余串行评估）
+EXECUTOR_BACKENDS = ('auto', 'serial', 'thread', 'process')
+
+
+class BatchObjective(ABC):
+    """
+    可批量评估的目标函数
+
+    子类把行情等大数组放在 self.arrays 中。进程池后端把这些数组写成内存映射文件，
+    工作进程在初始化时映射一次，此后只传递参数列表；序列化目标函数时不包含
+    arrays 和 TRANSIENT_ATTRS 中列出的缓存属性。
+
+    max_budget 不为 None 时，目标函数支持只用前若干单位的预算（如最近若干根K线）
+    评估，evaluate_batch 会收到 budget 参数，供逐级淘汰类的优化器使用。
+    """
+
+    # 序列化时丢弃、工作进程中按需重建的属性
+    TRANSIENT_ATTRS: Sequence[str] = ()
+    max_budget: Optional[int] = None
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+
+    @abstractmethod
+    def evaluate_batch(self, params_list: List[Dict[str, Any]], budget: Optional[int] = None) -> List[float]:
+        """批量评估参数，返回与 params_list 一一对应的得分（budget 为 None 时使用全部预算）"""
+
+    async def __call__(self, params: Dict[str, Any]) -> float:
+        return self.evaluate_batch([params])[0]
+
+    def attach(self, arrays: Dict[str, np.ndarray]):
+        """在工作进程中绑定共享数组"""
+        self.arrays = arrays
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['arrays'] = None
+        for attr in self.TRANSIENT_ATTRS:
+            state[attr] = None
+        return state
+
+
+def evaluate_batch_safely(
+    objective: BatchObjective,
+    params_list: List[Dict[str, Any]],
+    worst: float,
+    budget: Optional[int] = None
+) -> List[float]:
+    """批量评估；整批失败时逐个评估，出错的参数记为最差得分"""
+    kwargs = {} if budget is None else {'budget': budget}
+    try:
+        return list(objective.evaluate_batch(params_list, **kwargs))
+    except Exception as e:
+        logger.warning(f"批量评估失败，改为逐个评估: {e}")
+
+    scores = []
+    for params in params_list:
+        try:
+            scores.append(objective.evaluate_batch([params], **kwargs)[0])
+        except Exception as e:
+            logger.error(f"评估参数失败: {params}, 错误: {e}")
+            scores.append(worst)
+    return scores
+
+
+def _split(params_list: List[Dict[str, Any]], n_chunks: int, chunk_size: Optional[int]) -> List[List[Dict[str, Any]]]:
+    """把参数列表切成若干批（默认每个工作者一批，减少进程间通信次数）"""
+    size = chunk_size or math.ceil(len(params_list) / max(1, n_chunks))
+    return [params_list[i:i + size] for i in range(0, len(params_list), max(1, size))]
+
+
+async def _evaluate_each(
+    objective_func: Callable,
+    params_list: List[Dict[str, Any]],
+    worst: float,
+    concurrency: int = 1
+) -> List[float]:
+    """逐个调用目标函数（可以是协程函数），协程最多同时等待 concurrency 个"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def evaluate_one(params):
+        async with semaphore:
+            try:
+                score = objective_func(params)
+                if inspect.isawaitable(score):
+                    score = await score
+                return score
+            except Exception as e:
+                logger.error(f"评估参数失败: {params}, 错误: {e}")
+                return worst
+
+    return list(await asyncio.gather(*[evaluate_one(params) for params in params_list]))
+
+
+class EvaluationExecutor(ABC):
+    """参数评估执行器"""
+
+    n_jobs = 1
+
+    @abstractmethod
+    async def evaluate(
+        self,
+        objective_func: Callable,
+        params_list: List[Dict[str, Any]],
+        worst: float,
+        budget: Optional[int] = None
+    ) -> List[float]:
+        """
+        评估参数列表
+
+        Args:
+            objective_func: 目标函数（普通函数、协程函数或 BatchObjective）
+            params_list: 参数列表
+            worst: 评估失败时的得分
+            budget: 评估预算（仅 max_budget 不为 None 的 BatchObjective 支持）
+
+        Returns:
+            与 params_list 一一对应的得分
+        """
+
+    def close(self):
+        """释放线程/进程等资源"""
+
+
+class SerialExecutor(EvaluationExecutor):
+    """
+    串行评估
+
+    BatchObjective 整批向量化评估，在后台线程中执行，不阻塞事件循环；
+    协程目标函数在当前事件循环中最多同时等待 n_jobs 个
+    （适合等待数据加载等IO的目标函数，CPU计算仍是串行的）。
+    """
+
+    def __init__(self, n_jobs: int = 1):
+        self.n_jobs = n_jobs
+
+    async def evaluate(self, objective_func, params_list, worst, budget=None):
+        if isinstance(objective_func, BatchObjective):
+            return await asyncio.to_thread(evaluate_batch_safely, objective_func, params_list, worst, budget)
+        return await _evaluate_each(objective_func, params_list, worst, self.n_jobs)
+
+
+class ThreadExecutor(EvaluationExecutor):
+    """
+    线程池评估
+
+    参数按线程数分批，每批在一个线程中评估。协程目标函数在线程内用独立的事件循环
+    运行。NumPy/pandas 的计算会释放GIL，纯Python的目标函数加速有限。
+    """
+
+    def __init__(self, n_jobs: int, chunk_size: Optional[int] = None):
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    async def evaluate(self, objective_func, params_list, worst, budget=None):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.n_jobs)
+
+        if isinstance(objective_func, BatchObjective):
+            def run_chunk(chunk):
+                return evaluate_batch_safely(objective_func, chunk, worst, budget)
+        else:
+            def run_chunk(chunk):
+                return asyncio.run(_evaluate_each(objective_func, chunk, worst))
+
+        loop = asyncio.get_running_loop()
+        chunks = _split(params_list, self.n_jobs, self.chunk_size)
+        results = await asyncio.gather(*[loop.run_in_executor(self._pool, run_chunk, chunk) for chunk in chunks])
+        return [score for chunk_scores in results for score in chunk_scores]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+_worker_objective: Optional[BatchObjective] = None
+
+
+def _init_worker(objective: BatchObjective, array_paths: Dict[str, str]):
+    """工作进程初始化：映射共享数组，之后的每批评估复用同一个目标函数对象"""
+    global _worker_objective
+    objective.attach({name: np.load(path, mmap_mode='r') for name, path in array_paths.items()})
+    _worker_objective = objective
+
+
+def _evaluate_in_worker(params_list: List[Dict[str, Any]], worst: float, budget: Optional[int]) -> List[float]:
+    return evaluate_batch_safely(_worker_objective, params_list, worst, budget)
+
+
+def _call_in_worker(fn: Callable, task: Any) -> Any:
+    return fn(_worker_objective, task)
+
+
+def _cleanup_pool(pool: ProcessPoolExecutor, tmpdir: str):
+    pool.shutdown(wait=False, cancel_futures=True)
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+class ProcessPoolEvaluator(EvaluationExecutor):
+    """
+    进程池评估
+
+    目标函数必须是 BatchObjective。首次评估时把其数组写成内存映射文件并启动进程池，
+    工作进程通过 initializer 映射一次数据（各进程共享同一份页缓存），之后每批只传递
+    参数列表和得分。同一目标函数的多次评估（遗传算法的各代、贝叶斯优化的各轮）
+    复用同一个进程池和各进程内的指标缓存。
+    """
+
+    def __init__(self, n_jobs: int, chunk_size: Optional[int] = None):
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._objective: Optional[BatchObjective] = None
+        self._finalizer = None
+        self._fallback: Optional[ThreadExecutor] = None
+
+    async def evaluate(self, objective_func, params_list, worst, budget=None):
+        if not isinstance(objective_func, BatchObjective):
+            # 闭包/协程无法发送到子进程，退化为线程池
+            if self._fallback is None:
+                logger.warning("目标函数不是 BatchObjective，无法在进程池中评估，改用线程池")
+                self._fallback = ThreadExecutor(self.n_jobs, self.chunk_size)
+            return await self._fallback.evaluate(objective_func, params_list, worst)
+
+        pool = self._get_pool(objective_func)
+        loop = asyncio.get_running_loop()
+        chunks = _split(params_list, self.n_jobs, self.chunk_size)
+        results = await asyncio.gather(*[
+            loop.run_in_executor(pool, _evaluate_in_worker, chunk, worst, budget) for chunk in chunks
+        ])
+        return [score for chunk_scores in results for score in chunk_scores]
+
+    async def map_in_workers(self, objective: BatchObjective, fn: Callable, tasks: List[Any]) -> List[Any]:
+        """
+        在工作进程中执行 fn(objective, task)，复用已映射共享数据的目标函数
+
+        Args:
+            objective: 目标函数
+            fn: 模块级函数（需要可序列化）
+            tasks: 任务列表
+
+        Returns:
+            与 tasks 一一对应的返回值
+        """
+        pool = self._get_pool(objective)
+        loop = asyncio.get_running_loop()
+        return list(await asyncio.gather(*[
+            loop.run_in_executor(pool, _call_in_worker, fn, task) for task in tasks
+        ]))
+
+    def _get_pool(self, objective: BatchObjective) -> ProcessPoolExecutor:
+        if self._pool is not None and self._objective is objective:
+            return self._pool
+        self.close()
+
+        tmpdir = tempfile.mkdtemp(prefix='optimizer_')
+        array_paths = {}
+        for name, values in objective.arrays.items():
+            array_paths[name] = os.path.join(tmpdir, f'{name}.npy')
+            np.save(array_paths[name], np.ascontiguousarray(values))
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.n_jobs,
+            initializer=_init_worker,
+            initargs=(objective, array_paths)
+        )
+        self._objective = objective
+        # 优化中途出错未调用close时，随执行器回收进程池和临时文件
+        self._finalizer = weakref.finalize(self, _cleanup_pool, self._pool, tmpdir)
+        return self._pool
+
+    def close(self):
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        self._pool = None
+        self._objective = None
+        if self._fallback is not None:
+            self._fallback.close()
+            self._fallback = None
+
+
+def create_executor(
+    backend: Union[str, EvaluationExecutor] = 'auto',
+    n_jobs: int = 1,
+    objective_func: Optional[Callable] = None,
+    chunk_size: Optional[int] = None
+) -> EvaluationExecutor:
+    """
+    创建评估执行器
+
+    Args:
+        backend: 后端名称（EXECUTOR_BACKENDS）或执行器实例
+        n_jobs: 并行数
+        objective_func: 目标函数（auto时据此选择后端）
+        chunk_size: 每批参数个数（默认每个工作者一批）
+
+    Returns:
+        EvaluationExecutor
+    """
+    if isinstance(backend, EvaluationExecutor):
+        return backend
+    if backend not in EXECUTOR_BACKENDS:
+        raise ValueError(f"不支持的评估后端: {backend}")
+
+    if backend == 'auto':
+        # 协程闭包通常依赖调用方事件循环中的连接等资源，不默认移到其他线程
+        backend = 'process' if n_jobs > 1 and isinstance(objective_func, BatchObjective) else 'serial'
+
+    if backend == 'serial':
+        return SerialExecutor(max(1, n_jobs))
+    if backend == 'thread':
+        return ThreadExecutor(max(1, n_jobs), chunk_size)
+    return ProcessPoolEvaluator(max(1, n_jobs), chunk_size)
@@ -0,0 +1,117 @@
+"""高斯过程代理模型"""
+import math
+from typing import Sequence, Tuple
+
+import numpy as np
+from scipy.linalg import solve_triangular
+
+
+class GaussianProcess:
+    """
+    高斯过程回归（RBF核，输入为归一化到[0, 1]的参数向量）
+
+    核矩阵的Cholesky因子L按行追加：新增一个观测只需一次三角求解，
+    复杂度 O(n²)，不重新分解。L 存放在按倍数扩容的缓冲区中，
+    truncate 可以撤销最近追加的观测（批量建议中的“虚拟观测”）。
+    目标值在预测时按当前观测标准化，不影响 L。
+    """
+
+    def __init__(self, n_dims: int, length_scale: float = 0.2, noise: float = 1e-6, capacity: int = 64):
+        """
+        Args:
+            n_dims: 参数维数
+            length_scale: RBF核长度尺度（归一化空间）
+            noise: 观测噪声方差（相对于单位信号方差）
+            capacity: 初始缓冲区大小
+        """
+        self.n_dims = n_dims
+        self.length_scale = length_scale
+        self.noise = noise
+        self.n = 0
+        self._X = np.empty((capacity, n_dims))
+        self._y = np.empty(capacity)
+        self._L = np.zeros((capacity, capacity))
+
+    @property
+    def X(self) -> np.ndarray:
+        return self._X[:self.n]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[:self.n]
+
+    def kernel(self, A: np.ndarray, B: np.ndarray) -> np.ndarray:
+        """RBF核 k(a, b) = exp(-|a-b|² / 2l²)"""
+        sq_dist = (A * A).sum(1)[:, None] + (B * B).sum(1)[None, :] - 2 * A @ B.T
+        return np.exp(-0.5 * np.maximum(sq_dist, 0.0) / self.length_scale ** 2)
+
+    def add(self, x: Sequence[float], y: float):
+        """追加一个观测，增量更新Cholesky因子"""
+        x = np.asarray(x, dtype=np.float64)
+        if self.n == len(self._y):
+            self._grow()
+
+        n = self.n
+        if n == 0:
+            self._L[0, 0] = math.sqrt(1.0 + self.noise)
+        else:
+            k = self.kernel(self.X, x[None, :])[:, 0]
+            row = solve_triangular(self._L[:n, :n], k, lower=True, check_finite=False)
+            self._L[n, :n] = row
+            self._L[n, n] = math.sqrt(max(1.0 + self.noise - row @ row, self.noise))
+        self._X[n] = x
+        self._y[n] = y
+        self.n = n + 1
+
+    def truncate(self, n: int):
+        """只保留前 n 个观测（追加行的逆操作，L 的前 n 行不变）"""
+        self.n = min(n, self.n)
+
+    def fit(self, X: np.ndarray, y: np.ndarray):
+        """用一批观测重建模型"""
+        self.n = 0
+        for x_i, y_i in zip(X, y):
+            self.add(x_i, y_i)
+
+    def predict(self, X_new: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        预测均值和标准差
+
+        Args:
+            X_new: 候选点 (m, n_dims)
+
+        Returns:
+            (mu, sigma)，与目标值同一量纲
+        """
+        y = self.y
+        y_mean = y.mean()
+        y_std = y.std() or 1.0
+
+        L = self._L[:self.n, :self.n]
+        alpha = solve_triangular(
+            L.T, solve_triangular(L, (y - y_mean) / y_std, lower=True, check_finite=False),
+            lower=False, check_finite=False
+        )
+        K_star = self.kernel(X_new, self.X)
+        v = solve_triangular(L, K_star.T, lower=True, check_finite=False)
+        mu = K_star @ alpha
+        var = np.maximum(1.0 - (v * v).sum(0), 1e-12)
+        return mu * y_std + y_mean, np.sqrt(var) * y_std
+
+    def log_marginal_likelihood(self) -> float:
+        """标准化目标值下的对数边际似然（用于选择长度尺度）"""
+        y = self.y
+        y_std = y.std() or 1.0
+        L = self._L[:self.n, :self.n]
+        z = solve_triangular(L, (y - y.mean()) / y_std, lower=True, check_finite=False)
+        return float(-0.5 * z @ z - np.log(np.diag(L)).sum() - 0.5 * self.n * math.log(2 * math.pi))
+
+    def _grow(self):
+        capacity = len(self._y) * 2
+        X, y, L = self._X, self._y, self._L
+        self._X = np.empty((capacity, self.n_dims))
+        self._y = np.empty(capacity)
+        self._L = np.zeros((capacity, capacity))
+        self._X[:self.n] = X[:self.n]
+        self._y[:self.n] = y[:self.n]
+        self._L[:self.n, :self.n] = L[:self.n, :self.n]
@@ -1,20 +1,62 @@
 """遗传算法优化器"""
+import asyncio
+import math
 import time
 import random
-from typing import Dict, Any, List, Callable, Tuple
+from typing import Dict, Any, List, Callable, Tuple, Union, Iterable
 import logging
 
 from .base_optimizer import BaseOptimizer, OptimizationResult
+from .executors import BatchObjective, EvaluationExecutor, ProcessPoolEvaluator
 
 logger = logging.getLogger(__name__)
 
 
+async def _evolve_island(objective_func: Callable, task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    让一个岛（子种群）进化若干代
+
+    岛上的优化器串行评估，已评估过的参数从 task['cache'] 中直接取得分；
+    返回进化后的种群、各代结果、新增的适应度缓存和统计。
+    """
+    optimizer = GeneticOptimizer(**task['options'])
+    optimizer._fitness_cache = dict(task['cache'])
+    known = set(optimizer._fitness_cache)
+
+    population = task['population']
+    if any('score' not in individual for individual in population):
+        population = await optimizer._evaluate_population(objective_func, population)
+    population, results = await optimizer._evolve(
+        objective_func, population, task['param_ranges'], task['generations']
+    )
+    optimizer._close_executor()
+
+    return {
+        'population': population,
+        'results': results,
+        'cache': {key: score for key, score in optimizer._fitness_cache.items() if key not in known},
+        'lookups': optimizer._cache_lookups,
+        'hits': optimizer._cache_hits,
+        'convergence_curve': optimizer.convergence_curve
+    }
+
+
+def _run_island(objective_func: BatchObjective, task: Dict[str, Any]) -> Dict[str, Any]:
+    """在工作进程中运行 _evolve_island（只在工作进程中按 task['seed'] 重设随机数种子）"""
+    random.seed(task['seed'])
+    return asyncio.run(_evolve_island(objective_func, task))
+
+
 class GeneticOptimizer(BaseOptimizer):
     """遗传算法优化器
     
     模拟自然选择和遗传过程，通过选择、交叉、变异找到最优解。
     适合参数空间较大的情况。
     支持多目标优化。
+    
+    同一次优化中按参数组合缓存适应度，精英保留或交叉后重复出现的个体不再评估。
+    n_islands > 1 时为岛模型：种群分成若干子种群，在各自的工作进程中独立进化，
+    每 migration_interval 代按环形拓扑把各岛最优的 migration_size 个个体迁移到下一个岛。
     """
     
     def __init__(
@@ -26,7 +68,12 @@ class GeneticOptimizer(BaseOptimizer):
         generations: int = 20,
         crossover_rate: float = 0.8,
         mutation_rate: float = 0.1,
-        elitism_rate: float = 0.1
+        elitism_rate: float = 0.1,
+        executor: Union[str, EvaluationExecutor] = 'auto',
+        use_cache: bool = True,
+        n_islands: int = 1,
+        migration_interval: int = 5,
+        migration_size: int = 2
     ):
         """
         初始化遗传算法优化器
@@ -34,19 +81,29 @@ class GeneticOptimizer(BaseOptimizer):
         Args:
             objective: 优化目标
             maximize: 是否最大化
-            n_jobs: 并行任务数
-            population_size: 种群大小
+            n_jobs: 并行任务数（岛模型下为同时进化的岛数）
+            population_size: 种群大小（岛模型下为各岛合计）
             generations: 迭代代数
             crossover_rate: 交叉概率
             mutation_rate: 变异概率
             elitism_rate: 精英保留比例
+            executor: 评估后端
+            use_cache: 是否缓存适应度
+            n_islands: 岛数（1为单一种群）
+            migration_interval: 迁移间隔（代）
+            migration_size: 每次从每个岛迁出的个体数
         """
-        super().__init__(objective, maximize, n_jobs)
+        super().__init__(objective, maximize, n_jobs, executor)
         self.population_size = population_size
         self.generations = generations
         self.crossover_rate = crossover_rate
         self.mutation_rate = mutation_rate
         self.elitism_rate = elitism_rate
+        self.use_cache = use_cache
+        self.n_islands = n_islands
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self._reset_cache()
     
     async def optimize(
         self,
@@ -65,7 +122,7 @@ class GeneticOptimizer(BaseOptimizer):
             **kwargs: 其他参数
             
         Returns:
-            OptimizationResult: 优化结果
+            OptimizationResult: 优化结果，stats 中记录适应度缓存命中率和节省的评估次数
         """
         start_time = time.time()
         
@@ -74,18 +131,51 @@ class GeneticOptimizer(BaseOptimizer):
             raise ValueError("参数范围无效")
         
         if verbose:
-            logger.info(f"遗传算法开始，种群大小: {self.population_size}, 迭代代数: {self.generations}")
+            logger.info(
+                f"遗传算法开始，种群大小: {self.population_size}, 迭代代数: {self.generations}, 岛数: {self.n_islands}"
+            )
         
-        # 初始化种群
-        population = self._initialize_population(param_ranges)
+        self._reset_cache()
         
-        # 评估初始种群
-        population = await self._evaluate_population(objective_func, population)
+        if self.n_islands > 1:
+            all_results = await self._optimize_islands(objective_func, param_ranges, verbose)
+        else:
+            # 初始化并评估种群
+            population = self._initialize_population(param_ranges)
+            population = await self._evaluate_population(objective_func, population)
+            
+            # 进化迭代
+            _, all_results = await self._evolve(
+                objective_func, population, param_ranges, range(self.generations), verbose
+            )
         
-        all_results = []
+        optimization_time = time.time() - start_time
+        stats = self._cache_stats()
+        
+        if verbose:
+            logger.info(f"遗传算法完成，用时 {optimization_time:.2f} 秒")
+            logger.info(f"适应度缓存命中率: {stats['cache_hit_rate']:.1%}，节省评估 {stats['evaluations_saved']} 次")
+            logger.info(f"最优参数: {self.best_params}")
+            logger.info(f"最优得分: {self.best_score:.4f}")
+        
+        return self._create_result(all_results, optimization_time, stats=stats)
+    
+    async def _evolve(
+        self,
+        objective_func: Callable,
+        population: List[Dict[str, Any]],
+        param_ranges: Dict[str, Dict[str, Any]],
+        generations: Iterable[int],
+        verbose: bool = False
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        对已评估的种群进化若干代
         
-        # 进化迭代
-        for generation in range(self.generations):
+        Returns:
+            (最后一代种群, 各代结果)
+        """
+        results = []
+        for generation in generations:
             if verbose and generation % 5 == 0:
                 logger.info(f"第 {generation} 代，最优得分: {self.best_score:.4f}")
             
@@ -105,44 +195,173 @@ class GeneticOptimizer(BaseOptimizer):
             population = self._elitism(population, mutated)
             
             # 记录结果
-            current_best = max(population, key=lambda x: x['score'])
-            all_results.append({
+            current_best = sorted(population, key=lambda x: x['score'], reverse=self.maximize)[0]
+            results.append({
                 'generation': generation,
                 'best_params': current_best['params'],
                 'best_score': current_best['score'],
                 'avg_score': sum(p['score'] for p in population) / len(population)
             })
         
-        optimization_time = time.time() - start_time
+        return population, results
+    
+    async def _optimize_islands(
+        self,
+        objective_func: Callable,
+        param_ranges: Dict[str, Dict[str, Any]],
+        verbose: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        岛模型：各岛每次进化 migration_interval 代，之后汇总结果、合并适应度缓存并迁移
         
-        if verbose:
-            logger.info(f"遗传算法完成，用时 {optimization_time:.2f} 秒")
-            logger.info(f"最优参数: {self.best_params}")
-            logger.info(f"最优得分: {self.best_score:.4f}")
+        目标函数为 BatchObjective 时各岛在进程池中并行进化（工作进程映射同一份共享数据），
+        否则在当前事件循环中依次进化。
+        """
+        island_size = max(2, self.population_size // self.n_islands)
+        island_options = {
+            'objective': self.objective,
+            'maximize': self.maximize,
+            'population_size': island_size,
+            'crossover_rate': self.crossover_rate,
+            'mutation_rate': self.mutation_rate,
+            'elitism_rate': self.elitism_rate,
+            'executor': 'serial',
+            'use_cache': self.use_cache
+        }
+        populations = [
+            [{'params': params} for params in self._sample_params(param_ranges, island_size)]
+            for _ in range(self.n_islands)
+        ]
+        
+        # 岛在工作进程中评估，不经过评估存储：热启动的历史点预先放入适应度缓存，
+        # 并轮流替换各岛的随机个体，每次迁移后把新评估的得分写回存储
+        warm_points = self._warm_start_points(param_ranges)
+        for i, point in enumerate(warm_points[:self.population_size // 2]):
+            populations[i % self.n_islands][i // self.n_islands] = {'params': point['params']}
+        for point in warm_points:
+            self._fitness_cache[self._param_key(point['params'])] = point['score']
+        
+        in_processes = isinstance(objective_func, BatchObjective) and self.executor != 'serial'
+        pool = ProcessPoolEvaluator(max(1, min(self.n_islands, self.n_jobs))) if in_processes else None
+        
+        all_results = []
+        try:
+            for start in range(0, self.generations, self.migration_interval):
+                epoch = range(start, min(start + self.migration_interval, self.generations))
+                tasks = [{
+                    'options': island_options,
+                    'population': population,
+                    'param_ranges': param_ranges,
+                    'generations': epoch,
+                    'cache': self._fitness_cache,
+                    'seed': random.randrange(2 ** 32)
+                } for population in populations]
+                
+                if pool is not None:
+                    outcomes = await pool.map_in_workers(objective_func, _run_island, tasks)
+                else:
+                    outcomes = [await _evolve_island(objective_func, task) for task in tasks]
+                
+                populations = []
+                for island, outcome in enumerate(outcomes):
+                    populations.append(outcome['population'])
+                    all_results.extend(dict(result, island=island) for result in outcome['results'])
+                    self._fitness_cache.update(outcome['cache'])
+                    # 与 _evaluate_params 一致，评估失败的最差得分（±inf）不写入存储
+                    finite = [(key, score) for key, score in outcome['cache'].items() if math.isfinite(score)]
+                    if self.evaluation_store is not None and finite:
+                        self.evaluation_store.save([dict(key) for key, _ in finite], [score for _, score in finite])
+                    self._cache_lookups += outcome['lookups']
+                    self._cache_hits += outcome['hits']
+                    for result in outcome['results']:
+                        if self._is_better(result['best_score']):
+                            self.best_score = result['best_score']
+                            self.best_params = dict(result['best_params'])
+                    self.convergence_curve.extend(outcome['convergence_curve'])
+                
+                if epoch.stop < self.generations:
+                    populations = self._migrate(populations)
+                
+                if verbose:
+                    logger.info(f"第 {epoch.stop} 代迁移完成，最优得分: {self.best_score:.4f}")
+        finally:
+            if pool is not None:
+                pool.close()
+        
+        return all_results
+    
+    def _migrate(self, populations: List[List[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+        """环形迁移：每个岛最优的若干个体替换下一个岛最差的个体"""
+        size = min(self.migration_size, min(len(p) for p in populations) - 1)
+        if size <= 0:
+            return populations
         
-        return self._create_result(all_results, optimization_time)
+        ranked = [sorted(p, key=lambda x: x['score'], reverse=self.maximize) for p in populations]
+        migrated = []
+        for i, population in enumerate(ranked):
+            migrants = [dict(individual, params=individual['params'].copy()) for individual in ranked[i - 1][:size]]
+            migrated.append(population[:-size] + migrants)
+        return migrated
     
     def _initialize_population(
         self,
         param_ranges: Dict[str, Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """初始化种群"""
-        return self._sample_params(param_ranges, self.population_size)
+        """初始化种群（热启动时至多一半个体取自评估存储中的历史最优点）"""
+        seeds = [{'params': point['params']} for point in self._warm_start_points(param_ranges, self.population_size // 2)]
+        samples = self._sample_params(param_ranges, self.population_size - len(seeds))
+        return seeds + [{'params': params} for params in samples]
     
     async def _evaluate_population(
         self,
         objective_func: Callable,
         population: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """评估种群"""
-        scores = await self._evaluate_params(objective_func, population)
+        """评估种群（整代一次提交给执行器，已缓存和同代重复的参数只评估一次）"""
+        keys = [self._param_key(individual['params']) for individual in population]
+        
+        if self.use_cache:
+            pending = {}
+            for key, individual in zip(keys, population):
+                if key not in self._fitness_cache and key not in pending:
+                    pending[key] = individual['params']
+            self._cache_lookups += len(population)
+            self._cache_hits += len(population) - len(pending)
+            
+            scores = await self._evaluate_params(objective_func, list(pending.values()))
+            self._fitness_cache.update(zip(pending.keys(), scores))
+            scores = [self._fitness_cache[key] for key in keys]
+        else:
+            scores = await self._evaluate_params(objective_func, [individual['params'] for individual in population])
         
         for i, score in enumerate(scores):
             population[i]['score'] = score
-            self._update_best(population[i], score)
+            self._update_best(population[i]['params'], score)
         
         return population
     
+    @staticmethod
+    def _param_key(params: Dict[str, Any]) -> tuple:
+        """参数组合的规范键"""
+        return tuple(sorted(params.items()))
+    
+    def _reset_cache(self):
+        """清空适应度缓存和统计"""
+        self._fitness_cache: Dict[tuple, float] = {}
+        self._cache_lookups = 0
+        self._cache_hits = 0
+    
+    def _cache_stats(self) -> Dict[str, Any]:
+        """适应度缓存统计"""
+        return {
+            'cache_lookups': self._cache_lookups,
+            'cache_hits': self._cache_hits,
+            'cache_hit_rate': self._cache_hits / self._cache_lookups if self._cache_lookups else 0.0,
+            'evaluations': self._cache_lookups - self._cache_hits,
+            'evaluations_saved': self._cache_hits,
+            'n_islands': self.n_islands
+        }
+    
     def _select(
         self,
         population: List[Dict[str, Any]]
@@ -151,13 +370,14 @@ class GeneticOptimizer(BaseOptimizer):
         # 按得分排序
         sorted_population = sorted(population, key=lambda x: x['score'], reverse=self.maximize)
         
-        # 计算适应度
+        # 计算适应度（评估失败的个体得分为±inf，按最差的有限得分处理）
+        finite = [p['score'] for p in population if math.isfinite(p['score'])] or [0.0]
+        worst = min(finite) if self.maximize else max(finite)
+        scores = [p['score'] if math.isfinite(p['score']) else worst for p in sorted_population]
         if self.maximize:
-            min_score = min(p['score'] for p in population)
-            fitness = [p['score'] - min_score + 1 for p in sorted_population]
+            fitness = [score - worst + 1 for score in scores]
         else:
-            max_score = max(p['score'] for p in population)
-            fitness = [max_score - p['score'] + 1 for p in sorted_population]
+            fitness = [worst - score + 1 for score in scores]
         
         total_fitness = sum(fitness)
         probabilities = [f / total_fitness for f in fitness]
@@ -170,7 +390,7 @@ class GeneticOptimizer(BaseOptimizer):
             for i, prob in enumerate(probabilities):
                 cumulative += prob
                 if r <= cumulative:
-                    selected.append(sorted_population[i].copy())
+                    selected.append({'params': sorted_population[i]['params'].copy()})
                     break
         
         return selected
@@ -194,7 +414,10 @@ class GeneticOptimizer(BaseOptimizer):
                 )
                 offspring.extend([child1, child2])
             else:
-                offspring.extend([parent1.copy(), parent2.copy()])
+                offspring.extend([
+                    {'params': parent1['params'].copy()},
+                    {'params': parent2['params'].copy()}
+                ])
         
         return offspring[:self.population_size]
     
@@ -206,6 +429,8 @@ class GeneticOptimizer(BaseOptimizer):
     ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """单点交叉"""
         params = list(param_ranges.keys())
+        if len(params) < 2:
+            return {'params': parent2['params'].copy()}, {'params': parent1['params'].copy()}
         crossover_point = random.randint(1, len(params) - 1)
         
         child1 = {}
@@ -1,27 +1,65 @@
 """网格搜索优化器"""
 import time
-from typing import Dict, Any, List, Callable
+import itertools
+import math
+from typing import Dict, Any, List, Callable, Optional, Union, Tuple
 import logging
 
 from .base_optimizer import BaseOptimizer, OptimizationResult
+from .executors import EvaluationExecutor
 
 logger = logging.getLogger(__name__)
 
 
+# 自适应网格中未指定step的float参数的目标分辨率（区间等分数）
+ADAPTIVE_FLOAT_DIVISIONS = 100
+
+
 class GridSearchOptimizer(BaseOptimizer):
     """网格搜索优化器
     
     遍历所有参数组合，找到最优解。
     适合参数空间较小的情况。
     保证找到全局最优解。
+    
+    adaptive=True 时为由粗到细的自适应网格：先在每个数值参数上取 coarse_points 个点
+    评估，之后每轮把网格间距减半，只在当前最优的 top_k 个点周围细分，直到间距达到
+    参数的 step（float 未指定 step 时为区间的 1/100）。评估过的点不会重复评估。
     """
     
+    def __init__(
+        self,
+        objective: str = 'sharpe_ratio',
+        maximize: bool = True,
+        n_jobs: int = 1,
+        executor: Union[str, EvaluationExecutor] = 'auto',
+        adaptive: bool = False,
+        coarse_points: int = 5,
+        top_k: int = 3
+    ):
+        """
+        初始化网格搜索优化器
+        
+        Args:
+            objective: 优化目标
+            maximize: 是否最大化
+            n_jobs: 并行任务数
+            executor: 评估后端
+            adaptive: 是否使用由粗到细的自适应网格
+            coarse_points: 自适应网格第一轮每个数值参数的取值数
+            top_k: 自适应网格每轮细分的最优点数
+        """
+        super().__init__(objective, maximize, n_jobs, executor)
+        self.adaptive = adaptive
+        self.coarse_points = coarse_points
+        self.top_k = top_k
+    
     async def optimize(
         self,
         objective_func: Callable,
         param_ranges: Dict[str, Dict[str, Any]],
         verbose: bool = True,
-        batch_size: int = 10,
+        batch_size: Optional[int] = None,
         **kwargs
     ) -> OptimizationResult:
         """
@@ -31,7 +69,7 @@ class GridSearchOptimizer(BaseOptimizer):
             objective_func: 目标函数
             param_ranges: 参数范围字典
             verbose: 是否打印进度
-            batch_size: 批处理大小（并行执行时有效）
+            batch_size: 每批提交给执行器的参数组合数（默认每个并行任务32个）
             **kwargs: 其他参数
             
         Returns:
@@ -43,6 +81,9 @@ class GridSearchOptimizer(BaseOptimizer):
         if not self._validate_param_ranges(param_ranges):
             raise ValueError("参数范围无效")
         
+        if self.adaptive:
+            return await self._optimize_adaptive(objective_func, param_ranges, verbose, start_time)
+        
         # 生成所有参数组合
         all_combinations = self._generate_param_combinations(param_ranges)
         total_combinations = len(all_combinations)
@@ -50,7 +91,8 @@ class GridSearchOptimizer(BaseOptimizer):
         if verbose:
             logger.info(f"网格搜索开始，共 {total_combinations} 个参数组合")
         
-        # 分批执行
+        # 分批执行（批次越大，进程池的调度和通信开销越小）
+        batch_size = batch_size or max(1, self.n_jobs) * 32
         all_results = []
         batch_num = 0
         
@@ -85,4 +127,104 @@ class GridSearchOptimizer(BaseOptimizer):
             logger.info(f"最优参数: {self.best_params}")
             logger.info(f"最优得分: {self.best_score:.4f}")
         
-        return self._create_result(all_results, optimization_time)
\ No newline at end of file
+        return self._create_result(all_results, optimization_time)
+    
+    async def _optimize_adaptive(
+        self,
+        objective_func: Callable,
+        param_ranges: Dict[str, Dict[str, Any]],
+        verbose: bool,
+        start_time: float
+    ) -> OptimizationResult:
+        """
+        由粗到细的自适应网格搜索
+        
+        各参数先离散成目标分辨率下的取值表，搜索在取值序号上进行：
+        数值参数的初始间距使每个参数约有 coarse_points 个取值，choice 参数全部枚举；
+        之后每轮间距减半（向上取整），在最优的 top_k 个点周围取 ±间距 的邻域
+        （choice 参数保持不变），间距全部为1的一轮结束后停止。
+        """
+        values = [self._adaptive_values(config) for config in param_ranges.values()]
+        names = list(param_ranges.keys())
+        numeric = [config.get('type') != 'choice' for config in param_ranges.values()]
+        
+        strides = [
+            max(1, math.ceil((len(v) - 1) / max(1, self.coarse_points - 1))) if is_numeric else 1
+            for v, is_numeric in zip(values, numeric)
+        ]
+        axes = [
+            sorted(set(range(0, len(v), stride)) | {len(v) - 1}) if is_numeric else range(len(v))
+            for v, stride, is_numeric in zip(values, strides, numeric)
+        ]
+        
+        scores: Dict[Tuple[int, ...], float] = {}
+        all_results = []
+        candidates = list(itertools.product(*axes))
+        level = 0
+        
+        while True:
+            batch = [index for index in dict.fromkeys(candidates) if index not in scores]
+            if batch:
+                batch_params = [{name: v[i] for name, v, i in zip(names, values, index)} for index in batch]
+                batch_scores = await self._evaluate_params(objective_func, batch_params)
+                for index, params, score in zip(batch, batch_params, batch_scores):
+                    scores[index] = score
+                    all_results.append({'params': params, 'score': score, 'level': level})
+                    self._update_best(params, score)
+            
+            if verbose:
+                logger.info(f"第 {level} 轮，间距 {strides}，新增 {len(batch)} 个点，当前最优: {self.best_score:.4f}")
+            
+            if all(stride == 1 for stride in strides):
+                break
+            
+            strides = [math.ceil(stride / 2) for stride in strides]
+            level += 1
+            candidates = []
+            for center in self._top_indices(scores):
+                neighborhood = [
+                    sorted({max(0, c - stride), c, min(len(v) - 1, c + stride)}) if is_numeric else [c]
+                    for c, v, stride, is_numeric in zip(center, values, strides, numeric)
+                ]
+                candidates.extend(itertools.product(*neighborhood))
+        
+        optimization_time = time.time() - start_time
+        full_grid_size = math.prod(len(v) for v in values)
+        stats = {
+            'evaluations': len(scores),
+            'full_grid_size': full_grid_size,
+            'evaluated_fraction': len(scores) / full_grid_size,
+            'levels': level + 1
+        }
+        
+        if verbose:
+            logger.info(
+                f"自适应网格搜索完成，用时 {optimization_time:.2f} 秒，"
+                f"评估 {len(scores)}/{full_grid_size} 个参数组合"
+            )
+            logger.info(f"最优参数: {self.best_params}")
+            logger.info(f"最优得分: {self.best_score:.4f}")
+        
+        return self._create_result(all_results, optimization_time, stats=stats)
+    
+    def _top_indices(self, scores: Dict[Tuple[int, ...], float]) -> List[Tuple[int, ...]]:
+        """得分最优的 top_k 个点（评估失败的点不参与细分）"""
+        finite = [index for index, score in scores.items() if math.isfinite(score)]
+        finite.sort(key=lambda index: scores[index], reverse=self.maximize)
+        return finite[:self.top_k]
+    
+    @staticmethod
+    def _adaptive_values(param_config: Dict[str, Any]) -> List[Any]:
+        """参数在目标分辨率下的全部取值"""
+        param_type = param_config.get('type')
+        if param_type == 'choice':
+            return list(param_config['choices'])
+        
+        start = param_config['min']
+        stop = param_config['max']
+        if param_type == 'int':
+            return list(range(start, stop + 1, param_config['step']))
+        
+        step = param_config.get('step') or (stop - start) / ADAPTIVE_FLOAT_DIVISIONS
+        num_points = int(round((stop - start) / step)) + 1
+        return [round(min(start + i * step, stop), 4) for i in range(num_points)]
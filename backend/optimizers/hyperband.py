@@ -0,0 +1,158 @@
+"""Hyperband 优化器（逐级淘汰）"""
+import math
+import time
+import random
+from typing import Dict, Any, Callable, Optional, Union
+import logging
+
+from .base_optimizer import BaseOptimizer, OptimizationResult
+from .executors import BatchObjective, EvaluationExecutor
+
+logger = logging.getLogger(__name__)
+
+
+# 默认最短评估窗口（K线数）
+DEFAULT_MIN_BARS = 120
+
+
+class HyperbandOptimizer(BaseOptimizer):
+    """Hyperband 优化器
+
+    先在最近的一小段行情上评估大量候选参数，只保留排名前 1/eta 的参数，
+    在逐级加长的行情上重新评估，最后一级使用全部行情。
+    预算以模拟的K线数计，明显较差的参数只消耗很短的行情。
+    n_brackets=1 时即逐级淘汰（successive halving），不限制时为完整的 Hyperband。
+    """
+
+    def __init__(
+        self,
+        objective: str = 'sharpe_ratio',
+        maximize: bool = True,
+        n_jobs: int = 1,
+        eta: int = 3,
+        min_bars: Optional[int] = None,
+        max_bars: Optional[int] = None,
+        n_candidates: Optional[int] = None,
+        n_brackets: Optional[int] = 1,
+        executor: Union[str, EvaluationExecutor] = 'auto',
+        seed: Optional[int] = None
+    ):
+        """
+        初始化 Hyperband 优化器
+
+        Args:
+            objective: 优化目标
+            maximize: 是否最大化
+            n_jobs: 并行任务数
+            eta: 每级保留 1/eta 的参数，窗口加长 eta 倍
+            min_bars: 最短评估窗口（默认为最长窗口的 1/eta^3，至少 DEFAULT_MIN_BARS 根）
+            max_bars: 最长评估窗口（默认为全部行情）
+            n_candidates: 最激进一组的初始候选数（默认为全部网格组合）
+            n_brackets: 运行的组数，从淘汰最激进的一组开始（None 表示全部）
+            executor: 评估后端
+            seed: 抽取候选参数的随机种子（默认使用全局随机数生成器）
+        """
+        super().__init__(objective, maximize, n_jobs, executor)
+        if eta < 2:
+            raise ValueError("eta必须不小于2")
+        self.eta = eta
+        self.min_bars = min_bars
+        self.max_bars = max_bars
+        self.n_candidates = n_candidates
+        self.n_brackets = n_brackets
+        self.seed = seed
+
+    async def optimize(
+        self,
+        objective_func: Callable,
+        param_ranges: Dict[str, Dict[str, Any]],
+        verbose: bool = True,
+        **kwargs
+    ) -> OptimizationResult:
+        """
+        执行 Hyperband 优化
+
+        Args:
+            objective_func: 目标函数（需要是支持按K线数评估的 BatchObjective）
+            param_ranges: 参数范围字典
+            verbose: 是否打印进度
+            **kwargs: 其他参数
+
+        Returns:
+            OptimizationResult: 优化结果，stats 中记录模拟的K线数
+        """
+        start_time = time.time()
+
+        # 验证参数范围
+        if not self._validate_param_ranges(param_ranges):
+            raise ValueError("参数范围无效")
+        if not isinstance(objective_func, BatchObjective) or objective_func.max_budget is None:
+            raise ValueError("Hyperband需要支持按K线数评估的目标函数")
+
+        max_bars = min(self.max_bars or objective_func.max_budget, objective_func.max_budget)
+        min_bars = min(self.min_bars or max(max_bars // self.eta ** 3, DEFAULT_MIN_BARS), max_bars)
+        s_max = int(math.log(max_bars / min_bars, self.eta) + 1e-9)
+
+        grid = self._generate_param_combinations(param_ranges)
+        n_max = min(self.n_candidates or len(grid), len(grid))
+        brackets = list(range(s_max, -1, -1))[:self.n_brackets]
+
+        if verbose:
+            logger.info(
+                f"Hyperband开始，{len(grid)} 个参数组合，窗口 {min_bars}~{max_bars} 根K线，"
+                f"eta={self.eta}，{len(brackets)} 组"
+            )
+
+        rng = random.Random(self.seed) if self.seed is not None else random
+        all_results = []
+        bracket_stats = []
+        bars_simulated = 0
+
+        for s in brackets:
+            n = math.ceil(n_max * (s_max + 1) / (s + 1) * self.eta ** (s - s_max))
+            candidates = rng.sample(grid, min(n, len(grid)))
+            rungs = []
+
+            for i in range(s + 1):
+                bars = max_bars if i == s else max(min_bars, int(round(max_bars * self.eta ** (i - s))))
+                scores = await self._evaluate_params(objective_func, candidates, budget=bars)
+                bars_simulated += bars * len(candidates)
+                rungs.append({'bars': bars, 'candidates': len(candidates)})
+
+                for params, score in zip(candidates, scores):
+                    all_results.append({
+                        'params': params.copy(),
+                        'score': score,
+                        'bars': bars,
+                        'bracket': s,
+                        'rung': i
+                    })
+                    # 不同窗口上的得分不可比，只用全部行情上的得分更新最优解
+                    if i == s:
+                        self._update_best(params, score)
+
+                if i < s:
+                    keep = max(1, len(candidates) // self.eta)
+                    ranked = sorted(zip(scores, range(len(candidates))), reverse=self.maximize)
+                    candidates = [candidates[j] for _, j in ranked[:keep]]
+
+            bracket_stats.append({'bracket': s, 'rungs': rungs})
+            if verbose:
+                logger.info(f"第 {s} 组完成，当前最优: {self.best_params}, 得分: {self.best_score:.4f}")
+
+        optimization_time = time.time() - start_time
+        grid_bars = len(grid) * max_bars
+
+        if verbose:
+            logger.info(f"Hyperband完成，用时 {optimization_time:.2f} 秒")
+            logger.info(f"模拟K线 {bars_simulated}，网格搜索需要 {grid_bars}")
+            logger.info(f"最优参数: {self.best_params}")
+            logger.info(f"最优得分: {self.best_score:.4f}")
+
+        return self._create_result(all_results, optimization_time, stats={
+            'bars_simulated': bars_simulated,
+            'grid_bars': grid_bars,
+            'min_bars': min_bars,
+            'max_bars': max_bars,
+            'brackets': bracket_stats
+        })
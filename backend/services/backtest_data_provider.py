@@ -0,0 +1,180 @@
+"""回测数据提供器 - 本地DuckDB优先，只从远程数据源补齐缺失区间"""
+from datetime import datetime, time, timedelta
+from typing import Optional, List, Tuple
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .data_fetcher import DataFetcher
+from .duckdb_storage_service import DuckDBStorageService
+from .kline_resampler import KlineResampler, RESAMPLE_MINUTES
+
+
+# 回测频率 -> kline_data中存储的频率
+STORAGE_FREQ_MAP = {
+    '1d': 'daily',
+    'daily': 'daily',
+}
+
+# kline_data中存储的频率 -> 数据获取器频率
+FETCH_FREQ_MAP = {
+    'daily': '1d',
+}
+
+KLINE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# A股收盘时间，覆盖范围在当天收盘前结束时当天的K线仍可能更新
+MARKET_CLOSE = time(15, 0)
+
+_shared_storage: Optional[DuckDBStorageService] = None
+
+
+def get_shared_storage() -> Optional[DuckDBStorageService]:
+    """获取进程内共享的DuckDB存储，打开失败时返回None（退化为纯远程获取）"""
+    global _shared_storage
+    if _shared_storage is None:
+        try:
+            _shared_storage = DuckDBStorageService()
+        except Exception as e:
+            logger.warning(f"本地DuckDB不可用，回测将直接访问远程数据源: {e}")
+            return None
+    return _shared_storage
+
+
+def _has_trading_day(start: datetime, end: datetime) -> bool:
+    """区间 [start, end] 内是否包含交易日（按工作日判断，与utils.trading_days一致）"""
+    if end.date() < start.date():
+        return False
+    return np.busday_count(start.date(), end.date() + timedelta(days=1)) > 0
+
+
+class BacktestDataProvider:
+    """
+    回测数据提供器（读穿缓存）
+    
+    接口与 DataFetcher.get_data 相同。本地kline_data已覆盖请求区间时直接读取；
+    否则只向远程数据源请求缺失的头部/尾部区间，写回本地后再统一从本地读取。
+    """
+    
+    def __init__(
+        self,
+        storage: Optional[DuckDBStorageService] = None,
+        data_source: str = 'auto',
+        data_fetcher: Optional[DataFetcher] = None
+    ):
+        """
+        初始化回测数据提供器
+        
+        Args:
+            storage: DuckDB存储服务（默认使用进程内共享实例）
+            data_source: 远程数据源
+            data_fetcher: 远程数据获取器（默认按data_source按需创建）
+        """
+        self.storage = storage if storage is not None else get_shared_storage()
+        self.data_source = data_source
+        self._data_fetcher = data_fetcher
+    
+    @property
+    def data_fetcher(self) -> DataFetcher:
+        """按需创建远程数据获取器"""
+        if self._data_fetcher is None:
+            self._data_fetcher = DataFetcher(source=self.data_source)
+        return self._data_fetcher
+    
+    async def get_data(
+        self,
+        code: str,
+        start_date: datetime,
+        end_date: datetime,
+        freq: str = '1d'
+    ) -> pd.DataFrame:
+        """
+        获取回测数据
+        
+        Args:
+            code: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            freq: 数据频率
+            
+        Returns:
+            DataFrame包含OHLCV数据，索引为date
+        """
+        if self.storage is None:
+            return await self.data_fetcher.get_data(
+                code=code, start_date=start_date, end_date=end_date, freq=freq
+            )
+        
+        storage_freq = STORAGE_FREQ_MAP.get(freq, freq)
+        fetch_freq = FETCH_FREQ_MAP.get(storage_freq, storage_freq)
+        
+        # 不请求未来的数据
+        effective_end = min(end_date, datetime.now())
+        
+        # 本地1分钟K线覆盖的部分先增量合成，合成区间会记入覆盖范围
+        if storage_freq in RESAMPLE_MINUTES:
+            KlineResampler(self.storage).refresh(code, storage_freq)
+        
+        coverage = self.storage.get_kline_coverage(code, storage_freq)
+        missing = self._missing_ranges(coverage, start_date, effective_end)
+        
+        for fetch_start, fetch_end in missing:
+            logger.info(f"本地数据缺失，从远程补齐: {code}, {fetch_start} 到 {fetch_end}, 频率: {fetch_freq}")
+            try:
+                delta = await self.data_fetcher.get_data(
+                    code=code, start_date=fetch_start, end_date=fetch_end, freq=fetch_freq
+                )
+            except Exception as e:
+                logger.warning(f"远程补齐失败，使用本地已有数据: {e}")
+                continue
+            
+            if delta is not None and len(delta) > 0:
+                self.storage.upsert_kline_data(delta, code, storage_freq)
+            self.storage.update_kline_coverage(code, fetch_start, fetch_end, storage_freq)
+        
+        if not missing:
+            logger.info(f"本地数据已覆盖请求区间，无需访问远程: {code}, {storage_freq}")
+        
+        df = self.storage.load_kline_data(code, start_date, end_date, storage_freq)
+        if df is None or len(df) == 0:
+            raise Exception(f"本地和远程均无法获取 {code} 的 {freq} 数据")
+        
+        df = df[KLINE_COLUMNS].copy()
+        df.index = pd.to_datetime(df.index)
+        df.index.name = 'date'
+        return df.sort_index()
+    
+    @staticmethod
+    def _missing_ranges(
+        coverage: Optional[dict],
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        计算本地覆盖区间之外、包含交易日的头部/尾部区间
+
+        交易时段内的请求只把覆盖范围记到请求时刻，因此同一天覆盖范围在收盘前结束时，
+        按完整时间比较，补齐之后新产生的K线。
+        """
+        if coverage is None:
+            return [(start_date, end_date)] if _has_trading_day(start_date, end_date) else []
+        
+        covered_start = pd.Timestamp(coverage['start_date']).to_pydatetime()
+        covered_end = pd.Timestamp(coverage['end_date']).to_pydatetime()
+        
+        missing = []
+        if start_date.date() < covered_start.date():
+            head_end = covered_start - timedelta(days=1)
+            if _has_trading_day(start_date, head_end):
+                missing.append((start_date, covered_start))
+        if end_date.date() > covered_end.date():
+            tail_start = covered_end + timedelta(days=1)
+            if _has_trading_day(tail_start, end_date):
+                missing.append((covered_end, end_date))
+        elif (
+            end_date > covered_end
+            and covered_end < datetime.combine(covered_end.date(), MARKET_CLOSE)
+            and _has_trading_day(end_date, end_date)
+        ):
+            missing.append((covered_end, end_date))
+        return missing
@@ -0,0 +1,366 @@
+"""回测任务队列 - 回测在工作进程中执行，请求处理协程只负责提交和等待，不阻塞事件循环"""
+import asyncio
+import heapq
+import inspect
+import itertools
+import os
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+from loguru import logger
+
+from .backtest_data_provider import BacktestDataProvider
+from .backtest_result_cache import BacktestResultCache, data_fingerprint, get_shared_result_cache, make_cache_key
+from .backtest_service import BacktestEngine, MEMORY_MODES, RESULT_FORMATS
+
+
+# 任务优先级（数值越小越先执行）：交互式回测排在批量扫描之前
+JOB_PRIORITIES = {
+    'interactive': 0,
+    'bulk': 1,
+}
+
+# 已结束任务（含结果）最多保留的个数
+DEFAULT_MAX_FINISHED_JOBS = 500
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+class _PreloadedDataProvider:
+    """直接返回主进程已加载数据的数据提供器（工作进程中不访问DuckDB和远程数据源）"""
+
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+
+    async def get_data(self, **kwargs) -> pd.DataFrame:
+        return self.data
+
+
+def _run_backtest_job(task: Dict[str, Any]) -> Dict:
+    """在工作进程中运行一次回测"""
+    engine = BacktestEngine(
+        initial_capital=task['initial_capital'],
+        commission=task['commission'],
+        slippage=task['slippage'],
+        data_provider=_PreloadedDataProvider(task['data'])
+    )
+    return asyncio.run(engine.run_backtest(
+        stock_code=task['stock_code'],
+        start_date=task['start_date'],
+        end_date=task['end_date'],
+        freq=task['freq'],
+        strategy_params=task['strategy_params'],
+        result_format=task['result_format'],
+        memory_mode=task['memory_mode']
+    ))
+
+
+class BacktestJobQueue:
+    """
+    回测任务队列
+
+    提交后立即返回任务ID。主进程的事件循环中加载数据（I/O）并查询结果缓存，
+    模拟计算交给进程池。同时运行的任务数不超过max_workers，批量任务最多占用
+    bulk_workers个名额，始终为交互式任务留出空位；排队中的任务按优先级、
+    同优先级按提交顺序出队。任务状态变化时通知监听器（WebSocket推送）。
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        bulk_workers: Optional[int] = None,
+        data_provider: Optional[BacktestDataProvider] = None,
+        result_cache: Optional[BacktestResultCache] = None,
+        executor: Optional[Executor] = None,
+        max_finished_jobs: int = DEFAULT_MAX_FINISHED_JOBS
+    ):
+        """
+        初始化回测任务队列
+
+        Args:
+            max_workers: 同时运行的任务数（默认 min(4, CPU核数)）
+            bulk_workers: 批量任务最多同时运行的个数（默认 max_workers-1，至少为1）
+            data_provider: 回测数据提供器（默认按任务的data_source创建）
+            result_cache: 回测结果缓存，命中时不再提交到进程池
+            executor: 执行回测的进程池（默认按max_workers首次使用时创建）
+            max_finished_jobs: 已结束任务最多保留的个数
+        """
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.bulk_workers = bulk_workers if bulk_workers is not None else max(1, self.max_workers - 1)
+        self.data_provider = data_provider
+        self.result_cache = result_cache
+        self.max_finished_jobs = max_finished_jobs
+
+        self.jobs: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._results: Dict[str, Dict] = {}
+        self._specs: Dict[str, Dict[str, Any]] = {}
+        self._done: Dict[str, asyncio.Future] = {}
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._running = 0
+        self._running_bulk = 0
+        self._executor = executor
+        self._listeners: List[Callable[[Dict[str, Any]], Any]] = []
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], Any]):
+        """
+        注册任务事件监听器
+
+        Args:
+            listener: 接收事件字典的回调，可以是协程函数
+        """
+        self._listeners.append(listener)
+
+    def submit(
+        self,
+        stock_code: str,
+        start_date: datetime,
+        end_date: datetime,
+        freq: str = '1d',
+        strategy_params: Optional[Dict] = None,
+        initial_capital: float = 100000.0,
+        commission: float = 0.0003,
+        slippage: float = 0.001,
+        result_format: str = 'rows',
+        memory_mode: str = 'standard',
+        data_source: str = 'auto',
+        priority: str = 'interactive'
+    ) -> str:
+        """
+        提交回测任务（需要在事件循环中调用）
+
+        参数与 BacktestEngine.run_backtest 相同，另加任务优先级。
+
+        Returns:
+            任务ID
+        """
+        if priority not in JOB_PRIORITIES:
+            raise ValueError(f"不支持的任务优先级: {priority}")
+        if result_format not in RESULT_FORMATS:
+            raise ValueError(f"不支持的结果格式: {result_format}")
+        if memory_mode not in MEMORY_MODES:
+            raise ValueError(f"不支持的内存模式: {memory_mode}")
+
+        job_id = uuid.uuid4().hex
+        strategy_params = strategy_params or {}
+        self._specs[job_id] = {
+            'stock_code': stock_code,
+            'start_date': start_date,
+            'end_date': end_date,
+            'freq': freq,
+            'strategy_params': strategy_params,
+            'initial_capital': initial_capital,
+            'commission': commission,
+            'slippage': slippage,
+            'result_format': result_format,
+            'memory_mode': memory_mode,
+            'data_source': data_source
+        }
+        self.jobs[job_id] = {
+            'job_id': job_id,
+            'status': 'queued',
+            'priority': priority,
+            'stock_code': stock_code,
+            'strategy_type': strategy_params.get('type', 'MA'),
+            'progress': 0.0,
+            'message': '排队中',
+            'submitted_at': datetime.now().isoformat()
+        }
+        self._done[job_id] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (JOB_PRIORITIES[priority], next(self._seq), job_id))
+
+        logger.info(f"提交回测任务: {job_id}, {stock_code}, 优先级: {priority}")
+        self._notify(job_id)
+        self._dispatch()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务状态，任务不存在时返回None"""
+        job = self.jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    def get_result(self, job_id: str) -> Optional[Dict]:
+        """获取已完成任务的回测结果"""
+        return self._results.get(job_id)
+
+    def list_jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按提交顺序列出任务"""
+        return [dict(job) for job in self.jobs.values() if status is None or job['status'] == status]
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取队列统计"""
+        stats = {status: 0 for status in ('queued', 'loading', 'running') + FINISHED_STATUSES}
+        for job in self.jobs.values():
+            stats[job['status']] += 1
+        stats['max_workers'] = self.max_workers
+        stats['bulk_workers'] = self.bulk_workers
+        return stats
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        取消排队中的任务（已开始的任务不能取消）
+
+        Returns:
+            是否已取消
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job['status'] != 'queued':
+            return False
+        self._specs.pop(job_id, None)
+        self._update(job_id, status='cancelled', message='已取消', finished_at=datetime.now().isoformat())
+        self._finish(job_id)
+        return True
+
+    async def wait(self, job_id: str) -> Dict:
+        """
+        等待任务结束并返回回测结果
+
+        Raises:
+            KeyError: 任务不存在
+            Exception: 任务失败或被取消
+        """
+        if job_id not in self.jobs:
+            raise KeyError(job_id)
+        future = self._done.get(job_id)
+        if future is not None:
+            await asyncio.shield(future)
+
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job['status'] == 'completed':
+            return self._results[job_id]
+        if job['status'] == 'cancelled':
+            raise Exception("回测任务已取消")
+        raise Exception(job.get('error') or "回测任务失败")
+
+    async def run(self, **kwargs) -> Dict:
+        """提交任务并等待结果，参数与 submit 相同"""
+        return await self.wait(self.submit(**kwargs))
+
+    def shutdown(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _get_data_provider(self, data_source: str) -> BacktestDataProvider:
+        if self.data_provider is not None:
+            return self.data_provider
+        return BacktestDataProvider(data_source=data_source)
+
+    def _dispatch(self):
+        """在并发名额内按优先级启动排队中的任务"""
+        while self._heap and self._running < self.max_workers:
+            job_id = self._heap[0][2]
+            job = self.jobs.get(job_id)
+            if job is None or job['status'] != 'queued':
+                heapq.heappop(self._heap)
+                continue
+            is_bulk = job['priority'] == 'bulk'
+            # 堆顶已是批量任务，后面也都是批量任务
+            if is_bulk and self._running_bulk >= self.bulk_workers:
+                break
+
+            heapq.heappop(self._heap)
+            self._running += 1
+            self._running_bulk += is_bulk
+            self._update(job_id, status='loading', progress=0.1, message='加载数据',
+                         started_at=datetime.now().isoformat())
+            asyncio.get_running_loop().create_task(self._execute(job_id, is_bulk))
+
+    async def _execute(self, job_id: str, is_bulk: bool):
+        """执行一个任务：主进程加载数据并查缓存，进程池计算"""
+        spec = self._specs.pop(job_id)
+        try:
+            df = await self._get_data_provider(spec['data_source']).get_data(
+                code=spec['stock_code'],
+                start_date=spec['start_date'],
+                end_date=spec['end_date'],
+                freq=spec['freq']
+            )
+            if df is None or len(df) == 0:
+                raise Exception("无法获取历史数据")
+
+            result, cache_key = None, None
+            if self.result_cache is not None:
+                cache_key = make_cache_key(
+                    spec['stock_code'], spec['freq'], spec['start_date'], spec['end_date'],
+                    data_fingerprint(df), spec['strategy_params'], spec['initial_capital'],
+                    spec['commission'], spec['slippage'], spec['result_format'], spec['memory_mode']
+                )
+                result = self.result_cache.get(cache_key)
+
+            if result is None:
+                self._update(job_id, status='running', progress=0.3, message='回测计算中')
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._get_executor(), _run_backtest_job, {**spec, 'data': df})
+                if cache_key is not None:
+                    self.result_cache.put(cache_key, spec['stock_code'], spec['freq'], result)
+
+            self._results[job_id] = result
+            self._update(job_id, status='completed', progress=1.0, message='回测完成',
+                         finished_at=datetime.now().isoformat())
+            logger.info(f"回测任务完成: {job_id}")
+
+        except Exception as e:
+            logger.error(f"回测任务失败: {job_id}, {e}")
+            self._update(job_id, status='failed', message='回测失败', error=str(e),
+                         finished_at=datetime.now().isoformat())
+
+        finally:
+            self._running -= 1
+            self._running_bulk -= is_bulk
+            self._finish(job_id)
+            self._dispatch()
+
+    def _update(self, job_id: str, **fields):
+        self.jobs[job_id].update(fields)
+        self._notify(job_id)
+
+    def _finish(self, job_id: str):
+        """唤醒等待者，并淘汰超出保留个数的最早结束的任务"""
+        future = self._done.pop(job_id, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+        finished = [jid for jid, job in self.jobs.items() if job['status'] in FINISHED_STATUSES]
+        for jid in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[jid]
+            self._results.pop(jid, None)
+
+    def _notify(self, job_id: str):
+        """向监听器推送任务事件，完成事件附带回测结果"""
+        if not self._listeners:
+            return
+        event = {'type': 'backtest_job', 'job_id': job_id, 'data': dict(self.jobs[job_id])}
+        if event['data']['status'] == 'completed':
+            event['result'] = self._results.get(job_id)
+
+        for listener in self._listeners:
+            try:
+                ret = listener(event)
+                if inspect.isawaitable(ret):
+                    asyncio.ensure_future(ret)
+            except Exception as e:
+                logger.warning(f"回测任务事件推送失败: {e}")
+
+
+_job_queue: Optional[BacktestJobQueue] = None
+
+
+def get_backtest_job_queue() -> BacktestJobQueue:
+    """获取全局回测任务队列"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = BacktestJobQueue(result_cache=get_shared_result_cache())
+    return _job_queue
@@ -0,0 +1,388 @@
+"""回测模拟内核 - 基于NumPy数组的持仓模拟"""
+from typing import Dict, Tuple
+import numpy as np
+
+
+# 买入时使用的现金比例
+BUY_CASH_RATIO = 0.8
+
+
+def process_signal(
+    signal: float,
+    price: float,
+    prev_cash: float,
+    prev_shares: float,
+    commission: float,
+    slippage: float
+) -> Tuple[float, float, int, float]:
+    """
+    处理单个交易信号
+
+    Args:
+        signal: 信号值（1买入，-1卖出，其他忽略）
+        price: 当前收盘价
+        prev_cash: 前一根K线的现金
+        prev_shares: 前一根K线的持股数
+        commission: 手续费率
+        slippage: 滑点
+
+    Returns:
+        (新现金, 新持股数, 交易类型, 交易金额)
+    """
+    # 买入信号
+    if signal == 1 and prev_shares == 0:
+        buy_cash = prev_cash * BUY_CASH_RATIO
+        actual_price = price * (1 + slippage)
+        shares_to_buy = buy_cash / actual_price
+        total_cost = shares_to_buy * actual_price * (1 + commission)
+
+        if total_cost <= prev_cash:
+            return prev_cash - total_cost, shares_to_buy, 1, total_cost
+        return prev_cash, prev_shares, 0, 0.0
+
+    # 卖出信号
+    if signal == -1 and prev_shares > 0:
+        actual_price = price * (1 - slippage)
+        sell_amount = prev_shares * actual_price
+        net_amount = sell_amount * (1 - commission)
+        return prev_cash + net_amount, 0, -1, sell_amount
+
+    return prev_cash, prev_shares, 0, 0.0
+
+
+def simulate_signals(
+    signal: np.ndarray,
+    close: np.ndarray,
+    initial_capital: float,
+    commission: float,
+    slippage: float,
+    initial_shares: float = 0.0,
+    trade_from: int = 1
+) -> Dict[str, np.ndarray]:
+    """
+    在NumPy数组上运行持仓模拟
+
+    只在可能成交的K线（信号为1或-1）上逐笔处理，其余K线的现金和持仓
+    由最近一笔成交向前填充，复杂度为 O(n + 信号数)。默认第一根K线不交易，
+    与逐行回测的语义一致。
+
+    Args:
+        signal: 交易信号数组
+        close: 收盘价数组
+        initial_capital: 初始资金（分块模拟时为上一块期末现金）
+        commission: 手续费率
+        slippage: 滑点
+        initial_shares: 初始持股数（分块模拟时为上一块期末持股）
+        trade_from: 允许交易的第一根K线下标（分块模拟的后续块为0）
+
+    Returns:
+        包含 cash, shares, trade_type, trade_price, trade_amount 的数组字典
+    """
+    sig = np.asarray(signal, dtype=np.float64)
+    px = np.asarray(close, dtype=np.float64)
+    n = len(px)
+
+    candidates = np.flatnonzero((sig == 1) | (sig == -1))
+    candidates = candidates[candidates >= trade_from]
+
+    trade_idx = []
+    cash_after = [float(initial_capital)]
+    shares_after = [float(initial_shares)]
+    trade_types = []
+    trade_amounts = []
+
+    cash = float(initial_capital)
+    shares = float(initial_shares)
+    for i in candidates.tolist():
+        new_cash, new_shares, trade_type, trade_amount = process_signal(
+            sig[i], float(px[i]), cash, shares, commission, slippage
+        )
+        if trade_type == 0:
+            continue
+        cash, shares = new_cash, float(new_shares)
+        trade_idx.append(i)
+        cash_after.append(cash)
+        shares_after.append(shares)
+        trade_types.append(trade_type)
+        trade_amounts.append(trade_amount)
+
+    # 每根K线对应的最近一笔成交序号（0表示尚未成交）
+    trade_idx = np.asarray(trade_idx, dtype=np.int64)
+    markers = np.zeros(n, dtype=np.int64)
+    markers[trade_idx] = 1
+    state = np.cumsum(markers)
+
+    trade_type_arr = np.zeros(n, dtype=np.int64)
+    trade_type_arr[trade_idx] = trade_types
+    trade_price_arr = np.zeros(n, dtype=np.float64)
+    trade_price_arr[trade_idx] = px[trade_idx]
+    trade_amount_arr = np.zeros(n, dtype=np.float64)
+    trade_amount_arr[trade_idx] = trade_amounts
+
+    return {
+        'cash': np.asarray(cash_after, dtype=np.float64)[state],
+        'shares': np.asarray(shares_after, dtype=np.float64)[state],
+        'trade_type': trade_type_arr,
+        'trade_price': trade_price_arr,
+        'trade_amount': trade_amount_arr,
+    }
+
+
+def simulate_signal_matrix(
+    signals: np.ndarray,
+    close: np.ndarray,
+    initial_capital: float,
+    commission: float,
+    slippage: float
+) -> Dict[str, np.ndarray]:
+    """
+    对多组信号（每列一组参数）同时运行持仓模拟
+
+    Args:
+        signals: 信号矩阵 (n_bars, n_sets)
+        close: 收盘价数组 (n_bars,)
+        initial_capital: 初始资金
+        commission: 手续费率
+        slippage: 滑点
+
+    Returns:
+        包含 total_value (n_bars, n_sets) 和 trade_count (n_sets,) 的字典
+    """
+    px = np.asarray(close, dtype=np.float64)
+    n_bars, n_sets = signals.shape
+    # 按列填充，使用列优先存储保证每列内存连续
+    cash = np.empty((n_bars, n_sets), dtype=np.float64, order='F')
+    shares = np.empty((n_bars, n_sets), dtype=np.float64, order='F')
+    trade_count = np.zeros(n_sets, dtype=np.int64)
+
+    for j in range(n_sets):
+        sim = simulate_signals(signals[:, j], px, initial_capital, commission, slippage)
+        cash[:, j] = sim['cash']
+        shares[:, j] = sim['shares']
+        trade_count[j] = np.count_nonzero(sim['trade_type'])
+
+    # 原地计算总市值，避免额外的 n_bars x n_sets 临时矩阵
+    np.multiply(shares, px[:, None], out=shares)
+    np.add(cash, shares, out=cash)
+    return {'total_value': cash, 'trade_count': trade_count}
+
+
+def calculate_metrics(
+    total_value: np.ndarray,
+    trade_count: np.ndarray,
+    initial_capital: float,
+    periods_per_year: int = 252,
+    risk_free_rate: float = 0.03
+) -> Dict[str, np.ndarray]:
+    """
+    按列计算绩效指标
+
+    Args:
+        total_value: 总市值矩阵 (n_bars, n_sets)
+        trade_count: 每列的交易次数 (n_sets,)
+        initial_capital: 初始资金
+        periods_per_year: 每年周期数
+        risk_free_rate: 年化无风险利率
+
+    Returns:
+        指标名到 (n_sets,) 数组的字典
+    """
+    tv = np.asarray(total_value, dtype=np.float64)
+    if tv.ndim == 1:
+        tv = tv[:, None]
+    n_bars, n_sets = tv.shape
+
+    total_return = (tv[-1] - initial_capital) / initial_capital
+
+    # 年化收益率
+    years = n_bars / periods_per_year
+    with np.errstate(invalid='ignore', divide='ignore'):
+        annual_return = (1 + total_return) ** (1 / years) - 1 if years > 0 else np.zeros(n_sets)
+
+    # 最大回撤
+    running_max = np.fmax.accumulate(tv, axis=0)
+    drawdown = (tv - running_max) / running_max
+    max_drawdown = np.abs(np.nanmin(drawdown, axis=0))
+
+    # 逐期收益率（忽略缺失值）
+    returns = tv[1:] / tv[:-1] - 1
+    valid = ~np.isnan(returns)
+    n_valid = valid.sum(axis=0)
+    filled = np.where(valid, returns, 0.0)
+    mean = filled.sum(axis=0) / np.maximum(n_valid, 1)
+    sq_dev = np.where(valid, (returns - mean) ** 2, 0.0).sum(axis=0)
+    std = np.sqrt(sq_dev / np.maximum(n_valid - 1, 1))
+    has_std = (n_valid > 1) & (std != 0)
+
+    # 夏普比率
+    rf = risk_free_rate / periods_per_year
+    safe_std = np.where(has_std, std, 1.0)
+    sharpe_ratio = np.where(has_std, np.sqrt(periods_per_year) * (mean - rf) / safe_std, 0.0)
+
+    # 胜率
+    wins = returns > 0
+    losses = returns < 0
+    n_wins = wins.sum(axis=0)
+    n_losses = losses.sum(axis=0)
+    n_nonzero = n_wins + n_losses
+    win_rate = np.where(n_nonzero > 0, n_wins / np.maximum(n_nonzero, 1), 0.0)
+
+    # 盈亏比
+    avg_win = np.where(wins, returns, 0.0).sum(axis=0) / np.maximum(n_wins, 1)
+    avg_loss = np.abs(np.where(losses, returns, 0.0).sum(axis=0) / np.maximum(n_losses, 1))
+    has_both = (n_wins > 0) & (n_losses > 0) & (avg_loss != 0)
+    profit_loss_ratio = np.where(has_both, avg_win / np.where(has_both, avg_loss, 1.0), 0.0)
+
+    # 波动率
+    volatility = np.where(n_valid > 1, std * np.sqrt(periods_per_year), 0.0)
+
+    # 卡尔马比率
+    has_dd = max_drawdown != 0
+    calmar_ratio = np.where(has_dd, annual_return / np.where(has_dd, max_drawdown, 1.0), 0.0)
+
+    return {
+        'total_return': total_return,
+        'annual_return': annual_return,
+        'max_drawdown': max_drawdown,
+        'sharpe_ratio': sharpe_ratio,
+        'win_rate': win_rate,
+        'trade_count': np.asarray(trade_count, dtype=np.int64),
+        'profit_loss_ratio': profit_loss_ratio,
+        'volatility': volatility,
+        'calmar_ratio': calmar_ratio
+    }
+
+
+def metrics_to_dicts(metrics: Dict[str, np.ndarray]) -> list:
+    """将按列的指标数组拆分为每组参数一个字典"""
+    names = list(metrics.keys())
+    columns = [metrics[name].tolist() for name in names]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def simulate_portfolio(
+    signals: np.ndarray,
+    close: np.ndarray,
+    tradable: np.ndarray,
+    initial_capital: float,
+    commission: float,
+    slippage: float
+) -> Dict[str, np.ndarray]:
+    """
+    多标的共享现金账户的持仓模拟
+
+    只遍历至少有一个标的出现信号的K线，每根K线内按标的向量化处理：
+    先卖出，再把当前现金的80%平均分配给所有可交易的空仓标的，
+    并只用于本根K线出现买入信号的标的。单标的时与 simulate_signals 一致。
+
+    Args:
+        signals: 信号矩阵 (n_bars, n_symbols)
+        close: 收盘价矩阵 (n_bars, n_symbols)，停牌K线可为前值填充
+        tradable: 可交易掩码 (n_bars, n_symbols)，停牌或未上市为False
+        initial_capital: 初始资金
+        commission: 手续费率
+        slippage: 滑点
+
+    Returns:
+        包含 cash (n_bars,)、持仓变动事件 event_bar/event_symbol/event_shares
+        以及 trade_count (n_symbols,) 的字典
+    """
+    n_bars, n_symbols = close.shape
+    active = ((signals == 1) | (signals == -1)) & tradable
+    active[:1] = False
+    event_rows = np.flatnonzero(active.any(axis=1))
+
+    cash = float(initial_capital)
+    shares = np.zeros(n_symbols, dtype=np.float64)
+    trade_count = np.zeros(n_symbols, dtype=np.int64)
+    cash_rows = []
+    cash_values = [cash]
+    event_bar = []
+    event_symbol = []
+    event_shares = []
+
+    for t in event_rows.tolist():
+        sig = signals[t]
+        px = close[t].astype(np.float64)
+        ok = tradable[t]
+
+        # 卖出
+        sell = np.flatnonzero((sig == -1) & (shares > 0) & ok)
+        if len(sell) > 0:
+            sell_amount = shares[sell] * (px[sell] * (1 - slippage))
+            cash = cash + float((sell_amount * (1 - commission)).sum())
+            shares[sell] = 0.0
+            trade_count[sell] += 1
+            event_bar.extend([t] * len(sell))
+            event_symbol.extend(sell.tolist())
+            event_shares.extend([0.0] * len(sell))
+
+        # 买入：当前现金的80%平均分配给所有可交易的空仓标的
+        buy = np.flatnonzero((sig == 1) & (shares == 0) & ok)
+        if len(buy) > 0:
+            n_flat = np.count_nonzero((shares == 0) & ok)
+            budget = cash * BUY_CASH_RATIO / n_flat
+            actual_price = px[buy] * (1 + slippage)
+            shares_to_buy = budget / actual_price
+            total_cost = shares_to_buy * actual_price * (1 + commission)
+
+            affordable = np.cumsum(total_cost) <= cash
+            buy = buy[affordable]
+            if len(buy) > 0:
+                cash = cash - float(total_cost[affordable].sum())
+                shares[buy] = shares_to_buy[affordable]
+                trade_count[buy] += 1
+                event_bar.extend([t] * len(buy))
+                event_symbol.extend(buy.tolist())
+                event_shares.extend(shares_to_buy[affordable].tolist())
+
+        cash_rows.append(t)
+        cash_values.append(cash)
+
+    markers = np.zeros(n_bars, dtype=np.int64)
+    markers[np.asarray(cash_rows, dtype=np.int64)] = 1
+
+    return {
+        'cash': np.asarray(cash_values, dtype=np.float64)[np.cumsum(markers)],
+        'event_bar': np.asarray(event_bar, dtype=np.int64),
+        'event_symbol': np.asarray(event_symbol, dtype=np.int64),
+        'event_shares': np.asarray(event_shares, dtype=np.float64),
+        'trade_count': trade_count,
+    }
+
+
+def position_value_matrix(
+    sim: Dict[str, np.ndarray],
+    close: np.ndarray,
+    columns: slice,
+    dtype=np.float64
+) -> np.ndarray:
+    """
+    根据持仓变动事件重建部分标的的逐K线持仓市值
+
+    Args:
+        sim: simulate_portfolio 的返回值
+        close: 收盘价矩阵 (n_bars, n_symbols)
+        columns: 需要重建的标的列范围
+        dtype: 输出精度
+
+    Returns:
+        持仓市值矩阵 (n_bars, 列数)，未持仓处为0
+    """
+    px = close[:, columns]
+    n_bars, width = px.shape
+    start = columns.start or 0
+
+    in_range = (sim['event_symbol'] >= start) & (sim['event_symbol'] < start + width)
+    shares = np.full((n_bars, width), np.nan, dtype=dtype)
+    shares[0] = 0
+    shares[sim['event_bar'][in_range], sim['event_symbol'][in_range] - start] = sim['event_shares'][in_range]
+
+    # 列方向向前填充持仓数
+    row_idx = np.where(np.isnan(shares), 0, np.arange(n_bars)[:, None])
+    np.maximum.accumulate(row_idx, axis=0, out=row_idx)
+    shares = np.take_along_axis(shares, row_idx, axis=0)
+
+    value = shares * px
+    value[shares == 0] = 0
+    return value.astype(dtype, copy=False)
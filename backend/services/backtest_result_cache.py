@@ -0,0 +1,238 @@
+"""回测结果缓存 - 以数据指纹和参数为键，持久化在DuckDB中"""
+import hashlib
+import json
+import zlib
+from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .backtest_data_provider import STORAGE_FREQ_MAP, get_shared_storage
+from .duckdb_storage_service import DuckDBStorageService
+
+
+# 默认最多缓存的结果条数和压缩后总字节数
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+FINGERPRINT_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """
+    计算K线数据内容指纹
+
+    对时间索引和OHLCV列的原始字节做哈希，数据任何一行变化都会改变指纹。
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(pd.DatetimeIndex(df.index).asi8).tobytes())
+    for col in FINGERPRINT_COLUMNS:
+        if col in df.columns:
+            h.update(col.encode())
+            h.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+def make_cache_key(
+    stock_code: str,
+    freq: str,
+    start_date: datetime,
+    end_date: datetime,
+    fingerprint: str,
+    strategy_params: Optional[Dict],
+    initial_capital: float,
+    commission: float,
+    slippage: float,
+    result_format: str = 'rows',
+    memory_mode: str = 'standard'
+) -> str:
+    """生成回测结果缓存键"""
+    payload = json.dumps({
+        'stock_code': stock_code,
+        'freq': freq,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'fingerprint': fingerprint,
+        'strategy_params': strategy_params or {},
+        'initial_capital': initial_capital,
+        'commission': commission,
+        'slippage': slippage,
+        'result_format': result_format,
+        'memory_mode': memory_mode
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class BacktestResultCache:
+    """
+    回测结果缓存
+
+    结果以压缩JSON存放在DuckDB的backtest_result_cache表中，超过条数或字节上限时
+    按最近访问时间淘汰。kline_data写入、删除或字段更新时由存储服务删除对应股票的
+    缓存；键中的数据指纹保证即使绕过存储服务修改了数据也不会命中旧结果。
+    """
+
+    def __init__(
+        self,
+        storage: Optional[DuckDBStorageService] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        初始化回测结果缓存
+
+        Args:
+            storage: DuckDB存储服务（默认使用进程内共享实例）
+            max_entries: 最大缓存条数
+            max_bytes: 最大缓存字节数（压缩后）
+        """
+        self.storage = storage if storage is not None else get_shared_storage()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """本地DuckDB不可用时缓存不生效"""
+        return self.storage is not None
+
+    def get(self, cache_key: str) -> Optional[Dict]:
+        """
+        读取缓存结果
+
+        Args:
+            cache_key: 缓存键
+
+        Returns:
+            回测结果字典，未命中返回None
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            row = self.storage.con.execute("""
+                SELECT result FROM backtest_result_cache WHERE cache_key = ?
+            """, [cache_key]).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.storage.con.execute("""
+                UPDATE backtest_result_cache
+                SET last_accessed = ?, hit_count = hit_count + 1
+                WHERE cache_key = ?
+            """, [datetime.now(), cache_key])
+            self.hits += 1
+            return json.loads(zlib.decompress(row[0]))
+
+        except Exception as e:
+            logger.warning(f"读取回测结果缓存失败: {e}")
+            return None
+
+    def put(self, cache_key: str, stock_code: str, freq: str, result: Dict) -> bool:
+        """
+        写入缓存结果并按LRU淘汰超限条目
+
+        Args:
+            cache_key: 缓存键
+            stock_code: 股票代码
+            freq: 数据频率（回测频率或存储频率）
+            result: 回测结果字典
+
+        Returns:
+            是否成功
+        """
+        if not self.enabled:
+            return False
+
+        try:
+            blob = zlib.compress(json.dumps(result, default=str).encode())
+            now = datetime.now()
+            if len(blob) > self.max_bytes:
+                return False
+
+            self.storage.con.execute("""
+                INSERT OR REPLACE INTO backtest_result_cache
+                    (cache_key, stock_code, frequency, result, size_bytes, hit_count, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+            """, [cache_key, stock_code, STORAGE_FREQ_MAP.get(freq, freq), blob, len(blob), now, now])
+
+            self._evict()
+            return True
+
+        except Exception as e:
+            logger.warning(f"写入回测结果缓存失败: {e}")
+            return False
+
+    def _evict(self):
+        """淘汰最久未访问的条目，直到条数和字节数都在上限内"""
+        count, total = self.storage.con.execute("""
+            SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM backtest_result_cache
+        """).fetchone()
+
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # 按最近访问时间倒序累计，保留累计条数和字节数都不超限的前缀
+        self.storage.con.execute("""
+            DELETE FROM backtest_result_cache
+            WHERE cache_key IN (
+                SELECT cache_key FROM (
+                    SELECT cache_key,
+                           ROW_NUMBER() OVER w AS rank,
+                           SUM(size_bytes) OVER w AS cumulative_bytes
+                    FROM backtest_result_cache
+                    WINDOW w AS (ORDER BY last_accessed DESC, created_at DESC, cache_key)
+                )
+                WHERE rank > ? OR cumulative_bytes > ?
+            )
+        """, [self.max_entries, self.max_bytes])
+
+        evicted = count - self.storage.con.execute(
+            "SELECT COUNT(*) FROM backtest_result_cache"
+        ).fetchone()[0]
+        logger.info(f"回测结果缓存淘汰 {evicted} 条")
+
+    def clear(self) -> int:
+        """
+        清空缓存
+
+        Returns:
+            删除的条目数
+        """
+        if not self.enabled:
+            return 0
+        count = self.storage.con.execute("SELECT COUNT(*) FROM backtest_result_cache").fetchone()[0]
+        self.storage.con.execute("DELETE FROM backtest_result_cache")
+        return count
+
+    def get_statistics(self) -> Dict:
+        """获取缓存统计信息"""
+        if not self.enabled:
+            return {'enabled': False}
+        count, total = self.storage.con.execute("""
+            SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM backtest_result_cache
+        """).fetchone()
+        return {
+            'enabled': True,
+            'entries': int(count),
+            'size_bytes': int(total),
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+_shared_result_cache: Optional[BacktestResultCache] = None
+
+
+def get_shared_result_cache() -> BacktestResultCache:
+    """获取进程内共享的回测结果缓存"""
+    global _shared_result_cache
+    if _shared_result_cache is None:
+        _shared_result_cache = BacktestResultCache()
+    return _shared_result_cache
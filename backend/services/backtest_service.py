@@ -6,7 +6,69 @@ from typing import Dict, List, Optional, Tuple
 from loguru import logger
 import asyncio
 from data_adapters import AdapterFactory
-from .data_fetcher import DataFetcher
+from indicators.graph import IndicatorGraph, IndicatorGraphCache, Node, get_indicator_graph_cache
+from strategies import get_strategy
+from .backtest_data_provider import BacktestDataProvider
+from .backtest_result_cache import BacktestResultCache, data_fingerprint, make_cache_key
+from .monte_carlo import monte_carlo_analysis
+from .lean_backtest import DEFAULT_CHUNK_SIZE, run_lean_backtest, to_lean_frame
+from .backtest_kernel import (
+    simulate_signals,
+    simulate_signal_matrix,
+    simulate_portfolio,
+    position_value_matrix,
+    process_signal,
+    calculate_metrics,
+    metrics_to_dicts
+)
+
+
+# run_backtest支持的净值曲线/交易明细格式
+RESULT_FORMATS = ('rows', 'columnar')
+
+# run_backtest支持的内存模式
+MEMORY_MODES = ('standard', 'lean')
+
+
+def _ma_nodes(params: Dict) -> List[Node]:
+    return [
+        ('SMA', 'close', params.get('short_window', 5)),
+        ('SMA', 'close', params.get('long_window', 20))
+    ]
+
+
+def _rsi_nodes(params: Dict) -> List[Node]:
+    return [('RSI', 'close', params.get('rsi_window', 14))]
+
+
+def _boll_nodes(params: Dict) -> List[Node]:
+    window, num_std = params.get('boll_window', 20), params.get('num_std', 2)
+    return [
+        ('SMA', 'close', window),
+        ('BOLL_UPPER', 'close', window, num_std),
+        ('BOLL_LOWER', 'close', window, num_std)
+    ]
+
+
+def _macd_nodes(params: Dict) -> List[Node]:
+    key = (params.get('fast', 12), params.get('slow', 26), params.get('signal', 9))
+    return [('DIF', 'close') + key[:2], ('DEA', 'close') + key, ('MACD_HIST', 'close') + key]
+
+
+# 各策略依赖的指标节点（未知策略按MA处理）
+STRATEGY_INDICATOR_NODES = {
+    'MA': _ma_nodes,
+    'RSI': _rsi_nodes,
+    'BOLL': _boll_nodes,
+    'MACD': _macd_nodes,
+}
+
+
+def strategy_indicator_nodes(params: Dict) -> List[Node]:
+    """获取策略参数声明的指标节点（策略插件在计算信号时按需请求节点）"""
+    if get_strategy(params.get('type', 'MA')) is not None:
+        return []
+    return STRATEGY_INDICATOR_NODES.get(params.get('type', 'MA'), _ma_nodes)(params)
 
 
 class BacktestEngine:
@@ -14,7 +76,10 @@ class BacktestEngine:
     
     def __init__(self, initial_capital: float = 100000.0, 
                  commission: float = 0.0003,
-                 slippage: float = 0.001):
+                 slippage: float = 0.001,
+                 data_provider: Optional[BacktestDataProvider] = None,
+                 result_cache: Optional[BacktestResultCache] = None,
+                 indicator_cache: Optional[IndicatorGraphCache] = None):
         """
         初始化回测引擎
         
@@ -22,13 +87,26 @@ class BacktestEngine:
             initial_capital: 初始资金
             commission: 手续费率（默认0.03%）
             slippage: 滑点（默认0.1%）
+            data_provider: 回测数据提供器（默认本地DuckDB优先，按data_source补齐）
+            result_cache: 回测结果缓存（命中时run_backtest直接返回缓存结果，不更新portfolio）
+            indicator_cache: 指标计算图缓存（默认使用进程内共享缓存）
         """
         self.initial_capital = initial_capital
         self.commission = commission
         self.slippage = slippage
+        self.data_provider = data_provider
+        self.result_cache = result_cache
+        self.indicator_cache = indicator_cache if indicator_cache is not None else get_indicator_graph_cache()
         self.portfolio = None
+        self.trade_log = None
         self.trade_count = 0
         
+    def _get_data_provider(self, data_source: str) -> BacktestDataProvider:
+        """获取数据提供器，未注入时按数据源创建"""
+        if self.data_provider is not None:
+            return self.data_provider
+        return BacktestDataProvider(data_source=data_source)
+        
     async def run_backtest(
         self,
         stock_code: str,
@@ -36,7 +114,9 @@ class BacktestEngine:
         end_date: datetime,
         freq: str = 'daily',
         strategy_params: Dict = None,
-        data_source: str = 'auto'
+        data_source: str = 'auto',
+        result_format: str = 'rows',
+        memory_mode: str = 'standard'
     ) -> Dict:
         """
         运行回测
@@ -48,16 +128,25 @@ class BacktestEngine:
             freq: 数据频率
             strategy_params: 策略参数
             data_source: 数据源
+            result_format: 净值曲线和交易明细的格式，'rows'为每行一个字典，
+                'columnar'为每个字段一个数组（时间为毫秒时间戳）
+            memory_mode: 'standard'为完整的float64逐K线明细；'lean'为float32价格、
+                分块模拟且不保留中间列，适合多年的分钟K线
             
         Returns:
             回测结果字典
         """
+        if result_format not in RESULT_FORMATS:
+            raise ValueError(f"不支持的结果格式: {result_format}")
+        if memory_mode not in MEMORY_MODES:
+            raise ValueError(f"不支持的内存模式: {memory_mode}")
+        
         try:
             logger.info(f"开始回测: {stock_code}, {start_date} 到 {end_date}")
             
-            # 1. 获取历史数据
-            data_fetcher = DataFetcher(source=data_source)
-            df = await data_fetcher.get_data(
+            # 1. 获取历史数据（本地优先）
+            data_provider = self._get_data_provider(data_source)
+            df = await data_provider.get_data(
                 code=stock_code,
                 start_date=start_date,
                 end_date=end_date,
@@ -73,20 +162,41 @@ class BacktestEngine:
             if not has_volume:
                 logger.warning("⚠️ 数据源未返回成交量数据，请检查数据源配置")
             
-            # 2. 计算技术指标和信号
-            df = self._calculate_indicators(df, strategy_params)
-            
-            # 3. 运行回测
-            self.portfolio = self._run_backtest_simulation(df)
+            fingerprint = data_fingerprint(df)
+            cache_key = None
+            if self.result_cache is not None:
+                cache_key = make_cache_key(
+                    stock_code, freq, start_date, end_date, fingerprint,
+                    strategy_params, self.initial_capital, self.commission, self.slippage,
+                    result_format, memory_mode
+                )
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"命中回测结果缓存: {stock_code}")
+                    return cached
             
-            # 4. 计算绩效指标
-            metrics = self._calculate_metrics()
+            if memory_mode == 'lean':
+                # 2-4. 转为float32后丢弃float64原始数据，分块计算信号、模拟和指标
+                df = to_lean_frame(df)
+                metrics = self.run_lean(df, strategy_params)
+            else:
+                # 2. 计算技术指标和信号（同一份数据上的指标节点跨回测复用）
+                df = df.sort_index()
+                graph = self.indicator_cache.get((stock_code, freq, start_date, end_date, fingerprint), df)
+                df = self._calculate_indicators(df, strategy_params, graph)
+                
+                # 3. 运行回测
+                self.portfolio = self._run_backtest_simulation(df)
+                
+                # 4. 计算绩效指标
+                metrics = self._calculate_metrics()
             
             # 5. 获取交易明细
-            trades = self._get_trade_details()
+            columnar = result_format == 'columnar'
+            trades = self._get_trade_details(columnar)
             
             # 6. 生成净值曲线数据
-            equity_curve = self._generate_equity_curve()
+            equity_curve = self._generate_equity_curve(columnar)
             
             result = {
                 'stock_code': stock_code,
@@ -99,9 +209,14 @@ class BacktestEngine:
                 'trades': trades,
                 'equity_curve': equity_curve,
                 'data_points': len(df),
-                'trading_days': len(df)
+                'trading_days': len(df),
+                'result_format': result_format,
+                'memory_mode': memory_mode
             }
             
+            if cache_key is not None:
+                self.result_cache.put(cache_key, stock_code, freq, result)
+            
             logger.info(f"回测完成: 总收益率 {metrics['total_return']:.2%}")
             return result
             
@@ -109,13 +224,50 @@ class BacktestEngine:
             logger.error(f"回测失败: {e}")
             raise
     
-    def _calculate_indicators(self, df: pd.DataFrame, params: Dict) -> pd.DataFrame:
+    def run_lean(
+        self,
+        df: pd.DataFrame,
+        strategy_params: Dict,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        keep_intermediates: bool = False
+    ) -> Dict:
+        """
+        低内存模式回测
+        
+        价格列转为float32，信号和持仓模拟按块计算，portfolio只保留价格和总市值
+        （keep_intermediates为True时保留全部中间列），成交记录保存在trade_log中。
+        
+        Args:
+            df: K线数据
+            strategy_params: 策略参数
+            chunk_size: 每块K线数
+            keep_intermediates: 是否保留中间列
+            
+        Returns:
+            绩效指标字典
+        """
+        result = run_lean_backtest(
+            df, strategy_params or {}, self.initial_capital, self.commission, self.slippage,
+            chunk_size=chunk_size, keep_intermediates=keep_intermediates
+        )
+        self.portfolio = result['portfolio']
+        self.trade_log = result['trades']
+        self.trade_count = result['trade_count']
+        return result['metrics']
+    
+    def _calculate_indicators(
+        self,
+        df: pd.DataFrame,
+        params: Dict,
+        graph: Optional[IndicatorGraph] = None
+    ) -> pd.DataFrame:
         """
         计算技术指标和交易信号
         
         Args:
             df: 原始数据
             params: 策略参数
+            graph: 与排序后的df对应的指标计算图（默认新建）
             
         Returns:
             添加了技术指标的DataFrame
@@ -125,31 +277,39 @@ class BacktestEngine:
         # 确保数据按时间排序
         df = df.sort_index()
         
+        if graph is None:
+            graph = IndicatorGraph(df)
+        # 先计算策略声明的指标节点，已计算过的节点直接复用
+        graph.require(strategy_indicator_nodes(params))
+        
         # 获取策略类型
         strategy_type = params.get('type', 'MA')
+        plugin = get_strategy(strategy_type)
         
-        if strategy_type == 'MA':
-            df = self._calculate_ma_signals(df, params)
+        if plugin is not None:
+            df['signal'] = plugin.signals(graph, params)
+        elif strategy_type == 'MA':
+            df = self._calculate_ma_signals(df, params, graph)
         elif strategy_type == 'RSI':
-            df = self._calculate_rsi_signals(df, params)
+            df = self._calculate_rsi_signals(df, params, graph)
         elif strategy_type == 'BOLL':
-            df = self._calculate_boll_signals(df, params)
+            df = self._calculate_boll_signals(df, params, graph)
         elif strategy_type == 'MACD':
-            df = self._calculate_macd_signals(df, params)
+            df = self._calculate_macd_signals(df, params, graph)
         else:
             # 默认使用双均线策略
-            df = self._calculate_ma_signals(df, params)
+            df = self._calculate_ma_signals(df, params, graph)
         
         return df
     
-    def _calculate_ma_signals(self, df: pd.DataFrame, params: Dict) -> pd.DataFrame:
+    def _calculate_ma_signals(self, df: pd.DataFrame, params: Dict, graph: IndicatorGraph) -> pd.DataFrame:
         """计算均线策略信号"""
         short_window = params.get('short_window', 5)
         long_window = params.get('long_window', 20)
         
-        # 计算移动平均线
-        df['MA_short'] = df['close'].rolling(window=short_window).mean()
-        df['MA_long'] = df['close'].rolling(window=long_window).mean()
+        # 移动平均线
+        df['MA_short'] = graph.sma(short_window)
+        df['MA_long'] = graph.sma(long_window)
         
         # 生成信号
         df['signal'] = 0
@@ -162,18 +322,14 @@ class BacktestEngine:
         
         return df
     
-    def _calculate_rsi_signals(self, df: pd.DataFrame, params: Dict) -> pd.DataFrame:
+    def _calculate_rsi_signals(self, df: pd.DataFrame, params: Dict, graph: IndicatorGraph) -> pd.DataFrame:
         """计算RSI策略信号"""
         rsi_window = params.get('rsi_window', 14)
         oversold = params.get('oversold', 30)
         overbought = params.get('overbought', 70)
         
-        # 计算RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=rsi_window).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_window).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
+        # RSI
+        df['RSI'] = graph.rsi(rsi_window)
         
         # 生成信号
         df['signal'] = 0
@@ -186,16 +342,14 @@ class BacktestEngine:
         
         return df
     
-    def _calculate_boll_signals(self, df: pd.DataFrame, params: Dict) -> pd.DataFrame:
+    def _calculate_boll_signals(self, df: pd.DataFrame, params: Dict, graph: IndicatorGraph) -> pd.DataFrame:
         """计算布林带策略信号"""
         window = params.get('boll_window', 20)
         num_std = params.get('num_std', 2)
         
-        # 计算布林带
-        df['BOLL_mid'] = df['close'].rolling(window=window).mean()
-        df['BOLL_std'] = df['close'].rolling(window=window).std()
-        df['BOLL_upper'] = df['BOLL_mid'] + num_std * df['BOLL_std']
-        df['BOLL_lower'] = df['BOLL_mid'] - num_std * df['BOLL_std']
+        # 布林带（中轨与同周期均线是同一个节点）
+        df['BOLL_mid'], df['BOLL_upper'], df['BOLL_lower'] = graph.boll(window, num_std)
+        df['BOLL_std'] = graph.std(window)
         
         # 生成信号
         df['signal'] = 0
@@ -208,18 +362,14 @@ class BacktestEngine:
         
         return df
     
-    def _calculate_macd_signals(self, df: pd.DataFrame, params: Dict) -> pd.DataFrame:
+    def _calculate_macd_signals(self, df: pd.DataFrame, params: Dict, graph: IndicatorGraph) -> pd.DataFrame:
         """计算MACD策略信号"""
         fast = params.get('fast', 12)
         slow = params.get('slow', 26)
         signal = params.get('signal', 9)
         
-        # 计算MACD
-        ema_fast = df['close'].ewm(span=fast, adjust=False).mean()
-        ema_slow = df['close'].ewm(span=slow, adjust=False).mean()
-        df['MACD'] = ema_fast - ema_slow
-        df['MACD_signal'] = df['MACD'].ewm(span=signal, adjust=False).mean()
-        df['MACD_hist'] = df['MACD'] - df['MACD_signal']
+        # MACD
+        df['MACD'], df['MACD_signal'], df['MACD_hist'] = graph.macd(fast, slow, signal)
         
         # 生成信号
         df['signal'] = 0
@@ -232,217 +382,462 @@ class BacktestEngine:
         
         return df
     
+    def run_batch(
+        self,
+        df: pd.DataFrame,
+        strategy_type: str,
+        params_list: List[Dict],
+        max_matrix_mb: float = 256.0,
+        graph: Optional[IndicatorGraph] = None
+    ) -> List[Dict]:
+        """
+        在同一份数据上批量评估多组策略参数
+        
+        相同周期的指标只计算一次，所有参数组合的信号按列组成矩阵后一起模拟，
+        避免逐组调用 run_backtest 时重复获取数据和计算指标。
+        
+        Args:
+            df: 已获取的K线数据（需包含close列，策略插件还需要其声明的数据列）
+            strategy_type: 策略类型 (MA, RSI, BOLL, MACD 或已注册的策略插件)
+            params_list: 参数字典列表
+            max_matrix_mb: 单批模拟矩阵的内存上限（MB），超出时按列分块
+            graph: 与排序后的df对应的指标计算图，优化器多次调用时传入同一张图，
+                已计算过的指标不再重复计算
+            
+        Returns:
+            与 params_list 一一对应的绩效指标字典列表
+        """
+        if len(params_list) == 0:
+            return []
+        
+        df = df.sort_index()
+        close = df['close'].to_numpy(dtype=np.float64)
+        if graph is None:
+            graph = IndicatorGraph(df)
+        build_signals = self._get_batch_signal_builder(strategy_type)
+        
+        # 每组参数约占用若干个 n_bars 长度的 float64 临时数组
+        bytes_per_set = max(len(close), 1) * 8 * 8
+        chunk_size = max(1, int(max_matrix_mb * 1024 * 1024 // bytes_per_set))
+        
+        results = []
+        for i in range(0, len(params_list), chunk_size):
+            chunk = params_list[i:i + chunk_size]
+            signals = build_signals(graph, chunk)
+            sim = simulate_signal_matrix(
+                signals, close, self.initial_capital, self.commission, self.slippage
+            )
+            metrics = calculate_metrics(sim['total_value'], sim['trade_count'], self.initial_capital)
+            results.extend(metrics_to_dicts(metrics))
+        
+        return results
+    
+    def _get_batch_signal_builder(self, strategy_type: str):
+        """获取策略对应的批量信号构建函数"""
+        plugin = get_strategy(strategy_type)
+        if plugin is not None:
+            return lambda graph, params_list: np.column_stack(
+                [plugin.signals(graph, params) for params in params_list]
+            )
+        
+        builders = {
+            'MA': self._batch_ma_signals,
+            'RSI': self._batch_rsi_signals,
+            'BOLL': self._batch_boll_signals,
+            'MACD': self._batch_macd_signals,
+        }
+        # 与 _calculate_indicators 一致，未知策略默认使用双均线
+        return builders.get(strategy_type, self._batch_ma_signals)
+    
+    async def run_portfolio_backtest(
+        self,
+        stock_codes: List[str],
+        start_date: datetime,
+        end_date: datetime,
+        freq: str = 'daily',
+        strategy_params: Dict = None,
+        data_source: str = 'auto',
+        max_concurrency: int = 8,
+        include_symbol_curves: bool = False,
+        dtype=np.float64
+    ) -> Dict:
+        """
+        运行多标的组合回测（共享现金账户）
+        
+        Args:
+            stock_codes: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            freq: 数据频率
+            strategy_params: 策略参数（所有标的使用同一组参数）
+            data_source: 数据源
+            max_concurrency: 并发获取数据的最大数量
+            include_symbol_curves: 是否返回每个标的的持仓市值曲线（每个标的一条完整曲线，标的多时占用大量内存）
+            dtype: 价格矩阵精度（全市场回测可用np.float32减半内存）
+            
+        Returns:
+            组合回测结果字典
+        """
+        strategy_params = strategy_params or {}
+        logger.info(f"开始组合回测: {len(stock_codes)}只股票, {start_date} 到 {end_date}")
+        
+        data_provider = self._get_data_provider(data_source)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch_close(code: str) -> Optional[pd.Series]:
+            async with semaphore:
+                try:
+                    df = await data_provider.get_data(
+                        code=code, start_date=start_date, end_date=end_date, freq=freq
+                    )
+                except Exception as e:
+                    logger.warning(f"获取 {code} 数据失败，跳过: {e}")
+                    return None
+                if df is None or len(df) == 0:
+                    return None
+                return df['close'].rename(code)
+        
+        series = await asyncio.gather(*[fetch_close(code) for code in stock_codes])
+        closes = [s for s in series if s is not None]
+        failed_codes = [code for code, s in zip(stock_codes, series) if s is None]
+        
+        if len(closes) == 0:
+            raise Exception("无法获取任何股票的历史数据")
+        
+        # 按统一时间轴对齐（外连接）
+        close_df = pd.concat(closes, axis=1).sort_index()
+        
+        # 矩阵计算在线程池中运行，不阻塞事件循环
+        result = await asyncio.to_thread(
+            self.run_portfolio, close_df, strategy_params,
+            include_symbol_curves=include_symbol_curves, dtype=dtype
+        )
+        result.update({
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': end_date.strftime('%Y-%m-%d'),
+            'frequency': freq,
+            'failed_codes': failed_codes
+        })
+        
+        logger.info(f"组合回测完成: 总收益率 {result['metrics']['total_return']:.2%}")
+        return result
+    
+    def run_portfolio(
+        self,
+        close_df: pd.DataFrame,
+        strategy_params: Dict,
+        include_symbol_curves: bool = False,
+        dtype=np.float64,
+        max_matrix_mb: float = 256.0
+    ) -> Dict:
+        """
+        在已对齐的收盘价矩阵上运行组合回测
+        
+        Args:
+            close_df: 收盘价矩阵，索引为时间，每列一个标的，缺失值表示停牌或未上市
+            strategy_params: 策略参数
+            include_symbol_curves: 是否返回每个标的的持仓市值曲线（每个标的一条完整曲线，标的多时占用大量内存）
+            dtype: 价格矩阵精度
+            max_matrix_mb: 重建持仓市值时单块矩阵的内存上限（MB）
+            
+        Returns:
+            组合回测结果字典
+        """
+        close_df = close_df.sort_index()
+        codes = [str(c) for c in close_df.columns]
+        n_bars, n_symbols = close_df.shape
+        
+        tradable = close_df.notna().to_numpy()
+        # 停牌期间按前值估值，上市前保持缺失
+        price = close_df.ffill().to_numpy(dtype=dtype)
+        
+        # 逐标的在其自身的K线上计算信号，再放回统一时间轴
+        build_signals = self._get_batch_signal_builder(strategy_params.get('type', 'MA'))
+        signals = np.zeros((n_bars, n_symbols), dtype=np.int8)
+        for j in range(n_symbols):
+            rows = np.flatnonzero(tradable[:, j])
+            if len(rows) == 0:
+                continue
+            own_graph = IndicatorGraph({'close': price[rows, j]})
+            signals[rows, j] = build_signals(own_graph, [strategy_params])[:, 0]
+        
+        sim = simulate_portfolio(
+            signals, price, tradable, self.initial_capital, self.commission, self.slippage
+        )
+        
+        # 按列分块重建持仓市值，控制临时矩阵大小
+        chunk = max(1, int(max_matrix_mb * 1024 * 1024 // (max(n_bars, 1) * 24)))
+        position_value = np.zeros(n_bars, dtype=np.float64)
+        final_values = np.zeros(n_symbols, dtype=np.float64)
+        symbol_curves = {}
+        for start in range(0, n_symbols, chunk):
+            cols = slice(start, min(start + chunk, n_symbols))
+            values = position_value_matrix(sim, price, cols, dtype=dtype)
+            position_value += values.sum(axis=1, dtype=np.float64)
+            final_values[cols] = values[-1] if n_bars > 0 else 0
+            if include_symbol_curves:
+                for k, code in enumerate(codes[cols]):
+                    symbol_curves[code] = values[:, k].astype(np.float64).tolist()
+        
+        total_value = sim['cash'] + position_value
+        trade_count = int(sim['trade_count'].sum())
+        metrics = metrics_to_dicts(
+            calculate_metrics(total_value, np.array([trade_count]), self.initial_capital)
+        )[0]
+        
+        dates = [idx.strftime('%Y-%m-%d %H:%M:%S') for idx in close_df.index]
+        equity_curve = [
+            {'date': d, 'total_value': tv, 'cash': c, 'position_value': pv}
+            for d, tv, c, pv in zip(dates, total_value.tolist(), sim['cash'].tolist(), position_value.tolist())
+        ]
+        symbols = [
+            {
+                'stock_code': code,
+                'trade_count': int(sim['trade_count'][j]),
+                'final_position_value': float(final_values[j]),
+                'data_points': int(tradable[:, j].sum())
+            }
+            for j, code in enumerate(codes)
+        ]
+        
+        result = {
+            'stock_codes': codes,
+            'initial_capital': self.initial_capital,
+            'final_capital': float(total_value[-1]) if n_bars > 0 else self.initial_capital,
+            'metrics': metrics,
+            'symbols': symbols,
+            'equity_curve': equity_curve,
+            'data_points': n_bars
+        }
+        if include_symbol_curves:
+            result['symbol_dates'] = dates
+            result['symbol_equity_curves'] = symbol_curves
+        return result
+    
+    @staticmethod
+    def _positions_to_signals(positions: np.ndarray) -> np.ndarray:
+        """将目标方向矩阵（1/-1/0）转换为信号矩阵（按列差分，首行为0）"""
+        signals = np.zeros(positions.shape, dtype=np.float64, order='F')
+        np.subtract(positions[1:], positions[:-1], out=signals[1:])
+        return signals
+    
+    def _batch_ma_signals(self, graph: IndicatorGraph, params_list: List[Dict]) -> np.ndarray:
+        """批量计算均线策略信号矩阵"""
+        short = [p.get('short_window', 5) for p in params_list]
+        long = [p.get('long_window', 20) for p in params_list]
+        
+        ma_short = np.column_stack([graph.sma(w) for w in short])
+        ma_long = np.column_stack([graph.sma(w) for w in long])
+        
+        positions = np.where(ma_short > ma_long, 1.0, np.where(ma_short < ma_long, -1.0, 0.0))
+        return self._positions_to_signals(positions)
+    
+    def _batch_rsi_signals(self, graph: IndicatorGraph, params_list: List[Dict]) -> np.ndarray:
+        """批量计算RSI策略信号矩阵"""
+        windows = [p.get('rsi_window', 14) for p in params_list]
+        oversold = np.array([p.get('oversold', 30) for p in params_list], dtype=np.float64)
+        overbought = np.array([p.get('overbought', 70) for p in params_list], dtype=np.float64)
+        
+        rsi = np.column_stack([graph.rsi(w) for w in windows])
+        positions = np.where(rsi < oversold, 1.0, np.where(rsi > overbought, -1.0, 0.0))
+        return self._positions_to_signals(positions)
+    
+    def _batch_boll_signals(self, graph: IndicatorGraph, params_list: List[Dict]) -> np.ndarray:
+        """批量计算布林带策略信号矩阵"""
+        windows = [p.get('boll_window', 20) for p in params_list]
+        num_std = np.array([p.get('num_std', 2) for p in params_list], dtype=np.float64)
+        
+        mid = np.column_stack([graph.sma(w) for w in windows])
+        std = np.column_stack([graph.std(w) for w in windows])
+        upper = mid + num_std * std
+        lower = mid - num_std * std
+        
+        px = graph.column('close')[:, None]
+        positions = np.where(px < lower, 1.0, np.where(px > upper, -1.0, 0.0))
+        return self._positions_to_signals(positions)
+    
+    def _batch_macd_signals(self, graph: IndicatorGraph, params_list: List[Dict]) -> np.ndarray:
+        """批量计算MACD策略信号矩阵"""
+        keys = [
+            (p.get('fast', 12), p.get('slow', 26), p.get('signal', 9))
+            for p in params_list
+        ]
+        hist = np.column_stack([graph.get('MACD_HIST', 'close', *k) for k in keys])
+        positions = np.where(hist > 0, 1.0, np.where(hist < 0, -1.0, 0.0))
+        return self._positions_to_signals(positions)
+    
     def _run_backtest_simulation(self, df: pd.DataFrame) -> pd.DataFrame:
         """运行回测模拟"""
-        # 初始化
-        self.portfolio = pd.DataFrame(index=df.index)
-        self.portfolio['cash'] = self.initial_capital
+        signal = df['signal'].fillna(0).to_numpy(dtype=np.float64)
+        close = df['close'].to_numpy(dtype=np.float64)
+        
+        # 在NumPy数组上模拟持仓，最后一次性构建portfolio
+        sim = simulate_signals(
+            signal, close, self.initial_capital, self.commission, self.slippage
+        )
+        
+        columns = {'cash': sim['cash']}
         
         # 保留OHLCV数据用于展示
         for col in ['open', 'high', 'low', 'close', 'volume']:
             if col in df.columns:
-                self.portfolio[col] = df[col]
-                
-        self.portfolio['signal'] = df['signal'].fillna(0)
-        self.portfolio['shares'] = 0.0
-        
-        # 记录交易信息
-        self.portfolio['trade_type'] = 0  # 0: 无交易, 1: 买入, -1: 卖出
-        self.portfolio['trade_price'] = 0.0
-        self.portfolio['trade_amount'] = 0.0
-        
-        # 逐行处理
-        for i in range(len(df)):
-            if i == 0:
-                self.portfolio.iloc[i, self.portfolio.columns.get_loc('shares')] = 0
-                continue
-                
-            prev_cash = self.portfolio.iloc[i-1]['cash']
-            prev_shares = self.portfolio.iloc[i-1]['shares']
-            
-            current_signal = self.portfolio.iloc[i]['signal']
-            current_price = self.portfolio.iloc[i]['close']
-            
-            new_cash, new_shares, trade_type, trade_amount = self._process_signal(
-                current_signal, current_price, prev_cash, prev_shares
-            )
-            
-            self.portfolio.iloc[i, self.portfolio.columns.get_loc('cash')] = new_cash
-            self.portfolio.iloc[i, self.portfolio.columns.get_loc('shares')] = new_shares
-            self.portfolio.iloc[i, self.portfolio.columns.get_loc('trade_type')] = trade_type
-            self.portfolio.iloc[i, self.portfolio.columns.get_loc('trade_price')] = current_price if trade_type != 0 else 0
-            self.portfolio.iloc[i, self.portfolio.columns.get_loc('trade_amount')] = trade_amount
+                columns[col] = df[col].to_numpy()
+        
+        columns['signal'] = signal
+        columns['shares'] = sim['shares']
+        
+        # 记录交易信息（trade_type: 0无交易, 1买入, -1卖出）
+        columns['trade_type'] = sim['trade_type']
+        columns['trade_price'] = sim['trade_price']
+        columns['trade_amount'] = sim['trade_amount']
         
         # 计算每日市值
-        self.portfolio['position_value'] = self.portfolio['shares'] * self.portfolio['close']
-        self.portfolio['total_value'] = self.portfolio['cash'] + self.portfolio['position_value']
+        position_value = sim['shares'] * close
+        total_value = sim['cash'] + position_value
+        columns['position_value'] = position_value
+        columns['total_value'] = total_value
         
         # 计算收益率
-        self.portfolio['returns'] = self.portfolio['total_value'].pct_change()
-        self.portfolio['cumulative_returns'] = (self.portfolio['total_value'] / self.initial_capital) - 1
+        returns = np.full(len(total_value), np.nan)
+        returns[1:] = total_value[1:] / total_value[:-1] - 1
+        columns['returns'] = returns
+        columns['cumulative_returns'] = (total_value / self.initial_capital) - 1
         
         # 计算回撤
-        self.portfolio['running_max'] = self.portfolio['total_value'].expanding().max()
-        self.portfolio['drawdown_pct'] = (self.portfolio['total_value'] - self.portfolio['running_max']) / self.portfolio['running_max']
+        running_max = np.fmax.accumulate(total_value) if len(total_value) > 0 else total_value
+        columns['running_max'] = running_max
+        columns['drawdown_pct'] = (total_value - running_max) / running_max
+        
+        self.portfolio = pd.DataFrame(columns, index=df.index)
+        self.trade_log = None
         
         # 统计交易次数
-        self.trade_count = len(self.portfolio[self.portfolio['trade_type'] != 0])
+        self.trade_count = int(np.count_nonzero(sim['trade_type']))
         
         return self.portfolio
     
     def _process_signal(self, signal: int, price: float, 
                        prev_cash: float, prev_shares: float) -> Tuple:
         """处理交易信号"""
-        trade_type = 0
-        trade_amount = 0.0
-        
-        # 买入信号
-        if signal == 1 and prev_shares == 0:
-            buy_cash = prev_cash * 0.8  # 使用80%现金
-            actual_price = price * (1 + self.slippage)
-            shares_to_buy = buy_cash / actual_price
-            total_cost = shares_to_buy * actual_price * (1 + self.commission)
-            
-            if total_cost <= prev_cash:
-                new_cash = prev_cash - total_cost
-                new_shares = shares_to_buy
-                trade_type = 1
-                trade_amount = total_cost
-            else:
-                new_cash = prev_cash
-                new_shares = prev_shares
-                
-        # 卖出信号
-        elif signal == -1 and prev_shares > 0:
-            actual_price = price * (1 - self.slippage)
-            sell_amount = prev_shares * actual_price
-            net_amount = sell_amount * (1 - self.commission)
-            
-            new_cash = prev_cash + net_amount
-            new_shares = 0
-            trade_type = -1
-            trade_amount = sell_amount
-            
-        else:
-            new_cash = prev_cash
-            new_shares = prev_shares
-            
-        return new_cash, new_shares, trade_type, trade_amount
+        return process_signal(
+            signal, price, prev_cash, prev_shares, self.commission, self.slippage
+        )
     
     def _calculate_metrics(self) -> Dict:
         """计算绩效指标"""
         if self.portfolio is None or len(self.portfolio) == 0:
             return {}
         
-        total_return = (self.portfolio['total_value'].iloc[-1] - self.initial_capital) / self.initial_capital
-        
-        # 年化收益率
-        trading_periods = len(self.portfolio)
-        if trading_periods > 0:
-            periods_per_year = 252  # 日线数据
-            years = trading_periods / periods_per_year
-            annual_return = (1 + total_return) ** (1 / years) - 1 if years > 0 else 0
-        else:
-            annual_return = 0
+        metrics = calculate_metrics(
+            self.portfolio['total_value'].to_numpy(dtype=np.float64),
+            np.array([self.trade_count]),
+            self.initial_capital
+        )
+        return metrics_to_dicts(metrics)[0]
+    
+    def run_monte_carlo(self, n_paths: int = 10000, method: str = 'bootstrap', **kwargs) -> Dict:
+        """
+        对最近一次回测的净值曲线做蒙特卡洛重采样
         
-        # 最大回撤
-        max_drawdown = abs(self.portfolio['drawdown_pct'].min()) if len(self.portfolio) > 0 else 0
+        Args:
+            n_paths: 模拟路径数
+            method: 重采样方法 (bootstrap, shuffle)
+            **kwargs: 传给 monte_carlo_analysis 的其他参数
+            
+        Returns:
+            夏普、最大回撤和总收益的分布统计及置信区间
+        """
+        if self.portfolio is None or len(self.portfolio) == 0:
+            raise ValueError("请先运行回测")
+        return monte_carlo_analysis(
+            self.portfolio['total_value'].to_numpy(), n_paths=n_paths, method=method, **kwargs
+        )
+    
+    def _get_trade_details(self, columnar: bool = False):
+        """
+        获取交易明细
         
-        # 夏普比率
-        returns = self.portfolio['returns'].dropna()
-        if len(returns) > 1 and returns.std() != 0:
-            risk_free_rate = 0.03 / 252
-            excess_returns = returns - risk_free_rate
-            sharpe_ratio = np.sqrt(252) * excess_returns.mean() / returns.std()
-        else:
-            sharpe_ratio = 0
-        
-        # 胜率
-        trade_returns = self.portfolio['returns'].dropna()
-        winning_trades = len(trade_returns[trade_returns > 0])
-        total_trades = len(trade_returns[trade_returns != 0])
-        win_rate = winning_trades / total_trades if total_trades > 0 else 0
-        
-        # 盈亏比
-        winning_returns = trade_returns[trade_returns > 0]
-        losing_returns = trade_returns[trade_returns < 0]
-        
-        if len(winning_returns) > 0 and len(losing_returns) > 0:
-            avg_win = winning_returns.mean()
-            avg_loss = abs(losing_returns.mean())
-            profit_loss_ratio = avg_win / avg_loss if avg_loss != 0 else 0
+        Args:
+            columnar: 是否返回列式结构（每个字段一个数组，date为毫秒时间戳）
+        """
+        # 低内存模式下成交记录单独保存，portfolio中没有trade_type列
+        if self.trade_log is not None:
+            trades = self.trade_log
         else:
-            profit_loss_ratio = 0
-        
-        # 波动率
-        volatility = returns.std() * np.sqrt(252) if len(returns) > 1 else 0
-        
-        # 卡尔马比率
-        calmar_ratio = annual_return / max_drawdown if max_drawdown != 0 else 0
-        
-        return {
-            'total_return': total_return,
-            'annual_return': annual_return,
-            'max_drawdown': max_drawdown,
-            'sharpe_ratio': sharpe_ratio,
-            'win_rate': win_rate,
-            'trade_count': self.trade_count,
-            'profit_loss_ratio': profit_loss_ratio,
-            'volatility': volatility,
-            'calmar_ratio': calmar_ratio
-        }
-    
-    def _get_trade_details(self) -> List[Dict]:
-        """获取交易明细"""
-        trades = self.portfolio[self.portfolio['trade_type'] != 0].copy()
+            trades = self.portfolio[self.portfolio['trade_type'] != 0]
+        
+        if columnar:
+            return {
+                'timestamp': self._epoch_millis(trades.index),
+                'type': np.where(trades['trade_type'].to_numpy() == 1, '买入', '卖出').tolist(),
+                'price': trades['trade_price'].to_numpy(dtype=np.float64).tolist(),
+                'amount': trades['trade_amount'].to_numpy(dtype=np.float64).tolist(),
+                'cash': trades['cash'].to_numpy(dtype=np.float64).tolist(),
+                'shares': trades['shares'].to_numpy(dtype=np.float64).tolist(),
+                'total_value': trades['total_value'].to_numpy(dtype=np.float64).tolist()
+            }
         
         if len(trades) == 0:
             return []
         
-        trades_list = []
-        for idx, row in trades.iterrows():
-            trades_list.append({
-                'date': idx.strftime('%Y-%m-%d %H:%M:%S'),
-                'type': '买入' if row['trade_type'] == 1 else '卖出',
-                'price': float(row['trade_price']),
-                'amount': float(row['trade_amount']),
-                'cash': float(row['cash']),
-                'shares': float(row['shares']),
-                'total_value': float(row['total_value'])
-            })
-        
-        return trades_list
+        keys = ('date', 'type', 'price', 'amount', 'cash', 'shares', 'total_value')
+        columns = (
+            trades.index.strftime('%Y-%m-%d %H:%M:%S'),
+            np.where(trades['trade_type'].to_numpy() == 1, '买入', '卖出').tolist(),
+            trades['trade_price'].to_numpy(dtype=np.float64).tolist(),
+            trades['trade_amount'].to_numpy(dtype=np.float64).tolist(),
+            trades['cash'].to_numpy(dtype=np.float64).tolist(),
+            trades['shares'].to_numpy(dtype=np.float64).tolist(),
+            trades['total_value'].to_numpy(dtype=np.float64).tolist()
+        )
+        return [dict(zip(keys, values)) for values in zip(*columns)]
     
-    def _generate_equity_curve(self) -> List[Dict]:
-        """生成净值曲线数据"""
+    def _generate_equity_curve(self, columnar: bool = False):
+        """
+        生成净值曲线数据
+        
+        Args:
+            columnar: 是否返回列式结构（每个字段一个数组，date为毫秒时间戳）
+        """
         if self.portfolio is None:
-            return []
+            return {} if columnar else []
         
-        equity_curve = []
-        for idx, row in self.portfolio.iterrows():
-            point = {
-                'date': idx.strftime('%Y-%m-%d %H:%M:%S'),
-                'total_value': float(row['total_value']),
-                'cumulative_return': float(row['cumulative_returns']),
-                'drawdown': float(row['drawdown_pct'])
-            }
-            
-            # 如果原始数据中有OHLCV，也包含进去用于前端K线图展示
-            if 'open' in row:
-                point['open'] = float(row['open'])
-                point['high'] = float(row['high'])
-                point['low'] = float(row['low'])
-                point['close'] = float(row['close'])
-                # 添加成交量数据
-                if 'volume' in row:
-                    point['volume'] = int(row['volume'])
-            elif 'close' in row:
-                # 兜底逻辑：如果只有close，则OHLC都设为close
-                point['open'] = point['high'] = point['low'] = point['close'] = float(row['close'])
-                # 如果有volume数据
-                if 'volume' in row:
-                    point['volume'] = int(row['volume'])
-                
-            equity_curve.append(point)
+        portfolio = self.portfolio
+        total_value = portfolio['total_value'].to_numpy(dtype=np.float64)
+        if 'cumulative_returns' in portfolio.columns:
+            cumulative_return = portfolio['cumulative_returns'].to_numpy(dtype=np.float64)
+            drawdown = portfolio['drawdown_pct'].to_numpy(dtype=np.float64)
+        else:
+            # 低内存模式不保留中间列，输出时由总市值现算
+            cumulative_return = total_value / self.initial_capital - 1
+            running_max = np.fmax.accumulate(total_value) if len(total_value) > 0 else total_value
+            drawdown = (total_value - running_max) / running_max
+        columns = {
+            'total_value': total_value.tolist(),
+            'cumulative_return': cumulative_return.tolist(),
+            'drawdown': drawdown.tolist()
+        }
         
-        return equity_curve
+        # 如果原始数据中有OHLCV，也包含进去用于前端K线图展示
+        if 'open' in portfolio.columns:
+            for col in ('open', 'high', 'low', 'close'):
+                columns[col] = portfolio[col].to_numpy(dtype=np.float64).tolist()
+        elif 'close' in portfolio.columns:
+            # 兜底逻辑：如果只有close，则OHLC都设为close
+            close = portfolio['close'].to_numpy(dtype=np.float64).tolist()
+            for col in ('open', 'high', 'low', 'close'):
+                columns[col] = close
+        if 'close' in portfolio.columns and 'volume' in portfolio.columns:
+            columns['volume'] = portfolio['volume'].astype(np.int64).tolist()
+        
+        if columnar:
+            return {'timestamp': self._epoch_millis(portfolio.index), **columns}
+        
+        keys = ('date',) + tuple(columns.keys())
+        rows = zip(portfolio.index.strftime('%Y-%m-%d %H:%M:%S'), *columns.values())
+        return [dict(zip(keys, values)) for values in rows]
+    
+    @staticmethod
+    def _epoch_millis(index: pd.Index) -> List[int]:
+        """时间索引转换为毫秒时间戳列表"""
+        return pd.DatetimeIndex(index).values.astype('datetime64[ms]').astype(np.int64).tolist()
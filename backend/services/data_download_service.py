@@ -7,7 +7,8 @@ import pandas as pd
 
 from .data_fetcher import DataFetcher
 from .data_storage_service import DataStorageService
-from .duckdb_storage_service import DuckDBStorageService
+from .duckdb_storage_service import DuckDBStorageService, ROLLUP_SOURCE_FREQUENCY
+from .kline_resampler import KlineResampler, RESAMPLE_MINUTES
 from .stock_code_service import stock_code_service
 
 
@@ -27,6 +28,7 @@ class DataDownloadService:
             try:
                 self.storage = DuckDBStorageService()
                 self.use_duckdb = True
+                self.resampler = KlineResampler(self.storage)
                 logger.info("使用DuckDB存储服务")
             except Exception as e:
                 logger.warning(f"DuckDB初始化失败，使用CSV存储: {e}")
@@ -91,6 +93,23 @@ class DataDownloadService:
             except Exception as e:
                 logger.warning(f"获取股票名称失败: {e}")
             
+            # 本地1分钟K线已覆盖请求区间时直接合成，不再单独下载更粗的频率
+            if not force_download and self.use_duckdb and frequency in RESAMPLE_MINUTES \
+                    and self.resampler.covers(stock_code, start_date, end_date):
+                data = self.resampler.derive(stock_code, start_date, end_date, frequency)
+                if data is not None and len(data) > 0:
+                    logger.info(f"由本地1分钟K线合成 {frequency} 数据: {len(data)}条记录")
+                    return {
+                        'status': 'completed',
+                        'message': '由本地1分钟K线合成',
+                        'download_id': download_id,
+                        'stock_code': stock_code,
+                        'stock_name': stock_name,
+                        'data_count': len(data),
+                        'data': data,
+                        'source': 'resampled'
+                    }
+            
             # 如果不是强制下载，检查数据是否存在
             if not force_download and self.use_duckdb:
                 check_result = self.storage.check_data_exists(
@@ -193,6 +212,10 @@ class DataDownloadService:
                     stock_name=stock_name
                 )
                 logger.info(f"使用DuckDB保存成功: record_id={record_id}")
+                
+                # 新的1分钟K线写入后同步刷新各合成频率，保持各频率一致
+                if frequency == ROLLUP_SOURCE_FREQUENCY:
+                    self.resampler.refresh_all(stock_code)
             else:
                 # 使用CSV存储，传入股票名称
                 record_id = self.storage.save_downloaded_data(
@@ -0,0 +1,135 @@
+"""分布式评估后端 - 把参数分块提交到优化任务代理，由远程工作者评估"""
+import asyncio
+import itertools
+import math
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import httpx
+from loguru import logger
+
+from optimizers.executors import EvaluationExecutor, _split
+from .backtest_result_cache import data_fingerprint
+from .optimization_broker import encode_frame
+from .optimization_objective import BacktestObjective
+
+
+# 按工作者数拆分时单个任务的最大参数组合数，避免单个任务超过代理的租约时长
+MAX_TASK_SIZE = 256
+# 查询结果的间隔（秒）
+DEFAULT_POLL_INTERVAL = 0.1
+
+
+class DistributedExecutor(EvaluationExecutor):
+    """
+    分布式评估执行器
+
+    只支持 BacktestObjective：行情按数据指纹上传到代理一次，工作者下载后缓存在本地；
+    工作者返回全部绩效指标，这里按目标函数换算成得分。每批参数默认按代理上的在线
+    工作者数平均拆分成任务，每个工作者领取一份。代理保证任务至少投递一次，
+    结果按任务ID只写入一次，某个任务被重复执行不会影响结果；工作者之间没有共享状态，
+    吞吐随工作者数线性增长。
+    """
+
+    def __init__(
+        self,
+        broker_url: str,
+        chunk_size: Optional[int] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            broker_url: 任务代理地址
+            chunk_size: 每个任务的参数组合数（默认按在线工作者数拆分）
+            poll_interval: 查询结果的间隔（秒）
+            timeout: 一批参数的最长等待时间（秒，None为一直等待）
+        """
+        self.broker_url = broker_url
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.job_id = uuid.uuid4().hex
+        self._client: Optional[httpx.Client] = None
+        self._published: Dict[int, str] = {}
+        self._batches = itertools.count()
+
+    async def evaluate(self, objective_func, params_list, worst, budget=None):
+        if not isinstance(objective_func, BacktestObjective):
+            raise TypeError("分布式评估只支持 BacktestObjective")
+        if not params_list:
+            return []
+
+        fingerprint = await asyncio.to_thread(self._publish, objective_func)
+        chunk_size = self.chunk_size
+        if chunk_size is None:
+            stats = await asyncio.to_thread(self._request, 'GET', '/stats')
+            n_workers = max(1, stats['workers'])
+            chunk_size = min(math.ceil(len(params_list) / n_workers), MAX_TASK_SIZE)
+        batch = next(self._batches)
+        tasks = [
+            {'task_id': f"{self.job_id}-{batch}-{i}", 'params_list': chunk, 'budget': budget}
+            for i, chunk in enumerate(_split(params_list, 1, chunk_size))
+        ]
+        await asyncio.to_thread(self._request, 'POST', '/tasks', {
+            'job_id': self.job_id, 'spec': objective_func.spec, 'fingerprint': fingerprint, 'tasks': tasks
+        })
+
+        results = await self._wait(task['task_id'] for task in tasks)
+
+        scores = []
+        for task in tasks:
+            result = results[task['task_id']]
+            if result['error'] is not None:
+                logger.error(f"任务 {task['task_id']} 评估失败: {result['error']}")
+                scores.extend([worst] * len(task['params_list']))
+            else:
+                scores.extend(objective_func._score(metrics) for metrics in result['metrics'])
+        return scores
+
+    def close(self):
+        """删除代理上本执行器的任务和结果"""
+        if self._client is None:
+            return
+        try:
+            self._client.delete(f'/jobs/{self.job_id}')
+        except httpx.HTTPError as e:
+            logger.warning(f"删除代理上的任务失败: {e}")
+        self._client.close()
+        self._client = None
+        self._published.clear()
+
+    async def _wait(self, task_ids) -> Dict[str, Dict[str, Any]]:
+        """轮询直到全部任务都有结果"""
+        pending = set(task_ids)
+        results = {}
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            response = await asyncio.to_thread(self._request, 'POST', '/results/query', {'task_ids': sorted(pending)})
+            results.update(response['results'])
+            pending.difference_update(response['results'])
+            if not pending:
+                return results
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"等待远程评估超时，剩余 {len(pending)} 个任务")
+            await asyncio.sleep(self.poll_interval)
+
+    def _publish(self, objective: BacktestObjective) -> str:
+        """上传行情（每个目标函数只上传一次）"""
+        if id(objective) not in self._published:
+            df = objective.to_frame()
+            fingerprint = data_fingerprint(df)
+            self._get_client().put(f'/data/{fingerprint}', content=encode_frame(df)).raise_for_status()
+            self._published[id(objective)] = fingerprint
+        return self._published[id(objective)]
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        response = self._get_client().request(method, path, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    def _get_client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(base_url=self.broker_url, timeout=httpx.Timeout(60.0, connect=10.0))
+        return self._client
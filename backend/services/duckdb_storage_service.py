@@ -1,13 +1,27 @@
 """DuckDB存储服务 - 高性能列式数据库存储（修复版）"""
 import os
 import duckdb
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Sequence
 from loguru import logger
 
 
+# 全市场回测结果可用于排序的字段
+UNIVERSE_RANK_COLUMNS = (
+    'stock_code', 'total_return', 'annual_return', 'max_drawdown', 'sharpe_ratio', 'win_rate',
+    'trade_count', 'profit_loss_ratio', 'volatility', 'calmar_ratio', 'final_capital', 'data_points'
+)
+
+# 可批量加载的K线数据列
+KLINE_BATCH_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# 合成更粗频率K线所用的源频率
+ROLLUP_SOURCE_FREQUENCY = '1min'
+
+
 class DuckDBStorageService:
     """DuckDB存储服务"""
     
@@ -83,6 +97,98 @@ class DuckDBStorageService:
                 )
             """)
             
+            # 创建K线覆盖范围表（记录已向远程数据源请求过的时间区间）
+            self.con.execute("""
+                CREATE TABLE IF NOT EXISTS kline_coverage (
+                    stock_code VARCHAR(20) NOT NULL,
+                    frequency VARCHAR(10) NOT NULL,
+                    start_date TIMESTAMP NOT NULL,
+                    end_date TIMESTAMP NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (stock_code, frequency)
+                )
+            """)
+            
+            # 创建K线合成水位表（记录每个合成频率已合并到的最后一根1分钟K线）
+            self.con.execute("""
+                CREATE TABLE IF NOT EXISTS kline_rollup_state (
+                    stock_code VARCHAR(20) NOT NULL,
+                    frequency VARCHAR(10) NOT NULL,
+                    source_end TIMESTAMP NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (stock_code, frequency)
+                )
+            """)
+            
+            # 创建回测结果缓存表（键包含数据指纹和参数，按最近访问时间LRU淘汰）
+            self.con.execute("""
+                CREATE TABLE IF NOT EXISTS backtest_result_cache (
+                    cache_key VARCHAR(64) PRIMARY KEY,
+                    stock_code VARCHAR(20) NOT NULL,
+                    frequency VARCHAR(10) NOT NULL,
+                    result BLOB NOT NULL,
+                    size_bytes BIGINT NOT NULL,
+                    hit_count BIGINT DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # 创建参数优化评估结果表（研究键包含策略、股票、区间、数据指纹和优化目标）
+            self.con.execute("""
+                CREATE TABLE IF NOT EXISTS optimization_evaluations (
+                    study_key VARCHAR(64) NOT NULL,
+                    param_key VARCHAR(32) NOT NULL,
+                    params JSON NOT NULL,
+                    score DOUBLE NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (study_key, param_key)
+                )
+            """)
+            
+            # 创建参数优化运行记录表（用于查询进度和恢复中断的优化）
+            self.con.execute("""
+                CREATE TABLE IF NOT EXISTS optimization_runs (
+                    run_id VARCHAR(64) PRIMARY KEY,
+                    study_key VARCHAR(64) NOT NULL,
+                    method VARCHAR(20) NOT NULL,
+                    status VARCHAR(20) NOT NULL,
+                    config JSON NOT NULL,
+                    best_params JSON,
+                    best_score DOUBLE,
+                    evaluations BIGINT DEFAULT 0,
+                    error VARCHAR,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # 创建全市场回测结果表
+            self.con.execute("""
+                CREATE TABLE IF NOT EXISTS universe_backtest_results (
+                    run_id VARCHAR(64) NOT NULL,
+                    stock_code VARCHAR(20) NOT NULL,
+                    strategy_type VARCHAR(20),
+                    params JSON,
+                    frequency VARCHAR(10),
+                    start_date TIMESTAMP,
+                    end_date TIMESTAMP,
+                    data_points INTEGER,
+                    final_capital DOUBLE,
+                    total_return DOUBLE,
+                    annual_return DOUBLE,
+                    max_drawdown DOUBLE,
+                    sharpe_ratio DOUBLE,
+                    win_rate DOUBLE,
+                    trade_count INTEGER,
+                    profit_loss_ratio DOUBLE,
+                    volatility DOUBLE,
+                    calmar_ratio DOUBLE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (run_id, stock_code)
+                )
+            """)
+            
             logger.info("[DuckDB] 表结构初始化完成")
             
         except Exception as e:
@@ -113,92 +219,22 @@ class DuckDBStorageService:
             if stock_name:
                 self._update_stock_info(stock_code, stock_name)
             
-            # 重置索引为列
-            df_reset = df.reset_index()
-            
-            # 列名映射（中文 -> 英文）
-            column_map = {
-                '日期': 'date',
-                '开盘': 'open',
-                '最高': 'high',
-                '最低': 'low',
-                '收盘': 'close',
-                '成交量': 'volume',
-                '成交额': 'amount',
-                '涨跌幅': 'change_pct',
-                '涨跌额': 'change',
-                '换手率': 'turnover_rate',
-                '振幅': 'amplitude'
-            }
-            
-            # 重命名列
-            df_reset = df_reset.rename(columns=column_map)
-            
-            # 转换为小写
-            df_reset.columns = [col.lower() for col in df_reset.columns]
+            df_insert = self._prepare_kline_frame(df, stock_code, frequency)
             
-            # 确保有date列
-            if 'date' not in df_reset.columns:
-                # 尝试从索引获取
-                if hasattr(df, 'index'):
-                    df_reset['date'] = df.index
-                else:
-                    raise ValueError("数据中缺少日期列")
-            
-            # 添加必需字段
-            df_reset['stock_code'] = stock_code
-            df_reset['frequency'] = frequency
-            df_reset['created_at'] = datetime.now()
-            df_reset['updated_at'] = datetime.now()
-            
-            # 确保所有必需列存在
-            required_columns = ['date', 'open', 'high', 'low', 'close', 'volume']
-            for col in required_columns:
-                if col not in df_reset.columns:
-                    if col == 'volume':
-                        df_reset[col] = 0
-                    else:
-                        df_reset[col] = 0.0
-            
-            # 添加可选列（如果不存在）
-            optional_columns = {
-                'amount': 0.0,
-                'pe_ratio': None,
-                'pb_ratio': None,
-                'turnover_rate': None
-            }
-            for col, default_val in optional_columns.items():
-                if col not in df_reset.columns:
-                    df_reset[col] = default_val
-            
-            # 生成ID
-            max_id_result = self.con.execute(
-                "SELECT COALESCE(MAX(id), 0) FROM kline_data"
-            ).fetchone()
-            max_id = max_id_result[0] if max_id_result else 0
-            df_reset['id'] = range(max_id + 1, max_id + 1 + len(df_reset))
-            
-            # 只选择表结构中的列
-            table_columns = self.con.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_name = 'kline_data'
-                ORDER BY ordinal_position
-            """).fetchall()
-            table_columns = [row[0] for row in table_columns]
-            
-            # 选择并排序列
-            df_insert = df_reset[table_columns]
-            
-            # 删除已存在的数据
+            # 删除已存在的数据（整体替换后旧的覆盖区间不再有效）
             self.con.execute("""
                 DELETE FROM kline_data 
                 WHERE stock_code = ? AND frequency = ?
             """, [stock_code, frequency])
+            self._reset_kline_coverage(stock_code, frequency)
+            self._invalidate_backtest_results(stock_code, frequency)
+            if frequency == ROLLUP_SOURCE_FREQUENCY:
+                self._reset_rollup_watermarks(stock_code)
             
             # 批量插入
             self.con.execute("INSERT INTO kline_data SELECT * FROM df_insert")
             
-            count = len(df_reset)
+            count = len(df_insert)
             logger.info(f"[DuckDB] 保存K线数据: {stock_code}, {stock_name}, {frequency}, {count}条")
             return count
             
@@ -206,6 +242,143 @@ class DuckDBStorageService:
             logger.error(f"[DuckDB] 保存K线数据失败: {e}")
             raise
     
+    def _prepare_kline_frame(
+        self,
+        df: pd.DataFrame,
+        stock_code: str,
+        frequency: str
+    ) -> pd.DataFrame:
+        """
+        将K线数据整理为与kline_data表结构一致的DataFrame
+        
+        Args:
+            df: K线数据DataFrame
+            stock_code: 股票代码
+            frequency: 频率
+            
+        Returns:
+            可直接插入kline_data的DataFrame
+        """
+        # 重置索引为列
+        df_reset = df.reset_index()
+        
+        # 列名映射（中文 -> 英文）
+        column_map = {
+            '日期': 'date',
+            '开盘': 'open',
+            '最高': 'high',
+            '最低': 'low',
+            '收盘': 'close',
+            '成交量': 'volume',
+            '成交额': 'amount',
+            '涨跌幅': 'change_pct',
+            '涨跌额': 'change',
+            '换手率': 'turnover_rate',
+            '振幅': 'amplitude'
+        }
+        
+        # 重命名列
+        df_reset = df_reset.rename(columns=column_map)
+        
+        # 转换为小写
+        df_reset.columns = [col.lower() for col in df_reset.columns]
+        
+        # 确保有date列
+        if 'date' not in df_reset.columns:
+            # 尝试从索引获取
+            if hasattr(df, 'index'):
+                df_reset['date'] = df.index
+            else:
+                raise ValueError("数据中缺少日期列")
+        
+        # 添加必需字段
+        df_reset['stock_code'] = stock_code
+        df_reset['frequency'] = frequency
+        df_reset['created_at'] = datetime.now()
+        df_reset['updated_at'] = datetime.now()
+        
+        # 确保所有必需列存在
+        required_columns = ['date', 'open', 'high', 'low', 'close', 'volume']
+        for col in required_columns:
+            if col not in df_reset.columns:
+                if col == 'volume':
+                    df_reset[col] = 0
+                else:
+                    df_reset[col] = 0.0
+        
+        # 添加可选列（如果不存在）
+        optional_columns = {
+            'amount': 0.0,
+            'pe_ratio': None,
+            'pb_ratio': None,
+            'turnover_rate': None
+        }
+        for col, default_val in optional_columns.items():
+            if col not in df_reset.columns:
+                df_reset[col] = default_val
+        
+        # 生成ID
+        max_id_result = self.con.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM kline_data"
+        ).fetchone()
+        max_id = max_id_result[0] if max_id_result else 0
+        df_reset['id'] = range(max_id + 1, max_id + 1 + len(df_reset))
+        
+        # 只选择表结构中的列
+        table_columns = self.con.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'kline_data'
+            ORDER BY ordinal_position
+        """).fetchall()
+        table_columns = [row[0] for row in table_columns]
+        
+        # 选择并排序列
+        df_insert = df_reset[table_columns]
+        
+        return df_insert
+    
+    def upsert_kline_data(
+        self,
+        df: pd.DataFrame,
+        stock_code: str,
+        frequency: str = 'daily'
+    ) -> int:
+        """
+        增量写入K线数据，只替换时间范围内已存在的记录，保留其余数据
+        
+        Args:
+            df: K线数据DataFrame
+            stock_code: 股票代码
+            frequency: 频率
+            
+        Returns:
+            写入的记录数
+        """
+        if df is None or len(df) == 0:
+            return 0
+        
+        try:
+            df_insert = self._prepare_kline_frame(df, stock_code, frequency)
+            
+            self.con.execute("""
+                DELETE FROM kline_data
+                WHERE stock_code = ? AND frequency = ?
+                  AND date >= ? AND date <= ?
+            """, [stock_code, frequency, df_insert['date'].min(), df_insert['date'].max()])
+            
+            self.con.execute("INSERT INTO kline_data SELECT * FROM df_insert")
+            self._invalidate_backtest_results(stock_code, frequency)
+            if frequency == ROLLUP_SOURCE_FREQUENCY:
+                self._reset_rollup_watermarks(stock_code, df_insert['date'].min())
+            
+            count = len(df_insert)
+            logger.info(f"[DuckDB] 增量写入K线数据: {stock_code}, {frequency}, {count}条")
+            return count
+            
+        except Exception as e:
+            logger.error(f"[DuckDB] 增量写入K线数据失败: {e}")
+            raise
+    
     def _update_stock_info(self, stock_code: str, stock_name: str):
         """
         更新股票信息表
@@ -307,6 +480,157 @@ class DuckDBStorageService:
             logger.error(f"[DuckDB] 加载K线数据失败: {e}")
             return None
     
+    def get_kline_coverage(
+        self,
+        stock_code: str,
+        frequency: str = 'daily'
+    ) -> Optional[Dict]:
+        """
+        获取本地K线数据的覆盖区间
+        
+        优先使用kline_coverage中记录的已请求区间（可覆盖上市前、节假日等
+        没有K线的日期），没有记录时退化为已存数据的最早/最晚时间。
+        
+        Args:
+            stock_code: 股票代码
+            frequency: 频率
+            
+        Returns:
+            {'start_date', 'end_date', 'data_count'}，没有数据时返回None
+        """
+        try:
+            stored = self.con.execute("""
+                SELECT MIN(date), MAX(date), COUNT(*)
+                FROM kline_data
+                WHERE stock_code = ? AND frequency = ?
+            """, [stock_code, frequency]).fetchone()
+            
+            recorded = self.con.execute("""
+                SELECT start_date, end_date FROM kline_coverage
+                WHERE stock_code = ? AND frequency = ?
+            """, [stock_code, frequency]).fetchone()
+            
+            if stored[0] is None and recorded is None:
+                return None
+            
+            starts = [d for d in (stored[0], recorded[0] if recorded else None) if d is not None]
+            ends = [d for d in (stored[1], recorded[1] if recorded else None) if d is not None]
+            
+            return {
+                'start_date': min(starts),
+                'end_date': max(ends),
+                'data_count': stored[2]
+            }
+            
+        except Exception as e:
+            logger.error(f"[DuckDB] 获取覆盖区间失败: {e}")
+            return None
+    
+    def update_kline_coverage(
+        self,
+        stock_code: str,
+        start_date: datetime,
+        end_date: datetime,
+        frequency: str = 'daily'
+    ) -> bool:
+        """
+        扩展K线覆盖区间（与已有区间取并集）
+        
+        Args:
+            stock_code: 股票代码
+            start_date: 已请求区间开始
+            end_date: 已请求区间结束
+            frequency: 频率
+            
+        Returns:
+            是否成功
+        """
+        try:
+            self.con.execute("""
+                INSERT INTO kline_coverage (stock_code, frequency, start_date, end_date, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (stock_code, frequency) DO UPDATE SET
+                    start_date = LEAST(kline_coverage.start_date, excluded.start_date),
+                    end_date = GREATEST(kline_coverage.end_date, excluded.end_date),
+                    updated_at = excluded.updated_at
+            """, [stock_code, frequency, start_date, end_date])
+            return True
+            
+        except Exception as e:
+            logger.error(f"[DuckDB] 更新覆盖区间失败: {e}")
+            return False
+    
+    def _reset_kline_coverage(self, stock_code: str, frequency: str):
+        """清除覆盖区间记录，之后以实际存储的数据范围为准"""
+        self.con.execute("""
+            DELETE FROM kline_coverage
+            WHERE stock_code = ? AND frequency = ?
+        """, [stock_code, frequency])
+    
+    def _invalidate_backtest_results(self, stock_code: str, frequency: Optional[str] = None):
+        """K线数据变更后删除该股票的回测结果缓存"""
+        if frequency is None:
+            self.con.execute("""
+                DELETE FROM backtest_result_cache WHERE stock_code = ?
+            """, [stock_code])
+        else:
+            self.con.execute("""
+                DELETE FROM backtest_result_cache
+                WHERE stock_code = ? AND frequency = ?
+            """, [stock_code, frequency])
+    
+    def get_rollup_watermark(self, stock_code: str, frequency: str) -> Optional[datetime]:
+        """
+        获取合成频率已合并到的最后一根1分钟K线时间
+        
+        Args:
+            stock_code: 股票代码
+            frequency: 合成频率
+            
+        Returns:
+            水位时间，从未合成过时返回None
+        """
+        row = self.con.execute("""
+            SELECT source_end FROM kline_rollup_state
+            WHERE stock_code = ? AND frequency = ?
+        """, [stock_code, frequency]).fetchone()
+        return row[0] if row else None
+    
+    def update_rollup_watermark(self, stock_code: str, frequency: str, source_end: datetime):
+        """
+        记录合成频率已合并到的最后一根1分钟K线时间
+        
+        Args:
+            stock_code: 股票代码
+            frequency: 合成频率
+            source_end: 最后一根已合并的1分钟K线时间
+        """
+        self.con.execute("""
+            INSERT INTO kline_rollup_state (stock_code, frequency, source_end, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (stock_code, frequency) DO UPDATE SET
+                source_end = excluded.source_end,
+                updated_at = excluded.updated_at
+        """, [stock_code, frequency, source_end])
+    
+    def _reset_rollup_watermarks(self, stock_code: str, since: Optional[datetime] = None):
+        """
+        1分钟K线变更后回退合成水位
+        
+        since为None时（整体替换）删除水位，下次全量合成；否则水位回退到since，
+        下次从since所在交易日开始重新合成。
+        """
+        if since is None:
+            self.con.execute("""
+                DELETE FROM kline_rollup_state WHERE stock_code = ?
+            """, [stock_code])
+        else:
+            self.con.execute("""
+                UPDATE kline_rollup_state
+                SET source_end = LEAST(source_end, ?), updated_at = CURRENT_TIMESTAMP
+                WHERE stock_code = ?
+            """, [since, stock_code])
+    
     def update_kline_fields(
         self,
         stock_code: str,
@@ -338,6 +662,7 @@ class DuckDBStorageService:
             """
             
             self.con.execute(query, values)
+            self._invalidate_backtest_results(stock_code)
             
             logger.info(f"[DuckDB] 更新字段: {stock_code}, {date}, {list(updates.keys())}")
             return True
@@ -389,6 +714,164 @@ class DuckDBStorageService:
             logger.error(f"[DuckDB] 添加列失败: {e}")
             return False
     
+    def list_kline_symbols(self, frequency: str = 'daily') -> List[str]:
+        """
+        列出指定频率下有K线数据的所有股票代码
+        
+        Args:
+            frequency: 频率
+            
+        Returns:
+            股票代码列表（升序）
+        """
+        rows = self.con.execute("""
+            SELECT DISTINCT stock_code FROM kline_data
+            WHERE frequency = ?
+            ORDER BY stock_code
+        """, [frequency]).fetchall()
+        return [row[0] for row in rows]
+    
+    def load_close_batch(
+        self,
+        stock_codes: List[str],
+        start_date: datetime,
+        end_date: datetime,
+        frequency: str = 'daily'
+    ) -> Dict[str, pd.Series]:
+        """
+        一次查询批量加载多只股票的收盘价
+        
+        Args:
+            stock_codes: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            frequency: 频率
+            
+        Returns:
+            {股票代码: 以日期为索引的收盘价Series}
+        """
+        frames = self.load_kline_batch(stock_codes, start_date, end_date, frequency)
+        return {code: df['close'] for code, df in frames.items()}
+    
+    def load_kline_batch(
+        self,
+        stock_codes: List[str],
+        start_date: datetime,
+        end_date: datetime,
+        frequency: str = 'daily',
+        columns: Sequence[str] = ('close',)
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        一次查询批量加载多只股票的K线数据列
+        
+        Args:
+            stock_codes: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            frequency: 频率
+            columns: 需要的数据列（open, high, low, close, volume 的子集）
+            
+        Returns:
+            {股票代码: 以日期为索引、包含所需列的DataFrame}
+        
+        Note:
+            使用独立的游标查询，可以在线程池中调用
+        """
+        columns = list(dict.fromkeys(columns))
+        invalid = [col for col in columns if col not in KLINE_BATCH_COLUMNS]
+        if invalid:
+            raise ValueError(f"不支持的数据列: {invalid}")
+        
+        with self.con.cursor() as cur:
+            arrays = cur.execute(f"""
+                SELECT stock_code, date, {', '.join(columns)} FROM kline_data
+                WHERE frequency = ?
+                  AND stock_code IN (SELECT UNNEST(?))
+                  AND date >= ? AND date <= ?
+                ORDER BY stock_code, date
+            """, [frequency, list(stock_codes), start_date, end_date]).fetchnumpy()
+        
+        codes = arrays['stock_code']
+        if len(codes) == 0:
+            return {}
+        
+        # 结果已按股票代码排序，按代码变化的位置切分
+        changes = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        boundaries = [0] + changes.tolist() + [len(codes)]
+        frames = {}
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            frames[codes[start]] = pd.DataFrame(
+                {col: arrays[col][start:end] for col in columns},
+                index=pd.DatetimeIndex(arrays['date'][start:end])
+            )
+        return frames
+    
+    def save_universe_results(self, results: pd.DataFrame) -> int:
+        """
+        写入全市场回测结果（同一run_id和股票代码重复写入时覆盖）
+        
+        Args:
+            results: 结果DataFrame，列与universe_backtest_results表一致（不含created_at）
+            
+        Returns:
+            写入的记录数
+        
+        Note:
+            使用独立的游标写入，可以在线程池中调用
+        """
+        if results is None or len(results) == 0:
+            return 0
+        
+        # NaN写为NULL，排序时统一放在最后
+        df_results = results.astype(object).where(results.notna(), None)
+        columns = ', '.join(df_results.columns)
+        with self.con.cursor() as cur:
+            cur.register('df_results', df_results)
+            cur.execute(f"""
+                INSERT OR REPLACE INTO universe_backtest_results ({columns})
+                SELECT {columns} FROM df_results
+            """)
+        return len(df_results)
+    
+    def get_universe_results(
+        self,
+        run_id: str,
+        order_by: str = 'sharpe_ratio',
+        ascending: bool = False,
+        limit: Optional[int] = 100
+    ) -> List[Dict]:
+        """
+        查询全市场回测结果排名
+        
+        Args:
+            run_id: 回测批次ID
+            order_by: 排序指标
+            ascending: 是否升序
+            limit: 返回条数（None为全部）
+            
+        Returns:
+            结果字典列表
+        """
+        if order_by not in UNIVERSE_RANK_COLUMNS:
+            raise ValueError(f"不支持的排序字段: {order_by}")
+        
+        direction = 'ASC' if ascending else 'DESC'
+        query = f"""
+            SELECT * EXCLUDE (created_at) FROM universe_backtest_results
+            WHERE run_id = ?
+            ORDER BY {order_by} {direction} NULLS LAST, stock_code
+        """
+        params = [run_id]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        
+        df = self.con.execute(query, params).df()
+        df = df.astype(object).where(df.notna(), None)
+        for col in ('start_date', 'end_date'):
+            df[col] = [d.strftime('%Y-%m-%d %H:%M:%S') if d is not None else None for d in df[col]]
+        return df.to_dict('records')
+    
     def get_downloaded_data_list(
         self,
         stock_code: Optional[str] = None,
@@ -560,6 +1043,10 @@ class DuckDBStorageService:
             
             # 执行删除
             self.con.execute(query, [stock_code, frequency, start_date, end_date])
+            self._reset_kline_coverage(stock_code, frequency)
+            self._invalidate_backtest_results(stock_code, frequency)
+            if frequency == ROLLUP_SOURCE_FREQUENCY:
+                self._reset_rollup_watermarks(stock_code, start_date)
             
             logger.info(f"[DuckDB] 删除数据: {stock_code}, {count}条")
             return count
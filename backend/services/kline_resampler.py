@@ -0,0 +1,217 @@
+"""K线合成服务 - 由本地1分钟K线合成5/15/30/60分钟线和日线"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .duckdb_storage_service import DuckDBStorageService, ROLLUP_SOURCE_FREQUENCY
+
+
+# 可由1分钟K线合成的频率 -> 每根K线包含的交易分钟数（日线为整个交易日）
+RESAMPLE_MINUTES = {
+    '5min': 5,
+    '15min': 15,
+    '30min': 30,
+    '60min': 60,
+    'daily': 240,
+}
+
+# A股交易时段（自零点起的分钟数）：上午 09:30-11:30，下午 13:00-15:00，各120分钟
+MORNING_OPEN = 9 * 60 + 30
+MORNING_CLOSE = 11 * 60 + 30
+AFTERNOON_OPEN = 13 * 60
+SESSION_MINUTES = 120
+
+SUM_COLUMNS = ('volume', 'amount')
+
+
+def trading_minute_index(minute_of_day: np.ndarray) -> np.ndarray:
+    """
+    将K线时间（自零点起的分钟数）映射为当日第几个交易分钟（1..240）
+
+    1分钟K线按结束时间标记（09:31..11:30, 13:01..15:00）。09:30的集合竞价K线
+    并入第1分钟，午休和收盘后的零星记录分别并入上午和下午的最后一分钟。
+    """
+    minute = np.asarray(minute_of_day, dtype=np.int64)
+    morning = np.clip(minute - MORNING_OPEN, 1, SESSION_MINUTES)
+    afternoon = np.clip(minute - AFTERNOON_OPEN, 1, SESSION_MINUTES) + SESSION_MINUTES
+    return np.where(
+        minute <= MORNING_CLOSE, morning,
+        np.where(minute < AFTERNOON_OPEN, SESSION_MINUTES, afternoon)
+    )
+
+
+def _bucket_end_minute(trading_minute: np.ndarray) -> np.ndarray:
+    """交易分钟序号（1..240）-> 自零点起的分钟数，是 trading_minute_index 的逆映射"""
+    return np.where(
+        trading_minute <= SESSION_MINUTES,
+        MORNING_OPEN + trading_minute,
+        AFTERNOON_OPEN + trading_minute - SESSION_MINUTES
+    )
+
+
+def resample_minute_bars(df: pd.DataFrame, frequency: str) -> pd.DataFrame:
+    """
+    将1分钟K线合成为更粗的频率
+
+    K线不跨越午休：60分钟线为 10:30、11:30、14:00、15:00 四根，按结束时间标记；
+    日线标记为当日零点。开盘取首根、收盘取末根、最高/最低取极值、成交量/额求和，
+    全部为向量化的分组归约。
+
+    Args:
+        df: 1分钟K线，索引为时间，至少包含 open/high/low/close
+        frequency: 目标频率，RESAMPLE_MINUTES 中的键
+
+    Returns:
+        合成后的K线DataFrame，索引为date
+    """
+    if frequency not in RESAMPLE_MINUTES:
+        raise ValueError(f"不支持由1分钟K线合成的频率: {frequency}")
+
+    columns = [col for col in ('open', 'high', 'low', 'close') + SUM_COLUMNS if col in df.columns]
+    df = df.dropna(subset=['close'])
+    if len(df) == 0:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='date'))
+
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+
+    timestamps = pd.DatetimeIndex(df.index).values.astype('datetime64[m]')
+    days = timestamps.astype('datetime64[D]')
+    minute_of_day = (timestamps - days).astype(np.int64)
+
+    bar_minutes = RESAMPLE_MINUTES[frequency]
+    bucket = (trading_minute_index(minute_of_day) - 1) // bar_minutes
+    key = days.astype(np.int64) * (2 * SESSION_MINUTES) + bucket
+    starts = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+    ends = np.append(starts[1:], len(key)) - 1
+
+    if frequency == 'daily':
+        labels = days[starts]
+    else:
+        bucket_end = np.minimum((bucket[starts] + 1) * bar_minutes, 2 * SESSION_MINUTES)
+        labels = days[starts] + _bucket_end_minute(bucket_end).astype('timedelta64[m]')
+
+    result = {
+        'open': df['open'].to_numpy(dtype=np.float64)[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(dtype=np.float64), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(dtype=np.float64), starts),
+        'close': df['close'].to_numpy(dtype=np.float64)[ends],
+    }
+    for col in SUM_COLUMNS:
+        if col in df.columns:
+            values = np.nan_to_num(df[col].to_numpy(dtype=np.float64))
+            result[col] = np.add.reduceat(values, starts)
+    if 'volume' in result:
+        result['volume'] = result['volume'].astype(np.int64)
+
+    index = pd.DatetimeIndex(labels.astype('datetime64[ns]'), name='date')
+    return pd.DataFrame(result, index=index)[columns]
+
+
+class KlineResampler:
+    """
+    K线合成服务
+
+    合成结果按目标频率写回kline_data（物化汇总），下游的加载、覆盖区间检查和
+    回测数据提供器无需区分数据是下载的还是合成的。kline_rollup_state 记录每个
+    频率已合并到的1分钟K线时间，刷新时只重算水位所在交易日及之后的K线。
+    """
+
+    def __init__(self, storage: DuckDBStorageService):
+        """
+        初始化K线合成服务
+
+        Args:
+            storage: DuckDB存储服务
+        """
+        self.storage = storage
+
+    def covers(self, stock_code: str, start_date: datetime, end_date: datetime) -> bool:
+        """本地1分钟K线是否覆盖请求区间"""
+        coverage = self.storage.get_kline_coverage(stock_code, ROLLUP_SOURCE_FREQUENCY)
+        if coverage is None:
+            return False
+        return (coverage['start_date'].date() <= start_date.date()
+                and coverage['end_date'].date() >= end_date.date())
+
+    def refresh(self, stock_code: str, frequency: str) -> int:
+        """
+        增量刷新一个合成频率
+
+        Args:
+            stock_code: 股票代码
+            frequency: 合成频率
+
+        Returns:
+            重新写入的K线数
+        """
+        if frequency not in RESAMPLE_MINUTES:
+            raise ValueError(f"不支持由1分钟K线合成的频率: {frequency}")
+
+        coverage = self.storage.get_kline_coverage(stock_code, ROLLUP_SOURCE_FREQUENCY)
+        if coverage is None or not coverage['data_count']:
+            return 0
+
+        watermark = self.storage.get_rollup_watermark(stock_code, frequency)
+        # 水位所在交易日的K线可能还不完整（日线、尾部的分钟线），从当日零点开始重算
+        since = datetime.combine(watermark.date(), datetime.min.time()) if watermark else coverage['start_date']
+        until = datetime.combine(coverage['end_date'].date(), datetime.min.time()) + timedelta(days=1)
+
+        minute_bars = self.storage.load_kline_data(stock_code, since, until, ROLLUP_SOURCE_FREQUENCY)
+        if minute_bars is None or len(minute_bars) == 0:
+            return 0
+
+        source_end = pd.Timestamp(minute_bars.index.max()).to_pydatetime()
+        if watermark is not None and source_end <= watermark:
+            return 0
+
+        bars = resample_minute_bars(minute_bars, frequency)
+        count = self.storage.upsert_kline_data(bars, stock_code, frequency)
+        self.storage.update_kline_coverage(
+            stock_code, coverage['start_date'], coverage['end_date'], frequency
+        )
+        self.storage.update_rollup_watermark(stock_code, frequency, source_end)
+
+        logger.info(f"[K线合成] {stock_code} 1min -> {frequency}: 重算{count}根（自 {since}）")
+        return count
+
+    def refresh_all(self, stock_code: str, frequencies: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        增量刷新多个合成频率
+
+        Args:
+            stock_code: 股票代码
+            frequencies: 合成频率列表，默认全部
+
+        Returns:
+            {频率: 重新写入的K线数}
+        """
+        return {
+            frequency: self.refresh(stock_code, frequency)
+            for frequency in (frequencies or RESAMPLE_MINUTES)
+        }
+
+    def derive(
+        self,
+        stock_code: str,
+        start_date: datetime,
+        end_date: datetime,
+        frequency: str
+    ) -> Optional[pd.DataFrame]:
+        """
+        刷新合成频率后加载请求区间的K线
+
+        Args:
+            stock_code: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            frequency: 合成频率
+
+        Returns:
+            K线数据DataFrame，本地没有1分钟K线时返回None
+        """
+        self.refresh(stock_code, frequency)
+        return self.storage.load_kline_data(stock_code, start_date, end_date, frequency)
@@ -0,0 +1,379 @@
+"""低内存回测 - float32价格列、预分配缓冲区、分块模拟，用于多年分钟K线回测"""
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from indicators.graph import IndicatorGraph
+from strategies import get_strategy
+from .backtest_kernel import simulate_signals
+
+
+# 低内存模式的价格精度
+LEAN_PRICE_DTYPE = np.float32
+
+# 默认每块处理的K线数
+DEFAULT_CHUNK_SIZE = 65536
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# 逐K线模拟时的中间列（keep_intermediates=True 时才保留）
+INTERMEDIATE_COLUMNS = [
+    'signal', 'cash', 'shares', 'position_value',
+    'returns', 'cumulative_returns', 'running_max', 'drawdown_pct'
+]
+
+
+def to_lean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """按时间排序并把价格列转换为float32，其他列保持原样"""
+    df = df.sort_index()
+    price_columns = {col: LEAN_PRICE_DTYPE for col in PRICE_COLUMNS if col in df.columns}
+    return df.astype(price_columns)
+
+
+def _compare_positions(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """a>b为1，a<b为-1，其他（含缺失值）为0"""
+    positions = (a > b).astype(np.int8)
+    positions -= a < b
+    return positions
+
+
+def _ma_positions(close: np.ndarray, start: int, stop: int, params: Dict, state: Dict) -> np.ndarray:
+    """均线策略：向前多取 long_window-1 根K线作为滚动窗口预热"""
+    short_window = params.get('short_window', 5)
+    long_window = params.get('long_window', 20)
+    lo = max(0, start - max(short_window, long_window) + 1)
+    series = pd.Series(close[lo:stop], dtype=np.float64)
+
+    ma_short = series.rolling(window=short_window).mean().to_numpy()[start - lo:]
+    ma_long = series.rolling(window=long_window).mean().to_numpy()[start - lo:]
+    return _compare_positions(ma_short, ma_long)
+
+
+def _rsi_positions(close: np.ndarray, start: int, stop: int, params: Dict, state: Dict) -> np.ndarray:
+    """RSI策略：差分再滚动，需要向前多取 rsi_window 根K线"""
+    rsi_window = params.get('rsi_window', 14)
+    oversold = params.get('oversold', 30)
+    overbought = params.get('overbought', 70)
+    lo = max(0, start - rsi_window)
+    series = pd.Series(close[lo:stop], dtype=np.float64)
+
+    delta = series.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=rsi_window).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_window).mean()
+    rsi = (100 - (100 / (1 + gain / loss))).to_numpy()[start - lo:]
+
+    # 与 _calculate_rsi_signals 相同，超买判断后写入，优先级更高
+    positions = (rsi < oversold).astype(np.int8)
+    positions[rsi > overbought] = -1
+    return positions
+
+
+def _boll_positions(close: np.ndarray, start: int, stop: int, params: Dict, state: Dict) -> np.ndarray:
+    """布林带策略：向前多取 boll_window-1 根K线作为滚动窗口预热"""
+    window = params.get('boll_window', 20)
+    num_std = params.get('num_std', 2)
+    lo = max(0, start - window + 1)
+    series = pd.Series(close[lo:stop], dtype=np.float64)
+
+    mid = series.rolling(window=window).mean()
+    std = series.rolling(window=window).std()
+    upper = (mid + num_std * std).to_numpy()[start - lo:]
+    lower = (mid - num_std * std).to_numpy()[start - lo:]
+    px = series.to_numpy()[start - lo:]
+
+    positions = (px < lower).astype(np.int8)
+    positions[px > upper] = -1
+    return positions
+
+
+def _ewm_from(values: np.ndarray, span: int, prev: Optional[float]) -> np.ndarray:
+    """
+    从上一块的末值继续计算EMA（adjust=False）
+
+    把上一块的EMA末值放在本块之前作为首个元素，递推结果与整段计算逐位一致。
+    """
+    if prev is None:
+        return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+    extended = np.empty(len(values) + 1, dtype=np.float64)
+    extended[0] = prev
+    extended[1:] = values
+    return pd.Series(extended).ewm(span=span, adjust=False).mean().to_numpy()[1:]
+
+
+def _macd_positions(close: np.ndarray, start: int, stop: int, params: Dict, state: Dict) -> np.ndarray:
+    """MACD策略：EMA是递推量，块之间携带三条EMA的末值"""
+    fast = params.get('fast', 12)
+    slow = params.get('slow', 26)
+    signal = params.get('signal', 9)
+    px = close[start:stop].astype(np.float64)
+
+    ema_fast = _ewm_from(px, fast, state.get('ema_fast'))
+    ema_slow = _ewm_from(px, slow, state.get('ema_slow'))
+    macd = ema_fast - ema_slow
+    macd_signal = _ewm_from(macd, signal, state.get('macd_signal'))
+    state.update(ema_fast=ema_fast[-1], ema_slow=ema_slow[-1], macd_signal=macd_signal[-1])
+
+    return _compare_positions(macd - macd_signal, 0.0)
+
+
+POSITION_BUILDERS: Dict[str, Callable] = {
+    'MA': _ma_positions,
+    'RSI': _rsi_positions,
+    'BOLL': _boll_positions,
+    'MACD': _macd_positions,
+}
+
+
+def lean_signals(
+    close: np.ndarray,
+    strategy_params: Dict,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    分块计算交易信号，写入int8缓冲区
+
+    每块只为滚动窗口向前多取少量K线，EMA等递推指标在块之间携带状态，
+    结果与 BacktestEngine._calculate_indicators 的 signal 列一致。
+
+    Args:
+        close: 收盘价数组
+        strategy_params: 策略参数（含type，未知类型按MA处理）
+        chunk_size: 每块K线数
+        out: 预分配的int8输出缓冲区
+
+    Returns:
+        信号数组（相邻两根K线持仓状态之差，首根为0）
+    """
+    n = len(close)
+    if out is None:
+        out = np.empty(n, dtype=np.int8)
+    build_positions = POSITION_BUILDERS.get(strategy_params.get('type', 'MA'), _ma_positions)
+
+    state: Dict = {}
+    prev_position = None
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        positions = build_positions(close, start, stop, strategy_params, state)
+        chunk = out[start:stop]
+        np.subtract(positions[1:], positions[:-1], out=chunk[1:])
+        chunk[0] = 0 if prev_position is None else positions[0] - prev_position
+        prev_position = positions[-1]
+    return out
+
+
+class MetricsAccumulator:
+    """
+    分块累计绩效指标
+
+    回撤的滚动高点、收益率的均值/二阶矩（按块合并）和盈亏计数在块之间携带，
+    结果与 calculate_metrics 口径一致，内存占用只与块大小有关。
+    """
+
+    def __init__(self, initial_capital: float, periods_per_year: int = 252, risk_free_rate: float = 0.03):
+        self.initial_capital = initial_capital
+        self.periods_per_year = periods_per_year
+        self.risk_free_rate = risk_free_rate
+
+        self.n_bars = 0
+        self.last_value = None
+        self.running_max = np.nan
+        self.min_drawdown = np.nan
+        self.n_returns = 0
+        self.sum_returns = 0.0
+        self.m2_returns = 0.0
+        self.n_wins = 0
+        self.n_losses = 0
+        self.sum_wins = 0.0
+        self.sum_losses = 0.0
+
+    def update(self, values: np.ndarray):
+        """累计一块总市值"""
+        if len(values) == 0:
+            return
+        self.n_bars += len(values)
+
+        running_max = np.fmax.accumulate(values)
+        np.fmax(running_max, self.running_max, out=running_max)
+        self.running_max = running_max[-1]
+        drawdown = np.subtract(values, running_max)
+        drawdown /= running_max
+        self.min_drawdown = np.fmin(self.min_drawdown, np.fmin.reduce(drawdown))
+
+        if self.last_value is None:
+            returns = values[1:] / values[:-1]
+        else:
+            returns = np.empty(len(values), dtype=np.float64)
+            returns[0] = values[0] / self.last_value
+            np.divide(values[1:], values[:-1], out=returns[1:])
+        returns -= 1
+        self.last_value = values[-1]
+
+        returns = returns[~np.isnan(returns)]
+        n = len(returns)
+        if n == 0:
+            return
+
+        # 按块合并均值和二阶矩（Chan等人的并行方差公式）
+        mean = returns.mean()
+        m2 = float(((returns - mean) ** 2).sum())
+        if self.n_returns > 0:
+            delta = mean - self.sum_returns / self.n_returns
+            m2 += delta * delta * self.n_returns * n / (self.n_returns + n)
+        self.m2_returns += m2
+        self.n_returns += n
+        self.sum_returns += float(returns.sum())
+
+        wins = returns > 0
+        losses = returns < 0
+        self.n_wins += int(wins.sum())
+        self.n_losses += int(losses.sum())
+        self.sum_wins += float(returns[wins].sum())
+        self.sum_losses += float(returns[losses].sum())
+
+    def result(self, trade_count: int) -> Dict:
+        """计算绩效指标字典"""
+        if self.n_bars == 0:
+            return {}
+
+        total_return = (self.last_value - self.initial_capital) / self.initial_capital
+        years = self.n_bars / self.periods_per_year
+        with np.errstate(invalid='ignore', divide='ignore'):
+            annual_return = float(np.power(1 + total_return, 1 / years) - 1)
+        max_drawdown = abs(float(self.min_drawdown))
+
+        mean = self.sum_returns / max(self.n_returns, 1)
+        std = float(np.sqrt(self.m2_returns / max(self.n_returns - 1, 1)))
+        has_std = self.n_returns > 1 and std != 0
+        rf = self.risk_free_rate / self.periods_per_year
+        sharpe_ratio = float(np.sqrt(self.periods_per_year) * (mean - rf) / std) if has_std else 0.0
+
+        n_nonzero = self.n_wins + self.n_losses
+        avg_win = self.sum_wins / max(self.n_wins, 1)
+        avg_loss = abs(self.sum_losses / max(self.n_losses, 1))
+        has_both = self.n_wins > 0 and self.n_losses > 0 and avg_loss != 0
+
+        return {
+            'total_return': float(total_return),
+            'annual_return': annual_return,
+            'max_drawdown': max_drawdown,
+            'sharpe_ratio': sharpe_ratio,
+            'win_rate': self.n_wins / n_nonzero if n_nonzero > 0 else 0.0,
+            'trade_count': int(trade_count),
+            'profit_loss_ratio': avg_win / avg_loss if has_both else 0.0,
+            'volatility': float(std * np.sqrt(self.periods_per_year)) if self.n_returns > 1 else 0.0,
+            'calmar_ratio': annual_return / max_drawdown if max_drawdown != 0 else 0.0
+        }
+
+
+def run_lean_backtest(
+    df: pd.DataFrame,
+    strategy_params: Dict,
+    initial_capital: float,
+    commission: float,
+    slippage: float,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    keep_intermediates: bool = False
+) -> Dict:
+    """
+    低内存回测
+
+    价格列使用float32，信号写入预分配的int8缓冲区，持仓模拟和绩效指标按块计算，
+    块之间携带现金、持股、滚动高点等状态。默认只保留逐K线的总市值（float64，
+    保证收益率精度），成交记录单独以稀疏表返回。
+
+    Args:
+        df: K线数据（需包含close列，索引为时间）
+        strategy_params: 策略参数
+        initial_capital: 初始资金
+        commission: 手续费率
+        slippage: 滑点
+        chunk_size: 每块K线数
+        keep_intermediates: 是否保留signal、cash、shares、drawdown_pct等中间列
+
+    Returns:
+        包含 portfolio（精简的逐K线DataFrame）、trades（成交记录DataFrame）、
+        metrics 和 trade_count 的字典
+    """
+    df = to_lean_frame(df)
+    close = df['close'].to_numpy()
+    n = len(close)
+
+    plugin = get_strategy(strategy_params.get('type', 'MA'))
+    if plugin is not None:
+        # 策略插件的信号函数是整段向量化的，一次计算后压缩为int8
+        signal = plugin.signals(IndicatorGraph(df), strategy_params).astype(np.int8)
+    else:
+        signal = lean_signals(close, strategy_params, chunk_size)
+    total_value = np.empty(n, dtype=np.float64)
+    if keep_intermediates:
+        cash_buf = np.empty(n, dtype=np.float64)
+        shares_buf = np.empty(n, dtype=np.float64)
+
+    accumulator = MetricsAccumulator(initial_capital)
+    trade_parts = []
+    cash, shares = float(initial_capital), 0.0
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        px = close[start:stop].astype(np.float64)
+        sim = simulate_signals(
+            signal[start:stop], px, cash, commission, slippage,
+            initial_shares=shares, trade_from=1 if start == 0 else 0
+        )
+        cash, shares = float(sim['cash'][-1]), float(sim['shares'][-1])
+
+        values = total_value[start:stop]
+        np.multiply(sim['shares'], px, out=values)
+        values += sim['cash']
+        accumulator.update(values)
+
+        if keep_intermediates:
+            cash_buf[start:stop] = sim['cash']
+            shares_buf[start:stop] = sim['shares']
+
+        idx = np.flatnonzero(sim['trade_type'])
+        if len(idx) > 0:
+            trade_parts.append({
+                'position': idx + start,
+                'trade_type': sim['trade_type'][idx],
+                'trade_price': sim['trade_price'][idx],
+                'trade_amount': sim['trade_amount'][idx],
+                'cash': sim['cash'][idx],
+                'shares': sim['shares'][idx],
+                'total_value': values[idx]
+            })
+
+    columns = {col: df[col].to_numpy() for col in PRICE_COLUMNS + ['volume'] if col in df.columns}
+    columns['total_value'] = total_value
+    if keep_intermediates:
+        columns['signal'] = signal
+        columns['cash'] = cash_buf
+        columns['shares'] = shares_buf
+        columns['position_value'] = shares_buf * close.astype(np.float64)
+        returns = np.full(n, np.nan)
+        returns[1:] = total_value[1:] / total_value[:-1] - 1
+        columns['returns'] = returns
+        columns['cumulative_returns'] = total_value / initial_capital - 1
+        running_max = np.fmax.accumulate(total_value) if n > 0 else total_value
+        columns['running_max'] = running_max
+        columns['drawdown_pct'] = (total_value - running_max) / running_max
+    portfolio = pd.DataFrame(columns, index=df.index)
+
+    trade_columns = ['trade_type', 'trade_price', 'trade_amount', 'cash', 'shares', 'total_value']
+    if trade_parts:
+        positions = np.concatenate([part['position'] for part in trade_parts])
+        trades = pd.DataFrame(
+            {col: np.concatenate([part[col] for part in trade_parts]) for col in trade_columns},
+            index=df.index[positions]
+        )
+    else:
+        trades = pd.DataFrame({col: [] for col in trade_columns}, index=df.index[:0])
+
+    trade_count = len(trades)
+    return {
+        'portfolio': portfolio,
+        'trades': trades,
+        'metrics': accumulator.result(trade_count),
+        'trade_count': trade_count
+    }
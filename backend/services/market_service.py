@@ -4,7 +4,9 @@ from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 from services.data_fetcher import DataFetcher
+from services.backtest_result_cache import data_fingerprint
 from core.config import settings
+from indicators.graph import get_indicator_graph_cache
 from loguru import logger
 
 
@@ -186,46 +188,40 @@ class MarketService:
                 return {}
 
             result = {}
+            # 指标节点与同一份数据上的回测共享，已计算过的均线等不再重复计算
+            graph = get_indicator_graph_cache().get(
+                (stock_code, freq, start_date, end_date, data_fingerprint(df)), df
+            )
+
+            def to_list(values) -> list:
+                return pd.Series(values).fillna('').tolist()
 
             # MA指标
             if 'MA' in indicators:
                 result['MA'] = {
-                    'MA5': df['close'].rolling(window=5).mean().fillna('').tolist(),
-                    'MA10': df['close'].rolling(window=10).mean().fillna('').tolist(),
-                    'MA20': df['close'].rolling(window=20).mean().fillna('').tolist(),
-                    'MA60': df['close'].rolling(window=60).mean().fillna('').tolist()
+                    f'MA{window}': to_list(graph.sma(window)) for window in (5, 10, 20, 60)
                 }
 
             # BOLL指标
             if 'BOLL' in indicators:
-                rolling_mean = df['close'].rolling(window=20)
-                rolling_std = df['close'].rolling(window=20).std()
+                middle, upper, lower = graph.boll(20, 2)
                 result['BOLL'] = {
-                    'upper': (rolling_mean + 2 * rolling_std).fillna('').tolist(),
-                    'middle': rolling_mean.fillna('').tolist(),
-                    'lower': (rolling_mean - 2 * rolling_std).fillna('').tolist()
+                    'upper': to_list(upper),
+                    'middle': to_list(middle),
+                    'lower': to_list(lower)
                 }
 
             # RSI指标
             if 'RSI' in indicators:
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = 100 - (100 / (1 + rs))
-                result['RSI'] = rsi.fillna('').tolist()
+                result['RSI'] = to_list(graph.rsi(14))
 
             # MACD指标
             if 'MACD' in indicators:
-                ema12 = df['close'].ewm(span=12, adjust=False).mean()
-                ema26 = df['close'].ewm(span=26, adjust=False).mean()
-                dif = ema12 - ema26
-                dea = dif.ewm(span=9, adjust=False).mean()
-                macd = (dif - dea) * 2
+                dif, dea, hist = graph.macd(12, 26, 9)
                 result['MACD'] = {
-                    'DIF': dif.fillna('').tolist(),
-                    'DEA': dea.fillna('').tolist(),
-                    'MACD': macd.fillna('').tolist()
+                    'DIF': to_list(dif),
+                    'DEA': to_list(dea),
+                    'MACD': to_list(hist * 2)
                 }
 
             return result
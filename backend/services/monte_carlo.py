@@ -0,0 +1,144 @@
+"""蒙特卡洛稳健性分析 - 对回测收益序列重采样，估计绩效指标的置信区间"""
+from typing import Dict, Optional
+import numpy as np
+
+
+# 支持的重采样方法
+MONTE_CARLO_METHODS = ('bootstrap', 'shuffle')
+
+
+def _resample_chunk(
+    returns: np.ndarray,
+    n_paths: int,
+    method: str,
+    block_size: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """生成 (n_paths, n_bars) 的重采样收益率矩阵"""
+    n = len(returns)
+
+    if method == 'shuffle':
+        # 打乱收益顺序：总收益不变，路径（回撤）变化
+        return rng.permuted(np.tile(returns, (n_paths, 1)), axis=1)
+
+    if block_size <= 1:
+        return returns[rng.integers(0, n, size=(n_paths, n))]
+
+    # 块自助法：按连续区块重采样，保留收益的短期相关性
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, n - block_size + 1, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, :n]
+    return returns[idx]
+
+
+def _path_metrics(
+    paths: np.ndarray,
+    periods_per_year: int,
+    risk_free_rate: float
+) -> Dict[str, np.ndarray]:
+    """按行计算每条路径的总收益、最大回撤和夏普比率（会原地修改paths）"""
+    n = paths.shape[1]
+    mean = paths.mean(axis=1)
+    std = paths.std(axis=1, ddof=1) if n > 1 else np.zeros(len(paths))
+    rf = risk_free_rate / periods_per_year
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(std != 0, np.sqrt(periods_per_year) * (mean - rf) / std, 0.0)
+
+    # 净值（以初始资金为1），原地计算避免额外的矩阵分配
+    growth = np.add(paths, 1.0, out=paths)
+    np.cumprod(growth, axis=1, out=growth)
+    total_return = growth[:, -1] - 1
+
+    # 初始资金也是回撤的参照高点
+    running_max = np.maximum.accumulate(growth, axis=1)
+    np.maximum(running_max, 1.0, out=running_max)
+    np.divide(growth, running_max, out=running_max)
+    max_drawdown = 1.0 - np.minimum(running_max.min(axis=1), 1.0)
+
+    return {
+        'total_return': total_return,
+        'max_drawdown': max_drawdown,
+        'sharpe_ratio': sharpe
+    }
+
+
+def monte_carlo_analysis(
+    total_value: np.ndarray,
+    n_paths: int = 10000,
+    method: str = 'bootstrap',
+    block_size: int = 1,
+    confidence: float = 0.95,
+    periods_per_year: int = 252,
+    risk_free_rate: float = 0.03,
+    seed: Optional[int] = None,
+    max_matrix_mb: float = 128.0
+) -> Dict:
+    """
+    对回测净值曲线做蒙特卡洛重采样
+
+    所有路径以 (n_paths, n_bars) 矩阵一次性计算，超过内存上限时按行分块。
+
+    Args:
+        total_value: 回测净值序列
+        n_paths: 模拟路径数
+        method: 重采样方法，bootstrap（有放回抽样）或 shuffle（打乱顺序）
+        block_size: 块自助法的区块长度（1为逐根K线独立抽样）
+        confidence: 置信水平
+        periods_per_year: 每年周期数
+        risk_free_rate: 年化无风险利率
+        seed: 随机种子
+        max_matrix_mb: 单块路径矩阵的内存上限（MB）
+
+    Returns:
+        各指标的原始值、均值、标准差、分位数和置信区间，以及亏损概率
+    """
+    if method not in MONTE_CARLO_METHODS:
+        raise ValueError(f"不支持的重采样方法: {method}")
+    if not 0 < confidence < 1:
+        raise ValueError("置信水平必须在0和1之间")
+    if n_paths < 1:
+        raise ValueError("路径数必须大于0")
+
+    total_value = np.asarray(total_value, dtype=np.float64)
+    returns = total_value[1:] / total_value[:-1] - 1
+    returns = returns[np.isfinite(returns)]
+    n = len(returns)
+    if n < 2:
+        raise ValueError("收益序列过短，无法进行蒙特卡洛分析")
+    block_size = max(1, min(block_size, n))
+
+    rng = np.random.default_rng(seed)
+
+    # 每条路径约占用3个 n_bars 长度的 float64 数组（收益、净值、回撤）
+    chunk_size = max(1, int(max_matrix_mb * 1024 * 1024 // (n * 8 * 3)))
+    collected = {'total_return': [], 'max_drawdown': [], 'sharpe_ratio': []}
+    for start in range(0, n_paths, chunk_size):
+        paths = _resample_chunk(returns, min(chunk_size, n_paths - start), method, block_size, rng)
+        for name, values in _path_metrics(paths, periods_per_year, risk_free_rate).items():
+            collected[name].append(values)
+
+    original = _path_metrics(returns[None, :].copy(), periods_per_year, risk_free_rate)
+    alpha = (1 - confidence) / 2
+
+    metrics = {}
+    for name, chunks in collected.items():
+        values = np.concatenate(chunks)
+        lower, median, upper = np.quantile(values, [alpha, 0.5, 1 - alpha])
+        metrics[name] = {
+            'original': float(original[name][0]),
+            'mean': float(values.mean()),
+            'std': float(values.std()),
+            'median': float(median),
+            'ci_lower': float(lower),
+            'ci_upper': float(upper)
+        }
+
+    return {
+        'method': method,
+        'n_paths': n_paths,
+        'n_bars': n,
+        'block_size': block_size,
+        'confidence': confidence,
+        'metrics': metrics,
+        'probability_of_loss': float((np.concatenate(collected['total_return']) < 0).mean())
+    }
@@ -0,0 +1,431 @@
+"""参数优化任务代理 - 通过HTTP把评估任务分发给远程优化工作者
+
+协议（JSON，得分指标中的 NaN/Infinity 按 Python json 的扩展写法传递）：
+    PUT    /data/{fingerprint}   上传行情（encode_frame 编码）
+    GET    /data/{fingerprint}   下载行情
+    POST   /tasks                提交任务 {job_id, spec, fingerprint, tasks: [{task_id, params_list, budget}]}
+    POST   /lease                领取任务 {worker_id} -> {task: ... | null}
+    POST   /results              提交结果 {task_id, worker_id, metrics | error} -> {accepted}
+    POST   /results/query        查询结果 {task_ids} -> {results: {task_id: {metrics, error, worker_id}}}
+    DELETE /jobs/{job_id}        删除任务和结果
+    GET    /stats                统计
+
+用法（在backend目录下）:
+    python -m services.optimization_broker --host 0.0.0.0 --port 8765
+"""
+import argparse
+import io
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+
+# 任务租约时长（秒）：领取后超过该时间未提交结果的任务重新入队
+DEFAULT_LEASE_SECONDS = 120.0
+# 同一任务最多投递次数，超过后记为失败
+DEFAULT_MAX_ATTEMPTS = 5
+# 最近该时间（秒）内领取过任务的工作者计为在线（空闲工作者也在持续轮询）
+WORKER_TIMEOUT = 30.0
+# 结果和行情超过该时间（秒）未被使用即删除，客户端崩溃未调用 DELETE /jobs 时不会一直占用内存
+DEFAULT_TTL_SECONDS = 3600.0
+# 清理过期条目的最短间隔（秒）
+PURGE_INTERVAL = 60.0
+
+
+def encode_frame(df: pd.DataFrame) -> bytes:
+    """行情编码为npz字节（列和时间索引保留原始类型和精度，解码后数据指纹不变）"""
+    buffer = io.BytesIO()
+    columns = {column: df[column].to_numpy() for column in df.columns}
+    np.savez(buffer, __index__=pd.DatetimeIndex(df.index).to_numpy(), **columns)
+    return buffer.getvalue()
+
+
+def decode_frame(blob: bytes) -> pd.DataFrame:
+    """encode_frame 的逆操作"""
+    with np.load(io.BytesIO(blob)) as arrays:
+        index = pd.DatetimeIndex(arrays['__index__'])
+        return pd.DataFrame({name: arrays[name] for name in arrays.files if name != '__index__'}, index=index)
+
+
+class OptimizationBroker:
+    """
+    评估任务队列（至少一次投递）
+
+    工作者领取任务后进入租约期，租约到期仍未提交结果的任务重新入队，工作者崩溃
+    或失联不会丢任务；因此同一任务可能被执行多次。结果按 task_id 只接受第一次提交
+    （幂等写入），之后的重复提交被忽略。行情按数据指纹只保存一份。
+    结果和行情超过 ttl_seconds 未被使用（查询、下载或有任务引用）时删除。
+    """
+
+    def __init__(
+        self,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS
+    ):
+        """
+        Args:
+            lease_seconds: 任务租约时长（秒）
+            max_attempts: 同一任务最多投递次数
+            ttl_seconds: 结果和行情的保留时长（秒，自最后一次使用起算）
+        """
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._queue: deque = deque()
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._data: Dict[str, bytes] = {}
+        self._data_used: Dict[str, float] = {}
+        self._workers: Dict[str, float] = {}
+        self._next_purge = time.monotonic() + min(PURGE_INTERVAL, ttl_seconds)
+        self._stats = {
+            'submitted': 0, 'delivered': 0, 'redelivered': 0,
+            'completed': 0, 'duplicates': 0, 'failed': 0, 'expired': 0
+        }
+
+    def put_data(self, fingerprint: str, blob: bytes):
+        """保存行情"""
+        with self._lock:
+            self._data[fingerprint] = blob
+            self._data_used[fingerprint] = time.monotonic()
+
+    def get_data(self, fingerprint: str) -> Optional[bytes]:
+        """读取行情，不存在时返回None"""
+        with self._lock:
+            if fingerprint in self._data:
+                self._data_used[fingerprint] = time.monotonic()
+            return self._data.get(fingerprint)
+
+    def submit(self, job_id: str, spec: Dict[str, Any], fingerprint: str, tasks: List[Dict[str, Any]]) -> int:
+        """
+        提交任务（已提交或已完成的 task_id 被忽略，客户端可以安全重试）
+
+        Returns:
+            新入队的任务数
+        """
+        submitted = 0
+        with self._lock:
+            self._maybe_purge(time.monotonic())
+            for task in tasks:
+                task_id = task['task_id']
+                if task_id in self._tasks or task_id in self._results:
+                    continue
+                self._tasks[task_id] = {
+                    'task_id': task_id,
+                    'job_id': job_id,
+                    'spec': spec,
+                    'fingerprint': fingerprint,
+                    'params_list': task['params_list'],
+                    'budget': task.get('budget'),
+                    'attempts': 0,
+                    'leased_until': None
+                }
+                self._queue.append(task_id)
+                submitted += 1
+            self._stats['submitted'] += submitted
+        return submitted
+
+    def lease(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        领取一个任务
+
+        Returns:
+            任务（含 spec、fingerprint、params_list、budget、attempt），队列为空时返回None
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._workers[worker_id] = now
+            self._maybe_purge(now)
+            self._requeue_expired(now)
+            while self._queue:
+                task = self._tasks.get(self._queue.popleft())
+                if task is None or task['leased_until'] is not None:
+                    continue
+                task['attempts'] += 1
+                task['leased_until'] = now + self.lease_seconds
+                task['worker_id'] = worker_id
+                self._data_used[task['fingerprint']] = now
+                self._stats['delivered'] += 1
+                return {
+                    key: task[key]
+                    for key in ('task_id', 'job_id', 'spec', 'fingerprint', 'params_list', 'budget')
+                } | {'attempt': task['attempts']}
+        return None
+
+    def complete(
+        self,
+        task_id: str,
+        worker_id: str,
+        metrics: Optional[List[Dict[str, Any]]] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        """
+        提交任务结果（每个任务只接受第一次提交）
+
+        Returns:
+            是否被接受（重复提交或任务已删除时为False）
+        """
+        with self._lock:
+            if task_id in self._results:
+                self._stats['duplicates'] += 1
+                return False
+            task = self._tasks.pop(task_id, None)
+            if task is None:
+                return False
+            self._results[task_id] = {
+                'job_id': task['job_id'],
+                'metrics': metrics,
+                'error': error,
+                'worker_id': worker_id,
+                'used_at': time.monotonic()
+            }
+            self._stats['completed'] += 1
+            return True
+
+    def results(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """已完成任务的结果（查询过的结果重新计算保留时长）"""
+        with self._lock:
+            now = time.monotonic()
+            for task_id in task_ids:
+                if task_id in self._results:
+                    self._results[task_id]['used_at'] = now
+            return {
+                task_id: {key: self._results[task_id][key] for key in ('metrics', 'error', 'worker_id')}
+                for task_id in task_ids if task_id in self._results
+            }
+
+    def drop_job(self, job_id: str) -> int:
+        """
+        删除任务的全部子任务和结果
+
+        Returns:
+            删除的条目数
+        """
+        with self._lock:
+            task_ids = [task_id for task_id, task in self._tasks.items() if task['job_id'] == job_id]
+            result_ids = [task_id for task_id, result in self._results.items() if result['job_id'] == job_id]
+            for task_id in task_ids:
+                del self._tasks[task_id]
+            for task_id in result_ids:
+                del self._results[task_id]
+            return len(task_ids) + len(result_ids)
+
+    def get_stats(self) -> Dict[str, int]:
+        """队列统计（workers 为在线工作者数）"""
+        with self._lock:
+            now = time.monotonic()
+            leased = sum(1 for task in self._tasks.values() if task['leased_until'] is not None)
+            workers = sum(1 for last_seen in self._workers.values() if now - last_seen <= WORKER_TIMEOUT)
+            return dict(
+                self._stats, queued=len(self._tasks) - leased, leased=leased,
+                results=len(self._results), workers=workers
+            )
+
+    def purge_expired(self) -> int:
+        """
+        删除超过保留时长未使用的结果和行情
+
+        Returns:
+            删除的条目数
+        """
+        with self._lock:
+            return self._purge_expired(time.monotonic())
+
+    def _maybe_purge(self, now: float):
+        if now >= self._next_purge:
+            self._purge_expired(now)
+
+    def _purge_expired(self, now: float) -> int:
+        self._next_purge = now + min(PURGE_INTERVAL, self.ttl_seconds)
+        cutoff = now - self.ttl_seconds
+        results = [task_id for task_id, result in self._results.items() if result['used_at'] < cutoff]
+        for task_id in results:
+            del self._results[task_id]
+        # 仍有任务引用的行情保留
+        referenced = {task['fingerprint'] for task in self._tasks.values()}
+        data = [fp for fp, used in self._data_used.items() if used < cutoff and fp not in referenced]
+        for fp in data:
+            self._data.pop(fp, None)
+            del self._data_used[fp]
+        for worker_id in [w for w, last_seen in self._workers.items() if last_seen < cutoff]:
+            del self._workers[worker_id]
+        if results or data:
+            self._stats['expired'] += len(results) + len(data)
+            logger.info(f"删除过期的结果 {len(results)} 条、行情 {len(data)} 份")
+        return len(results) + len(data)
+
+    def _requeue_expired(self, now: float):
+        """租约到期的任务重新入队，超过最多投递次数的记为失败"""
+        for task_id, task in list(self._tasks.items()):
+            if task['leased_until'] is None or task['leased_until'] > now:
+                continue
+            if task['attempts'] >= self.max_attempts:
+                del self._tasks[task_id]
+                self._results[task_id] = {
+                    'job_id': task['job_id'],
+                    'metrics': None,
+                    'error': f"超过最多投递次数 {self.max_attempts}",
+                    'worker_id': None,
+                    'used_at': now
+                }
+                self._stats['failed'] += 1
+                continue
+            logger.warning(f"任务 {task_id} 租约到期（工作者 {task.get('worker_id')}），重新入队")
+            task['leased_until'] = None
+            self._queue.append(task_id)
+            self._stats['redelivered'] += 1
+
+
+class _BrokerRequestHandler(BaseHTTPRequestHandler):
+    """把HTTP请求映射到 OptimizationBroker 的方法"""
+
+    @property
+    def broker(self) -> OptimizationBroker:
+        return self.server.broker
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        if parts == ['stats']:
+            self._send_json(self.broker.get_stats())
+        elif len(parts) == 2 and parts[0] == 'data':
+            blob = self.broker.get_data(parts[1])
+            if blob is None:
+                self._send_json({'detail': '行情不存在'}, status=404)
+            else:
+                self._send(blob, 'application/octet-stream')
+        else:
+            self._send_json({'detail': '未知路径'}, status=404)
+
+    def do_PUT(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'data':
+            self.broker.put_data(parts[1], self._read_body())
+            self._send_json({'stored': True})
+        else:
+            self._send_json({'detail': '未知路径'}, status=404)
+
+    def do_POST(self):
+        path = self.path.strip('/')
+        try:
+            body = json.loads(self._read_body() or b'{}')
+        except ValueError:
+            self._send_json({'detail': '请求体不是JSON'}, status=400)
+            return
+
+        if path == 'tasks':
+            submitted = self.broker.submit(body['job_id'], body['spec'], body['fingerprint'], body['tasks'])
+            self._send_json({'submitted': submitted})
+        elif path == 'lease':
+            self._send_json({'task': self.broker.lease(body.get('worker_id', 'unknown'))})
+        elif path == 'results':
+            accepted = self.broker.complete(
+                body['task_id'], body.get('worker_id', 'unknown'), body.get('metrics'), body.get('error')
+            )
+            self._send_json({'accepted': accepted})
+        elif path == 'results/query':
+            self._send_json({'results': self.broker.results(body.get('task_ids', []))})
+        else:
+            self._send_json({'detail': '未知路径'}, status=404)
+
+    def do_DELETE(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'jobs':
+            self._send_json({'deleted': self.broker.drop_job(parts[1])})
+        else:
+            self._send_json({'detail': '未知路径'}, status=404)
+
+    def log_message(self, format: str, *args):
+        logger.debug(f"[优化代理] {self.address_string()} {format % args}")
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send_json(self, payload: Any, status: int = 200):
+        self._send(json.dumps(payload).encode(), 'application/json', status)
+
+    def _send(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class BrokerServer:
+    """
+    HTTP任务代理服务
+
+    测试和单机使用时在后台线程中运行（port=0 自动分配端口）；多机部署时
+    用命令行 python -m services.optimization_broker 单独启动。
+    """
+
+    def __init__(self, broker: Optional[OptimizationBroker] = None, host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            broker: 任务队列（默认新建）
+            host: 监听地址
+            port: 监听端口（0为自动分配）
+        """
+        self.broker = broker if broker is not None else OptimizationBroker()
+        self._server = ThreadingHTTPServer((host, port), _BrokerRequestHandler)
+        self._server.daemon_threads = True
+        self._server.broker = self.broker
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'BrokerServer':
+        """在后台线程中启动"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='optimization-broker', daemon=True)
+        self._thread.start()
+        logger.info(f"优化任务代理已启动: {self.url}")
+        return self
+
+    def serve_forever(self):
+        """在当前线程中运行"""
+        logger.info(f"优化任务代理已启动: {self.url}")
+        self._server.serve_forever()
+
+    def stop(self):
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='参数优化任务代理')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('--lease-seconds', type=float, default=DEFAULT_LEASE_SECONDS, help='任务租约时长（秒）')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS, help='同一任务最多投递次数')
+    parser.add_argument('--ttl-seconds', type=float, default=DEFAULT_TTL_SECONDS, help='结果和行情的保留时长（秒）')
+    args = parser.parse_args()
+
+    broker = OptimizationBroker(
+        lease_seconds=args.lease_seconds, max_attempts=args.max_attempts, ttl_seconds=args.ttl_seconds
+    )
+    server = BrokerServer(broker, host=args.host, port=args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""参数优化目标函数 - 在同一份行情上批量回测参数组合"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from indicators.graph import IndicatorGraph
+from optimizers.executors import BatchObjective
+from .backtest_service import BacktestEngine
+
+
+class BacktestObjective(BatchObjective):
+    """
+    回测目标函数
+
+    行情按列保存在 arrays 中，进程池评估时由各工作进程映射同一份数据；
+    回测引擎和指标计算图在每个进程中首次评估时创建，之后各批共享，
+    相同周期的指标在一个进程中只计算一次。
+
+    预算以K线数计：budget=n 时只用最近 n 根K线回测（各预算分别缓存指标计算图）。
+    """
+
+    TRANSIENT_ATTRS = ('_windows', '_engine')
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        strategy_type: str,
+        objective: str = 'sharpe_ratio',
+        maximize: bool = True,
+        initial_capital: float = 100000.0,
+        commission: float = 0.0003,
+        slippage: float = 0.001,
+        max_matrix_mb: float = 256.0
+    ):
+        """
+        Args:
+            df: K线数据（至少包含close列）
+            strategy_type: 策略类型 (MA, RSI, BOLL, MACD 或已注册的策略插件)
+            objective: 优化目标（绩效指标名）
+            maximize: 是否最大化（决定无效指标的得分）
+            initial_capital: 初始资金
+            commission: 手续费率
+            slippage: 滑点
+            max_matrix_mb: 单批模拟矩阵的内存上限（MB）
+        """
+        df = df.sort_index()
+        columns = [column for column in ('open', 'high', 'low', 'close', 'volume') if column in df.columns]
+        super().__init__({column: df[column].to_numpy(dtype=np.float64) for column in columns})
+        self.index = df.index
+        self.strategy_type = strategy_type
+        self.objective = objective
+        self.maximize = maximize
+        self.worst = float('-inf') if maximize else float('inf')
+        self.initial_capital = initial_capital
+        self.commission = commission
+        self.slippage = slippage
+        self.max_matrix_mb = max_matrix_mb
+        self._windows: Optional[Dict[int, Tuple[pd.DataFrame, IndicatorGraph]]] = None
+        self._engine: Optional[BacktestEngine] = None
+
+    @property
+    def max_budget(self) -> int:
+        return len(self.index)
+
+    def attach(self, arrays: Dict[str, np.ndarray]):
+        super().attach(arrays)
+        self._windows = None
+
+    @property
+    def spec(self) -> Dict[str, Any]:
+        """除行情外重建目标函数所需的参数（远程工作者用它和同一份行情构造目标函数）"""
+        return {
+            'strategy_type': self.strategy_type,
+            'objective': self.objective,
+            'maximize': self.maximize,
+            'initial_capital': self.initial_capital,
+            'commission': self.commission,
+            'slippage': self.slippage,
+            'max_matrix_mb': self.max_matrix_mb
+        }
+
+    def to_frame(self) -> pd.DataFrame:
+        """全部K线"""
+        return self._window(self.max_budget)[0]
+
+    def evaluate_batch(self, params_list: List[Dict[str, Any]], budget: Optional[int] = None) -> List[float]:
+        return [self._score(metrics) for metrics in self.evaluate_metrics(params_list, budget)]
+
+    def evaluate_metrics(
+        self,
+        params_list: List[Dict[str, Any]],
+        budget: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """批量回测，返回每组参数的全部绩效指标"""
+        df, graph = self._window(min(budget or self.max_budget, self.max_budget))
+        if self._engine is None:
+            self._engine = BacktestEngine(self.initial_capital, self.commission, self.slippage)
+
+        return self._engine.run_batch(
+            df, self.strategy_type, params_list,
+            max_matrix_mb=self.max_matrix_mb, graph=graph
+        )
+
+    def _window(self, n_bars: int) -> Tuple[pd.DataFrame, IndicatorGraph]:
+        """最近 n_bars 根K线及其指标计算图"""
+        if self._windows is None:
+            self._windows = {}
+        if n_bars not in self._windows:
+            df = pd.DataFrame(
+                {name: values[-n_bars:] for name, values in self.arrays.items()},
+                index=self.index[-n_bars:]
+            )
+            self._windows[n_bars] = (df, IndicatorGraph(df))
+        return self._windows[n_bars]
+
+    def _score(self, metrics: Dict[str, Any]) -> float:
+        score = metrics.get(self.objective)
+        if score is None or np.isnan(score):
+            return self.worst
+        return float(score)
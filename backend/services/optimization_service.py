@@ -1,6 +1,7 @@
 """优化服务"""
 import logging
-from typing import Dict, Any, List, Callable, Optional
+import uuid
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
 from optimizers import (
@@ -8,12 +9,23 @@ from optimizers import (
     GridSearchOptimizer,
     GeneticOptimizer,
     BayesianOptimizer,
+    HyperbandOptimizer,
     OptimizationResult
 )
+from services.backtest_result_cache import data_fingerprint
 from services.backtest_service import BacktestEngine as BacktestService
+from services.distributed_executor import DistributedExecutor
+from services.optimization_objective import BacktestObjective
+from services.optimization_store import OptimizationStore, make_study_key
+from services.walk_forward import run_walk_forward
 
 logger = logging.getLogger(__name__)
 
+# 可作为优化目标的绩效指标
+OBJECTIVE_METRICS = (
+    'total_return', 'sharpe_ratio', 'max_drawdown', 'calmar_ratio', 'win_rate', 'profit_loss_ratio'
+)
+
 
 class OptimizationService:
     """优化服务
@@ -21,15 +33,24 @@ class OptimizationService:
     提供统一的优化接口，管理优化任务
     """
     
-    def __init__(self, backtest_service: BacktestService):
+    def __init__(
+        self,
+        backtest_service: BacktestService,
+        store: Optional[OptimizationStore] = None,
+        broker_url: Optional[str] = None
+    ):
         """
         初始化优化服务
         
         Args:
             backtest_service: 回测服务
+            store: 参数优化存储（为None时不持久化评估结果和运行记录）
+            broker_url: 优化任务代理地址（executor="distributed" 时把评估分发给远程工作者）
         """
         self.backtest_service = backtest_service
-        self.optimization_tasks = {}  # 存储优化任务
+        self.store = store
+        self.broker_url = broker_url
+        self.optimization_tasks = {}  # 本进程中正在进行的优化任务（run_id -> 任务信息）
     
     async def run_optimization(
         self,
@@ -44,11 +65,18 @@ class OptimizationService:
         objective: str = 'sharpe_ratio',
         maximize: bool = True,
         n_jobs: int = 1,
+        run_id: Optional[str] = None,
+        warm_start: bool = True,
         **kwargs
     ) -> OptimizationResult:
         """
         运行优化
         
+        配置了参数优化存储时，每个评估过的参数组合都按研究键（策略、股票、区间、
+        数据指纹、目标）写入存储，同一研究中已评估的参数不再回测；运行记录保存
+        重新运行所需的配置，中断后以同一 run_id 重新运行（见 resume_optimization）
+        即可从存储中取回已完成的评估。
+        
         Args:
             strategy_type: 策略类型
             stock_code: 股票代码
@@ -56,19 +84,39 @@ class OptimizationService:
             end_date: 结束日期
             frequency: 频率
             initial_capital: 初始资金
-            optimization_method: 优化方法 (grid_search, genetic, bayesian)
+            optimization_method: 优化方法 (grid_search, genetic, bayesian, hyperband)
             param_ranges: 参数范围
             objective: 优化目标
             maximize: 是否最大化
             n_jobs: 并行任务数
+            run_id: 运行ID（为None时生成新的ID）
+            warm_start: 是否用存储中的历史最优点热启动遗传算法和贝叶斯优化
             **kwargs: 其他参数
             
         Returns:
-            OptimizationResult: 优化结果
+            OptimizationResult: 优化结果（持久化时 stats 中包含 run_id）
         """
         logger.info(f"开始优化: {strategy_type}, {stock_code}, 方法: {optimization_method}")
         
-        # 创建优化器
+        # 行情只获取一次，所有参数组合共享同一份数组
+        df = await self._load_data(stock_code, start_date, end_date, frequency)
+        
+        # 创建目标函数
+        objective_func = self._create_objective_func(
+            df=df,
+            strategy_type=strategy_type,
+            initial_capital=initial_capital,
+            objective=objective,
+            maximize=maximize
+        )
+        
+        use_store = self.store is not None and self.store.enabled
+        if use_store:
+            run_id = run_id or uuid.uuid4().hex
+            if run_id in self.optimization_tasks:
+                raise ValueError(f"优化运行正在进行: {run_id}")
+        
+        # 创建优化器（在行情加载和运行检查之后，出错时不会遗留分布式执行器的连接）
         optimizer = self._create_optimizer(
             method=optimization_method,
             objective=objective,
@@ -77,29 +125,224 @@ class OptimizationService:
             **kwargs
         )
         
-        # 创建目标函数
-        objective_func = self._create_objective_func(
-            strategy_type=strategy_type,
-            stock_code=stock_code,
-            start_date=start_date,
-            end_date=end_date,
-            frequency=frequency,
-            initial_capital=initial_capital,
-            objective=objective
-        )
+        study_key = None
+        if use_store:
+            study_key = make_study_key(
+                strategy_type, stock_code, frequency, start_date, end_date, data_fingerprint(df),
+                objective_func.objective, maximize, initial_capital,
+                objective_func.commission, objective_func.slippage
+            )
+            config = dict(
+                strategy_type=strategy_type, stock_code=stock_code, start_date=start_date, end_date=end_date,
+                frequency=frequency, initial_capital=initial_capital, optimization_method=optimization_method,
+                param_ranges=param_ranges, objective=objective, maximize=maximize, n_jobs=n_jobs,
+                warm_start=warm_start, **kwargs
+            )
+            self.store.create_run(run_id, study_key, optimization_method, config)
+            optimizer.attach_store(self.store.study(study_key), warm_start=warm_start)
+            self.optimization_tasks[run_id] = {
+                'method': optimization_method,
+                'study_key': study_key,
+                'started_at': datetime.now()
+            }
         
         # 运行优化
-        result = await optimizer.optimize(
-            objective_func=objective_func,
+        try:
+            result = await optimizer.optimize(
+                objective_func=objective_func,
+                param_ranges=param_ranges,
+                verbose=True,
+                **kwargs
+            )
+        except Exception as e:
+            if study_key is not None:
+                self.store.update_run(run_id, 'failed', error=str(e))
+            raise
+        finally:
+            self.optimization_tasks.pop(run_id, None)
+            if isinstance(optimizer.executor, DistributedExecutor):
+                optimizer.executor.close()
+        
+        if study_key is not None:
+            self.store.update_run(
+                run_id, 'completed', best_params=result.best_params, best_score=result.best_score,
+                evaluations=self.store.count(study_key)
+            )
+            result.stats['run_id'] = run_id
+        
+        logger.info(f"优化完成: 最优得分 {result.best_score:.4f}")
+        
+        return result
+    
+    async def resume_optimization(self, run_id: str) -> OptimizationResult:
+        """
+        恢复（重新运行）一次优化
+        
+        按运行记录中的配置重新运行，已写入存储的评估直接复用，
+        因此中断的运行只需补上未完成的部分。
+        
+        Args:
+            run_id: 运行ID
+            
+        Returns:
+            OptimizationResult: 优化结果
+        """
+        if self.store is None or not self.store.enabled:
+            raise ValueError("未配置参数优化存储，无法恢复优化")
+        
+        run = self.store.get_run(run_id)
+        if run is None:
+            raise ValueError(f"优化运行不存在: {run_id}")
+        
+        logger.info(f"恢复优化: {run_id}, 状态: {run['status']}")
+        return await self.run_optimization(run_id=run_id, **run['config'])
+    
+    def get_optimization_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取优化运行记录
+        
+        Args:
+            run_id: 运行ID
+            
+        Returns:
+            Optional[Dict[str, Any]]: 运行记录（active 表示是否在本进程中进行）
+        """
+        if self.store is None:
+            return None
+        run = self.store.get_run(run_id)
+        if run is not None:
+            run['active'] = run_id in self.optimization_tasks
+        return run
+    
+    def list_optimization_runs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        列出优化运行记录
+        
+        状态为 running 但不在本进程中进行的运行是服务重启前被中断的，可以恢复。
+        
+        Args:
+            status: 按状态过滤 (running, completed, failed)
+            limit: 限制数量
+            
+        Returns:
+            List[Dict[str, Any]]: 运行记录列表
+        """
+        if self.store is None:
+            return []
+        runs = self.store.list_runs(status, limit)
+        for run in runs:
+            run['active'] = run['run_id'] in self.optimization_tasks
+        return runs
+    
+    async def run_walk_forward_optimization(
+        self,
+        strategy_type: str,
+        stock_code: str,
+        start_date: str,
+        end_date: str,
+        train_bars: int,
+        test_bars: int,
+        step_bars: Optional[int] = None,
+        anchored: bool = False,
+        frequency: str = 'daily',
+        initial_capital: float = 100000,
+        optimization_method: str = 'grid_search',
+        param_ranges: Dict[str, Dict[str, Any]] = None,
+        objective: str = 'sharpe_ratio',
+        maximize: bool = True,
+        n_jobs: int = 1,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        运行滚动前推优化
+        
+        数据只获取一次，按训练/测试窗口切分后在进程池中并行优化，
+        返回各窗口最优参数和拼接后的样本外净值曲线。
+        
+        Args:
+            strategy_type: 策略类型
+            stock_code: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            train_bars: 训练窗口长度（K线数）
+            test_bars: 测试窗口长度（K线数）
+            step_bars: 窗口前推步长（默认等于test_bars）
+            anchored: 是否锚定训练起点
+            frequency: 频率
+            initial_capital: 初始资金
+            optimization_method: 优化方法 (grid_search, genetic, bayesian, hyperband)
+            param_ranges: 参数范围
+            objective: 优化目标
+            maximize: 是否最大化
+            n_jobs: 并行进程数
+            **kwargs: 优化器参数
+            
+        Returns:
+            Dict[str, Any]: 滚动前推优化结果
+        """
+        logger.info(f"开始滚动前推优化: {strategy_type}, {stock_code}, 方法: {optimization_method}")
+        
+        df = await self._load_data(stock_code, start_date, end_date, frequency)
+        
+        result = await run_walk_forward(
+            df,
+            strategy_type=strategy_type,
             param_ranges=param_ranges,
-            verbose=True,
-            **kwargs
+            train_bars=train_bars,
+            test_bars=test_bars,
+            step_bars=step_bars,
+            anchored=anchored,
+            optimization_method=optimization_method,
+            objective=objective,
+            maximize=maximize,
+            initial_capital=initial_capital,
+            commission=self.backtest_service.commission,
+            slippage=self.backtest_service.slippage,
+            n_jobs=n_jobs,
+            optimizer_kwargs=kwargs
         )
+        result.update({
+            'strategy_type': strategy_type,
+            'stock_code': stock_code,
+            'frequency': frequency,
+            'optimization_method': optimization_method,
+            'objective': objective
+        })
         
-        logger.info(f"优化完成: 最优得分 {result.best_score:.4f}")
+        logger.info(f"滚动前推优化完成: {len(result['folds'])}个窗口")
         
         return result
     
+    async def _load_data(
+        self,
+        stock_code: str,
+        start_date: str,
+        end_date: str,
+        frequency: str
+    ):
+        """
+        获取优化用的K线数据（整个优化过程只调用一次）
+        
+        Args:
+            stock_code: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            frequency: 频率
+            
+        Returns:
+            pd.DataFrame: K线数据
+        """
+        data_provider = self.backtest_service._get_data_provider('auto')
+        df = await data_provider.get_data(
+            code=stock_code,
+            start_date=datetime.fromisoformat(start_date),
+            end_date=datetime.fromisoformat(end_date),
+            freq=frequency
+        )
+        if df is None or len(df) == 0:
+            raise ValueError(f"未获取到数据: {stock_code} {start_date} ~ {end_date}")
+        return df
+    
     def _create_optimizer(
         self,
         method: str,
@@ -121,11 +364,21 @@ class OptimizationService:
         Returns:
             BaseOptimizer: 优化器实例
         """
+        executor = kwargs.get('executor', 'auto')
+        if executor == 'distributed':
+            if not self.broker_url:
+                raise ValueError("未配置优化任务代理地址 (OPTIMIZATION_BROKER_URL)，无法使用分布式评估")
+            executor = DistributedExecutor(self.broker_url, chunk_size=kwargs.get('distributed_chunk_size'))
+        
         if method == 'grid_search':
             return GridSearchOptimizer(
                 objective=objective,
                 maximize=maximize,
-                n_jobs=n_jobs
+                n_jobs=n_jobs,
+                executor=executor,
+                adaptive=kwargs.get('adaptive', False),
+                coarse_points=kwargs.get('coarse_points', 5),
+                top_k=kwargs.get('top_k', 3)
             )
         elif method == 'genetic':
             return GeneticOptimizer(
@@ -136,7 +389,11 @@ class OptimizationService:
                 generations=kwargs.get('generations', 20),
                 crossover_rate=kwargs.get('crossover_rate', 0.8),
                 mutation_rate=kwargs.get('mutation_rate', 0.1),
-                elitism_rate=kwargs.get('elitism_rate', 0.1)
+                elitism_rate=kwargs.get('elitism_rate', 0.1),
+                executor=executor,
+                n_islands=kwargs.get('n_islands', 1),
+                migration_interval=kwargs.get('migration_interval', 5),
+                migration_size=kwargs.get('migration_size', 2)
             )
         elif method == 'bayesian':
             return BayesianOptimizer(
@@ -145,74 +402,62 @@ class OptimizationService:
                 n_jobs=n_jobs,
                 n_iter=kwargs.get('n_iter', 100),
                 n_init=kwargs.get('n_init', 10),
-                acquisition=kwargs.get('acquisition', 'EI')
+                acquisition=kwargs.get('acquisition', 'EI'),
+                executor=executor
+            )
+        elif method == 'hyperband':
+            return HyperbandOptimizer(
+                objective=objective,
+                maximize=maximize,
+                n_jobs=n_jobs,
+                eta=kwargs.get('eta', 3),
+                min_bars=kwargs.get('min_bars'),
+                max_bars=kwargs.get('max_bars'),
+                n_candidates=kwargs.get('n_candidates'),
+                n_brackets=kwargs.get('n_brackets', 1),
+                executor=executor,
+                seed=kwargs.get('seed')
             )
         else:
             raise ValueError(f"不支持的优化方法: {method}")
     
     def _create_objective_func(
         self,
+        df,
         strategy_type: str,
-        stock_code: str,
-        start_date: str,
-        end_date: str,
-        frequency: str,
         initial_capital: float,
-        objective: str
-    ) -> Callable:
+        objective: str,
+        maximize: bool
+    ) -> BacktestObjective:
         """
         创建目标函数
         
+        目标函数持有预先获取的K线数组，优化器每批参数调用一次向量化的批量回测，
+        不再逐组走 run_backtest 的数据获取流程。
+        
         Args:
+            df: K线数据
             strategy_type: 策略类型
-            stock_code: 股票代码
-            start_date: 开始日期
-            end_date: 结束日期
-            frequency: 频率
             initial_capital: 初始资金
             objective: 优化目标
+            maximize: 是否最大化（决定回测失败时的得分）
             
         Returns:
-            Callable: 目标函数
+            BacktestObjective: 目标函数
         """
-        async def objective_func(params: Dict[str, Any]) -> float:
-            """目标函数"""
-            try:
-                # 运行回测
-                result = await self.backtest_service.run_backtest(
-                    strategy_type=strategy_type,
-                    stock_code=stock_code,
-                    start_date=start_date,
-                    end_date=end_date,
-                    frequency=frequency,
-                    initial_capital=initial_capital,
-                    params=params
-                )
-                
-                # 提取目标值
-                if objective == 'total_return':
-                    return result.get('total_return', float('-inf'))
-                elif objective == 'sharpe_ratio':
-                    return result.get('sharpe_ratio', float('-inf'))
-                elif objective == 'max_drawdown':
-                    # 对于回撤，越小越好
-                    return result.get('max_drawdown', float('inf'))
-                elif objective == 'calmar_ratio':
-                    return result.get('calmar_ratio', float('-inf'))
-                elif objective == 'win_rate':
-                    return result.get('win_rate', float('-inf'))
-                elif objective == 'profit_loss_ratio':
-                    return result.get('profit_loss_ratio', float('-inf'))
-                else:
-                    logger.warning(f"未知的目标: {objective}, 使用total_return")
-                    return result.get('total_return', float('-inf'))
-                    
-            except Exception as e:
-                logger.error(f"回测失败: {params}, 错误: {e}")
-                # 返回最差值
-                return float('-inf') if objective != 'max_drawdown' else float('inf')
-        
-        return objective_func
+        if objective not in OBJECTIVE_METRICS:
+            logger.warning(f"未知的目标: {objective}, 使用total_return")
+            objective = 'total_return'
+        
+        return BacktestObjective(
+            df,
+            strategy_type=strategy_type,
+            objective=objective,
+            maximize=maximize,
+            initial_capital=initial_capital,
+            commission=self.backtest_service.commission,
+            slippage=self.backtest_service.slippage
+        )
     
     async def run_parallel_optimization(
         self,
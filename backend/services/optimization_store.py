@@ -0,0 +1,302 @@
+"""参数优化持久化 - 评估结果和运行记录保存在DuckDB中，支持热启动和恢复中断的优化"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+from loguru import logger
+
+from optimizers.evaluation_store import EvaluationStore
+from .backtest_data_provider import get_shared_storage
+from .duckdb_storage_service import DuckDBStorageService
+
+
+# 运行状态
+RUN_STATUSES = ('running', 'completed', 'failed')
+
+
+def make_study_key(
+    strategy_type: str,
+    stock_code: str,
+    frequency: str,
+    start_date: str,
+    end_date: str,
+    fingerprint: str,
+    objective: str,
+    maximize: bool,
+    initial_capital: float,
+    commission: float,
+    slippage: float
+) -> str:
+    """
+    生成研究键
+
+    同一研究内参数组合的得分可以直接复用：策略、股票、区间、数据指纹、
+    优化目标和交易成本任何一项不同都会得到不同的键。
+    """
+    payload = json.dumps({
+        'strategy_type': strategy_type,
+        'stock_code': stock_code,
+        'frequency': frequency,
+        'start_date': start_date,
+        'end_date': end_date,
+        'fingerprint': fingerprint,
+        'objective': objective,
+        'maximize': maximize,
+        'initial_capital': initial_capital,
+        'commission': commission,
+        'slippage': slippage
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _params_json(params: Dict[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def make_param_key(params: Dict[str, Any]) -> str:
+    """参数组合的规范键（与参数顺序无关）"""
+    return hashlib.blake2b(_params_json(params).encode(), digest_size=16).hexdigest()
+
+
+class StudyEvaluations(EvaluationStore):
+    """绑定到一个研究的评估结果存储，供优化器查询和写回得分"""
+
+    def __init__(self, store: 'OptimizationStore', study_key: str):
+        self.store = store
+        self.study_key = study_key
+
+    def lookup(self, params_list: Sequence[Dict[str, Any]]) -> List[Optional[float]]:
+        return self.store.lookup(self.study_key, params_list)
+
+    def save(self, params_list: Sequence[Dict[str, Any]], scores: Sequence[float]):
+        self.store.save(self.study_key, params_list, scores)
+
+    def best(self, limit: int, maximize: bool = True) -> List[Dict[str, Any]]:
+        return self.store.best(self.study_key, limit, maximize)
+
+
+class OptimizationStore:
+    """
+    参数优化持久化
+
+    optimization_evaluations 表按 (研究键, 参数键) 保存全预算下的得分，写入幂等；
+    optimization_runs 表保存每次运行的配置、状态和最优解。服务重启后，
+    以同一 run_id 重新运行时已评估的参数直接取自存储，不再重复回测。
+    读写失败只记录警告，优化照常进行。
+    """
+
+    def __init__(self, storage: Optional[DuckDBStorageService] = None):
+        """
+        Args:
+            storage: DuckDB存储服务（默认使用进程内共享实例）
+        """
+        self.storage = storage if storage is not None else get_shared_storage()
+
+    @property
+    def enabled(self) -> bool:
+        """本地DuckDB不可用时不持久化"""
+        return self.storage is not None
+
+    def study(self, study_key: str) -> StudyEvaluations:
+        """获取绑定到研究的评估结果存储"""
+        return StudyEvaluations(self, study_key)
+
+    def lookup(self, study_key: str, params_list: Sequence[Dict[str, Any]]) -> List[Optional[float]]:
+        """
+        查询参数组合的得分
+
+        Args:
+            study_key: 研究键
+            params_list: 参数列表
+
+        Returns:
+            与 params_list 一一对应的得分，未存储的为None
+        """
+        keys = [make_param_key(params) for params in params_list]
+        if not self.enabled or not keys:
+            return [None] * len(keys)
+
+        try:
+            rows = self.storage.con.execute("""
+                SELECT param_key, score FROM optimization_evaluations
+                WHERE study_key = ? AND param_key IN (SELECT UNNEST(?::VARCHAR[]))
+            """, [study_key, list(set(keys))]).fetchall()
+        except Exception as e:
+            logger.warning(f"读取优化评估结果失败: {e}")
+            return [None] * len(keys)
+
+        scores = dict(rows)
+        return [scores.get(key) for key in keys]
+
+    def save(self, study_key: str, params_list: Sequence[Dict[str, Any]], scores: Sequence[float]) -> int:
+        """
+        写入参数组合的得分（同一参数重复写入时覆盖）
+
+        Returns:
+            写入的记录数
+        """
+        if not self.enabled or not params_list:
+            return 0
+
+        df_evaluations = pd.DataFrame({
+            'study_key': study_key,
+            'param_key': [make_param_key(params) for params in params_list],
+            'params': [_params_json(params) for params in params_list],
+            'score': [float(score) for score in scores],
+            'created_at': datetime.now()
+        }).drop_duplicates('param_key', keep='last')
+
+        try:
+            self.storage.con.execute("""
+                INSERT OR REPLACE INTO optimization_evaluations
+                SELECT study_key, param_key, params, score, created_at FROM df_evaluations
+            """)
+            return len(df_evaluations)
+        except Exception as e:
+            logger.warning(f"写入优化评估结果失败: {e}")
+            return 0
+
+    def best(self, study_key: str, limit: int, maximize: bool = True) -> List[Dict[str, Any]]:
+        """
+        研究中得分最优的记录（不含评估失败的±inf得分）
+
+        Returns:
+            [{'params': ..., 'score': ...}]，按得分从优到劣
+        """
+        if not self.enabled:
+            return []
+
+        direction = 'DESC' if maximize else 'ASC'
+        try:
+            rows = self.storage.con.execute(f"""
+                SELECT params, score FROM optimization_evaluations
+                WHERE study_key = ? AND isfinite(score)
+                ORDER BY score {direction}, param_key
+                LIMIT ?
+            """, [study_key, int(limit)]).fetchall()
+        except Exception as e:
+            logger.warning(f"读取优化评估结果失败: {e}")
+            return []
+
+        return [{'params': json.loads(params), 'score': score} for params, score in rows]
+
+    def count(self, study_key: str) -> int:
+        """研究中已存储的评估数"""
+        if not self.enabled:
+            return 0
+        return self.storage.con.execute("""
+            SELECT COUNT(*) FROM optimization_evaluations WHERE study_key = ?
+        """, [study_key]).fetchone()[0]
+
+    def create_run(self, run_id: str, study_key: str, method: str, config: Dict[str, Any]) -> bool:
+        """
+        记录一次运行（同一 run_id 重新运行时重置为 running）
+
+        Args:
+            run_id: 运行ID
+            study_key: 研究键
+            method: 优化方法
+            config: 重新运行所需的全部参数
+
+        Returns:
+            是否成功
+        """
+        if not self.enabled:
+            return False
+
+        now = datetime.now()
+        try:
+            self.storage.con.execute("""
+                INSERT INTO optimization_runs
+                    (run_id, study_key, method, status, config, created_at, updated_at)
+                VALUES (?, ?, ?, 'running', ?, ?, ?)
+                ON CONFLICT (run_id) DO UPDATE SET
+                    study_key = excluded.study_key,
+                    method = excluded.method,
+                    status = 'running',
+                    config = excluded.config,
+                    error = NULL,
+                    updated_at = excluded.updated_at
+            """, [run_id, study_key, method, json.dumps(config, default=str), now, now])
+            return True
+        except Exception as e:
+            logger.warning(f"记录优化运行失败: {e}")
+            return False
+
+    def update_run(
+        self,
+        run_id: str,
+        status: str,
+        best_params: Optional[Dict[str, Any]] = None,
+        best_score: Optional[float] = None,
+        evaluations: Optional[int] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        """更新运行状态和结果"""
+        if not self.enabled:
+            return False
+
+        try:
+            self.storage.con.execute("""
+                UPDATE optimization_runs SET
+                    status = ?,
+                    best_params = COALESCE(?, best_params),
+                    best_score = COALESCE(?, best_score),
+                    evaluations = COALESCE(?, evaluations),
+                    error = ?,
+                    updated_at = ?
+                WHERE run_id = ?
+            """, [
+                status,
+                None if best_params is None else _params_json(best_params),
+                best_score, evaluations, error, datetime.now(), run_id
+            ])
+            return True
+        except Exception as e:
+            logger.warning(f"更新优化运行失败: {e}")
+            return False
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """获取运行记录，不存在时返回None"""
+        runs = self._query_runs("WHERE run_id = ?", [run_id])
+        return runs[0] if runs else None
+
+    def list_runs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """按更新时间倒序列出运行记录"""
+        if status is not None and status not in RUN_STATUSES:
+            raise ValueError(f"不支持的运行状态: {status}")
+        if status is None:
+            return self._query_runs("ORDER BY updated_at DESC LIMIT ?", [int(limit)])
+        return self._query_runs("WHERE status = ? ORDER BY updated_at DESC LIMIT ?", [status, int(limit)])
+
+    def _query_runs(self, clause: str, params: List[Any]) -> List[Dict[str, Any]]:
+        if not self.enabled:
+            return []
+
+        cursor = self.storage.con.execute(f"""
+            SELECT run_id, study_key, method, status, config, best_params, best_score,
+                   evaluations, error, created_at, updated_at
+            FROM optimization_runs {clause}
+        """, params)
+        columns = [column[0] for column in cursor.description]
+        runs = []
+        for row in cursor.fetchall():
+            run = dict(zip(columns, row))
+            run['config'] = json.loads(run['config'])
+            run['best_params'] = json.loads(run['best_params']) if run['best_params'] else None
+            run['stored_evaluations'] = self.count(run['study_key'])
+            runs.append(run)
+        return runs
+
+
+_shared_optimization_store: Optional[OptimizationStore] = None
+
+
+def get_shared_optimization_store() -> OptimizationStore:
+    """获取进程内共享的参数优化存储"""
+    global _shared_optimization_store
+    if _shared_optimization_store is None:
+        _shared_optimization_store = OptimizationStore()
+    return _shared_optimization_store
@@ -0,0 +1,215 @@
+"""参数优化工作者 - 从任务代理领取评估任务，在本机批量回测并提交绩效指标
+
+用法（在backend目录下，每台机器可以启动多个）:
+    python -m services.optimization_worker --broker http://<代理地址>:8765
+"""
+import argparse
+import json
+import os
+import socket
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+import pandas as pd
+from loguru import logger
+
+from .backtest_result_cache import data_fingerprint
+from .optimization_broker import decode_frame
+from .optimization_objective import BacktestObjective
+
+
+# 行情本地缓存目录
+DEFAULT_CACHE_DIR = os.path.join('data', 'optimization_worker_cache')
+# 队列为空时的轮询间隔（秒）
+DEFAULT_POLL_INTERVAL = 0.2
+# 内存中最多保留的行情（及其目标函数和指标计算图）份数
+DEFAULT_MAX_CACHED = 8
+
+
+class OptimizationWorker:
+    """
+    远程优化工作者
+
+    行情按数据指纹缓存在 cache_dir 中，首次遇到时从代理下载并校验指纹；
+    目标函数（含指标计算图）按 (数据指纹, 目标函数参数) 缓存在内存中，
+    同一优化的后续任务直接复用已计算的指标。内存中的行情和目标函数按最近使用
+    保留至多 max_cached 份，全市场扫描时旧股票的数据和指标会被释放。
+    """
+
+    def __init__(
+        self,
+        broker_url: str,
+        worker_id: Optional[str] = None,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        max_cached: int = DEFAULT_MAX_CACHED
+    ):
+        """
+        Args:
+            broker_url: 任务代理地址
+            worker_id: 工作者ID（默认主机名加随机后缀）
+            cache_dir: 行情本地缓存目录
+            poll_interval: 队列为空时的轮询间隔（秒）
+            max_cached: 内存中最多保留的行情和目标函数数量
+        """
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.cache_dir = cache_dir
+        self.poll_interval = poll_interval
+        self.client = httpx.Client(base_url=broker_url, timeout=httpx.Timeout(60.0, connect=10.0))
+        self.max_cached = max_cached
+        self.tasks_done = 0
+        self._objectives: "OrderedDict[Tuple[str, str], BacktestObjective]" = OrderedDict()
+        self._frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+
+    def run(self, max_tasks: Optional[int] = None, stop: Optional[threading.Event] = None):
+        """
+        循环领取并执行任务
+
+        Args:
+            max_tasks: 执行该数量的任务后退出（None为不限）
+            stop: 设置后退出
+        """
+        stop = stop or threading.Event()
+        logger.info(f"优化工作者 {self.worker_id} 开始运行")
+        while not stop.is_set() and (max_tasks is None or self.tasks_done < max_tasks):
+            try:
+                if not self.run_once():
+                    stop.wait(self.poll_interval)
+            except httpx.HTTPError as e:
+                logger.warning(f"连接任务代理失败: {e}")
+                stop.wait(self.poll_interval * 10)
+
+    def run_once(self) -> bool:
+        """
+        领取并执行一个任务
+
+        Returns:
+            是否领取到任务
+        """
+        response = self.client.post('/lease', json={'worker_id': self.worker_id})
+        response.raise_for_status()
+        task = response.json()['task']
+        if task is None:
+            return False
+
+        payload = {'task_id': task['task_id'], 'worker_id': self.worker_id}
+        try:
+            objective = self._objective(task['fingerprint'], task['spec'])
+            payload['metrics'] = objective.evaluate_metrics(task['params_list'], task['budget'])
+        except Exception as e:
+            logger.error(f"任务 {task['task_id']} 评估失败: {e}")
+            payload['error'] = str(e)
+
+        self._post_result(payload)
+        self.tasks_done += 1
+        return True
+
+    def close(self):
+        """关闭连接"""
+        self.client.close()
+
+    def _post_result(self, payload: Dict[str, Any]):
+        # 绩效指标可能含 NaN/inf，用 Python json 的扩展写法传递
+        response = self.client.post(
+            '/results', content=json.dumps(payload), headers={'Content-Type': 'application/json'}
+        )
+        response.raise_for_status()
+        if not response.json()['accepted']:
+            logger.debug(f"任务 {payload['task_id']} 的结果已由其他工作者提交")
+
+    def _objective(self, fingerprint: str, spec: Dict[str, Any]) -> BacktestObjective:
+        key = (fingerprint, json.dumps(spec, sort_keys=True))
+        if key in self._objectives:
+            self._objectives.move_to_end(key)
+            # 行情与目标函数一起保持为最近使用，避免行情先被淘汰
+            self._frames.move_to_end(fingerprint)
+            return self._objectives[key]
+
+        objective = BacktestObjective(self._load_frame(fingerprint), **spec)
+        self._objectives[key] = objective
+        while len(self._objectives) > self.max_cached:
+            self._objectives.popitem(last=False)
+        return objective
+
+    def _load_frame(self, fingerprint: str) -> pd.DataFrame:
+        """读取行情：内存 -> 本地缓存文件 -> 代理"""
+        if fingerprint in self._frames:
+            self._frames.move_to_end(fingerprint)
+            return self._frames[fingerprint]
+
+        path = os.path.join(self.cache_dir, f"{fingerprint}.npz")
+        df = self._read_cache_file(path, fingerprint)
+        if df is None:
+            response = self.client.get(f'/data/{fingerprint}')
+            response.raise_for_status()
+            df = decode_frame(response.content)
+            if data_fingerprint(df) != fingerprint:
+                raise ValueError(f"行情数据指纹不一致: {fingerprint}")
+            self._write_cache_file(path, response.content)
+            logger.info(f"行情已缓存到本地: {path} ({len(df)} 根K线)")
+
+        self._frames[fingerprint] = df
+        while len(self._frames) > self.max_cached:
+            evicted, _ = self._frames.popitem(last=False)
+            # 目标函数引用着行情，一并释放
+            for key in [key for key in self._objectives if key[0] == evicted]:
+                del self._objectives[key]
+        return df
+
+    def _read_cache_file(self, path: str, fingerprint: str) -> Optional[pd.DataFrame]:
+        """读取本地缓存的行情；文件损坏或指纹不一致时删除，返回None以便重新下载"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                df = decode_frame(f.read())
+            if data_fingerprint(df) == fingerprint:
+                return df
+            logger.warning(f"本地缓存的行情指纹不一致，重新下载: {path}")
+        except Exception as e:
+            logger.warning(f"本地缓存的行情无法读取，重新下载: {path}, {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    def _write_cache_file(self, path: str, content: bytes):
+        """先写临时文件再替换，写入中途退出不会留下不完整的缓存文件"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description='参数优化工作者')
+    parser.add_argument('--broker', required=True, help='任务代理地址，如 http://127.0.0.1:8765')
+    parser.add_argument('--worker-id', default=None, help='工作者ID')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='行情本地缓存目录')
+    parser.add_argument('--max-tasks', type=int, default=None, help='执行该数量的任务后退出')
+    parser.add_argument('--max-cached', type=int, default=DEFAULT_MAX_CACHED, help='内存中最多保留的行情份数')
+    args = parser.parse_args()
+
+    worker = OptimizationWorker(
+        args.broker, worker_id=args.worker_id, cache_dir=args.cache_dir, max_cached=args.max_cached
+    )
+    try:
+        worker.run(max_tasks=args.max_tasks)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,364 @@
+"""流式回测引擎 - 基于 on_bar 逐根K线驱动，历史回测与实盘/模拟盘共用同一套策略代码"""
+import math
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterable, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from indicators.incremental import RollingMean, RSI, BollingerBands, MACD
+from .backtest_kernel import process_signal
+from .duckdb_storage_service import DuckDBStorageService
+
+
+@dataclass
+class Bar:
+    """K线"""
+    date: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
+
+
+class StreamingStrategy(ABC):
+    """
+    流式策略基类
+
+    子类实现 target_position(bar)，返回目标持仓状态（1看多，-1看空，0无信号）。
+    与 BacktestEngine 的向量化信号相同，交易信号为相邻两根K线持仓状态之差。
+    """
+
+    def __init__(self):
+        self._prev_position = None
+
+    @abstractmethod
+    def target_position(self, bar: Bar) -> int:
+        """根据新K线更新指标并返回持仓状态"""
+
+    def on_bar(self, bar: Bar) -> int:
+        """
+        处理新K线
+
+        Returns:
+            交易信号（1买入，-1卖出，其他值不交易）
+        """
+        position = self.target_position(bar)
+        prev, self._prev_position = self._prev_position, position
+        return 0 if prev is None else position - prev
+
+
+class MAStreamingStrategy(StreamingStrategy):
+    """双均线策略"""
+
+    def __init__(self, short_window: int = 5, long_window: int = 20):
+        super().__init__()
+        self.short_ma = RollingMean(short_window)
+        self.long_ma = RollingMean(long_window)
+
+    def target_position(self, bar: Bar) -> int:
+        short = self.short_ma.update(bar.close)
+        long = self.long_ma.update(bar.close)
+        if short > long:
+            return 1
+        if short < long:
+            return -1
+        return 0
+
+
+class RSIStreamingStrategy(StreamingStrategy):
+    """RSI策略"""
+
+    def __init__(self, rsi_window: int = 14, oversold: float = 30, overbought: float = 70):
+        super().__init__()
+        self.rsi = RSI(rsi_window)
+        self.oversold = oversold
+        self.overbought = overbought
+
+    def target_position(self, bar: Bar) -> int:
+        rsi = self.rsi.update(bar.close)
+        if rsi > self.overbought:
+            return -1
+        if rsi < self.oversold:
+            return 1
+        return 0
+
+
+class BOLLStreamingStrategy(StreamingStrategy):
+    """布林带策略"""
+
+    def __init__(self, boll_window: int = 20, num_std: float = 2):
+        super().__init__()
+        self.boll = BollingerBands(boll_window, num_std)
+
+    def target_position(self, bar: Bar) -> int:
+        _, upper, lower = self.boll.update(bar.close)
+        if bar.close > upper:
+            return -1
+        if bar.close < lower:
+            return 1
+        return 0
+
+
+class MACDStreamingStrategy(StreamingStrategy):
+    """MACD策略"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        super().__init__()
+        self.macd = MACD(fast, slow, signal)
+
+    def target_position(self, bar: Bar) -> int:
+        _, _, hist = self.macd.update(bar.close)
+        if hist > 0:
+            return 1
+        if hist < 0:
+            return -1
+        return 0
+
+
+def create_streaming_strategy(params: Dict) -> StreamingStrategy:
+    """
+    根据策略参数创建流式策略（参数格式与 BacktestEngine 相同）
+
+    Args:
+        params: 策略参数，type 为 MA/RSI/BOLL/MACD，未知类型按 MA 处理
+    """
+    strategy_type = params.get('type', 'MA')
+
+    if strategy_type == 'RSI':
+        return RSIStreamingStrategy(
+            params.get('rsi_window', 14), params.get('oversold', 30), params.get('overbought', 70)
+        )
+    if strategy_type == 'BOLL':
+        return BOLLStreamingStrategy(params.get('boll_window', 20), params.get('num_std', 2))
+    if strategy_type == 'MACD':
+        return MACDStreamingStrategy(params.get('fast', 12), params.get('slow', 26), params.get('signal', 9))
+    return MAStreamingStrategy(params.get('short_window', 5), params.get('long_window', 20))
+
+
+class StreamingBacktestEngine:
+    """
+    流式回测引擎
+
+    逐根K线调用 on_bar，账户和绩效指标都以O(1)状态增量更新，内存占用与K线数量无关
+    （除非开启 record_equity）。同一个引擎既可以回放DuckDB中的历史数据，也可以接收
+    实时K线作为模拟盘使用。
+    """
+
+    def __init__(
+        self,
+        strategy: StreamingStrategy,
+        initial_capital: float = 100000.0,
+        commission: float = 0.0003,
+        slippage: float = 0.001,
+        periods_per_year: int = 252,
+        risk_free_rate: float = 0.03,
+        record_equity: bool = False,
+        on_trade: Optional[Callable[[Dict], None]] = None
+    ):
+        """
+        初始化流式回测引擎
+
+        Args:
+            strategy: 流式策略
+            initial_capital: 初始资金
+            commission: 手续费率
+            slippage: 滑点
+            periods_per_year: 每年K线数（用于年化）
+            risk_free_rate: 年化无风险利率
+            record_equity: 是否记录完整净值曲线（长历史回测时应关闭）
+            on_trade: 成交回调，实盘/模拟盘可在此下单或推送
+        """
+        self.strategy = strategy
+        self.initial_capital = initial_capital
+        self.commission = commission
+        self.slippage = slippage
+        self.periods_per_year = periods_per_year
+        self.risk_free_rate = risk_free_rate
+        self.record_equity = record_equity
+        self.on_trade = on_trade
+
+        self.cash = initial_capital
+        self.shares = 0.0
+        self.total_value = initial_capital
+        self.trade_count = 0
+        self.trades: List[Dict] = []
+        self.equity_curve: List[Dict] = []
+        self.last_bar: Optional[Bar] = None
+
+        # 增量绩效状态
+        self._n_bars = 0
+        self._running_max = -math.inf
+        self._max_drawdown = 0.0
+        self._prev_value = None
+        self._n_returns = 0
+        self._mean_return = 0.0
+        self._m2_return = 0.0
+        self._n_wins = 0
+        self._n_losses = 0
+        self._sum_wins = 0.0
+        self._sum_losses = 0.0
+
+    def on_bar(self, bar: Bar) -> Optional[Dict]:
+        """
+        处理一根K线
+
+        Returns:
+            本根K线的成交记录，无成交返回None
+        """
+        signal = self.strategy.on_bar(bar)
+        trade = None
+
+        if self._n_bars > 0:
+            cash, shares, trade_type, amount = process_signal(
+                signal, bar.close, self.cash, self.shares, self.commission, self.slippage
+            )
+            self.cash, self.shares = cash, shares
+            if trade_type != 0:
+                self.trade_count += 1
+                trade = {
+                    'date': bar.date,
+                    'type': '买入' if trade_type == 1 else '卖出',
+                    'price': float(bar.close),
+                    'amount': float(amount),
+                    'cash': float(cash),
+                    'shares': float(shares),
+                    'total_value': float(cash + shares * bar.close)
+                }
+
+        self.total_value = self.cash + self.shares * bar.close
+        self._update_metrics(self.total_value)
+        self.last_bar = bar
+
+        if trade is not None:
+            self.trades.append(trade)
+            if self.on_trade is not None:
+                self.on_trade(trade)
+        if self.record_equity:
+            self.equity_curve.append({'date': bar.date, 'total_value': self.total_value})
+        return trade
+
+    def _update_metrics(self, value: float):
+        """增量更新回撤和收益率统计"""
+        self._n_bars += 1
+        self._running_max = max(self._running_max, value)
+        self._max_drawdown = min(self._max_drawdown, (value - self._running_max) / self._running_max)
+
+        if self._prev_value is not None:
+            ret = value / self._prev_value - 1
+            self._n_returns += 1
+            delta = ret - self._mean_return
+            self._mean_return += delta / self._n_returns
+            self._m2_return += delta * (ret - self._mean_return)
+            if ret > 0:
+                self._n_wins += 1
+                self._sum_wins += ret
+            elif ret < 0:
+                self._n_losses += 1
+                self._sum_losses += ret
+        self._prev_value = value
+
+    def run(self, bars: Iterable[Bar]) -> Dict:
+        """回放K线序列并返回回测结果"""
+        for bar in bars:
+            self.on_bar(bar)
+        return self.get_result()
+
+    async def run_async(self, bars: AsyncIterable[Bar]) -> Dict:
+        """消费异步K线流（如实时行情）并返回结束时的结果"""
+        async for bar in bars:
+            self.on_bar(bar)
+        return self.get_result()
+
+    def run_duckdb(
+        self,
+        storage: DuckDBStorageService,
+        stock_code: str,
+        start_date: datetime,
+        end_date: datetime,
+        frequency: str = 'daily',
+        chunk_size: int = 50_000
+    ) -> Dict:
+        """
+        分块读取DuckDB中的K线并回放，内存占用只与 chunk_size 有关
+
+        Args:
+            storage: DuckDB存储服务
+            stock_code: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            frequency: 存储频率
+            chunk_size: 每次从游标读取的行数
+        """
+        cursor = storage.con.cursor()
+        try:
+            cursor.execute("""
+                SELECT date, open, high, low, close, volume
+                FROM kline_data
+                WHERE stock_code = ? AND frequency = ?
+                  AND date >= ? AND date <= ?
+                ORDER BY date
+            """, [stock_code, frequency, start_date, end_date])
+
+            n_rows = 0
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    self.on_bar(Bar(*row))
+                n_rows += len(rows)
+        finally:
+            cursor.close()
+
+        logger.info(f"流式回测完成: {stock_code}, {frequency}, {n_rows}条K线")
+        return self.get_result()
+
+    def get_metrics(self) -> Dict:
+        """计算当前绩效指标（与 BacktestEngine._calculate_metrics 口径一致）"""
+        total_return = (self.total_value - self.initial_capital) / self.initial_capital
+        years = self._n_bars / self.periods_per_year
+        annual_return = (1 + total_return) ** (1 / years) - 1 if years > 0 else 0.0
+        max_drawdown = abs(self._max_drawdown)
+
+        std = math.sqrt(self._m2_return / max(self._n_returns - 1, 1))
+        has_std = self._n_returns > 1 and std != 0
+        rf = self.risk_free_rate / self.periods_per_year
+        sharpe_ratio = math.sqrt(self.periods_per_year) * (self._mean_return - rf) / std if has_std else 0.0
+
+        n_nonzero = self._n_wins + self._n_losses
+        win_rate = self._n_wins / n_nonzero if n_nonzero > 0 else 0.0
+
+        avg_win = self._sum_wins / max(self._n_wins, 1)
+        avg_loss = abs(self._sum_losses / max(self._n_losses, 1))
+        has_both = self._n_wins > 0 and self._n_losses > 0 and avg_loss != 0
+        profit_loss_ratio = avg_win / avg_loss if has_both else 0.0
+
+        return {
+            'total_return': total_return,
+            'annual_return': annual_return,
+            'max_drawdown': max_drawdown,
+            'sharpe_ratio': sharpe_ratio,
+            'win_rate': win_rate,
+            'trade_count': self.trade_count,
+            'profit_loss_ratio': profit_loss_ratio,
+            'volatility': std * math.sqrt(self.periods_per_year) if self._n_returns > 1 else 0.0,
+            'calmar_ratio': annual_return / max_drawdown if max_drawdown != 0 else 0.0
+        }
+
+    def get_result(self) -> Dict:
+        """获取回测结果"""
+        result = {
+            'initial_capital': self.initial_capital,
+            'final_capital': float(self.total_value),
+            'cash': float(self.cash),
+            'shares': float(self.shares),
+            'metrics': self.get_metrics(),
+            'trades': self.trades,
+            'data_points': self._n_bars
+        }
+        if self.record_equity:
+            result['equity_curve'] = self.equity_curve
+        return result
@@ -0,0 +1,229 @@
+"""全市场回测服务 - 同一策略批量回测kline_data中的所有股票，结果写入DuckDB供排名查询"""
+import asyncio
+import inspect
+import json
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+from loguru import logger
+
+from strategies import get_required_columns
+
+from .backtest_data_provider import get_shared_storage
+from .backtest_service import BacktestEngine
+from .duckdb_storage_service import DuckDBStorageService
+
+
+def _backtest_symbol_batch(task: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """在工作进程中回测一批股票，返回每只股票一行结果"""
+    engine = BacktestEngine(task['initial_capital'], task['commission'], task['slippage'])
+    strategy_params = task['strategy_params']
+    strategy_type = strategy_params.get('type', 'MA')
+    params = {k: v for k, v in strategy_params.items() if k != 'type'}
+
+    rows = []
+    for stock_code, df in task['frames'].items():
+        # 单只股票失败只跳过该股票（计入skipped），不影响整个批次
+        try:
+            metrics = engine.run_batch(df, strategy_type, [params])[0]
+        except Exception as e:
+            logger.warning(f"回测 {stock_code} 失败，跳过: {e}")
+            continue
+        rows.append({
+            'run_id': task['run_id'],
+            'stock_code': stock_code,
+            'strategy_type': strategy_type,
+            'params': json.dumps(params, sort_keys=True),
+            'frequency': task['frequency'],
+            'start_date': df.index[0],
+            'end_date': df.index[-1],
+            'data_points': len(df),
+            'final_capital': task['initial_capital'] * (1 + metrics['total_return']),
+            **metrics
+        })
+    return rows
+
+
+class UniverseBacktestService:
+    """
+    全市场回测服务
+
+    主进程按批从DuckDB读取策略所需的K线数据列，工作进程计算信号和指标，主进程把结果写回
+    universe_backtest_results 表。读取下一批数据与工作进程的计算重叠进行。
+    """
+
+    def __init__(self, storage: Optional[DuckDBStorageService] = None):
+        """
+        初始化全市场回测服务
+
+        Args:
+            storage: DuckDB存储服务（默认使用进程内共享实例）
+        """
+        self.storage = storage if storage is not None else get_shared_storage()
+        self.progress: Dict[str, Dict[str, Any]] = {}  # 存储回测进度
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(
+        self,
+        strategy_params: Dict,
+        start_date: datetime,
+        end_date: datetime,
+        frequency: str = 'daily',
+        stock_codes: Optional[List[str]] = None,
+        initial_capital: float = 100000.0,
+        commission: float = 0.0003,
+        slippage: float = 0.001,
+        batch_size: int = 200,
+        n_jobs: Optional[int] = None,
+        run_id: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        运行全市场回测
+
+        Args:
+            strategy_params: 策略参数（含type）
+            start_date: 开始日期
+            end_date: 结束日期
+            frequency: 存储频率（daily, 1min, 5min...）
+            stock_codes: 股票代码列表（默认kline_data中该频率的全部股票）
+            initial_capital: 初始资金
+            commission: 手续费率
+            slippage: 滑点
+            batch_size: 每批股票数
+            n_jobs: 工作进程数（默认CPU核数，1为不使用进程池）
+            run_id: 回测批次ID（默认自动生成）
+            progress_callback: 每批完成后的进度回调，可以是协程函数
+
+        Returns:
+            回测批次汇总信息
+        """
+        if self.storage is None:
+            raise Exception("本地DuckDB不可用，无法进行全市场回测")
+
+        run_id = run_id or uuid.uuid4().hex
+        n_jobs = n_jobs or os.cpu_count() or 1
+        codes = stock_codes or self.storage.list_kline_symbols(frequency)
+        batches = [codes[i:i + batch_size] for i in range(0, len(codes), batch_size)]
+
+        progress = {
+            'run_id': run_id,
+            'status': 'running',
+            'total': len(codes),
+            'completed': 0,
+            'skipped': 0,
+            'started_at': datetime.now().isoformat()
+        }
+        self.progress[run_id] = progress
+        logger.info(f"开始全市场回测: {run_id}, {len(codes)}只股票, {len(batches)}批, 进程数: {n_jobs}")
+
+        # 策略插件可能需要收盘价以外的数据列（如 high/low）
+        columns = get_required_columns(strategy_params.get('type', 'MA'), strategy_params)
+
+        loop = asyncio.get_running_loop()
+
+        def make_task(batch: List[str]) -> Dict[str, Any]:
+            # DuckDB读取是阻塞调用，在线程池中执行（load_kline_batch 使用独立游标）
+            return {
+                'run_id': run_id,
+                'frames': self.storage.load_kline_batch(batch, start_date, end_date, frequency, columns),
+                'strategy_params': strategy_params,
+                'frequency': frequency,
+                'initial_capital': initial_capital,
+                'commission': commission,
+                'slippage': slippage
+            }
+
+        async def on_batch_done(batch: List[str], rows: List[Dict[str, Any]]):
+            # 写入同样在线程池中执行，不阻塞事件循环
+            await loop.run_in_executor(None, self.storage.save_universe_results, pd.DataFrame(rows))
+            progress['completed'] += len(rows)
+            progress['skipped'] += len(batch) - len(rows)
+            if progress_callback is not None:
+                ret = progress_callback(dict(progress))
+                if inspect.isawaitable(ret):
+                    await ret
+
+        try:
+            if n_jobs > 1 and len(batches) > 0:
+                with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                    # 最多保持 2*n_jobs 批在途，读取和计算重叠，内存有界
+                    pending = {}
+                    next_batch = 0
+                    while next_batch < len(batches) or pending:
+                        while next_batch < len(batches) and len(pending) < 2 * n_jobs:
+                            batch = batches[next_batch]
+                            task = await loop.run_in_executor(None, make_task, batch)
+                            future = loop.run_in_executor(executor, _backtest_symbol_batch, task)
+                            pending[future] = batch
+                            next_batch += 1
+                        done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                        for future in done:
+                            await on_batch_done(pending.pop(future), future.result())
+            else:
+                for batch in batches:
+                    task = await loop.run_in_executor(None, make_task, batch)
+                    rows = await loop.run_in_executor(None, _backtest_symbol_batch, task)
+                    await on_batch_done(batch, rows)
+        except Exception as e:
+            progress['status'] = 'failed'
+            progress['error'] = str(e)
+            logger.error(f"全市场回测失败: {run_id}, {e}")
+            raise
+
+        progress['status'] = 'completed'
+        progress['finished_at'] = datetime.now().isoformat()
+        logger.info(f"全市场回测完成: {run_id}, 完成{progress['completed']}只, 跳过{progress['skipped']}只")
+        return dict(progress)
+
+    def start(self, **kwargs) -> str:
+        """
+        在后台启动全市场回测
+
+        Args:
+            **kwargs: 传给 run 的参数
+
+        Returns:
+            回测批次ID，可用于查询进度和结果
+        """
+        run_id = kwargs.pop('run_id', None) or uuid.uuid4().hex
+        self.progress[run_id] = {'run_id': run_id, 'status': 'pending', 'total': 0, 'completed': 0, 'skipped': 0}
+
+        task = asyncio.create_task(self.run(run_id=run_id, **kwargs))
+        task.add_done_callback(lambda t: t.exception() if not t.cancelled() else None)
+        self._tasks[run_id] = task
+        return run_id
+
+    def get_progress(self, run_id: str) -> Dict[str, Any]:
+        """获取回测进度"""
+        if run_id in self.progress:
+            return self.progress[run_id]
+        return {
+            'status': 'not_found',
+            'message': '回测任务不存在'
+        }
+
+    def get_results(
+        self,
+        run_id: str,
+        order_by: str = 'sharpe_ratio',
+        ascending: bool = False,
+        limit: Optional[int] = 100
+    ) -> List[Dict[str, Any]]:
+        """按指标排名查询回测结果"""
+        return self.storage.get_universe_results(run_id, order_by, ascending, limit)
+
+
+_universe_service: Optional[UniverseBacktestService] = None
+
+
+def get_universe_backtest_service() -> UniverseBacktestService:
+    """获取全局全市场回测服务"""
+    global _universe_service
+    if _universe_service is None:
+        _universe_service = UniverseBacktestService()
+    return _universe_service
@@ -0,0 +1,265 @@
+"""滚动前推（walk-forward）优化 - 多个训练/测试窗口并行优化，拼接样本外净值"""
+import asyncio
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from strategies import get_required_columns
+
+from .backtest_kernel import calculate_metrics, metrics_to_dicts, simulate_signals
+from .backtest_service import BacktestEngine
+from .optimization_objective import BacktestObjective
+
+
+# 映射给工作进程的K线数据列
+KLINE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def split_walk_forward_folds(
+    n_bars: int,
+    train_bars: int,
+    test_bars: int,
+    step_bars: Optional[int] = None,
+    anchored: bool = False
+) -> List[Dict[str, int]]:
+    """
+    划分训练/测试窗口
+
+    Args:
+        n_bars: K线总数
+        train_bars: 训练窗口长度
+        test_bars: 测试窗口长度
+        step_bars: 窗口前推步长（默认等于test_bars，测试窗口首尾相接）
+        anchored: 是否锚定起点（训练窗口从第0根开始逐步扩大）
+
+    Returns:
+        窗口列表，每项包含 train_start/train_end/test_start/test_end（左闭右开的K线下标）
+    """
+    if train_bars < 1 or test_bars < 1:
+        raise ValueError("训练和测试窗口长度必须大于0")
+    step_bars = step_bars or test_bars
+
+    folds = []
+    test_start = train_bars
+    while test_start < n_bars:
+        folds.append({
+            'train_start': 0 if anchored else test_start - train_bars,
+            'train_end': test_start,
+            'test_start': test_start,
+            'test_end': min(test_start + test_bars, n_bars)
+        })
+        test_start += step_bars
+    return folds
+
+
+def _run_fold(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    在工作进程中优化单个窗口并评估样本外表现
+
+    策略所需的K线数据列通过内存映射文件读取，各进程共享同一份页缓存，不重复加载数据。
+    """
+    from services.optimization_service import OptimizationService
+
+    columns = {col: np.load(path, mmap_mode='r') for col, path in task['column_paths'].items()}
+    fold = task['fold']
+    engine = BacktestEngine(task['initial_capital'], task['commission'], task['slippage'])
+    strategy_type = task['strategy_type']
+    objective = task['objective']
+
+    train_df = pd.DataFrame({col: values[fold['train_start']:fold['train_end']] for col, values in columns.items()})
+    # 同一窗口上的所有评估共享指标计算图，优化器每批参数一次run_batch
+    objective_func = BacktestObjective(
+        train_df, strategy_type, objective, task['maximize'],
+        task['initial_capital'], task['commission'], task['slippage']
+    )
+
+    optimizer = OptimizationService(engine)._create_optimizer(
+        method=task['optimization_method'],
+        objective=objective,
+        maximize=task['maximize'],
+        n_jobs=1,
+        **task['optimizer_kwargs']
+    )
+    result = asyncio.run(optimizer.optimize(
+        objective_func=objective_func,
+        param_ranges=task['param_ranges'],
+        verbose=False
+    ))
+
+    # 样本外：用训练窗口作为指标预热，只在测试窗口内交易。信号是持仓状态的变化，
+    # 预热段末尾已持有的仓位要带入测试段，否则要等到下一次交叉才会入场
+    window = pd.DataFrame({col: values[fold['train_start']:fold['test_end']] for col, values in columns.items()})
+    signals = engine._calculate_indicators(window, dict(result.best_params, type=strategy_type))['signal']
+    signals = signals.to_numpy(dtype=np.float64)
+    window_close = window['close'].to_numpy()
+    n_warmup = fold['test_start'] - fold['train_start']
+    warmup = simulate_signals(
+        signals[:n_warmup], window_close[:n_warmup], 1.0, task['commission'], task['slippage']
+    )
+    # 预热段期末状态按净值归一化，测试段净值相对于测试段前一根K线
+    warmup_value = warmup['cash'][-1] + warmup['shares'][-1] * window_close[n_warmup - 1]
+    test_close = window_close[n_warmup:]
+    sim = simulate_signals(
+        signals[n_warmup:], test_close, warmup['cash'][-1] / warmup_value,
+        task['commission'], task['slippage'],
+        initial_shares=warmup['shares'][-1] / warmup_value, trade_from=0
+    )
+    total_value = sim['cash'] + sim['shares'] * test_close
+
+    return {
+        'fold': task['index'],
+        'best_params': result.best_params,
+        'train_score': result.best_score,
+        'iterations': result.iterations,
+        'test_total_value': total_value,
+        'test_trade_count': int((sim['trade_type'] != 0).sum())
+    }
+
+
+async def run_walk_forward(
+    df: pd.DataFrame,
+    strategy_type: str,
+    param_ranges: Dict[str, Dict[str, Any]],
+    train_bars: int,
+    test_bars: int,
+    step_bars: Optional[int] = None,
+    anchored: bool = False,
+    optimization_method: str = 'grid_search',
+    objective: str = 'sharpe_ratio',
+    maximize: bool = True,
+    initial_capital: float = 100000.0,
+    commission: float = 0.0003,
+    slippage: float = 0.001,
+    n_jobs: int = 1,
+    optimizer_kwargs: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    运行滚动前推优化
+
+    每个窗口在训练段上用指定优化器寻找最优参数，再用该参数回测紧随其后的测试段；
+    各测试段收益首尾相接得到样本外净值曲线。测试段开始时沿用最优参数在训练段末尾的
+    持仓状态，与连续回测的仓位一致。窗口在进程池中并行执行。
+
+    Args:
+        df: K线数据（需包含close列和策略插件声明的数据列，索引为时间）
+        strategy_type: 策略类型
+        param_ranges: 参数范围
+        train_bars: 训练窗口长度（K线数）
+        test_bars: 测试窗口长度（K线数）
+        step_bars: 窗口前推步长（默认等于test_bars）
+        anchored: 是否锚定训练起点
+        optimization_method: 优化方法 (grid_search, genetic, bayesian)
+        objective: 优化目标
+        maximize: 是否最大化
+        initial_capital: 初始资金
+        commission: 手续费率
+        slippage: 滑点
+        n_jobs: 工作进程数
+        optimizer_kwargs: 传给优化器的其他参数
+
+    Returns:
+        各窗口最优参数、样本外指标和拼接后的样本外净值曲线
+    """
+    df = df.sort_index()
+    folds = split_walk_forward_folds(len(df), train_bars, test_bars, step_bars, anchored)
+    if len(folds) == 0:
+        raise ValueError(f"数据长度 {len(df)} 不足以划分训练窗口 {train_bars}")
+
+    missing = [col for col in get_required_columns(strategy_type) if col not in df.columns]
+    if missing:
+        raise ValueError(f"策略 {strategy_type} 需要 {'/'.join(missing)} 数据列")
+    # 参数（如公式）也可能引用其他数据列，已有的K线列全部映射
+    columns = [col for col in KLINE_COLUMNS if col in df.columns]
+
+    logger.info(f"滚动前推优化: {len(folds)}个窗口, 方法: {optimization_method}, 进程数: {n_jobs}")
+
+    tmpdir = tempfile.mkdtemp(prefix='walk_forward_')
+    try:
+        column_paths = {}
+        for col in columns:
+            column_paths[col] = os.path.join(tmpdir, f'{col}.npy')
+            np.save(column_paths[col], df[col].to_numpy(dtype=np.float64))
+
+        tasks = [{
+            'index': i,
+            'fold': fold,
+            'column_paths': column_paths,
+            'strategy_type': strategy_type,
+            'param_ranges': param_ranges,
+            'optimization_method': optimization_method,
+            'objective': objective,
+            'maximize': maximize,
+            'initial_capital': initial_capital,
+            'commission': commission,
+            'slippage': slippage,
+            'optimizer_kwargs': optimizer_kwargs or {}
+        } for i, fold in enumerate(folds)]
+
+        loop = asyncio.get_running_loop()
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as executor:
+                fold_results = await asyncio.gather(*[
+                    loop.run_in_executor(executor, _run_fold, task) for task in tasks
+                ])
+        else:
+            # 串行时放到线程中执行，避免阻塞事件循环（_run_fold内部会启动自己的事件循环）
+            fold_results = []
+            for task in tasks:
+                fold_results.append(await loop.run_in_executor(None, _run_fold, task))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    # 拼接样本外净值：每个测试段的起始资金等于上一段的期末净值；
+    # 步长小于测试窗口时只取到下一个测试段开始之前
+    segments = []
+    positions = []
+    capital = initial_capital
+    for i, (fold, result) in enumerate(zip(folds, fold_results)):
+        length = len(result['test_total_value'])
+        if i + 1 < len(folds):
+            length = min(length, folds[i + 1]['test_start'] - fold['test_start'])
+        segment = result['test_total_value'][:length] * capital
+        capital = float(segment[-1])
+        segments.append(segment)
+        positions.append(np.arange(fold['test_start'], fold['test_start'] + length))
+    equity = np.concatenate(segments)
+    dates = df.index[np.concatenate(positions)]
+    trade_count = sum(r['test_trade_count'] for r in fold_results)
+    oos_metrics = metrics_to_dicts(calculate_metrics(equity, np.array([trade_count]), initial_capital))[0]
+
+    fold_reports = []
+    for fold, result in zip(folds, fold_results):
+        test_value = result['test_total_value']
+        fold_metrics = metrics_to_dicts(calculate_metrics(
+            test_value, np.array([result['test_trade_count']]), 1.0
+        ))[0]
+        fold_reports.append({
+            'fold': result['fold'],
+            'train_start': df.index[fold['train_start']].strftime('%Y-%m-%d %H:%M:%S'),
+            'train_end': df.index[fold['train_end'] - 1].strftime('%Y-%m-%d %H:%M:%S'),
+            'test_start': df.index[fold['test_start']].strftime('%Y-%m-%d %H:%M:%S'),
+            'test_end': df.index[fold['test_end'] - 1].strftime('%Y-%m-%d %H:%M:%S'),
+            'best_params': result['best_params'],
+            'train_score': result['train_score'],
+            'iterations': result['iterations'],
+            'test_metrics': fold_metrics
+        })
+
+    logger.info(f"滚动前推优化完成: 样本外总收益率 {oos_metrics['total_return']:.2%}")
+
+    return {
+        'folds': fold_reports,
+        'oos_metrics': oos_metrics,
+        'oos_equity_curve': [
+            {'date': date, 'total_value': value}
+            for date, value in zip(dates.strftime('%Y-%m-%d %H:%M:%S'), equity.tolist())
+        ],
+        'initial_capital': initial_capital,
+        'final_capital': float(equity[-1])
+    }
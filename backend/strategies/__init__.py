@@ -0,0 +1,26 @@
+"""策略插件模块"""
+from .registry import (
+    StrategyPlugin,
+    STRATEGY_REGISTRY,
+    register_strategy,
+    get_strategy,
+    get_required_columns,
+    list_strategies,
+    get_strategy_templates,
+)
+from .formula import FormulaError, FormulaPlan, compile_formula, get_formula_cache
+from . import momentum, breakout, advanced, rsrs  # noqa: F401  注册内置策略
+
+__all__ = [
+    'StrategyPlugin',
+    'STRATEGY_REGISTRY',
+    'register_strategy',
+    'get_strategy',
+    'get_required_columns',
+    'list_strategies',
+    'get_strategy_templates',
+    'FormulaError',
+    'FormulaPlan',
+    'compile_formula',
+    'get_formula_cache',
+]
@@ -0,0 +1,100 @@
+"""高级策略：均值回归、趋势跟踪、一目均衡表、配对交易（移植自 legacy/src/strategies，逐行循环改为向量化）"""
+import numpy as np
+
+from indicators.graph import IndicatorGraph, Source, register_indicator
+from .registry import event_signals, register_strategy, shift
+
+
+@register_indicator('DIF_ADJ')
+def _dif_adjusted(graph: IndicatorGraph, source: Source, fast: int, slow: int) -> np.ndarray:
+    """adjust=True 口径的MACD快慢线差值（legacy TechnicalIndicators.MACD）"""
+    return graph.get('EMA_ADJ', source, fast) - graph.get('EMA_ADJ', source, slow)
+
+
+@register_indicator('MIDPOINT')
+def _midpoint(graph: IndicatorGraph, window: int) -> np.ndarray:
+    """N日最高价与最低价的中点"""
+    return (graph.get('HHV', 'high', window) + graph.get('LLV', 'low', window)) / 2
+
+
+@register_strategy(
+    'MeanReversion',
+    title='均值回归策略',
+    description='价格偏离均值超过阈值个标准差且RSI确认超买超卖时反向交易',
+    params={
+        'lookback': {'type': 'int', 'default': 20, 'min': 5, 'max': 120, 'description': '均值周期'},
+        'threshold': {'type': 'float', 'default': 2.0, 'min': 0.5, 'max': 4, 'description': 'Z-Score阈值'}
+    }
+)
+def mean_reversion_signals(graph: IndicatorGraph, params: dict) -> np.ndarray:
+    lookback, threshold = params['lookback'], params['threshold']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z_score = (graph.column('close') - graph.sma(lookback)) / graph.std(lookback)
+        rsi = graph.rsi(14)
+        buy = (z_score < -threshold) & (rsi < 40)
+        sell = (z_score > threshold) & (rsi > 60)
+    return event_signals(buy, sell, start=lookback)
+
+
+@register_strategy(
+    'TrendFollowing',
+    title='趋势跟踪策略',
+    description='价格位于趋势均线上方、当日上涨且MACD柱为正时买入，反之卖出',
+    params={
+        'trend_period': {'type': 'int', 'default': 50, 'min': 10, 'max': 250, 'description': '趋势均线周期'}
+    }
+)
+def trend_following_signals(graph: IndicatorGraph, params: dict) -> np.ndarray:
+    close = graph.column('close')
+    trend = graph.sma(params['trend_period'])
+    dif = graph.get('DIF_ADJ', 'close', 12, 26)
+    macd_hist = dif - graph.get('EMA_ADJ', ('DIF_ADJ', 'close', 12, 26), 9)
+    prev_close = shift(close)
+
+    with np.errstate(invalid='ignore'):
+        buy = (close > trend) & (close > prev_close) & (macd_hist > 0)
+        sell = (close < trend) & (close < prev_close) & (macd_hist < 0)
+    return event_signals(buy, sell, start=1)
+
+
+@register_strategy(
+    'Ichimoku',
+    title='一目均衡表策略',
+    description='价格位于云层之上且转换线上穿基准线时买入，位于云层之下且下穿时卖出',
+    params={},
+    required_columns=('high', 'low', 'close')
+)
+def ichimoku_signals(graph: IndicatorGraph, params: dict) -> np.ndarray:
+    conversion = graph.get('MIDPOINT', 9)
+    baseline = graph.get('MIDPOINT', 26)
+    span_a = shift((conversion + baseline) / 2, 26)
+    span_b = shift(graph.get('MIDPOINT', 52), 26)
+    # 与内置 max/min 的NaN行为一致：比较不成立时取 span_a
+    cloud_top = np.where(span_b > span_a, span_b, span_a)
+    cloud_bottom = np.where(span_b < span_a, span_b, span_a)
+    conversion_prev, baseline_prev = shift(conversion), shift(baseline)
+
+    close = graph.column('close')
+    with np.errstate(invalid='ignore'):
+        buy = (close > cloud_top) & (conversion > baseline) & (conversion_prev <= baseline_prev)
+        sell = (close < cloud_bottom) & (conversion < baseline) & (conversion_prev >= baseline_prev)
+    return event_signals(buy, sell, start=26)
+
+
+@register_strategy(
+    'PairsTrading',
+    title='配对交易策略',
+    description='价格与自身均线之比的Z-Score超过阈值时反向交易',
+    params={
+        'lookback': {'type': 'int', 'default': 30, 'min': 5, 'max': 120, 'description': '均值周期'},
+        'threshold': {'type': 'float', 'default': 2.0, 'min': 0.5, 'max': 4, 'description': 'Z-Score阈值'}
+    }
+)
+def pairs_trading_signals(graph: IndicatorGraph, params: dict) -> np.ndarray:
+    lookback, threshold = params['lookback'], params['threshold']
+    ratio_node = ('RATIO', 'close', ('SMA', 'close', lookback))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z_score = (graph.get(*ratio_node) - graph.sma(lookback, ratio_node)) / graph.std(lookback, ratio_node)
+        buy = z_score < -threshold
+        sell = z_score > threshold
+    return event_signals(buy, sell, start=lookback)
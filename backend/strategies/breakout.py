@@ -0,0 +1,74 @@
+"""突破类策略：Dual Thrust、网格（移植自 legacy/src/strategies，逐行循环改为向量化）"""
+import numpy as np
+import pandas as pd
+
+from indicators.graph import IndicatorGraph, register_indicator
+from .registry import event_signals, register_strategy, shift
+
+
+@register_indicator('VWAP')
+def _vwap(graph: IndicatorGraph) -> np.ndarray:
+    """累计成交量加权平均价（典型价格加权，缺失值不参与累计）"""
+    typical_price = (graph.column('high') + graph.column('low') + graph.column('close')) / 3
+    volume = pd.Series(graph.column('volume'))
+    return ((pd.Series(typical_price) * volume).cumsum() / volume.cumsum()).to_numpy()
+
+
+@register_strategy(
+    'DualThrust',
+    title='Dual Thrust策略',
+    description='开盘价加减前N日波动区间构成上下轨，放量且突破幅度超过半个ATR时入场',
+    params={
+        'window': {'type': 'int', 'default': 10, 'min': 2, 'max': 60, 'description': '区间周期'},
+        'k1': {'type': 'float', 'default': 0.4, 'min': 0.1, 'max': 1, 'description': '上轨系数'},
+        'k2': {'type': 'float', 'default': 0.6, 'min': 0.1, 'max': 1, 'description': '下轨系数'}
+    },
+    required_columns=('open', 'high', 'low', 'close', 'volume')
+)
+def dual_thrust_signals(graph: IndicatorGraph, params: dict) -> np.ndarray:
+    window, k1, k2 = params['window'], params['k1'], params['k2']
+    hh = graph.get('HHV', 'high', window)
+    hc = graph.get('HHV', 'close', window)
+    lc = graph.get('LLV', 'close', window)
+    ll = graph.get('LLV', 'low', window)
+    prev_range = shift(np.maximum(hh - lc, hc - ll))
+
+    open_, close = graph.column('open'), graph.column('close')
+    upper = open_ + k1 * prev_range
+    lower = open_ - k2 * prev_range
+    atr = graph.get('ATR', 14)
+    volume_confirm = graph.column('volume') > graph.sma(20, 'volume') * 1.2
+
+    with np.errstate(invalid='ignore'):
+        buy = (close > upper) & ((close - upper) > atr * 0.5) & volume_confirm
+        sell = (close < lower) & ((lower - close) > atr * 0.5) & volume_confirm
+    return event_signals(buy, sell, start=window)
+
+
+@register_strategy(
+    'Grid',
+    title='网格交易策略',
+    description='价格相对VWAP均值偏离若干个网格时分批买卖，只在适度波动的行情中交易',
+    params={
+        'grid_ratio': {'type': 'float', 'default': 0.03, 'min': 0.005, 'max': 0.2, 'description': '网格间距比例'},
+        'max_grids': {'type': 'int', 'default': 8, 'min': 1, 'max': 20, 'description': '最大网格层数'},
+        'base_period': {'type': 'int', 'default': 30, 'min': 5, 'max': 120, 'description': '基准价均值周期'}
+    }
+)
+def grid_signals(graph: IndicatorGraph, params: dict) -> np.ndarray:
+    grid_ratio, max_grids, base_period = params['grid_ratio'], params['max_grids'], params['base_period']
+    if graph.has_column('volume') and graph.has_column('high') and graph.has_column('low'):
+        base_price = graph.get('SMA', ('VWAP',), base_period)
+    else:
+        base_price = graph.sma(base_period)
+
+    close = graph.column('close')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        deviation = (close - base_price) / base_price
+        volatility = graph.std(20) / graph.sma(20)
+        grid_level = np.floor(np.abs(deviation) / grid_ratio)
+
+        active = (volatility > 0.01) & (volatility < 0.05) & (grid_level > 0) & (grid_level <= max_grids)
+        buy = active & (deviation < -grid_ratio)
+        sell = active & (deviation > grid_ratio)
+    return event_signals(buy, sell, start=base_period)
@@ -0,0 +1,401 @@
+"""
+公式策略
+
+用户以通达信风格的公式提交策略，例如::
+
+    MA5 := MA(C, 5);
+    MA20 := MA(C, 20);
+    BUY: CROSS(MA5, MA20);
+    SELL: CROSS(MA20, MA5)
+
+公式只解析一次，编译为按拓扑顺序执行的向量化计划（每一步是一次NumPy运算或
+indicators.kernels 中MyTT兼容函数的调用）。相同的子表达式在编译时合并为同一步，
+只计算一次。编译结果按公式哈希缓存，重复回测和参数优化直接复用计划，不再解析。
+"""
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from indicators import kernels
+from indicators.graph import IndicatorGraph
+from .registry import event_signals, register_strategy
+
+
+class FormulaError(ValueError):
+    """公式语法或语义错误"""
+
+
+# 函数名 -> (实现, 最少参数个数, 最多参数个数, 必须为数字常量的参数位置)
+# SLOPE/FORCAST 按通达信口径逐K线计算（MyTT 中只计算序列尾部）
+FORMULA_FUNCTIONS: Dict[str, Tuple[Callable, int, int, Tuple[int, ...]]] = {
+    'ABS': (kernels.ABS, 1, 1, ()),
+    'MAX': (kernels.MAX, 2, 2, ()),
+    'MIN': (kernels.MIN, 2, 2, ()),
+    'IF': (kernels.IF, 3, 3, ()),
+    'MA': (kernels.MA, 2, 2, (1,)),
+    'REF': (kernels.REF, 1, 2, (1,)),
+    'DIFF': (kernels.DIFF, 1, 2, (1,)),
+    'STD': (kernels.STD, 2, 2, (1,)),
+    'SUM': (kernels.SUM, 2, 2, (1,)),
+    'HHV': (kernels.HHV, 2, 2, (1,)),
+    'LLV': (kernels.LLV, 2, 2, (1,)),
+    'EMA': (kernels.EMA, 2, 2, (1,)),
+    'SMA': (kernels.SMA, 2, 3, (1, 2)),
+    'AVEDEV': (kernels.AVEDEV, 2, 2, (1,)),
+    'SLOPE': (kernels.ROLLING_SLOPE, 2, 2, (1,)),
+    'FORCAST': (kernels.ROLLING_FORCAST, 2, 2, (1,)),
+    'COUNT': (kernels.COUNT, 2, 2, (1,)),
+    'EVERY': (kernels.EVERY, 2, 2, (1,)),
+    'EXIST': (kernels.EXIST, 1, 2, (1,)),
+    'CROSS': (kernels.CROSS, 2, 2, ()),
+}
+
+# 行情变量名 -> 数据列
+FORMULA_COLUMNS = {
+    'C': 'close', 'CLOSE': 'close',
+    'O': 'open', 'OPEN': 'open',
+    'H': 'high', 'HIGH': 'high',
+    'L': 'low', 'LOW': 'low',
+    'V': 'volume', 'VOL': 'volume', 'VOLUME': 'volume',
+}
+
+# 运算符 -> NumPy 函数
+BINARY_OPERATORS: Dict[str, Callable] = {
+    '+': np.add, '-': np.subtract, '*': np.multiply, '/': np.true_divide,
+    '>': np.greater, '<': np.less, '>=': np.greater_equal, '<=': np.less_equal,
+    '=': np.equal, '<>': np.not_equal,
+    'AND': np.logical_and, 'OR': np.logical_or,
+}
+
+OPERATOR_ALIASES = {'==': '=', '!=': '<>', '&&': 'AND', '||': 'OR'}
+
+SIGNAL_OUTPUTS = ('BUY', 'SELL')
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>[ \t\r]+|\{[^}]*\})
+  | (?P<number>\d+\.?\d*|\.\d+)
+  | (?P<name>[^\W\d]\w*)
+  | (?P<op>:=|>=|<=|<>|!=|==|&&|\|\||[-+*/><=(),:;\n])
+""", re.VERBOSE)
+
+
+def tokenize(formula: str) -> List[Tuple[str, str]]:
+    """把公式拆分为 (类型, 文本) 记号列表，换行与分号都视为语句结束"""
+    tokens = []
+    pos = 0
+    while pos < len(formula):
+        match = _TOKEN_RE.match(formula, pos)
+        if match is None:
+            raise FormulaError(f"无法识别的字符 {formula[pos]!r}（位置 {pos}）")
+        kind = match.lastgroup
+        text = match.group()
+        if kind == 'name':
+            upper = text.upper()
+            tokens.append(('op', upper) if upper in ('AND', 'OR', 'NOT') else ('name', upper))
+        elif kind == 'op':
+            tokens.append(('end', ';') if text in (';', '\n') else ('op', OPERATOR_ALIASES.get(text, text)))
+        elif kind == 'number':
+            tokens.append(('number', text))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    递归下降解析器
+
+    表达式解析为可哈希的元组节点，变量引用直接替换为其定义的节点，
+    因此相同的子表达式（包括经不同变量名引用的）得到相同的元组。
+    """
+
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+        self.variables: Dict[str, tuple] = {}
+        self.outputs: Dict[str, tuple] = {}
+
+    def peek(self) -> Tuple[str, str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else ('eof', '')
+
+    def take(self) -> Tuple[str, str]:
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, text: str):
+        token = self.take()
+        if token[1] != text:
+            raise FormulaError(f"期望 {text!r}，实际为 {token[1] or '公式结尾'!r}")
+
+    def parse_program(self):
+        while self.peek()[0] != 'eof':
+            if self.peek()[0] == 'end':
+                self.take()
+                continue
+            self.parse_statement()
+            if self.peek()[0] not in ('end', 'eof'):
+                raise FormulaError(f"语句后出现多余的内容: {self.peek()[1]!r}")
+
+    def parse_statement(self):
+        kind, name = self.take()
+        if kind != 'name' or self.peek()[1] not in (':', ':='):
+            raise FormulaError("每条语句的格式应为 名称: 表达式 或 名称 := 表达式")
+        if name in FORMULA_COLUMNS or name in FORMULA_FUNCTIONS:
+            raise FormulaError(f"{name} 是保留名称，不能作为变量名")
+        is_output = self.take()[1] == ':'
+        node = self.parse_or()
+        self.variables[name] = node
+        if is_output:
+            self.outputs[name] = node
+
+    def parse_binary(self, operators: Tuple[str, ...], operand: Callable[[], tuple]) -> tuple:
+        node = operand()
+        while self.peek()[0] == 'op' and self.peek()[1] in operators:
+            op = self.take()[1]
+            node = ('OP', op, node, operand())
+        return node
+
+    def parse_or(self) -> tuple:
+        return self.parse_binary(('OR',), self.parse_and)
+
+    def parse_and(self) -> tuple:
+        return self.parse_binary(('AND',), self.parse_comparison)
+
+    def parse_comparison(self) -> tuple:
+        node = self.parse_additive()
+        if self.peek()[0] == 'op' and self.peek()[1] in ('>', '<', '>=', '<=', '=', '<>'):
+            op = self.take()[1]
+            node = ('OP', op, node, self.parse_additive())
+        return node
+
+    def parse_additive(self) -> tuple:
+        return self.parse_binary(('+', '-'), self.parse_multiplicative)
+
+    def parse_multiplicative(self) -> tuple:
+        return self.parse_binary(('*', '/'), self.parse_unary)
+
+    def parse_unary(self) -> tuple:
+        if self.peek() == ('op', '-'):
+            self.take()
+            operand = self.parse_unary()
+            if operand[0] == 'NUM':
+                return ('NUM', -operand[1])
+            return ('NEG', operand)
+        if self.peek() == ('op', 'NOT'):
+            self.take()
+            return ('NOT', self.parse_unary())
+        return self.parse_primary()
+
+    def parse_primary(self) -> tuple:
+        kind, text = self.take()
+        if kind == 'number':
+            return ('NUM', float(text))
+        if text == '(':
+            node = self.parse_or()
+            self.expect(')')
+            return node
+        if kind != 'name':
+            raise FormulaError(f"表达式中出现意外的 {text or '公式结尾'!r}")
+
+        if self.peek()[1] == '(':
+            return self.parse_call(text)
+        if text in self.variables:
+            return self.variables[text]
+        if text in FORMULA_COLUMNS:
+            return ('COL', FORMULA_COLUMNS[text])
+        raise FormulaError(f"未定义的变量: {text}")
+
+    def parse_call(self, name: str) -> tuple:
+        if name not in FORMULA_FUNCTIONS:
+            raise FormulaError(f"不支持的函数: {name}")
+        self.expect('(')
+        args = []
+        if self.peek()[1] != ')':
+            args.append(self.parse_or())
+            while self.peek()[1] == ',':
+                self.take()
+                args.append(self.parse_or())
+        self.expect(')')
+
+        _, min_args, max_args, constant_positions = FORMULA_FUNCTIONS[name]
+        if not min_args <= len(args) <= max_args:
+            raise FormulaError(f"{name} 需要 {min_args}~{max_args} 个参数，实际为 {len(args)} 个")
+        for i in constant_positions:
+            if i < len(args) and args[i][0] != 'NUM':
+                raise FormulaError(f"{name} 的第{i + 1}个参数必须是数字")
+        return ('CALL', name) + tuple(args)
+
+
+def _constant(value: float):
+    """整数值的常量按int传入，满足 rolling/shift 等对窗口参数的要求"""
+    return int(value) if float(value).is_integer() else value
+
+
+class FormulaPlan:
+    """
+    编译后的公式执行计划
+
+    steps 中每一步为 (类型, 参数, 输入槽位)，按依赖顺序排列，每个不同的子表达式
+    只占一步；outputs 为输出名到槽位的映射。
+    """
+
+    def __init__(self, formula_hash: str, steps: List[Tuple[str, Any, Tuple[int, ...]]], outputs: Dict[str, int]):
+        self.formula_hash = formula_hash
+        self.steps = steps
+        self.outputs = outputs
+        self.columns = sorted({payload for kind, payload, _ in steps if kind == 'COL'})
+
+    def evaluate(self, graph: IndicatorGraph) -> Dict[str, np.ndarray]:
+        """
+        在K线数据上执行计划
+
+        Args:
+            graph: 指标计算图（提供行情数据列）
+
+        Returns:
+            输出名到与K线等长数组的映射
+        """
+        for col in self.columns:
+            if not graph.has_column(col):
+                raise ValueError(f"公式需要 {col} 数据列")
+
+        values: List[Any] = []
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for kind, payload, inputs in self.steps:
+                args = [values[i] for i in inputs]
+                if kind == 'COL':
+                    values.append(graph.column(payload))
+                elif kind == 'NUM':
+                    values.append(_constant(payload))
+                elif kind == 'OP':
+                    values.append(BINARY_OPERATORS[payload](*args))
+                elif kind == 'NEG':
+                    values.append(np.negative(args[0]))
+                elif kind == 'NOT':
+                    values.append(np.logical_not(args[0]))
+                else:
+                    values.append(FORMULA_FUNCTIONS[payload][0](*args))
+
+        n = len(graph)
+        return {
+            name: np.broadcast_to(np.asarray(values[slot], dtype=np.float64), (n,))
+            for name, slot in self.outputs.items()
+        }
+
+    def signals(self, graph: IndicatorGraph) -> np.ndarray:
+        """BUY/SELL 输出转换为交易信号（NaN视为条件不成立）"""
+        outputs = self.evaluate(graph)
+        buy = np.nan_to_num(outputs['BUY']) != 0
+        sell = np.nan_to_num(outputs['SELL']) != 0
+        return event_signals(buy, sell)
+
+
+def _compile_nodes(formula_hash: str, outputs: Dict[str, tuple]) -> FormulaPlan:
+    """后序遍历表达式树生成执行计划，相同的节点只生成一步"""
+    slots: Dict[tuple, int] = {}
+    steps: List[Tuple[str, Any, Tuple[int, ...]]] = []
+
+    def visit(node: tuple) -> int:
+        if node in slots:
+            return slots[node]
+        kind = node[0]
+        if kind in ('COL', 'NUM'):
+            payload, children = node[1], ()
+        elif kind == 'OP':
+            payload, children = node[1], node[2:]
+        elif kind in ('NEG', 'NOT'):
+            payload, children = None, node[1:]
+        else:
+            payload, children = node[1], node[2:]
+        inputs = tuple(visit(child) for child in children)
+        steps.append((kind, payload, inputs))
+        slots[node] = len(steps) - 1
+        return slots[node]
+
+    output_slots = {name: visit(node) for name, node in outputs.items()}
+    return FormulaPlan(formula_hash, steps, output_slots)
+
+
+def formula_hash(formula: str) -> str:
+    """公式哈希（按记号序列计算，忽略大小写和空白差异；换行与分号等价）"""
+    normalized = ' '.join(text for _, text in tokenize(formula))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def parse_formula(formula: str) -> FormulaPlan:
+    """解析并编译公式（不使用缓存）"""
+    parser = _Parser(tokenize(formula))
+    parser.parse_program()
+    missing = [name for name in SIGNAL_OUTPUTS if name not in parser.outputs]
+    if missing:
+        raise FormulaError(f"公式缺少输出: {', '.join(missing)}")
+    return _compile_nodes(formula_hash(formula), parser.outputs)
+
+
+class FormulaPlanCache:
+    """按公式哈希缓存编译后的执行计划（LRU）"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._plans: "OrderedDict[str, FormulaPlan]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, formula: str) -> FormulaPlan:
+        key = formula_hash(formula)
+        plan = self._plans.get(key)
+        if plan is not None:
+            self.hits += 1
+            self._plans.move_to_end(key)
+            return plan
+
+        self.misses += 1
+        plan = parse_formula(formula)
+        self._plans[key] = plan
+        while len(self._plans) > self.max_entries:
+            self._plans.popitem(last=False)
+        return plan
+
+    def clear(self):
+        self._plans.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+
+_shared_plan_cache: Optional[FormulaPlanCache] = None
+
+
+def get_formula_cache() -> FormulaPlanCache:
+    """获取进程内共享的公式计划缓存"""
+    global _shared_plan_cache
+    if _shared_plan_cache is None:
+        _shared_plan_cache = FormulaPlanCache()
+    return _shared_plan_cache
+
+
+def compile_formula(formula: str) -> FormulaPlan:
+    """获取公式的执行计划，已编译过的公式直接返回缓存"""
+    return get_formula_cache().get(formula)
+
+
+@register_strategy(
+    'FORMULA',
+    title='公式策略',
+    description='通达信风格公式，需定义BUY和SELL两个输出，支持MA、EMA、REF、CROSS、HHV、LLV等函数',
+    params={
+        'formula': {
+            'type': 'str',
+            'default': 'BUY: CROSS(MA(C,5),MA(C,20)); SELL: CROSS(MA(C,20),MA(C,5))',
+            'description': '策略公式'
+        }
+    },
+    columns_func=lambda params: compile_formula(params['formula']).columns
+)
+def formula_signals(graph: IndicatorGraph, params: dict) -> np.ndarray:
+    return compile_formula(params['formula']).signals(graph)
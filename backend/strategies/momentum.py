@@ -0,0 +1,78 @@
+"""动量类策略：KDJ、威廉指标（移植自 legacy/src/strategies，逐行循环改为向量化）"""
+import numpy as np
+import pandas as pd
+
+from indicators.graph import IndicatorGraph, register_indicator
+from .registry import event_signals, register_strategy, shift
+
+
+@register_indicator('STOCH_K')
+def _stoch_k(graph: IndicatorGraph, k_period: int, d_period: int) -> np.ndarray:
+    """KDJ的K值：RSV的 d_period 日均值"""
+    lowest_low = graph.get('LLV', 'low', k_period)
+    highest_high = graph.get('HHV', 'high', k_period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsv = 100 * ((graph.column('close') - lowest_low) / (highest_high - lowest_low))
+    return pd.Series(rsv).rolling(window=d_period).mean().to_numpy()
+
+
+@register_indicator('STOCH_D')
+def _stoch_d(graph: IndicatorGraph, k_period: int, d_period: int) -> np.ndarray:
+    """KDJ的D值：K值的 d_period 日均值"""
+    return graph.series(('STOCH_K', k_period, d_period)).rolling(window=d_period).mean().to_numpy()
+
+
+@register_strategy(
+    'KDJ',
+    title='KDJ随机指标策略',
+    description='超卖区KDJ金叉且价格走强时买入，超买区死叉时卖出',
+    params={
+        'k_period': {'type': 'int', 'default': 9, 'min': 3, 'max': 30, 'description': 'RSV周期'},
+        'd_period': {'type': 'int', 'default': 3, 'min': 2, 'max': 10, 'description': 'K、D平滑周期'}
+    },
+    required_columns=('high', 'low', 'close')
+)
+def kdj_signals(graph: IndicatorGraph, params: dict) -> np.ndarray:
+    k_period, d_period = params['k_period'], params['d_period']
+    k = graph.get('STOCH_K', k_period, d_period)
+    d = graph.get('STOCH_D', k_period, d_period)
+    j = 3 * k - 2 * d
+    k_prev, d_prev = shift(k), shift(d)
+
+    close = graph.column('close')
+    price_rising = close > shift(graph.sma(5), 3)
+
+    with np.errstate(invalid='ignore'):
+        buy = (k_prev <= d_prev) & (k > d) & (k < 30) & (j < 20) & price_rising
+        sell = (k_prev >= d_prev) & (k < d) & (k > 70) & (j > 80)
+    return event_signals(buy, sell, start=max(k_period, 10))
+
+
+@register_strategy(
+    'WilliamsR',
+    title='威廉指标策略',
+    description='威廉指标离开超卖区且放量上涨时买入，离开超买区且放量下跌时卖出',
+    params={
+        'period': {'type': 'int', 'default': 14, 'min': 5, 'max': 50, 'description': '威廉指标周期'},
+        'overbought': {'type': 'int', 'default': -20, 'min': -50, 'max': 0, 'description': '超买阈值'},
+        'oversold': {'type': 'int', 'default': -80, 'min': -100, 'max': -50, 'description': '超卖阈值'}
+    },
+    required_columns=('high', 'low', 'close', 'volume')
+)
+def williams_r_signals(graph: IndicatorGraph, params: dict) -> np.ndarray:
+    period, overbought, oversold = params['period'], params['overbought'], params['oversold']
+    highest_high = graph.get('HHV', 'high', period)
+    lowest_low = graph.get('LLV', 'low', period)
+    close = graph.column('close')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        wr = -100 * (highest_high - close) / (highest_high - lowest_low)
+        price_change = close / shift(close) - 1
+    wr_prev = shift(wr)
+
+    volume = graph.column('volume')
+    volume_above_avg = volume > graph.sma(20, 'volume')
+
+    with np.errstate(invalid='ignore'):
+        buy = (wr_prev < oversold) & (wr > oversold) & (price_change > 0) & volume_above_avg
+        sell = (wr_prev > overbought) & (wr < overbought) & (price_change < 0) & volume_above_avg
+    return event_signals(buy, sell, start=1)
@@ -0,0 +1,143 @@
+"""
+策略插件注册表
+
+每个插件是一个向量化的信号函数 fn(graph, params) -> np.ndarray，输入为指标计算图，
+返回与K线等长的交易信号（1买入，-1卖出，0无信号）。注册后自动出现在策略模板中，
+BacktestEngine 的单次回测和 run_batch 都可以直接使用。
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from indicators.graph import IndicatorGraph
+
+
+SignalFunc = Callable[[IndicatorGraph, Dict[str, Any]], np.ndarray]
+ColumnsFunc = Callable[[Dict[str, Any]], Sequence[str]]
+
+
+@dataclass
+class StrategyPlugin:
+    """策略插件"""
+    name: str
+    title: str
+    description: str
+    params: Dict[str, Dict[str, Any]]
+    signal_func: SignalFunc
+    required_columns: Tuple[str, ...] = ('close',)
+    columns_func: Optional[ColumnsFunc] = None
+
+    def defaults(self) -> Dict[str, Any]:
+        """参数默认值"""
+        return {name: config['default'] for name, config in self.params.items()}
+
+    def template(self) -> Dict[str, Any]:
+        """与 STRATEGY_TEMPLATES 相同格式的策略模板"""
+        return {'name': self.title, 'description': self.description, 'params': self.params}
+
+    def columns(self, params: Optional[Dict[str, Any]] = None) -> Tuple[str, ...]:
+        """给定参数时需要的K线数据列（声明的列加上由参数决定的列）"""
+        columns = list(self.required_columns)
+        if self.columns_func is not None:
+            columns.extend(self.columns_func(self._merge(params)))
+        return tuple(dict.fromkeys(columns))
+
+    def signals(self, graph: IndicatorGraph, params: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """
+        计算交易信号
+
+        Args:
+            graph: 与K线对应的指标计算图
+            params: 策略参数，缺省的参数使用默认值
+
+        Returns:
+            float64 信号数组
+        """
+        for col in self.required_columns:
+            if not graph.has_column(col):
+                raise ValueError(f"策略 {self.name} 需要 {col} 数据列")
+
+        return np.asarray(self.signal_func(graph, self._merge(params)), dtype=np.float64)
+
+    def _merge(self, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """缺省的参数使用默认值"""
+        merged = self.defaults()
+        merged.update({k: v for k, v in (params or {}).items() if k in self.params})
+        return merged
+
+
+STRATEGY_REGISTRY: Dict[str, StrategyPlugin] = {}
+
+
+def register_strategy(
+    name: str,
+    title: str,
+    description: str,
+    params: Dict[str, Dict[str, Any]],
+    required_columns: Tuple[str, ...] = ('close',),
+    columns_func: Optional[ColumnsFunc] = None
+):
+    """
+    注册策略插件
+
+    Args:
+        name: 策略类型（回测参数中的 type）
+        title: 策略名称
+        description: 策略说明
+        params: 参数模板，格式与 STRATEGY_TEMPLATES 相同
+        required_columns: 需要的K线数据列
+        columns_func: 由参数决定的其他数据列（如公式中引用的列）
+    """
+    def decorator(func: SignalFunc) -> SignalFunc:
+        STRATEGY_REGISTRY[name] = StrategyPlugin(
+            name, title, description, params, func, required_columns, columns_func
+        )
+        return func
+    return decorator
+
+
+def get_strategy(name: str) -> Optional[StrategyPlugin]:
+    """获取已注册的策略插件"""
+    return STRATEGY_REGISTRY.get(name)
+
+
+def get_required_columns(name: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, ...]:
+    """
+    回测该策略需要的K线数据列
+
+    内置策略（MA、RSI等）只需要收盘价；插件还需要其声明的数据列和由参数决定的列。
+    收盘价用于持仓模拟，总是包含在内。
+
+    Args:
+        name: 策略类型
+        params: 策略参数（缺省时按默认参数）
+    """
+    plugin = STRATEGY_REGISTRY.get(name)
+    columns = plugin.columns(params) if plugin is not None else ()
+    return ('close',) + tuple(col for col in columns if col != 'close')
+
+
+def list_strategies() -> List[str]:
+    """已注册的策略类型"""
+    return list(STRATEGY_REGISTRY.keys())
+
+
+def get_strategy_templates() -> Dict[str, Dict[str, Any]]:
+    """所有插件的策略模板"""
+    return {name: plugin.template() for name, plugin in STRATEGY_REGISTRY.items()}
+
+
+def shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """向后平移，前 periods 个位置为NaN（与 pandas shift 一致）"""
+    out = np.full(len(values), np.nan)
+    if periods < len(values):
+        out[periods:] = values[:len(values) - periods]
+    return out
+
+
+def event_signals(buy: np.ndarray, sell: np.ndarray, start: int = 0) -> np.ndarray:
+    """买卖条件转换为信号数组，买入优先，start 之前的K线不产生信号"""
+    signal = np.where(buy, 1.0, np.where(sell, -1.0, 0.0))
+    signal[:start] = 0.0
+    return signal
@@ -0,0 +1,34 @@
+"""RSRS阻力支撑相对强度策略（legacy/src/strategies/rsra_strategies.py 只有类声明，按通行定义实现）"""
+import numpy as np
+
+from indicators.graph import IndicatorGraph, register_indicator
+from .registry import event_signals, register_strategy
+
+
+@register_indicator('RSRS_SLOPE')
+def _rsrs_slope(graph: IndicatorGraph, window: int) -> np.ndarray:
+    """最高价对最低价做N日滚动线性回归的斜率 cov(high, low) / var(low)"""
+    high, low = graph.series('high'), graph.series('low')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (high.rolling(window).cov(low) / low.rolling(window).var()).to_numpy()
+
+
+@register_strategy(
+    'RSRS',
+    title='RSRS阻力支撑策略',
+    description='最高价对最低价回归斜率的标准分高于阈值时买入，低于负阈值时卖出',
+    params={
+        'window': {'type': 'int', 'default': 18, 'min': 5, 'max': 60, 'description': '回归窗口'},
+        'zscore_window': {'type': 'int', 'default': 600, 'min': 50, 'max': 1200, 'description': '标准分窗口'},
+        'threshold': {'type': 'float', 'default': 0.7, 'min': 0.1, 'max': 2, 'description': '标准分阈值'}
+    },
+    required_columns=('high', 'low')
+)
+def rsrs_signals(graph: IndicatorGraph, params: dict) -> np.ndarray:
+    window, zscore_window, threshold = params['window'], params['zscore_window'], params['threshold']
+    slope_node = ('RSRS_SLOPE', window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z_score = (graph.get(*slope_node) - graph.sma(zscore_window, slope_node)) / graph.std(zscore_window, slope_node)
+        buy = z_score > threshold
+        sell = z_score < -threshold
+    return event_signals(buy, sell)
@@ -0,0 +1,62 @@
+"""自适应网格性能基准 - 与完整网格对比评估次数、耗时和最优得分
+
+排名为自适应网格最优得分在全部网格组合中的分位（1.0 即网格最优）。
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_adaptive_grid.py
+"""
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from optimizers import GridSearchOptimizer
+from services.optimization_objective import BacktestObjective
+from test_backtest_kernel import make_price_data
+
+
+N_BARS = 3_000
+SEEDS = range(3, 7)
+PARAM_RANGES = {
+    'short_window': {'type': 'int', 'min': 2, 'max': 60, 'step': 1},
+    'long_window': {'type': 'int', 'min': 20, 'max': 300, 'step': 2}
+}
+CONFIGS = {
+    'top_k=3': dict(top_k=3),
+    'top_k=8': dict(top_k=8),
+    'coarse=9 k=8': dict(coarse_points=9, top_k=8),
+}
+
+
+def timed_optimize(optimizer, objective):
+    start = time.perf_counter()
+    result = asyncio.run(optimizer.optimize(objective, PARAM_RANGES, verbose=False))
+    return result, time.perf_counter() - start
+
+
+def main():
+    print(f"K线: {N_BARS} 根，参数组合: 59 x 141")
+    print(f"{'seed':>4} | {'method':>12} | {'evals':>6} | {'time(s)':>8} | {'best':>8} | {'rank':>6}")
+    print('-' * 60)
+    for seed in SEEDS:
+        df = make_price_data(N_BARS, seed=seed)
+        objective = BacktestObjective(df, 'MA')
+
+        grid, grid_time = timed_optimize(GridSearchOptimizer(), objective)
+        grid_scores = np.array([item['score'] for item in grid.all_results])
+        print(f"{seed:>4} | {'grid':>12} | {len(grid_scores):>6} | {grid_time:>8.3f} | "
+              f"{grid.best_score:>8.4f} | {1.0:>6.3f}")
+
+        for name, options in CONFIGS.items():
+            result, elapsed = timed_optimize(GridSearchOptimizer(adaptive=True, **options), objective)
+            rank = (grid_scores <= result.best_score + 1e-12).mean()
+            print(f"{seed:>4} | {name:>12} | {result.stats['evaluations']:>6} | {elapsed:>8.3f} | "
+                  f"{result.best_score:>8.4f} | {rank:>6.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""回测模拟内核性能基准 - 随K线数量的扩展性
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_backtest_kernel.py
+"""
+import sys
+import time
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_service import BacktestEngine
+from test_backtest_kernel import make_price_data, run_reference_loop
+
+
+# 原始逐行循环在大数据量下过慢，只在小规模上对比
+LOOP_MAX_BARS = 10_000
+BAR_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def timed(func, *args):
+    """返回函数执行耗时（秒）"""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    engine = BacktestEngine(initial_capital=100000.0)
+    params = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+
+    print(f"{'bars':>10} | {'kernel(s)':>10} | {'loop(s)':>10} | {'speedup':>8}")
+    print('-' * 48)
+    for n in BAR_COUNTS:
+        df = engine._calculate_indicators(make_price_data(n), params)
+        kernel_time = timed(engine._run_backtest_simulation, df)
+
+        if n <= LOOP_MAX_BARS:
+            loop_time = timed(run_reference_loop, engine, df)
+            print(f"{n:>10} | {kernel_time:>10.4f} | {loop_time:>10.4f} | {loop_time / kernel_time:>7.1f}x")
+        else:
+            print(f"{n:>10} | {kernel_time:>10.4f} | {'-':>10} | {'-':>8}")
+
+
+if __name__ == '__main__':
+    main()
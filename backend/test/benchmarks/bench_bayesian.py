@@ -0,0 +1,82 @@
+"""贝叶斯优化性能基准 - Cholesky增量更新与批量建议
+
+1. 逐点追加观测：增量更新 vs 每次重新分解核矩阵
+2. 每轮建议 q 个点：评估耗时固定（sleep 模拟一次回测）时的墙钟时间，
+   评估在线程池中并行，单核机器上也能体现批量建议让所有工作者保持忙碌的效果
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_bayesian.py
+"""
+import asyncio
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append('.')
+
+from optimizers import BayesianOptimizer
+from optimizers.gaussian_process import GaussianProcess
+
+
+N_POINTS = [100, 200, 400]
+N_EVALS = 64
+EVAL_SECONDS = 0.02
+PARAM_RANGES = {
+    'x': {'type': 'int', 'min': 0, 'max': 100, 'step': 1},
+    'y': {'type': 'float', 'min': 0.0, 'max': 1.0}
+}
+
+
+def bench_incremental(n_points: int):
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 1, (n_points, 2))
+    y = np.sin(3 * X[:, 0]) + X[:, 1]
+
+    gp = GaussianProcess(2)
+    start = time.perf_counter()
+    for x_i, y_i in zip(X, y):
+        gp.add(x_i, y_i)
+    incremental = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for n in range(1, n_points + 1):
+        np.linalg.cholesky(gp.kernel(X[:n], X[:n]) + gp.noise * np.eye(n))
+    refit = time.perf_counter() - start
+    return incremental, refit
+
+
+def slow_objective(params):
+    time.sleep(EVAL_SECONDS)
+    return -((params['x'] - 30) / 50) ** 2 - (params['y'] - 0.7) ** 2
+
+
+def bench_batch(q: int):
+    random.seed(0)
+    optimizer = BayesianOptimizer(n_jobs=q, n_iter=N_EVALS, n_init=8, n_candidates=500, executor='thread')
+    start = time.perf_counter()
+    result = asyncio.run(optimizer.optimize(slow_objective, PARAM_RANGES, verbose=False))
+    return time.perf_counter() - start, result.best_score
+
+
+def main():
+    print(f"{'points':>7} | {'incremental(s)':>14} | {'refit(s)':>9} | {'speedup':>8}")
+    print('-' * 48)
+    for n_points in N_POINTS:
+        incremental, refit = bench_incremental(n_points)
+        print(f"{n_points:>7} | {incremental:>14.4f} | {refit:>9.4f} | {refit / incremental:>7.1f}x")
+
+    print()
+    print(f"{N_EVALS} 次评估，每次 {EVAL_SECONDS * 1000:.0f}ms")
+    print(f"{'q':>3} | {'wall(s)':>8} | {'speedup':>8} | {'best':>8}")
+    print('-' * 36)
+    base = None
+    for q in (1, 2, 4, 8):
+        elapsed, best = bench_batch(q)
+        base = base or elapsed
+        print(f"{q:>3} | {elapsed:>8.3f} | {base / elapsed:>7.1f}x | {best:>8.4f}")
+
+
+if __name__ == '__main__':
+    main()
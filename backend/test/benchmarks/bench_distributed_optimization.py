@@ -0,0 +1,96 @@
+"""分布式参数优化性能基准 - 工作者数量与吞吐
+
+本机启动一个任务代理，分别用 1/2/4 个工作者进程完成同一网格搜索，
+对比本地串行评估的耗时和每秒评估的参数组合数。每批参数按在线工作者数拆分，
+网格搜索的 n_jobs 设为工作者数（与服务中的用法一致）。工作者之间没有共享状态，
+吞吐随工作者数增长，上限是可用CPU核数（多机部署时为全部机器的核数）。
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_distributed_optimization.py
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from optimizers import GridSearchOptimizer
+from services.distributed_executor import DistributedExecutor
+from services.optimization_broker import BrokerServer
+from services.optimization_objective import BacktestObjective
+from services.optimization_worker import OptimizationWorker
+from test_backtest_kernel import make_price_data
+
+
+N_BARS = 20_000
+WORKER_COUNTS = [1, 2, 4]
+PARAM_RANGES = {
+    'short_window': {'type': 'int', 'min': 2, 'max': 40, 'step': 1},
+    'long_window': {'type': 'int', 'min': 20, 'max': 250, 'step': 10}
+}
+
+
+def run_worker(broker_url, cache_dir, ready, stop):
+    worker = OptimizationWorker(broker_url, cache_dir=cache_dir, poll_interval=0.02)
+    ready.put(worker.worker_id)
+    try:
+        worker.run(stop=stop)
+    finally:
+        worker.close()
+
+
+def run_grid(objective, executor, n_jobs=1):
+    optimizer = GridSearchOptimizer(n_jobs=n_jobs, executor=executor)
+    start = time.perf_counter()
+    result = asyncio.run(optimizer.optimize(objective, PARAM_RANGES, verbose=False))
+    return time.perf_counter() - start, result
+
+
+def main():
+    objective = BacktestObjective(make_price_data(N_BARS, seed=3), 'MA')
+    print(f"K线: {N_BARS} 根，CPU: {os.cpu_count()}")
+    print(f"{'workers':>8} | {'evals':>6} | {'time(s)':>8} | {'evals/s':>8} | {'speedup':>7} | {'best':>8}")
+    print('-' * 60)
+
+    baseline, result = run_grid(objective, 'serial')
+    evaluations = len(result.all_results)
+    print(f"{'local':>8} | {evaluations:>6} | {baseline:>8.3f} | {evaluations / baseline:>8.1f} | "
+          f"{1.0:>7.2f} | {result.best_score:>8.4f}")
+
+    context = multiprocessing.get_context('spawn')
+    for n_workers in WORKER_COUNTS:
+        server = BrokerServer().start()
+        ready, stop = context.Queue(), context.Event()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            workers = [
+                context.Process(target=run_worker, args=(server.url, cache_dir, ready, stop), daemon=True)
+                for _ in range(n_workers)
+            ]
+            for worker in workers:
+                worker.start()
+            # 计时不含工作者进程的启动时间
+            for _ in workers:
+                ready.get()
+            while server.broker.get_stats()['workers'] < n_workers:
+                time.sleep(0.01)
+
+            executor = DistributedExecutor(server.url)
+            try:
+                elapsed, result = run_grid(objective, executor, n_jobs=n_workers)
+            finally:
+                executor.close()
+                stop.set()
+                for worker in workers:
+                    worker.join()
+                server.stop()
+
+        print(f"{n_workers:>8} | {evaluations:>6} | {elapsed:>8.3f} | {evaluations / elapsed:>8.1f} | "
+              f"{baseline / elapsed:>7.2f} | {result.best_score:>8.4f}")
+
+
+if __name__ == '__main__':
+    main()
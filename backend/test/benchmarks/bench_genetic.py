@@ -0,0 +1,55 @@
+"""遗传算法性能基准 - 适应度缓存与岛模型
+
+1. 适应度缓存：相同种群与代数下，开启/关闭缓存的实际评估次数和耗时
+2. 岛模型：单一种群 vs 多个岛（各岛在独立进程中进化，每 migration_interval 代迁移一次）
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_genetic.py
+"""
+import asyncio
+import random
+import sys
+import time
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from optimizers import GeneticOptimizer
+from services.optimization_objective import BacktestObjective
+from test_backtest_kernel import make_price_data
+
+
+N_BARS = 5_000
+POPULATION_SIZE = 48
+GENERATIONS = 20
+PARAM_RANGES = {
+    'short_window': {'type': 'int', 'min': 2, 'max': 40, 'step': 2},
+    'long_window': {'type': 'int', 'min': 20, 'max': 250, 'step': 10}
+}
+CONFIGS = {
+    'no cache': dict(use_cache=False, executor='serial'),
+    'cache': dict(executor='serial'),
+    '2 islands': dict(n_islands=2, n_jobs=2),
+    '4 islands': dict(n_islands=4, n_jobs=4),
+}
+
+
+def main():
+    objective = BacktestObjective(make_price_data(N_BARS, seed=3), 'MA')
+    print(f"K线: {N_BARS} 根，种群: {POPULATION_SIZE}，代数: {GENERATIONS}")
+    print(f"{'config':>10} | {'evals':>6} | {'saved':>6} | {'hit rate':>8} | {'time(s)':>8} | {'best':>8}")
+    print('-' * 62)
+    for name, options in CONFIGS.items():
+        random.seed(0)
+        optimizer = GeneticOptimizer(population_size=POPULATION_SIZE, generations=GENERATIONS, **options)
+        start = time.perf_counter()
+        result = asyncio.run(optimizer.optimize(objective, PARAM_RANGES, verbose=False))
+        elapsed = time.perf_counter() - start
+        stats = result.stats
+        evaluations = stats['evaluations'] if stats['cache_lookups'] else POPULATION_SIZE * (GENERATIONS + 1)
+        print(f"{name:>10} | {evaluations:>6} | {stats['evaluations_saved']:>6} | "
+              f"{stats['cache_hit_rate']:>8.1%} | {elapsed:>8.3f} | {result.best_score:>8.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Hyperband 性能基准 - 与网格搜索对比模拟K线数、耗时和最优得分
+
+排名为 Hyperband 最优参数的全样本得分在全部网格组合中的分位（1.0 即网格最优）。
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_hyperband.py
+"""
+import asyncio
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from optimizers import GridSearchOptimizer, HyperbandOptimizer
+from services.optimization_objective import BacktestObjective
+from test_backtest_kernel import make_price_data
+
+
+N_BARS = 5_000
+SEEDS = range(3, 7)
+PARAM_RANGES = {
+    'short_window': {'type': 'int', 'min': 2, 'max': 40, 'step': 2},
+    'long_window': {'type': 'int', 'min': 20, 'max': 250, 'step': 10}
+}
+CONFIGS = {
+    'SH eta=3': dict(eta=3, min_bars=300),
+    'SH eta=4': dict(eta=4, min_bars=300),
+    'HB eta=3': dict(eta=3, min_bars=300, n_brackets=None),
+}
+
+
+def timed_optimize(optimizer, objective):
+    start = time.perf_counter()
+    result = asyncio.run(optimizer.optimize(objective, PARAM_RANGES, verbose=False))
+    return result, time.perf_counter() - start
+
+
+def main():
+    print(f"K线: {N_BARS} 根，参数组合: 20 x 24")
+    print(f"{'seed':>4} | {'method':>9} | {'bars':>10} | {'time(s)':>8} | {'best':>8} | {'rank':>6}")
+    print('-' * 60)
+    for seed in SEEDS:
+        random.seed(seed)
+        df = make_price_data(N_BARS, seed=seed)
+
+        grid, grid_time = timed_optimize(GridSearchOptimizer(), BacktestObjective(df, 'MA'))
+        grid_scores = np.array([item['score'] for item in grid.all_results])
+        print(f"{seed:>4} | {'grid':>9} | {len(grid_scores) * N_BARS:>10} | {grid_time:>8.3f} | "
+              f"{grid.best_score:>8.4f} | {1.0:>6.3f}")
+
+        for name, options in CONFIGS.items():
+            result, elapsed = timed_optimize(HyperbandOptimizer(**options), BacktestObjective(df, 'MA'))
+            rank = (grid_scores <= result.best_score + 1e-12).mean()
+            print(f"{seed:>4} | {name:>9} | {result.stats['bars_simulated']:>10} | {elapsed:>8.3f} | "
+                  f"{result.best_score:>8.4f} | {rank:>6.3f}")
+
+
+if __name__ == '__main__':
+    main()
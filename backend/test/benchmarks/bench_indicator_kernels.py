@@ -0,0 +1,88 @@
+"""指标内核性能基准 - 100万个点上逐函数对比 MyTT 与 indicators.kernels
+
+MyTT 的 AVEDEV（rolling.apply）和逐点 SLOPE/FORCAST 在100万点上需要数分钟，
+这几项在前 SAMPLE_POINTS 个点上计时后按点数线性折算（标记为 *）。
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_indicator_kernels.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.insert(0, str(Path('3rdparty') / 'Ashare'))
+
+import MyTT
+from indicators import kernels
+
+
+N_POINTS = 1_000_000
+SAMPLE_POINTS = 20_000
+WINDOW = 20
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def mytt_rolling(func, S, N):
+    """MyTT 只计算序列尾部，逐点调用得到滚动结果"""
+    return [func(S[:i + 1], N) for i in range(N - 1, len(S))]
+
+
+def main():
+    rng = np.random.default_rng(0)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.001, N_POINTS)))
+    high = close * (1 + rng.uniform(0, 0.002, N_POINTS))
+    low = close * (1 - rng.uniform(0, 0.002, N_POINTS))
+    cond = close > MyTT.REF(close, 1)
+
+    cases = [
+        ('MA', (close, WINDOW)),
+        ('SUM', (close, WINDOW)),
+        ('STD', (close, WINDOW)),
+        ('HHV', (close, WINDOW)),
+        ('LLV', (close, WINDOW)),
+        ('HHV(250)', (close, 250)),
+        ('EMA', (close, WINDOW)),
+        ('REF', (close, 1)),
+        ('COUNT', (cond, WINDOW)),
+        ('EVERY', (cond, 5)),
+        ('MACD', (close,)),
+        ('KDJ', (close, high, low)),
+        ('BOLL', (close,)),
+        ('ATR', (close, high, low)),
+    ]
+
+    print(f"点数: {N_POINTS}, 窗口: {WINDOW}")
+    print(f"{'function':>14} | {'MyTT(s)':>10} | {'kernels(s)':>10} | {'speedup':>8}")
+    print('-' * 52)
+    for label, args in cases:
+        name = label.split('(')[0]
+        mytt_time = timed(getattr(MyTT, name), *args)
+        kernel_time = timed(getattr(kernels, name), *args)
+        print(f"{label:>14} | {mytt_time:>10.4f} | {kernel_time:>10.4f} | {mytt_time / kernel_time:>7.1f}x")
+
+    scale = N_POINTS / SAMPLE_POINTS
+    sample = close[:SAMPLE_POINTS]
+    slow_cases = [
+        ('AVEDEV', lambda: MyTT.AVEDEV(sample, WINDOW), lambda: kernels.AVEDEV(close, WINDOW)),
+        ('CCI', lambda: MyTT.CCI(sample, high[:SAMPLE_POINTS], low[:SAMPLE_POINTS]),
+         lambda: kernels.CCI(close, high, low)),
+        ('SLOPE', lambda: mytt_rolling(MyTT.SLOPE, sample, WINDOW), lambda: kernels.ROLLING_SLOPE(close, WINDOW)),
+        ('FORCAST', lambda: mytt_rolling(MyTT.FORCAST, sample, WINDOW),
+         lambda: kernels.ROLLING_FORCAST(close, WINDOW)),
+    ]
+    for label, mytt_func, kernel_func in slow_cases:
+        mytt_time = timed(mytt_func) * scale
+        kernel_time = timed(kernel_func)
+        print(f"{label + ' *':>14} | {mytt_time:>10.2f} | {kernel_time:>10.4f} | {mytt_time / kernel_time:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""K线合成性能基准 - 5年1分钟K线合成各频率，对比 pandas groupby 逐频率聚合与增量刷新
+
+pandas 对照组先把时间映射到交易分钟序号再 groupby，结果与 resample_minute_bars 一致；
+增量刷新为追加一个交易日后刷新全部合成频率的耗时（含DuckDB读写）。
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_kline_resampler.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.duckdb_storage_service import DuckDBStorageService
+from services.kline_resampler import KlineResampler, RESAMPLE_MINUTES, resample_minute_bars, trading_minute_index
+from test_kline_resampler import make_minute_data
+
+
+N_DAYS = 1250
+
+
+def pandas_resample(df: pd.DataFrame, frequency: str) -> pd.DataFrame:
+    """pandas groupby 版本的同口径合成"""
+    minute_of_day = (df.index.hour * 60 + df.index.minute).to_numpy()
+    bucket = (trading_minute_index(minute_of_day) - 1) // RESAMPLE_MINUTES[frequency]
+    grouped = df.groupby([df.index.normalize(), bucket])
+    return grouped.agg({
+        'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum', 'amount': 'sum'
+    })
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    minute = make_minute_data(days=N_DAYS, start='2019-01-02')
+    print(f"1分钟K线: {len(minute)} 根（{N_DAYS} 个交易日）")
+    print(f"{'frequency':>10} | {'bars':>8} | {'pandas(s)':>10} | {'numpy(s)':>10} | {'speedup':>8}")
+    print('-' * 58)
+    for frequency in RESAMPLE_MINUTES:
+        bars = resample_minute_bars(minute, frequency)
+        pandas_time = timed(pandas_resample, minute, frequency)
+        numpy_time = timed(resample_minute_bars, minute, frequency)
+        print(f"{frequency:>10} | {len(bars):>8} | {pandas_time:>10.4f} | {numpy_time:>10.4f} | "
+              f"{pandas_time / numpy_time:>7.1f}x")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        storage = DuckDBStorageService(db_path=os.path.join(tmpdir, 'bench.duckdb'))
+        resampler = KlineResampler(storage)
+        last_day = minute.index.normalize()[-1]
+        storage.save_kline_data(minute[minute.index < last_day], '600000', '1min')
+
+        full_time = timed(resampler.refresh_all, '600000')
+        storage.upsert_kline_data(minute[minute.index >= last_day], '600000', '1min')
+        incremental_time = timed(resampler.refresh_all, '600000')
+        storage.close()
+
+    print()
+    print(f"全量物化全部频率: {full_time:.3f}s")
+    print(f"追加一个交易日后增量刷新: {incremental_time:.3f}s（{full_time / incremental_time:.1f}x）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""蒙特卡洛分析性能基准
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_monte_carlo.py
+"""
+import sys
+import time
+
+sys.path.append('.')
+
+import numpy as np
+
+from services.monte_carlo import monte_carlo_analysis
+
+
+CASES = [(10_000, 1_000), (10_000, 5_000), (100_000, 1_000)]
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'paths':>8} | {'bars':>6} | {'method':>9} | {'time(s)':>8}")
+    print('-' * 42)
+    for n_paths, n_bars in CASES:
+        total_value = 100000 * np.cumprod(1 + rng.normal(0.0003, 0.01, n_bars))
+        for method in ('bootstrap', 'shuffle'):
+            start = time.perf_counter()
+            monte_carlo_analysis(total_value, n_paths=n_paths, method=method, seed=0)
+            elapsed = time.perf_counter() - start
+            print(f"{n_paths:>8} | {n_bars:>6} | {method:>9} | {elapsed:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""优化器评估后端性能基准 - 网格搜索/遗传算法/贝叶斯优化在各后端上的耗时
+
+原实现为每组参数await一次协程目标函数（不共享指标）；serial 在当前进程整批评估，
+thread/process 按 n_jobs 分批并行。process 后端的加速比随CPU核数近似线性增长，
+单核机器上只能看到分批和共享指标带来的收益。
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_optimizer_executors.py [n_jobs]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from optimizers import BayesianOptimizer, GeneticOptimizer, GridSearchOptimizer
+from services.backtest_service import BacktestEngine
+from services.optimization_objective import BacktestObjective
+from test_backtest_kernel import make_price_data
+
+
+N_BARS = 5_000
+PARAM_RANGES = {
+    'short_window': {'type': 'int', 'min': 2, 'max': 40, 'step': 2},
+    'long_window': {'type': 'int', 'min': 20, 'max': 250, 'step': 10}
+}
+OPTIMIZERS = {
+    'grid': lambda **kwargs: GridSearchOptimizer(**kwargs),
+    'genetic': lambda **kwargs: GeneticOptimizer(population_size=40, generations=10, **kwargs),
+    'bayesian': lambda **kwargs: BayesianOptimizer(n_iter=64, n_init=16, **kwargs),
+}
+
+
+def make_legacy_objective(df):
+    """原有写法：每组参数单独回测，指标不在参数之间共享"""
+    engine = BacktestEngine()
+
+    async def objective_func(params):
+        return engine.run_batch(df, 'MA', [params])[0]['sharpe_ratio']
+
+    return objective_func
+
+
+def timed(name, objective_func, executor, n_jobs):
+    optimizer = OPTIMIZERS[name](n_jobs=n_jobs, executor=executor)
+    start = time.perf_counter()
+    result = asyncio.run(optimizer.optimize(objective_func, PARAM_RANGES, verbose=False))
+    return time.perf_counter() - start, result
+
+
+def main():
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    df = make_price_data(N_BARS)
+    print(f"K线: {N_BARS} 根，n_jobs: {n_jobs}，CPU核数: {os.cpu_count()}")
+    print(f"{'optimizer':>9} | {'evals':>6} | {'legacy(s)':>10} | {'serial(s)':>10} | "
+          f"{'thread(s)':>10} | {'process(s)':>10} | {'speedup':>8}")
+    print('-' * 82)
+    for name in OPTIMIZERS:
+        legacy_time, result = timed(name, make_legacy_objective(df), 'serial', 1)
+        evals = len(result.all_results) if name != 'genetic' else 40 * 11
+        times = [
+            timed(name, BacktestObjective(df, 'MA'), backend, n_jobs)[0]
+            for backend in ('serial', 'thread', 'process')
+        ]
+        print(f"{name:>9} | {evals:>6} | {legacy_time:>10.3f} | {times[0]:>10.3f} | "
+              f"{times[1]:>10.3f} | {times[2]:>10.3f} | {legacy_time / times[2]:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
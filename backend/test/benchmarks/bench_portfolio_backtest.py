@@ -0,0 +1,56 @@
+"""组合回测性能基准 - 全市场规模（约5000只股票的日线）
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_portfolio_backtest.py
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+
+from services.backtest_service import BacktestEngine
+
+
+N_BARS = 1_250  # 约5年日线
+SYMBOL_COUNTS = [50, 500, 5_000]
+
+
+def make_close_matrix(n_bars: int, n_symbols: int, seed: int = 0) -> pd.DataFrame:
+    """生成随机游走收盘价矩阵，部分标的晚上市"""
+    rng = np.random.default_rng(seed)
+    log_ret = rng.normal(0, 0.02, (n_bars, n_symbols)).astype(np.float32)
+    close = 10 * np.exp(np.cumsum(log_ret, axis=0))
+    listing = rng.integers(0, n_bars // 2, n_symbols)
+    close[np.arange(n_bars)[:, None] < listing[None, :]] = np.nan
+    return pd.DataFrame(
+        close,
+        index=pd.date_range('2020-01-01', periods=n_bars, freq='B'),
+        columns=[f"{i:06d}" for i in range(n_symbols)]
+    )
+
+
+def main():
+    engine = BacktestEngine(initial_capital=10_000_000.0)
+    params = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+
+    print(f"{'symbols':>8} | {'time(s)':>8} | {'peak(MB)':>9}")
+    print('-' * 32)
+    for n_symbols in SYMBOL_COUNTS:
+        close_df = make_close_matrix(N_BARS, n_symbols)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        engine.run_portfolio(close_df, params, include_symbol_curves=False, dtype=np.float32)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{n_symbols:>8} | {elapsed:>8.2f} | {peak / 1024 / 1024:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""回测结果序列化性能基准 - 原始iterrows、行式、列式的耗时和峰值内存
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_result_serialization.py
+"""
+import json
+import sys
+import time
+import tracemalloc
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_service import BacktestEngine
+from test_backtest_kernel import make_price_data
+from test_backtest_serialization import reference_equity_curve, reference_trade_details
+
+
+# 原始iterrows在大数据量下过慢，只在小规模上对比
+ITERROWS_MAX_BARS = 100_000
+BAR_COUNTS = [10_000, 100_000, 300_000]
+
+
+def measure(func):
+    """返回构造并JSON编码结果的耗时（秒）、峰值内存（MB）和JSON大小（MB）"""
+    start = time.perf_counter()
+    payload = json.dumps(func())
+    elapsed = time.perf_counter() - start
+
+    # 峰值内存单独测量，避免tracemalloc开销影响耗时
+    tracemalloc.start()
+    json.dumps(func())
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return elapsed, peak, len(payload) / 1024 / 1024
+
+
+def main():
+    engine = BacktestEngine(initial_capital=100000.0)
+    params = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+
+    print(f"{'bars':>8} | {'format':>9} | {'time(s)':>8} | {'peak(MB)':>9} | {'json(MB)':>9}")
+    print('-' * 56)
+    for n in BAR_COUNTS:
+        df = engine._calculate_indicators(make_price_data(n), params)
+        engine.portfolio = engine._run_backtest_simulation(df)
+        cases = {
+            'iterrows': lambda: (reference_equity_curve(engine.portfolio), reference_trade_details(engine.portfolio)),
+            'rows': lambda: (engine._generate_equity_curve(), engine._get_trade_details()),
+            'columnar': lambda: (engine._generate_equity_curve(True), engine._get_trade_details(True)),
+        }
+        if n > ITERROWS_MAX_BARS:
+            del cases['iterrows']
+        for name, func in cases.items():
+            elapsed, peak, size = measure(func)
+            print(f"{n:>8} | {name:>9} | {elapsed:>8.3f} | {peak:>9.1f} | {size:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
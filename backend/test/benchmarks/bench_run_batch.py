@@ -0,0 +1,56 @@
+"""批量参数回测性能基准 - short_window x long_window 网格
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_run_batch.py
+"""
+import sys
+import time
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_service import BacktestEngine
+from test_backtest_kernel import make_price_data
+
+
+BAR_COUNTS = [1_250, 10_000]
+SHORT_WINDOWS = range(2, 22, 2)
+LONG_WINDOWS = range(20, 220, 20)
+
+
+def run_one_by_one(engine: BacktestEngine, df, params_list):
+    """逐组参数计算指标、模拟、统计（与单次 run_backtest 相同的路径，不含数据获取）"""
+    results = []
+    for params in params_list:
+        data = engine._calculate_indicators(df, dict(params, type='MA'))
+        engine._run_backtest_simulation(data)
+        results.append(engine._calculate_metrics())
+    return results
+
+
+def main():
+    engine = BacktestEngine(initial_capital=100000.0)
+    params_list = [
+        {'short_window': s, 'long_window': l}
+        for s in SHORT_WINDOWS for l in LONG_WINDOWS
+    ]
+
+    print(f"参数组合数: {len(params_list)}")
+    print(f"{'bars':>8} | {'one-by-one(s)':>14} | {'run_batch(s)':>12} | {'speedup':>8}")
+    print('-' * 52)
+    for n in BAR_COUNTS:
+        df = make_price_data(n)
+
+        start = time.perf_counter()
+        run_one_by_one(engine, df, params_list)
+        single_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine.run_batch(df, 'MA', params_list)
+        batch_time = time.perf_counter() - start
+
+        print(f"{n:>8} | {single_time:>14.4f} | {batch_time:>12.4f} | {single_time / batch_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""策略插件性能基准 - legacy 逐行循环 vs 向量化信号函数（每个策略一行）
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_strategy_plugins.py
+"""
+import sys
+import time
+
+sys.path.append('.')
+sys.path.append('test/strategies')
+
+from indicators.graph import IndicatorGraph
+from strategies import get_strategy, list_strategies
+from test_registry import LEGACY_EQUIVALENTS, load_legacy_strategies, make_ohlcv_data
+
+
+BAR_COUNT = 5_000
+
+
+def main():
+    legacy = load_legacy_strategies()
+    df = make_ohlcv_data(BAR_COUNT)
+
+    print(f"K线数: {BAR_COUNT}")
+    print(f"{'strategy':>16} | {'legacy(s)':>10} | {'vectorized(s)':>13} | {'speedup':>8}")
+    print('-' * 58)
+    for name in list_strategies():
+        plugin = get_strategy(name)
+
+        # 每次使用新的计算图，计时包含指标计算
+        start = time.perf_counter()
+        plugin.signals(IndicatorGraph(df))
+        vector_time = time.perf_counter() - start
+
+        if legacy is None or name not in LEGACY_EQUIVALENTS:
+            print(f"{name:>16} | {'-':>10} | {vector_time:>13.4f} | {'-':>8}")
+            continue
+
+        class_name, _ = LEGACY_EQUIVALENTS[name]
+        start = time.perf_counter()
+        getattr(legacy, class_name)().calculate_signals(df)
+        legacy_time = time.perf_counter() - start
+
+        print(f"{name:>16} | {legacy_time:>10.4f} | {vector_time:>13.4f} | {legacy_time / vector_time:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
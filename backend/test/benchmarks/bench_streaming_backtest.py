@@ -0,0 +1,52 @@
+"""流式回测性能基准 - 分块读取DuckDB时的吞吐和峰值内存
+
+用法（在backend目录下）:
+    python test/benchmarks/bench_streaming_backtest.py
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from loguru import logger
+
+from services.duckdb_storage_service import DuckDBStorageService
+from services.streaming_backtest import StreamingBacktestEngine, create_streaming_strategy
+from test_backtest_kernel import make_price_data
+
+
+BAR_COUNTS = [100_000, 1_000_000]
+CHUNK_SIZE = 50_000
+
+
+def main():
+    logger.remove()
+    params = {'type': 'MACD', 'fast': 12, 'slow': 26, 'signal': 9}
+
+    print(f"{'bars':>10} | {'time(s)':>8} | {'bars/s':>10} | {'peak(MB)':>9}")
+    print('-' * 48)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        storage = DuckDBStorageService(db_path=os.path.join(tmpdir, 'bench.duckdb'))
+        for n in BAR_COUNTS:
+            df = make_price_data(n)
+            df.index = df.index[0] + (df.index - df.index[0]) / (24 * 60)  # 按分钟间隔
+            storage.save_kline_data(df, 'BENCH', '1min')
+            del df
+
+            engine = StreamingBacktestEngine(create_streaming_strategy(params))
+            tracemalloc.start()
+            start = time.perf_counter()
+            engine.run_duckdb(storage, 'BENCH', '1900-01-01', '2100-01-01', '1min', CHUNK_SIZE)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+            print(f"{n:>10} | {elapsed:>8.2f} | {n / elapsed:>10.0f} | {peak:>9.1f}")
+        storage.close()
+
+
+if __name__ == '__main__':
+    main()
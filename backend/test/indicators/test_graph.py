@@ -0,0 +1,85 @@
+"""指标计算图单元测试"""
+import unittest
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+
+from indicators.graph import IndicatorGraph, IndicatorGraphCache
+from services.backtest_service import BacktestEngine
+
+
+class TestIndicatorGraph(unittest.TestCase):
+    """指标计算图测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        rng = np.random.default_rng(3)
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, 1500)))
+        self.df = pd.DataFrame({'close': close}, index=pd.date_range('2020-01-01', periods=1500, freq='D'))
+        self.close = self.df['close']
+
+    def test_nodes_match_pandas(self):
+        """节点结果与直接用pandas计算一致"""
+        graph = IndicatorGraph(self.df)
+        np.testing.assert_array_equal(graph.sma(20), self.close.rolling(20).mean().to_numpy())
+        np.testing.assert_array_equal(graph.std(20), self.close.rolling(20).std().to_numpy())
+
+        ema_fast = self.close.ewm(span=12, adjust=False).mean()
+        ema_slow = self.close.ewm(span=26, adjust=False).mean()
+        dif = ema_fast - ema_slow
+        dea = dif.ewm(span=9, adjust=False).mean()
+        _, graph_dea, hist = graph.macd(12, 26, 9)
+        np.testing.assert_array_equal(graph_dea, dea.to_numpy())
+        np.testing.assert_array_equal(hist, (dif - dea).to_numpy())
+
+    def test_shared_nodes_computed_once(self):
+        """MA、BOLL、MACD在同一张图上运行时，20日均线只计算一次"""
+        engine = BacktestEngine()
+        graph = IndicatorGraph(self.df)
+        for params in (
+            {'type': 'MA', 'short_window': 5, 'long_window': 20},
+            {'type': 'BOLL', 'boll_window': 20, 'num_std': 2},
+            {'type': 'MACD', 'fast': 12, 'slow': 26, 'signal': 9},
+            {'type': 'MA', 'short_window': 12, 'long_window': 20},
+        ):
+            engine._calculate_indicators(self.df, params, graph)
+
+        self.assertEqual(graph.compute_counts[('SMA', 'close', 20)], 1)
+        self.assertTrue(all(count == 1 for count in graph.compute_counts.values()))
+        self.assertGreater(graph.hits, 0)
+
+    def test_graph_reused_across_batch_evaluations(self):
+        """优化器多次调用run_batch时复用同一张图，结果与不共享时一致"""
+        engine = BacktestEngine()
+        graph = IndicatorGraph(self.df)
+        params_list = [{'short_window': s, 'long_window': 20} for s in (5, 10, 15)]
+
+        shared = [engine.run_batch(self.df, 'MA', [p], graph=graph)[0] for p in params_list]
+        separate = engine.run_batch(self.df, 'MA', params_list)
+        self.assertEqual(shared, separate)
+        self.assertEqual(graph.compute_counts[('SMA', 'close', 20)], 1)
+
+    def test_node_values_read_only(self):
+        """缓存的节点值不可被调用方修改"""
+        graph = IndicatorGraph(self.df)
+        with self.assertRaises(ValueError):
+            graph.sma(5)[0] = 1.0
+
+    def test_cache_lru(self):
+        """按键缓存计算图，超过上限时淘汰最久未使用的"""
+        cache = IndicatorGraphCache(max_entries=2)
+        first = cache.get('a', self.df)
+        self.assertIs(cache.get('a', self.df), first)
+        second = cache.get('b', self.df)
+        cache.get('a', self.df)
+        cache.get('c', self.df)
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get('a', self.df), first)
+        self.assertIsNot(cache.get('b', self.df), second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""增量技术指标单元测试"""
+import unittest
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+
+from indicators.incremental import RollingMean, RollingStd, EMA, RSI, BollingerBands, MACD
+
+
+class TestIncrementalIndicators(unittest.TestCase):
+    """增量指标与pandas结果对比"""
+
+    def setUp(self):
+        """测试前初始化"""
+        rng = np.random.default_rng(0)
+        self.close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 2000))))
+
+    def _stream(self, indicator, values=None):
+        values = self.close if values is None else values
+        return np.array([indicator.update(x) for x in values])
+
+    def test_rolling_mean(self):
+        """滚动均值"""
+        expected = self.close.rolling(20).mean().to_numpy()
+        np.testing.assert_allclose(self._stream(RollingMean(20)), expected, rtol=1e-12, equal_nan=True)
+
+    def test_rolling_std(self):
+        """滚动标准差"""
+        expected = self.close.rolling(20).std().to_numpy()
+        np.testing.assert_allclose(self._stream(RollingStd(20)), expected, rtol=1e-9, equal_nan=True)
+
+    def test_rolling_mean_long_series_no_drift(self):
+        """长序列上补偿求和不漂移"""
+        rng = np.random.default_rng(1)
+        values = 1e6 + rng.normal(0, 1, 200_000)
+        indicator = RollingMean(50)
+        for x in values:
+            indicator.update(x)
+        self.assertAlmostEqual(indicator.value, values[-50:].mean(), places=8)
+
+    def test_ema(self):
+        """指数移动平均"""
+        expected = self.close.ewm(span=12, adjust=False).mean().to_numpy()
+        np.testing.assert_allclose(self._stream(EMA(12)), expected, rtol=1e-12)
+
+    def test_rsi(self):
+        """RSI与回测引擎的计算口径一致"""
+        delta = self.close.diff()
+        gain = delta.where(delta > 0, 0).rolling(14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+        expected = (100 - 100 / (1 + gain / loss)).to_numpy()
+        np.testing.assert_allclose(self._stream(RSI(14)), expected, rtol=1e-9, equal_nan=True)
+
+    def test_rsi_flat_and_rising(self):
+        """无涨跌时为NaN，只涨不跌时为100"""
+        rsi = RSI(3)
+        values = [rsi.update(x) for x in [10, 10, 10, 10, 11, 12, 13]]
+        self.assertTrue(np.isnan(values[3]))
+        self.assertEqual(values[-1], 100.0)
+
+    def test_bollinger_bands(self):
+        """布林带"""
+        boll = BollingerBands(20, 2)
+        result = np.array([boll.update(x) for x in self.close])
+        mid = self.close.rolling(20).mean()
+        std = self.close.rolling(20).std()
+        np.testing.assert_allclose(result[:, 1], (mid + 2 * std).to_numpy(), rtol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(result[:, 2], (mid - 2 * std).to_numpy(), rtol=1e-9, equal_nan=True)
+
+    def test_macd(self):
+        """MACD"""
+        macd = MACD(12, 26, 9)
+        result = np.array([macd.update(x) for x in self.close])
+        line = self.close.ewm(span=12, adjust=False).mean() - self.close.ewm(span=26, adjust=False).mean()
+        hist = line - line.ewm(span=9, adjust=False).mean()
+        np.testing.assert_allclose(result[:, 2], hist.to_numpy(), rtol=1e-9, atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""MyTT兼容指标内核单元测试"""
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / '3rdparty' / 'Ashare'))
+
+import MyTT
+from indicators import kernels
+
+
+def make_series(n: int, seed: int = 5):
+    """随机游走价格序列（价格水平跨越一个数量级，检验累计误差）"""
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, n)))
+    high = close * (1 + rng.uniform(0, 0.02, n))
+    low = close * (1 - rng.uniform(0, 0.02, n))
+    return close, high, low
+
+
+class TestKernels(unittest.TestCase):
+    """指标内核与MyTT结果对比"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.close, self.high, self.low = make_series(5000)
+        self.with_nan = self.close.copy()
+        self.with_nan[[0, 700, 701, 2500]] = np.nan
+
+    def test_rolling_functions_match_mytt(self):
+        """滑动窗口函数（含NaN输入）与MyTT一致"""
+        for name in ('MA', 'SUM', 'STD', 'HHV', 'LLV', 'AVEDEV'):
+            for data in (self.close, self.with_nan):
+                for n in (1, 5, 20, 250):
+                    with self.subTest(func=name, n=n, nan=data is self.with_nan):
+                        expected = getattr(MyTT, name)(data, n)
+                        np.testing.assert_allclose(
+                            getattr(kernels, name)(data, n), expected, rtol=1e-9, atol=1e-9
+                        )
+
+    def test_window_longer_than_series(self):
+        """窗口长于序列时全部为NaN"""
+        short = self.close[:10]
+        for name in ('MA', 'STD', 'HHV', 'AVEDEV'):
+            self.assertTrue(np.isnan(getattr(kernels, name)(short, 20)).all())
+
+    def test_count_functions_exact(self):
+        """布尔计数精确，EVERY/EXIST与MyTT一致"""
+        cond = self.close > MyTT.REF(self.close, 1)
+        np.testing.assert_array_equal(kernels.COUNT(cond, 10), MyTT.COUNT(cond, 10))
+        np.testing.assert_array_equal(kernels.EVERY(cond, 3), MyTT.EVERY(cond, 3))
+        np.testing.assert_array_equal(kernels.EXIST(cond, 5), MyTT.EXIST(cond, 5))
+
+    def test_shift_and_recursive_filters(self):
+        """REF、DIFF、EMA、SMA 与MyTT一致"""
+        np.testing.assert_array_equal(kernels.REF(self.close, 3), MyTT.REF(self.close, 3))
+        np.testing.assert_array_equal(kernels.DIFF(self.close, 2), np.asarray(MyTT.DIFF(self.close, 2)))
+        np.testing.assert_array_equal(kernels.EMA(self.close, 12), MyTT.EMA(self.close, 12))
+        np.testing.assert_array_equal(kernels.SMA(self.close, 9, 2), MyTT.SMA(self.close, 9, 2))
+
+    def test_slope(self):
+        """尾部斜率/预测与MyTT一致，滚动版本逐点等于尾部版本"""
+        self.assertAlmostEqual(kernels.SLOPE(self.close, 20), MyTT.SLOPE(self.close, 20), places=9)
+        self.assertAlmostEqual(kernels.FORCAST(self.close, 20), MyTT.FORCAST(self.close, 20), places=9)
+
+        slope = kernels.ROLLING_SLOPE(self.close, 20)
+        forcast = kernels.ROLLING_FORCAST(self.close, 20)
+        self.assertTrue(np.isnan(slope[:19]).all())
+        for i in (19, 1000, len(self.close) - 1):
+            self.assertAlmostEqual(slope[i], MyTT.SLOPE(self.close[:i + 1], 20), places=9)
+            self.assertAlmostEqual(forcast[i], MyTT.FORCAST(self.close[:i + 1], 20), places=9)
+
+    def test_indicators_match_mytt(self):
+        """组合指标与MyTT一致"""
+        c, h, l = self.close, self.high, self.low
+        for ours, theirs in (
+            (kernels.MACD(c), MyTT.MACD(c)),
+            (kernels.KDJ(c, h, l), MyTT.KDJ(c, h, l)),
+            (kernels.WR(c, h, l), MyTT.WR(c, h, l)),
+            (kernels.BOLL(c), MyTT.BOLL(c)),
+        ):
+            for a, b in zip(ours, theirs):
+                np.testing.assert_allclose(a, b, rtol=1e-9, atol=1e-3)
+        np.testing.assert_allclose(kernels.RSI(c), MyTT.RSI(c), atol=1e-3)
+        np.testing.assert_allclose(kernels.CCI(c, h, l), MyTT.CCI(c, h, l), rtol=1e-7)
+        np.testing.assert_allclose(kernels.ATR(c, h, l), MyTT.ATR(c, h, l), rtol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""高斯过程贝叶斯优化单元测试"""
+import unittest
+import asyncio
+import random
+import sys
+
+import numpy as np
+
+sys.path.append('.')
+
+from optimizers import BatchObjective, BayesianOptimizer, MemoryEvaluationStore
+from optimizers.gaussian_process import GaussianProcess
+
+
+class QuadraticObjective(BatchObjective):
+    """峰值在 (x, y) = (30, 0.7) 的二次函数，记录每批的参数个数"""
+
+    def __init__(self):
+        super().__init__({})
+        self.batch_sizes = []
+
+    def evaluate_batch(self, params_list, budget=None):
+        self.batch_sizes.append(len(params_list))
+        return [-((p['x'] - 30) / 50) ** 2 - (p['y'] - 0.7) ** 2 for p in params_list]
+
+
+PARAM_RANGES = {
+    'x': {'type': 'int', 'min': 0, 'max': 100, 'step': 1},
+    'y': {'type': 'float', 'min': 0.0, 'max': 1.0}
+}
+
+
+class TestGaussianProcess(unittest.TestCase):
+    """高斯过程测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        rng = np.random.default_rng(0)
+        self.X = rng.uniform(0, 1, (30, 2))
+        self.y = np.sin(3 * self.X[:, 0]) + self.X[:, 1] ** 2
+
+    def test_incremental_cholesky_matches_full_factorization(self):
+        """逐点追加得到的Cholesky因子和预测与一次性分解一致"""
+        gp = GaussianProcess(2, length_scale=0.3, noise=1e-4, capacity=4)
+        gp.fit(self.X, self.y)
+
+        K = gp.kernel(self.X, self.X) + 1e-4 * np.eye(30)
+        L = np.linalg.cholesky(K)
+        np.testing.assert_allclose(gp._L[:30, :30], L, atol=1e-10)
+
+        X_new = np.random.default_rng(1).uniform(0, 1, (5, 2))
+        K_star = gp.kernel(X_new, self.X)
+        y_norm = (self.y - self.y.mean()) / self.y.std()
+        mu_expected = K_star @ np.linalg.solve(K, y_norm) * self.y.std() + self.y.mean()
+        var_expected = 1 - np.einsum('ij,ji->i', K_star, np.linalg.solve(K, K_star.T))
+
+        mu, sigma = gp.predict(X_new)
+        np.testing.assert_allclose(mu, mu_expected, rtol=1e-6)
+        np.testing.assert_allclose(sigma, np.sqrt(var_expected) * self.y.std(), rtol=1e-5)
+
+    def test_truncate_restores_model(self):
+        """撤销虚拟观测后预测不变，训练点上的预测接近观测值"""
+        gp = GaussianProcess(2, length_scale=0.3)
+        gp.fit(self.X, self.y)
+        before = gp.predict(self.X)
+
+        gp.add([0.5, 0.5], -10.0)
+        gp.add([0.1, 0.9], -10.0)
+        gp.truncate(30)
+
+        np.testing.assert_allclose(gp.predict(self.X)[0], before[0])
+        np.testing.assert_allclose(before[0], self.y, atol=1e-3)
+
+
+class TestBayesianOptimizer(unittest.TestCase):
+    """贝叶斯优化器测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        random.seed(0)
+
+    def test_batch_proposals(self):
+        """每轮建议 n_jobs 个不重复的点整批评估，总评估次数不变"""
+        objective = QuadraticObjective()
+        optimizer = BayesianOptimizer(n_jobs=4, n_iter=30, n_init=8, n_candidates=300, executor='serial')
+        result = asyncio.run(optimizer.optimize(objective, PARAM_RANGES, verbose=False))
+
+        self.assertEqual(objective.batch_sizes, [8] + [4] * 7 + [2])
+        self.assertEqual(len(result.all_results), 38)
+        keys = {tuple(sorted(item['params'].items())) for item in result.all_results}
+        self.assertEqual(len(keys), 38)
+        self.assertGreater(result.best_score, -0.01)
+
+    def test_minimize_and_acquisitions(self):
+        """最小化目标与各采集函数都能收敛到峰值附近"""
+        class NegatedObjective(QuadraticObjective):
+            def evaluate_batch(self, params_list, budget=None):
+                return [-score for score in super().evaluate_batch(params_list)]
+
+        for acquisition in ('EI', 'PI', 'UCB'):
+            with self.subTest(acquisition=acquisition):
+                optimizer = BayesianOptimizer(
+                    maximize=False, n_jobs=2, n_iter=30, n_init=8, acquisition=acquisition, n_candidates=300
+                )
+                result = asyncio.run(optimizer.optimize(NegatedObjective(), PARAM_RANGES, verbose=False))
+                self.assertLess(result.best_score, 0.02)
+
+    def test_warm_start(self):
+        """历史评估直接作为高斯过程的观测，随机初始采样相应减少"""
+        store = MemoryEvaluationStore()
+        prior = [{'x': x, 'y': 0.5} for x in range(0, 100, 20)]
+        store.save(prior, [-((p['x'] - 30) / 50) ** 2 - 0.04 for p in prior])
+        objective = QuadraticObjective()
+        optimizer = BayesianOptimizer(n_jobs=4, n_iter=8, n_init=8, n_candidates=300, executor='serial')
+        optimizer.attach_store(store)
+        result = asyncio.run(optimizer.optimize(objective, PARAM_RANGES, verbose=False))
+
+        self.assertEqual(objective.batch_sizes, [3, 4, 4])
+        self.assertEqual(result.stats['warm_start_points'], 5)
+        self.assertEqual(len(result.all_results), 5 + 3 + 8)
+        self.assertEqual(len(store.records), 16)
+
+    def test_small_discrete_space(self):
+        """离散空间评估完后提前结束，失败的评估不影响模型"""
+        async def objective_func(params):
+            if params['x'] == 3:
+                raise ValueError('bad params')
+            return -abs(params['x'] - 5)
+
+        optimizer = BayesianOptimizer(n_jobs=3, n_iter=50, n_init=4)
+        result = asyncio.run(optimizer.optimize(
+            objective_func, {'x': {'type': 'int', 'min': 0, 'max': 9, 'step': 1}}, verbose=False
+        ))
+
+        self.assertEqual(len(result.all_results), 10)
+        self.assertEqual(result.best_params, {'x': 5})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+"""参数评估执行器单元测试"""
+import unittest
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from optimizers import (
+    BatchObjective, BayesianOptimizer, GeneticOptimizer, GridSearchOptimizer,
+    ProcessPoolEvaluator, SerialExecutor, ThreadExecutor, create_executor
+)
+from services.backtest_service import BacktestEngine
+from services.optimization_objective import BacktestObjective
+from test_backtest_kernel import make_price_data
+
+
+class WeightedSumObjective(BatchObjective):
+    """得分为 sum(x) * a；a为负数时报错，工作进程中要求数据为内存映射"""
+
+    def __init__(self, require_memmap: bool = False):
+        super().__init__({'x': np.arange(10, dtype=np.float64)})
+        self.require_memmap = require_memmap
+        self.batch_sizes = []
+
+    def evaluate_batch(self, params_list):
+        if self.require_memmap and not isinstance(self.arrays['x'], np.memmap):
+            raise AssertionError('工作进程应映射共享数据')
+        self.batch_sizes.append(len(params_list))
+        if any(params['a'] < 0 for params in params_list):
+            raise ValueError('negative weight')
+        return [float(self.arrays['x'].sum() * params['a']) for params in params_list]
+
+
+MA_RANGES = {
+    'short_window': {'type': 'int', 'min': 3, 'max': 15, 'step': 3},
+    'long_window': {'type': 'int', 'min': 20, 'max': 60, 'step': 10}
+}
+
+
+class TestExecutors(unittest.TestCase):
+    """执行器测试"""
+
+    PARAMS = [{'a': a} for a in (1, 2, -1, 3, 4)]
+    EXPECTED = [45.0, 90.0, float('-inf'), 135.0, 180.0]
+
+    def _evaluate(self, executor, objective):
+        try:
+            return asyncio.run(executor.evaluate(objective, self.PARAMS, float('-inf')))
+        finally:
+            executor.close()
+
+    def test_backends_isolate_failed_params(self):
+        """各后端结果一致，批量评估出错时只有出错的参数记为最差得分"""
+        serial_objective = WeightedSumObjective()
+        self.assertEqual(self._evaluate(SerialExecutor(), serial_objective), self.EXPECTED)
+        # 整批失败后逐个重试
+        self.assertEqual(serial_objective.batch_sizes, [5, 1, 1, 1, 1, 1])
+
+        self.assertEqual(self._evaluate(ThreadExecutor(2), WeightedSumObjective()), self.EXPECTED)
+        self.assertEqual(
+            self._evaluate(ProcessPoolEvaluator(2), WeightedSumObjective(require_memmap=True)), self.EXPECTED
+        )
+
+    def test_serial_batch_does_not_block_event_loop(self):
+        """串行后端的批量评估在后台线程中执行，事件循环上的其他任务照常运行"""
+        class SlowObjective(WeightedSumObjective):
+            def evaluate_batch(self, params_list):
+                time.sleep(0.3)
+                return super().evaluate_batch(params_list)
+
+        async def main():
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.create_task(ticker())
+            await asyncio.sleep(0)
+            scores = await SerialExecutor().evaluate(SlowObjective(), [{'a': 1}], float('-inf'))
+            task.cancel()
+            return scores, ticks
+
+        scores, ticks = asyncio.run(main())
+        self.assertEqual(scores, [45.0])
+        self.assertGreater(len(ticks), 5)
+
+    def test_plain_callables(self):
+        """普通函数和协程函数在串行、线程后端中评估，进程池退化为线程池"""
+        async def coroutine_objective(params):
+            if params['a'] < 0:
+                raise ValueError('negative weight')
+            return 45.0 * params['a']
+
+        for executor in (SerialExecutor(3), ThreadExecutor(2), ProcessPoolEvaluator(2)):
+            with self.subTest(executor=type(executor).__name__):
+                self.assertEqual(self._evaluate(executor, coroutine_objective), self.EXPECTED)
+
+    def test_create_executor(self):
+        """auto 对可批量评估的目标函数使用进程池，其余串行评估"""
+        self.assertIsInstance(create_executor('auto', 4, WeightedSumObjective()), ProcessPoolEvaluator)
+        self.assertIsInstance(create_executor('auto', 1, WeightedSumObjective()), SerialExecutor)
+        self.assertIsInstance(create_executor('auto', 4, lambda params: 0.0), SerialExecutor)
+        self.assertIsInstance(create_executor('thread', 4), ThreadExecutor)
+        with self.assertRaises(ValueError):
+            create_executor('cluster', 4)
+
+
+class TestOptimizersWithExecutors(unittest.TestCase):
+    """优化器使用不同评估后端"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.data = make_price_data(600, seed=11)
+
+    def _objective(self):
+        return BacktestObjective(self.data, 'MA', objective='total_return')
+
+    def test_grid_search_backends_match_run_batch(self):
+        """网格搜索在各后端上的得分与直接批量回测一致"""
+        results = {}
+        for backend in ('serial', 'thread', 'process'):
+            optimizer = GridSearchOptimizer(objective='total_return', n_jobs=2, executor=backend)
+            result = asyncio.run(optimizer.optimize(self._objective(), MA_RANGES, verbose=False))
+            results[backend] = result
+
+        params_list = [item['params'] for item in results['serial'].all_results]
+        expected = [m['total_return'] for m in BacktestEngine().run_batch(self.data, 'MA', params_list)]
+
+        self.assertEqual(len(params_list), 5 * 5)
+        for backend, result in results.items():
+            with self.subTest(backend=backend):
+                np.testing.assert_allclose([item['score'] for item in result.all_results], expected)
+                self.assertEqual(result.best_score, max(expected))
+
+    def test_genetic_and_bayesian_in_process_pool(self):
+        """遗传算法和贝叶斯优化在进程池中运行，最优解来自已评估的参数"""
+        genetic = GeneticOptimizer(
+            objective='total_return', n_jobs=2, executor='process', population_size=8, generations=3
+        )
+        genetic_result = asyncio.run(genetic.optimize(self._objective(), MA_RANGES, verbose=False))
+
+        bayesian = BayesianOptimizer(objective='total_return', n_jobs=2, executor='process', n_iter=5, n_init=4)
+        bayesian_result = asyncio.run(bayesian.optimize(self._objective(), MA_RANGES, verbose=False))
+
+        for result in (genetic_result, bayesian_result):
+            expected = BacktestEngine().run_batch(self.data, 'MA', [result.best_params])[0]['total_return']
+            self.assertAlmostEqual(result.best_score, expected)
+        self.assertEqual(len(bayesian_result.all_results), 4 + 5)
+        self.assertIsNone(genetic._executor)
+
+    def test_executor_closed_on_error(self):
+        """优化中途出错时也释放进程池"""
+        class Interrupted(BaseException):
+            pass
+
+        class FailingObjective(BacktestObjective):
+            def evaluate_batch(self, params_list, budget=None):
+                raise Interrupted()
+
+        optimizer = GridSearchOptimizer(objective='total_return', n_jobs=2, executor='thread')
+        objective = FailingObjective(self.data, 'MA', objective='total_return')
+        with self.assertRaises(Interrupted):
+            asyncio.run(optimizer.optimize(objective, MA_RANGES, verbose=False))
+        self.assertIsNone(optimizer._executor)
+
+    def test_genetic_single_param(self):
+        """只有一个参数时交叉操作不报错"""
+        optimizer = GeneticOptimizer(population_size=6, generations=2)
+        result = asyncio.run(optimizer.optimize(
+            WeightedSumObjective(), {'a': {'type': 'int', 'min': 0, 'max': 9, 'step': 1}}, verbose=False
+        ))
+        self.assertEqual(result.best_score, 45.0 * result.best_params['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
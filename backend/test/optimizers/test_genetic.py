@@ -0,0 +1,183 @@
+"""遗传算法优化器单元测试"""
+import unittest
+import asyncio
+import random
+import sys
+from unittest import mock
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from optimizers import BatchObjective, GeneticOptimizer, MemoryEvaluationStore
+from services.optimization_objective import BacktestObjective
+from test_backtest_kernel import make_price_data
+
+
+class CountingObjective(BatchObjective):
+    """峰值在 (x, y) = (12, 3) 的二次函数，记录评估过的参数"""
+
+    def __init__(self):
+        super().__init__({})
+        self.evaluated = []
+
+    def evaluate_batch(self, params_list, budget=None):
+        self.evaluated.extend(tuple(sorted(p.items())) for p in params_list)
+        return [-(p['x'] - 12) ** 2 - (p['y'] - 3) ** 2 for p in params_list]
+
+
+PARAM_RANGES = {
+    'x': {'type': 'int', 'min': 0, 'max': 20, 'step': 1},
+    'y': {'type': 'int', 'min': 0, 'max': 5, 'step': 1}
+}
+
+MA_RANGES = {
+    'short_window': {'type': 'int', 'min': 2, 'max': 30, 'step': 2},
+    'long_window': {'type': 'int', 'min': 20, 'max': 120, 'step': 10}
+}
+
+
+class TestGeneticOptimizer(unittest.TestCase):
+    """遗传算法优化器测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        random.seed(0)
+
+    def test_fitness_cache(self):
+        """同一参数组合只评估一次，统计与实际评估次数一致"""
+        objective = CountingObjective()
+        optimizer = GeneticOptimizer(population_size=20, generations=10, executor='serial')
+        result = asyncio.run(optimizer.optimize(objective, PARAM_RANGES, verbose=False))
+
+        stats = result.stats
+        self.assertEqual(len(objective.evaluated), len(set(objective.evaluated)))
+        self.assertEqual(stats['evaluations'], len(objective.evaluated))
+        self.assertEqual(stats['cache_lookups'], 20 * 11)
+        self.assertEqual(stats['evaluations_saved'], stats['cache_lookups'] - stats['evaluations'])
+        self.assertGreater(stats['cache_hit_rate'], 0.3)
+        self.assertEqual(result.best_score, 0)
+
+    def test_without_cache(self):
+        """关闭缓存时每个个体都评估"""
+        objective = CountingObjective()
+        optimizer = GeneticOptimizer(population_size=20, generations=5, executor='serial', use_cache=False)
+        result = asyncio.run(optimizer.optimize(objective, PARAM_RANGES, verbose=False))
+
+        self.assertEqual(len(objective.evaluated), 20 * 6)
+        self.assertEqual(result.stats['cache_hits'], 0)
+
+    def test_minimize(self):
+        """最小化时各代结果记录得分最低的个体"""
+        class NegatedObjective(CountingObjective):
+            def evaluate_batch(self, params_list, budget=None):
+                return [-score for score in super().evaluate_batch(params_list)]
+
+        optimizer = GeneticOptimizer(maximize=False, population_size=20, generations=10, executor='serial')
+        result = asyncio.run(optimizer.optimize(NegatedObjective(), PARAM_RANGES, verbose=False))
+
+        self.assertEqual(result.best_score, 0)
+        self.assertEqual(result.all_results[-1]['best_score'], 0)
+
+    def test_warm_start(self):
+        """绑定评估存储时用历史最优点初始化种群，存储中的参数不再评估，新得分写回存储"""
+        store = MemoryEvaluationStore()
+        store.save([{'x': 12, 'y': 3}, {'x': 11, 'y': 3}, {'x': 30, 'y': 3}], [0, -1, -5])
+        objective = CountingObjective()
+        optimizer = GeneticOptimizer(population_size=10, generations=0, executor='serial')
+        optimizer.attach_store(store)
+        result = asyncio.run(optimizer.optimize(objective, PARAM_RANGES, verbose=False))
+
+        # x=30 超出参数范围，不用于热启动
+        self.assertEqual(result.stats['warm_start_points'], 2)
+        self.assertEqual(result.stats['store_hits'], 2)
+        self.assertNotIn((('x', 12), ('y', 3)), objective.evaluated)
+        self.assertEqual(result.best_params, {'x': 12, 'y': 3})
+        self.assertEqual(len(store.records), 3 + len(objective.evaluated))
+
+    def test_failed_evaluations_not_stored(self):
+        """评估失败的最差得分不写入存储，存储中的失败得分会重新评估"""
+        class FlakyObjective(CountingObjective):
+            def evaluate_batch(self, params_list, budget=None):
+                if any(p['y'] == 0 for p in params_list):
+                    raise ValueError('数据暂时不可用')
+                return super().evaluate_batch(params_list)
+
+        store = MemoryEvaluationStore()
+        store.save([{'x': 12, 'y': 3}], [float('-inf')])
+        objective = FlakyObjective()
+        optimizer = GeneticOptimizer(executor='serial')
+        optimizer.attach_store(store)
+        scores = asyncio.run(optimizer._evaluate_params(objective, [{'x': 12, 'y': 3}, {'x': 1, 'y': 0}]))
+
+        self.assertEqual(scores, [0, float('-inf')])
+        self.assertEqual(optimizer._store_hits, 0)
+        self.assertEqual(store.lookup([{'x': 12, 'y': 3}, {'x': 1, 'y': 0}]), [0, None])
+
+        # 岛模型中各岛新评估的得分同样只写入有限值
+        class OddFailingObjective(CountingObjective):
+            def evaluate_batch(self, params_list, budget=None):
+                scores = super().evaluate_batch(params_list)
+                return [float('-inf') if p['x'] % 2 else score for p, score in zip(params_list, scores)]
+
+        store = MemoryEvaluationStore()
+        random.seed(0)
+        optimizer = GeneticOptimizer(
+            executor='serial', population_size=12, generations=4, n_islands=2, migration_interval=2
+        )
+        optimizer.attach_store(store)
+        asyncio.run(optimizer.optimize(OddFailingObjective(), PARAM_RANGES, verbose=False))
+
+        self.assertTrue(store.records)
+        self.assertTrue(all(record['params']['x'] % 2 == 0 for record in store.records.values()))
+
+    def test_migration(self):
+        """环形迁移：每个岛最优个体替换下一个岛的最差个体"""
+        optimizer = GeneticOptimizer(migration_size=1)
+        islands = [
+            [{'params': {'x': i * 10 + j}, 'score': float(i * 10 + j)} for j in range(3)]
+            for i in range(3)
+        ]
+        migrated = optimizer._migrate(islands)
+
+        self.assertEqual([len(p) for p in migrated], [3, 3, 3])
+        self.assertEqual(migrated[0][-1]['params'], {'x': 22})
+        self.assertEqual(migrated[1][-1]['params'], {'x': 2})
+        self.assertEqual(migrated[2][-1]['params'], {'x': 12})
+        self.assertNotIn({'x': 10}, [individual['params'] for individual in migrated[1]])
+
+    def test_islands_inline(self):
+        """普通目标函数的岛模型在当前进程中依次进化，缓存在岛间共享，不重设全局随机数种子"""
+        objective = CountingObjective()
+        optimizer = GeneticOptimizer(
+            population_size=24, generations=9, n_islands=3, migration_interval=3, executor='serial'
+        )
+        with mock.patch.object(random, 'seed') as seed:
+            result = asyncio.run(optimizer.optimize(objective, PARAM_RANGES, verbose=False))
+        seed.assert_not_called()
+
+        self.assertEqual({item['island'] for item in result.all_results}, {0, 1, 2})
+        self.assertEqual(len(result.all_results), 27)
+        self.assertEqual(len(objective.evaluated), result.stats['evaluations'])
+        self.assertEqual(result.stats['n_islands'], 3)
+        self.assertEqual(result.best_score, 0)
+
+    def test_islands_in_processes(self):
+        """回测目标函数的岛模型在工作进程中进化，最优解与单进程重算一致"""
+        data = make_price_data(1500, seed=5)
+        objective = BacktestObjective(data, 'MA', objective='sharpe_ratio')
+        optimizer = GeneticOptimizer(
+            n_jobs=2, population_size=16, generations=4, n_islands=2, migration_interval=2
+        )
+        result = asyncio.run(optimizer.optimize(objective, MA_RANGES, verbose=False))
+
+        self.assertEqual(len(result.all_results), 8)
+        self.assertGreater(result.stats['evaluations'], 0)
+        self.assertEqual(
+            result.stats['evaluations_saved'], result.stats['cache_lookups'] - result.stats['evaluations']
+        )
+        expected = objective.evaluate_batch([result.best_params])[0]
+        self.assertAlmostEqual(result.best_score, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
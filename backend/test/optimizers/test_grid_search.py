@@ -0,0 +1,92 @@
+"""网格搜索优化器单元测试"""
+import unittest
+import asyncio
+import sys
+
+sys.path.append('.')
+
+from optimizers import BatchObjective, GridSearchOptimizer
+
+
+class PeakObjective(BatchObjective):
+    """单峰函数，峰值在 (a, b, c) = (37, 0.62, 14)，记录评估过的参数"""
+
+    def __init__(self):
+        super().__init__({})
+        self.evaluated = []
+
+    def evaluate_batch(self, params_list, budget=None):
+        self.evaluated.extend(tuple(sorted(p.items())) for p in params_list)
+        return [
+            -((p['a'] - 37) / 100) ** 2 - (p['b'] - 0.62) ** 2 - ((p['c'] - 14) / 30) ** 2
+            + (0.01 if p.get('mode', 'x') == 'x' else 0.0)
+            for p in params_list
+        ]
+
+
+PARAM_RANGES = {
+    'a': {'type': 'int', 'min': 0, 'max': 100, 'step': 1},
+    'b': {'type': 'float', 'min': 0.0, 'max': 1.0, 'step': 0.01},
+    'c': {'type': 'int', 'min': 2, 'max': 60, 'step': 2}
+}
+
+
+class TestAdaptiveGridSearch(unittest.TestCase):
+    """自适应网格测试"""
+
+    def _optimize(self, objective, param_ranges, **kwargs):
+        optimizer = GridSearchOptimizer(executor='serial', **kwargs)
+        return asyncio.run(optimizer.optimize(objective, param_ranges, verbose=False))
+
+    def test_finds_full_grid_optimum(self):
+        """单峰目标上找到目标分辨率下的最优点，评估数远少于完整网格"""
+        objective = PeakObjective()
+        result = self._optimize(objective, PARAM_RANGES, adaptive=True)
+
+        self.assertEqual(result.best_params, {'a': 37, 'b': 0.62, 'c': 14})
+        self.assertEqual(result.stats['full_grid_size'], 101 * 101 * 30)
+        self.assertLess(result.stats['evaluations'], 2000)
+        self.assertEqual(result.stats['evaluations'], len(result.all_results))
+        # 已评估的点不重复评估
+        self.assertEqual(len(objective.evaluated), len(set(objective.evaluated)))
+        self.assertEqual(result.all_results[-1]['level'], result.stats['levels'] - 1)
+
+    def test_choice_and_minimize(self):
+        """choice 参数在第一轮全部枚举，细分时保持不变；最小化目标同样收敛"""
+        class NegatedObjective(PeakObjective):
+            def evaluate_batch(self, params_list, budget=None):
+                return [-score for score in super().evaluate_batch(params_list)]
+
+        param_ranges = dict(PARAM_RANGES, mode={'type': 'choice', 'choices': ['x', 'y']})
+        result = self._optimize(NegatedObjective(), param_ranges, adaptive=True, maximize=False)
+
+        self.assertEqual(result.best_params, {'a': 37, 'b': 0.62, 'c': 14, 'mode': 'x'})
+        first_level = [item for item in result.all_results if item['level'] == 0]
+        self.assertEqual(len(first_level), 5 * 5 * 5 * 2)
+
+    def test_float_default_resolution(self):
+        """未指定step的float参数按区间的1/100细分"""
+        result = self._optimize(
+            PeakObjective(),
+            {'a': {'type': 'int', 'min': 37, 'max': 38, 'step': 1}, 'b': {'type': 'float', 'min': 0.0, 'max': 2.0},
+             'c': {'type': 'choice', 'choices': [14]}},
+            adaptive=True
+        )
+
+        self.assertAlmostEqual(result.best_params['b'], 0.62)
+        self.assertEqual(result.stats['full_grid_size'], 2 * 101)
+
+    def test_full_grid_unchanged(self):
+        """默认仍枚举完整网格（float 取10个点）"""
+        result = self._optimize(PeakObjective(), {
+            'a': {'type': 'int', 'min': 30, 'max': 40, 'step': 5},
+            'b': {'type': 'float', 'min': 0.0, 'max': 1.0},
+            'c': {'type': 'choice', 'choices': [14]}
+        })
+
+        self.assertEqual(len(result.all_results), 3 * 10)
+        self.assertEqual(result.stats, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Hyperband 优化器单元测试"""
+import unittest
+import asyncio
+import random
+import sys
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from optimizers import HyperbandOptimizer
+from services.backtest_service import BacktestEngine
+from services.optimization_objective import BacktestObjective
+from services.optimization_service import OptimizationService
+from test_backtest_kernel import make_price_data
+
+
+PARAM_RANGES = {
+    'short_window': {'type': 'int', 'min': 2, 'max': 30, 'step': 2},
+    'long_window': {'type': 'int', 'min': 20, 'max': 120, 'step': 10}
+}
+
+
+class TestHyperbandOptimizer(unittest.TestCase):
+    """Hyperband 优化器测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        random.seed(0)
+        self.data = make_price_data(3000, seed=13)
+        self.objective = BacktestObjective(self.data, 'MA', objective='sharpe_ratio')
+
+    def _optimize(self, **kwargs):
+        optimizer = HyperbandOptimizer(**kwargs)
+        return asyncio.run(optimizer.optimize(self.objective, PARAM_RANGES, verbose=False))
+
+    def test_successive_halving_budget(self):
+        """逐级淘汰：每级保留1/eta，窗口加长eta倍，模拟K线数远少于网格搜索"""
+        result = self._optimize(min_bars=300)
+        rungs = result.stats['brackets'][0]['rungs']
+
+        self.assertEqual([rung['candidates'] for rung in rungs], [165, 55, 18])
+        self.assertEqual([rung['bars'] for rung in rungs], [333, 1000, 3000])
+        self.assertEqual(result.stats['bars_simulated'], sum(r['bars'] * r['candidates'] for r in rungs))
+        self.assertEqual(result.stats['grid_bars'], 165 * 3000)
+        self.assertLess(result.stats['bars_simulated'], result.stats['grid_bars'] / 3)
+
+        # 最优解来自全部行情上的评估，得分接近网格最优
+        params_list = [item['params'] for item in result.all_results if item['rung'] == 0]
+        grid_scores = np.array([m['sharpe_ratio'] for m in BacktestEngine().run_batch(self.data, 'MA', params_list)])
+        best = BacktestEngine().run_batch(self.data, 'MA', [result.best_params])[0]['sharpe_ratio']
+        self.assertAlmostEqual(result.best_score, best)
+        self.assertGreaterEqual(best, np.quantile(grid_scores, 0.9))
+
+    def test_sub_window_scores(self):
+        """短窗口的得分等于只用最近若干根K线的回测"""
+        result = self._optimize(min_bars=300)
+        first = result.all_results[0]
+        expected = BacktestEngine().run_batch(self.data.iloc[-first['bars']:], 'MA', [first['params']])[0]
+        self.assertAlmostEqual(first['score'], expected['sharpe_ratio'])
+
+    def test_full_hyperband_and_process_pool(self):
+        """完整Hyperband运行全部组，进程池评估与串行结果一致"""
+        serial = self._optimize(min_bars=300, n_brackets=None, n_candidates=60)
+        random.seed(0)
+        parallel = self._optimize(min_bars=300, n_brackets=None, n_candidates=60, n_jobs=2, executor='process')
+
+        self.assertEqual([b['bracket'] for b in serial.stats['brackets']], [2, 1, 0])
+        self.assertEqual(serial.stats['brackets'][0]['rungs'][0]['candidates'], 60)
+        np.testing.assert_allclose(
+            [item['score'] for item in serial.all_results], [item['score'] for item in parallel.all_results]
+        )
+
+    def test_seed_reproducible(self):
+        """固定随机种子时候选参数与全局随机状态无关"""
+        first = self._optimize(min_bars=300, n_candidates=30, seed=7)
+        random.seed(123)
+        second = self._optimize(min_bars=300, n_candidates=30, seed=7)
+
+        self.assertEqual(
+            [item['params'] for item in first.all_results], [item['params'] for item in second.all_results]
+        )
+        self.assertEqual(first.best_params, second.best_params)
+
+    def test_requires_budgeted_objective(self):
+        """目标函数不支持按K线数评估时报错"""
+        async def objective_func(params):
+            return 0.0
+
+        with self.assertRaises(ValueError):
+            asyncio.run(HyperbandOptimizer().optimize(objective_func, PARAM_RANGES, verbose=False))
+
+    def test_created_by_service(self):
+        """优化服务按名称创建Hyperband优化器"""
+        optimizer = OptimizationService(BacktestEngine())._create_optimizer(
+            'hyperband', 'sharpe_ratio', True, 1, eta=4, min_bars=200, n_brackets=None
+        )
+        self.assertIsInstance(optimizer, HyperbandOptimizer)
+        self.assertEqual((optimizer.eta, optimizer.min_bars, optimizer.n_brackets), (4, 200, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""回测数据提供器（本地优先读穿缓存）单元测试"""
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_data_provider import BacktestDataProvider
+from services.backtest_service import BacktestEngine
+from services.duckdb_storage_service import DuckDBStorageService
+from test_backtest_kernel import make_price_data
+
+
+class FakeFetcher:
+    """记录调用区间的远程数据获取器"""
+
+    def __init__(self, data: pd.DataFrame, fail: bool = False):
+        self.data = data
+        self.fail = fail
+        self.calls = []
+
+    async def get_data(self, code, start_date, end_date, freq='1d'):
+        self.calls.append((start_date, end_date, freq))
+        if self.fail:
+            raise Exception("remote unavailable")
+        df = self.data.loc[start_date:end_date].copy()
+        df.index.name = 'date'
+        return df
+
+
+class TestBacktestDataProvider(unittest.TestCase):
+    """回测数据提供器测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.storage = DuckDBStorageService(db_path=os.path.join(self.tmpdir.name, 'test.duckdb'))
+        data = make_price_data(600, seed=1)
+        self.data = data[data.index.dayofweek < 5]
+        self.fetcher = FakeFetcher(self.data)
+        self.provider = BacktestDataProvider(storage=self.storage, data_fetcher=self.fetcher)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.storage.close()
+        self.tmpdir.cleanup()
+
+    def _get(self, start: str, end: str) -> pd.DataFrame:
+        return asyncio.run(self.provider.get_data('600000', datetime.fromisoformat(start), datetime.fromisoformat(end), '1d'))
+
+    def test_repeat_request_served_locally(self):
+        """首次请求写入本地，重复请求不访问远程"""
+        first = self._get('2020-02-03', '2020-06-30')
+        self.assertEqual(len(self.fetcher.calls), 1)
+        self.assertEqual(self.fetcher.calls[0][2], '1d')
+
+        second = self._get('2020-02-03', '2020-06-30')
+        self.assertEqual(len(self.fetcher.calls), 1)
+        pd.testing.assert_frame_equal(first, second)
+
+        expected = self.data.loc['2020-02-03':'2020-06-30']
+        self.assertEqual(len(second), len(expected))
+        self.assertEqual(list(second.columns), ['open', 'high', 'low', 'close', 'volume'])
+        self.assertAlmostEqual(second['close'].iloc[-1], expected['close'].iloc[-1])
+
+    def test_only_missing_head_and_tail_fetched(self):
+        """只请求本地覆盖区间之外的头部和尾部"""
+        self._get('2020-03-02', '2020-04-30')
+        self.fetcher.calls.clear()
+
+        df = self._get('2020-02-03', '2020-06-30')
+        self.assertEqual(len(self.fetcher.calls), 2)
+        head, tail = self.fetcher.calls
+        self.assertEqual(head[0], datetime(2020, 2, 3))
+        self.assertEqual(head[1].date(), datetime(2020, 3, 2).date())
+        self.assertEqual(tail[0].date(), datetime(2020, 4, 30).date())
+        self.assertEqual(tail[1], datetime(2020, 6, 30))
+        self.assertEqual(len(df), len(self.data.loc['2020-02-03':'2020-06-30']))
+
+    def test_weekend_gap_not_refetched(self):
+        """覆盖区间边缘只差周末时不访问远程"""
+        self._get('2020-03-02', '2020-04-30')
+        self.fetcher.calls.clear()
+
+        # 2020-02-29/03-01 为周末
+        self._get('2020-02-29', '2020-04-30')
+        self.assertEqual(self.fetcher.calls, [])
+
+    def test_intraday_coverage_refreshed(self):
+        """覆盖范围在当天收盘前结束时，同一天之后的请求补齐新产生的K线"""
+        self._get('2020-03-02', '2020-04-30T10:30')
+        self.fetcher.calls.clear()
+
+        self._get('2020-03-02', '2020-04-30T14:00')
+        self.assertEqual(
+            [call[:2] for call in self.fetcher.calls], [(datetime(2020, 4, 30, 10, 30), datetime(2020, 4, 30, 14, 0))]
+        )
+
+        # 收盘后覆盖完整，不再访问远程
+        self._get('2020-03-02', '2020-04-30T15:00')
+        self.fetcher.calls.clear()
+        self._get('2020-03-02', '2020-04-30T20:00')
+        self.assertEqual(self.fetcher.calls, [])
+
+    def test_remote_failure_serves_local(self):
+        """远程失败时使用本地已有数据"""
+        self._get('2020-03-02', '2020-04-30')
+        self.provider._data_fetcher = FakeFetcher(self.data, fail=True)
+
+        df = self._get('2020-02-03', '2020-06-30')
+        self.assertEqual(len(df), len(self.data.loc['2020-03-02':'2020-04-30']))
+
+    def test_delete_resets_coverage(self):
+        """删除数据后覆盖区间失效，重新从远程获取"""
+        self._get('2020-03-02', '2020-04-30')
+        self.storage.delete_data('600000', datetime(2020, 1, 1), datetime(2020, 12, 31), 'daily')
+        self.assertIsNone(self.storage.get_kline_coverage('600000', 'daily'))
+
+        self.fetcher.calls.clear()
+        self._get('2020-03-02', '2020-04-30')
+        self.assertEqual(len(self.fetcher.calls), 1)
+
+    def test_engine_uses_provider(self):
+        """回测引擎通过注入的数据提供器获取数据"""
+        engine = BacktestEngine(initial_capital=100000.0, data_provider=self.provider)
+        params = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+        for _ in range(2):
+            result = asyncio.run(engine.run_backtest(
+                '600000', datetime(2020, 1, 1), datetime(2021, 6, 30), freq='1d', strategy_params=params
+            ))
+        self.assertEqual(len(self.fetcher.calls), 1)
+        self.assertEqual(result['data_points'], len(self.data.loc['2020-01-01':'2021-06-30']))
+
+
+if __name__ == '__main__':
+    unittest.main()
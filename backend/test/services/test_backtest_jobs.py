@@ -0,0 +1,207 @@
+"""回测任务队列单元测试"""
+import unittest
+import asyncio
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from api.websocket import ConnectionManager
+from services.backtest_jobs import BacktestJobQueue
+from services.backtest_service import BacktestEngine
+from test_backtest_kernel import make_price_data
+
+
+class FakeProvider:
+    """返回固定数据的数据提供器，gate未打开前阻塞在加载阶段"""
+
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.fail_codes = set()
+
+    async def get_data(self, code, start_date, end_date, freq='1d'):
+        await self.gate.wait()
+        if code in self.fail_codes:
+            raise Exception("remote unavailable")
+        return self.data
+
+
+class TestBacktestJobQueue(unittest.TestCase):
+    """回测任务队列测试"""
+
+    START = datetime(2020, 1, 1)
+    END = datetime(2021, 6, 30)
+    PARAMS = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+
+    def setUp(self):
+        """测试前初始化"""
+        self.data = make_price_data(500, seed=7)
+
+    def _make_queue(self, **kwargs):
+        self.provider = FakeProvider(self.data)
+        queue = BacktestJobQueue(data_provider=self.provider, **kwargs)
+        self.addCleanup(queue.shutdown)
+        return queue
+
+    def _submit(self, queue, code='600000', priority='interactive'):
+        return queue.submit(code, self.START, self.END, '1d', self.PARAMS, priority=priority)
+
+    def test_result_matches_direct_run(self):
+        """工作进程中的回测结果与直接运行一致"""
+        async def run():
+            queue = self._make_queue(max_workers=2)
+            job_id = self._submit(queue)
+            result = await queue.wait(job_id)
+            return queue, job_id, result
+
+        queue, job_id, result = asyncio.run(run())
+        engine = BacktestEngine(data_provider=FakeProvider(self.data))
+        expected = asyncio.run(engine.run_backtest('600000', self.START, self.END, '1d', self.PARAMS))
+
+        self.assertEqual(queue.get_job(job_id)['status'], 'completed')
+        self.assertEqual(result['metrics'], expected['metrics'])
+        self.assertEqual(result['trades'], expected['trades'])
+        self.assertIs(queue.get_result(job_id), result)
+
+    def test_interactive_jobs_run_before_queued_bulk_jobs(self):
+        """排队中的交互式任务先于更早提交的批量任务执行"""
+        async def run():
+            queue = self._make_queue(max_workers=1)
+            finished = []
+            queue.add_listener(lambda event: event['data']['status'] == 'completed' and finished.append(event['job_id']))
+
+            self.provider.gate.clear()
+            bulk = [self._submit(queue, priority='bulk') for _ in range(3)]
+            interactive = self._submit(queue)
+            self.assertEqual(queue.get_job(bulk[0])['status'], 'loading')
+            self.assertEqual(queue.get_job(interactive)['status'], 'queued')
+
+            self.provider.gate.set()
+            for job_id in bulk + [interactive]:
+                await queue.wait(job_id)
+            return finished, bulk, interactive
+
+        finished, bulk, interactive = asyncio.run(run())
+        self.assertEqual(finished, [bulk[0], interactive, bulk[1], bulk[2]])
+
+    def test_bulk_jobs_leave_a_slot_for_interactive_jobs(self):
+        """批量任务不会占满全部并发名额"""
+        async def run():
+            queue = self._make_queue(max_workers=2)
+            self.provider.gate.clear()
+            bulk = [self._submit(queue, priority='bulk') for _ in range(3)]
+            statuses = [queue.get_job(job_id)['status'] for job_id in bulk]
+
+            interactive = self._submit(queue)
+            interactive_status = queue.get_job(interactive)['status']
+            stats = queue.get_stats()
+
+            self.provider.gate.set()
+            await asyncio.gather(*(queue.wait(job_id) for job_id in bulk + [interactive]))
+            return statuses, interactive_status, stats
+
+        statuses, interactive_status, stats = asyncio.run(run())
+        self.assertEqual(statuses, ['loading', 'queued', 'queued'])
+        self.assertEqual(interactive_status, 'loading')
+        self.assertEqual(stats['loading'], 2)
+
+    def test_cancel_and_failure(self):
+        """排队中的任务可以取消；数据加载失败的任务标记为失败"""
+        async def run():
+            queue = self._make_queue(max_workers=1)
+            self.provider.fail_codes.add('000001')
+            self.provider.gate.clear()
+            failing = self._submit(queue, code='000001')
+            queued = self._submit(queue)
+
+            self.assertFalse(queue.cancel(failing))
+            self.assertTrue(queue.cancel(queued))
+            self.provider.gate.set()
+
+            with self.assertRaises(Exception):
+                await queue.wait(queued)
+            with self.assertRaises(Exception):
+                await queue.wait(failing)
+            return queue, failing, queued
+
+        queue, failing, queued = asyncio.run(run())
+        self.assertEqual(queue.get_job(queued)['status'], 'cancelled')
+        self.assertEqual(queue.get_job(failing)['status'], 'failed')
+        self.assertIn('remote unavailable', queue.get_job(failing)['error'])
+
+    def test_events_and_retention(self):
+        """状态变化推送事件，完成事件附带结果；超出保留个数的已结束任务被淘汰"""
+        async def run():
+            queue = self._make_queue(max_workers=2, max_finished_jobs=2)
+            events = []
+
+            async def listener(event):
+                events.append(event)
+
+            queue.add_listener(listener)
+            job_ids = [self._submit(queue) for _ in range(3)]
+            for job_id in job_ids:
+                await queue.wait(job_id)
+            await asyncio.sleep(0.01)
+            return queue, events, job_ids
+
+        queue, events, job_ids = asyncio.run(run())
+        first = [event['data']['status'] for event in events if event['job_id'] == job_ids[0]]
+        self.assertEqual(first, ['queued', 'loading', 'running', 'completed'])
+        self.assertIn('metrics', events[-1]['result'])
+        self.assertIsNone(queue.get_job(job_ids[0]))
+        self.assertEqual(len(queue.list_jobs()), 2)
+
+    def test_invalid_priority(self):
+        """不支持的优先级报错"""
+        async def run():
+            self._submit(self._make_queue(), priority='urgent')
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+
+
+class FakeWebSocket:
+    """记录发送消息的WebSocket"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.messages.append(message)
+
+
+class TestJobEventPush(unittest.TestCase):
+    """回测任务事件推送测试"""
+
+    def test_snapshot_sent_only_to_new_subscriber(self):
+        """订阅时的当前状态只发给新订阅的连接，任务结束后清除订阅"""
+        async def main():
+            manager = ConnectionManager()
+            sockets = {'a': FakeWebSocket(), 'b': FakeWebSocket()}
+            for connection_id, websocket in sockets.items():
+                await manager.connect(websocket, connection_id)
+                await manager.subscribe_jobs(connection_id, ['job'])
+
+            await manager.send_job_event({'type': 'backtest_job', 'job_id': 'job', 'data': {'status': 'running'}}, 'b')
+            await manager.broadcast_job_event(
+                {'type': 'backtest_job', 'job_id': 'job', 'data': {'status': 'completed'}}
+            )
+            return manager, sockets
+
+        manager, sockets = asyncio.run(main())
+        self.assertEqual([m['data']['status'] for m in sockets['a'].messages], ['completed'])
+        self.assertEqual([m['data']['status'] for m in sockets['b'].messages], ['running', 'completed'])
+        self.assertNotIn('job', manager.job_subscriptions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+"""回测模拟内核单元测试"""
+import unittest
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+
+from services.backtest_service import BacktestEngine
+from services.backtest_kernel import simulate_signals
+
+
+def make_price_data(n: int, seed: int = 42) -> pd.DataFrame:
+    """生成随机游走的OHLCV测试数据"""
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        'open': close * (1 + rng.normal(0, 0.005, n)),
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': rng.integers(1000, 100000, n)
+    }, index=pd.date_range('2020-01-01', periods=n, freq='D'))
+
+
+def run_reference_loop(engine: BacktestEngine, df: pd.DataFrame) -> pd.DataFrame:
+    """逐行iloc读写的原始回测循环，作为等价性基准"""
+    portfolio = pd.DataFrame(index=df.index)
+    portfolio['cash'] = engine.initial_capital
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        if col in df.columns:
+            portfolio[col] = df[col]
+    portfolio['signal'] = df['signal'].fillna(0)
+    portfolio['shares'] = 0.0
+    portfolio['trade_type'] = 0
+    portfolio['trade_price'] = 0.0
+    portfolio['trade_amount'] = 0.0
+
+    for i in range(1, len(df)):
+        prev_cash = portfolio.iloc[i-1]['cash']
+        prev_shares = portfolio.iloc[i-1]['shares']
+        new_cash, new_shares, trade_type, trade_amount = engine._process_signal(
+            portfolio.iloc[i]['signal'], portfolio.iloc[i]['close'], prev_cash, prev_shares
+        )
+        portfolio.iloc[i, portfolio.columns.get_loc('cash')] = new_cash
+        portfolio.iloc[i, portfolio.columns.get_loc('shares')] = new_shares
+        portfolio.iloc[i, portfolio.columns.get_loc('trade_type')] = trade_type
+        portfolio.iloc[i, portfolio.columns.get_loc('trade_price')] = portfolio.iloc[i]['close'] if trade_type != 0 else 0
+        portfolio.iloc[i, portfolio.columns.get_loc('trade_amount')] = trade_amount
+
+    portfolio['position_value'] = portfolio['shares'] * portfolio['close']
+    portfolio['total_value'] = portfolio['cash'] + portfolio['position_value']
+    portfolio['returns'] = portfolio['total_value'].pct_change()
+    portfolio['cumulative_returns'] = (portfolio['total_value'] / engine.initial_capital) - 1
+    portfolio['running_max'] = portfolio['total_value'].expanding().max()
+    portfolio['drawdown_pct'] = (portfolio['total_value'] - portfolio['running_max']) / portfolio['running_max']
+    return portfolio
+
+
+class TestBacktestKernel(unittest.TestCase):
+    """回测模拟内核测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.engine = BacktestEngine(initial_capital=100000.0, commission=0.0003, slippage=0.001)
+
+    def _assert_equivalent(self, params: dict, n: int = 400, seed: int = 42):
+        df = self.engine._calculate_indicators(make_price_data(n, seed), params)
+        expected = run_reference_loop(self.engine, df)
+        actual = self.engine._run_backtest_simulation(df)
+
+        self.assertEqual(list(actual.columns), list(expected.columns))
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_exact=True)
+        self.assertEqual(self.engine.trade_count, int((expected['trade_type'] != 0).sum()))
+
+    def test_equivalent_ma(self):
+        """均线策略与原始循环结果一致"""
+        self._assert_equivalent({'type': 'MA', 'short_window': 5, 'long_window': 20})
+
+    def test_equivalent_rsi(self):
+        """RSI策略与原始循环结果一致"""
+        self._assert_equivalent({'type': 'RSI', 'rsi_window': 14, 'oversold': 40, 'overbought': 60}, seed=7)
+
+    def test_equivalent_boll(self):
+        """布林带策略与原始循环结果一致"""
+        self._assert_equivalent({'type': 'BOLL', 'boll_window': 20, 'num_std': 1.5}, seed=3)
+
+    def test_equivalent_macd(self):
+        """MACD策略与原始循环结果一致"""
+        self._assert_equivalent({'type': 'MACD', 'fast': 12, 'slow': 26, 'signal': 9}, seed=11)
+
+    def test_first_bar_never_trades(self):
+        """第一根K线不交易"""
+        signal = np.array([1.0, 0.0, -1.0])
+        close = np.array([10.0, 11.0, 12.0])
+        sim = simulate_signals(signal, close, 1000.0, 0.0, 0.0)
+        self.assertEqual(sim['trade_type'].tolist(), [0, 0, 0])
+        self.assertEqual(sim['cash'].tolist(), [1000.0, 1000.0, 1000.0])
+
+    def test_buy_then_sell(self):
+        """买入80%现金后卖出"""
+        signal = np.array([0.0, 1.0, 1.0, -1.0, -1.0])
+        close = np.array([10.0, 10.0, 12.0, 20.0, 5.0])
+        sim = simulate_signals(signal, close, 1000.0, 0.0, 0.0)
+        self.assertEqual(sim['trade_type'].tolist(), [0, 1, 0, -1, 0])
+        self.assertAlmostEqual(sim['shares'][2], 80.0)
+        self.assertAlmostEqual(sim['cash'][2], 200.0)
+        self.assertAlmostEqual(sim['cash'][4], 200.0 + 80.0 * 20.0)
+        self.assertEqual(sim['shares'][4], 0.0)
+
+
+class TestRunBatch(unittest.TestCase):
+    """批量参数回测测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.engine = BacktestEngine(initial_capital=100000.0, commission=0.0003, slippage=0.001)
+        self.df = make_price_data(600, seed=5)
+
+    def _assert_matches_single(self, strategy_type: str, params_list: list):
+        batch = self.engine.run_batch(self.df, strategy_type, params_list)
+        self.assertEqual(len(batch), len(params_list))
+
+        for params, metrics in zip(params_list, batch):
+            df = self.engine._calculate_indicators(self.df, dict(params, type=strategy_type))
+            self.engine._run_backtest_simulation(df)
+            expected = self.engine._calculate_metrics()
+            self.assertEqual(set(metrics.keys()), set(expected.keys()))
+            self.assertEqual(metrics['trade_count'], expected['trade_count'])
+            for key, value in expected.items():
+                self.assertAlmostEqual(metrics[key], value, places=10, msg=f"{params} {key}")
+
+    def test_ma_grid(self):
+        """均线参数网格与逐组回测一致"""
+        params_list = [
+            {'short_window': s, 'long_window': l}
+            for s in (3, 5, 10) for l in (20, 30, 60)
+        ]
+        self._assert_matches_single('MA', params_list)
+
+    def test_rsi(self):
+        """RSI批量回测与逐组回测一致"""
+        self._assert_matches_single('RSI', [
+            {'rsi_window': 6, 'oversold': 30, 'overbought': 70},
+            {'rsi_window': 14, 'oversold': 40, 'overbought': 60},
+        ])
+
+    def test_boll(self):
+        """布林带批量回测与逐组回测一致"""
+        self._assert_matches_single('BOLL', [
+            {'boll_window': 10, 'num_std': 1.5},
+            {'boll_window': 20, 'num_std': 2},
+        ])
+
+    def test_macd(self):
+        """MACD批量回测与逐组回测一致"""
+        self._assert_matches_single('MACD', [
+            {'fast': 12, 'slow': 26, 'signal': 9},
+            {'fast': 5, 'slow': 35, 'signal': 5},
+        ])
+
+    def test_chunked_batches(self):
+        """按列分块时结果不变"""
+        params_list = [{'short_window': s, 'long_window': 30} for s in range(2, 12)]
+        full = self.engine.run_batch(self.df, 'MA', params_list)
+        chunked = self.engine.run_batch(self.df, 'MA', params_list, max_matrix_mb=0.01)
+        self.assertEqual(full, chunked)
+
+    def test_empty_params(self):
+        """空参数列表返回空结果"""
+        self.assertEqual(self.engine.run_batch(self.df, 'MA', []), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""回测结果缓存单元测试"""
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_data_provider import BacktestDataProvider
+from services.backtest_result_cache import BacktestResultCache, data_fingerprint
+from services.backtest_service import BacktestEngine
+from services.duckdb_storage_service import DuckDBStorageService
+from test_backtest_kernel import make_price_data
+from test_backtest_data_provider import FakeFetcher
+
+
+class TestBacktestResultCache(unittest.TestCase):
+    """回测结果缓存测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.storage = DuckDBStorageService(db_path=os.path.join(self.tmpdir.name, 'test.duckdb'))
+        data = make_price_data(600, seed=1)
+        self.data = data[data.index.dayofweek < 5]
+        self.provider = BacktestDataProvider(storage=self.storage, data_fetcher=FakeFetcher(self.data))
+        self.cache = BacktestResultCache(storage=self.storage)
+        self.params = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+
+    def tearDown(self):
+        """测试后清理"""
+        self.storage.close()
+        self.tmpdir.cleanup()
+
+    def _run(self, params=None, commission=0.0003):
+        engine = BacktestEngine(
+            initial_capital=100000.0, commission=commission,
+            data_provider=self.provider, result_cache=self.cache
+        )
+        return asyncio.run(engine.run_backtest(
+            '600000', datetime(2020, 1, 1), datetime(2021, 6, 30), freq='1d',
+            strategy_params=params or self.params
+        ))
+
+    def test_repeat_request_hits_cache(self):
+        """相同请求命中缓存且结果一致"""
+        first = self._run()
+        second = self._run()
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(first, second)
+
+    def test_params_and_costs_in_key(self):
+        """策略参数或交易成本不同不命中"""
+        self._run()
+        self._run(params={'type': 'MA', 'short_window': 10, 'long_window': 20})
+        self._run(commission=0.001)
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(self.cache.get_statistics()['entries'], 3)
+
+    def test_kline_change_invalidates(self):
+        """K线数据变更后缓存失效"""
+        self._run()
+        changed = self.data.loc['2021-03-01':'2021-03-05'].copy()
+        changed['close'] *= 1.05
+        self.storage.upsert_kline_data(changed, '600000', 'daily')
+        self.assertEqual(self.cache.get_statistics()['entries'], 0)
+
+        result = self._run()
+        self.assertEqual(self.cache.hits, 0)
+        self.assertIsNotNone(result)
+
+    def test_fingerprint_detects_change(self):
+        """数据内容变化改变指纹"""
+        df = self.data.copy()
+        before = data_fingerprint(df)
+        df.iloc[10, df.columns.get_loc('close')] += 0.01
+        self.assertNotEqual(before, data_fingerprint(df))
+
+    def test_lru_eviction_by_entries(self):
+        """超过条数上限时淘汰最久未访问的条目"""
+        self.cache.max_entries = 2
+        self.cache.put('a', '600000', '1d', {'v': 1})
+        self.cache.put('b', '600000', '1d', {'v': 2})
+        self.assertEqual(self.cache.get('a'), {'v': 1})  # a变为最近访问
+        self.cache.put('c', '600000', '1d', {'v': 3})
+
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), {'v': 1})
+        self.assertEqual(self.cache.get('c'), {'v': 3})
+
+    def test_eviction_by_bytes(self):
+        """超过字节上限时淘汰"""
+        self.cache.put('a', '600000', '1d', {'v': list(range(1000))})
+        size = self.cache.get_statistics()['size_bytes']
+        self.cache.max_bytes = size + 10
+        self.cache.put('b', '600000', '1d', {'v': list(range(1000, 2000))})
+
+        stats = self.cache.get_statistics()
+        self.assertEqual(stats['entries'], 1)
+        self.assertIsNotNone(self.cache.get('b'))
+
+
+if __name__ == '__main__':
+    unittest.main()
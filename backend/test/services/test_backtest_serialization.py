@@ -0,0 +1,104 @@
+"""回测结果序列化（行式/列式）单元测试"""
+import unittest
+import sys
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_service import BacktestEngine
+from test_backtest_kernel import make_price_data
+
+
+def reference_trade_details(portfolio):
+    """逐行iterrows构造的原始交易明细"""
+    trades = []
+    for idx, row in portfolio[portfolio['trade_type'] != 0].iterrows():
+        trades.append({
+            'date': idx.strftime('%Y-%m-%d %H:%M:%S'),
+            'type': '买入' if row['trade_type'] == 1 else '卖出',
+            'price': float(row['trade_price']),
+            'amount': float(row['trade_amount']),
+            'cash': float(row['cash']),
+            'shares': float(row['shares']),
+            'total_value': float(row['total_value'])
+        })
+    return trades
+
+
+def reference_equity_curve(portfolio):
+    """逐行iterrows构造的原始净值曲线"""
+    curve = []
+    for idx, row in portfolio.iterrows():
+        point = {
+            'date': idx.strftime('%Y-%m-%d %H:%M:%S'),
+            'total_value': float(row['total_value']),
+            'cumulative_return': float(row['cumulative_returns']),
+            'drawdown': float(row['drawdown_pct'])
+        }
+        if 'open' in row:
+            point['open'] = float(row['open'])
+            point['high'] = float(row['high'])
+            point['low'] = float(row['low'])
+            point['close'] = float(row['close'])
+            if 'volume' in row:
+                point['volume'] = int(row['volume'])
+        elif 'close' in row:
+            point['open'] = point['high'] = point['low'] = point['close'] = float(row['close'])
+            if 'volume' in row:
+                point['volume'] = int(row['volume'])
+        curve.append(point)
+    return curve
+
+
+class TestBacktestSerialization(unittest.TestCase):
+    """回测结果序列化测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.engine = BacktestEngine(initial_capital=100000.0)
+        params = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+        df = self.engine._calculate_indicators(make_price_data(300, seed=4), params)
+        self.engine.portfolio = self.engine._run_backtest_simulation(df)
+
+    def test_rows_match_reference(self):
+        """行式结果与原始逐行构造完全一致"""
+        portfolio = self.engine.portfolio
+        self.assertEqual(self.engine._get_trade_details(), reference_trade_details(portfolio))
+        self.assertEqual(self.engine._generate_equity_curve(), reference_equity_curve(portfolio))
+
+    def test_close_only_fallback(self):
+        """只有收盘价时OHLC都取收盘价"""
+        self.engine.portfolio = self.engine.portfolio.drop(columns=['open', 'high', 'low'])
+        self.assertEqual(
+            self.engine._generate_equity_curve(),
+            reference_equity_curve(self.engine.portfolio)
+        )
+
+    def test_columnar_matches_rows(self):
+        """列式结果与行式结果逐字段一致"""
+        rows = self.engine._generate_equity_curve()
+        columns = self.engine._generate_equity_curve(columnar=True)
+        self.assertEqual(len(columns['timestamp']), len(rows))
+        for key in rows[0]:
+            if key != 'date':
+                self.assertEqual(columns[key], [r[key] for r in rows])
+
+        expected_ms = self.engine.portfolio.index.values.astype('datetime64[ms]').astype(np.int64)
+        self.assertEqual(columns['timestamp'], expected_ms.tolist())
+
+        trades = self.engine._get_trade_details()
+        trade_columns = self.engine._get_trade_details(columnar=True)
+        self.assertEqual(trade_columns['type'], [t['type'] for t in trades])
+        self.assertEqual(trade_columns['total_value'], [t['total_value'] for t in trades])
+
+    def test_columnar_no_trades(self):
+        """无交易时列式交易明细为空数组"""
+        self.engine.portfolio['trade_type'] = 0
+        self.assertEqual(self.engine._get_trade_details(), [])
+        self.assertEqual(self.engine._get_trade_details(columnar=True)['timestamp'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,265 @@
+"""分布式参数优化单元测试"""
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from optimizers import BatchObjective
+from services.backtest_service import BacktestEngine
+from services.backtest_result_cache import data_fingerprint
+from services.distributed_executor import DistributedExecutor
+from services.optimization_broker import BrokerServer, OptimizationBroker, decode_frame, encode_frame
+from services.optimization_objective import BacktestObjective
+from services.optimization_service import OptimizationService
+from services.optimization_worker import OptimizationWorker
+from test_backtest_kernel import make_price_data
+from test_optimization_service import CountingProvider
+
+
+def make_tasks(n):
+    return [{'task_id': f'job-{i}', 'params_list': [{'x': i}], 'budget': None} for i in range(n)]
+
+
+class TestOptimizationBroker(unittest.TestCase):
+    """任务代理测试"""
+
+    def test_frame_roundtrip(self):
+        """行情编码后指纹不变"""
+        data = make_price_data(300, seed=1)
+        decoded = decode_frame(encode_frame(data))
+
+        self.assertEqual(data_fingerprint(decoded), data_fingerprint(data))
+        self.assertTrue(decoded.index.equals(data.index))
+
+    def test_idempotent_submit_and_complete(self):
+        """重复提交的任务被忽略，结果只接受第一次写入"""
+        broker = OptimizationBroker()
+        self.assertEqual(broker.submit('job', {}, 'fp', make_tasks(2)), 2)
+        self.assertEqual(broker.submit('job', {}, 'fp', make_tasks(3)), 1)
+
+        task = broker.lease('w1')
+        self.assertTrue(broker.complete(task['task_id'], 'w1', metrics=[{'total_return': 1.0}]))
+        self.assertFalse(broker.complete(task['task_id'], 'w2', metrics=[{'total_return': 2.0}]))
+        # 已完成的任务再次提交不会重新入队
+        self.assertEqual(broker.submit('job', {}, 'fp', make_tasks(1)), 0)
+
+        self.assertEqual(broker.results([task['task_id']])[task['task_id']]['worker_id'], 'w1')
+        stats = broker.get_stats()
+        self.assertEqual(stats['duplicates'], 1)
+        self.assertEqual(stats['queued'], 2)
+
+        self.assertEqual(broker.drop_job('job'), 3)
+        self.assertEqual(broker.get_stats()['results'], 0)
+
+    def test_expired_lease_is_redelivered(self):
+        """租约到期的任务重新投递，迟到的重复结果被忽略"""
+        broker = OptimizationBroker(lease_seconds=0.05)
+        broker.submit('job', {}, 'fp', make_tasks(1))
+
+        first = broker.lease('slow')
+        self.assertIsNone(broker.lease('fast'))
+        time.sleep(0.1)
+        second = broker.lease('fast')
+
+        self.assertEqual(second['task_id'], first['task_id'])
+        self.assertEqual(second['attempt'], 2)
+        self.assertTrue(broker.complete(second['task_id'], 'fast', metrics=[{}]))
+        self.assertFalse(broker.complete(first['task_id'], 'slow', metrics=[{}]))
+        self.assertEqual(broker.results(['job-0'])['job-0']['worker_id'], 'fast')
+        self.assertEqual(broker.get_stats()['redelivered'], 1)
+
+    def test_max_attempts(self):
+        """超过最多投递次数的任务记为失败"""
+        broker = OptimizationBroker(lease_seconds=0.01, max_attempts=2)
+        broker.submit('job', {}, 'fp', make_tasks(1))
+        for _ in range(2):
+            self.assertIsNotNone(broker.lease('w'))
+            time.sleep(0.02)
+
+        self.assertIsNone(broker.lease('w'))
+        result = broker.results(['job-0'])['job-0']
+        self.assertIsNone(result['metrics'])
+        self.assertIsNotNone(result['error'])
+
+    def test_purge_expired(self):
+        """超过保留时长未使用的结果和行情被删除，仍有任务引用的行情保留"""
+        broker = OptimizationBroker(ttl_seconds=0.05)
+        broker.put_data('done', b'a')
+        broker.put_data('pending', b'b')
+        broker.submit('job', {}, 'done', make_tasks(1))
+        broker.complete(broker.lease('w')['task_id'], 'w', metrics=[{}])
+        broker.submit('other', {}, 'pending', [{'task_id': 'other-0', 'params_list': [{}], 'budget': None}])
+
+        time.sleep(0.1)
+        self.assertEqual(broker.purge_expired(), 2)
+        self.assertEqual(broker.results(['job-0']), {})
+        self.assertIsNone(broker.get_data('done'))
+        self.assertEqual(broker.get_data('pending'), b'b')
+        self.assertEqual(broker.get_stats()['expired'], 2)
+
+
+class TestOptimizationWorker(unittest.TestCase):
+    """工作者测试"""
+
+    def test_lru_cache(self):
+        """内存中的行情和目标函数按最近使用保留至多 max_cached 份"""
+        server = BrokerServer().start()
+        frames = [make_price_data(200, seed=i) for i in range(3)]
+        fingerprints = [data_fingerprint(df) for df in frames]
+        for fp, df in zip(fingerprints, frames):
+            server.broker.put_data(fp, encode_frame(df))
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            worker = OptimizationWorker(server.url, cache_dir=cache_dir, max_cached=2)
+            try:
+                for fp in fingerprints[:2]:
+                    worker._objective(fp, {'strategy_type': 'MA'})
+                worker._objective(fingerprints[0], {'strategy_type': 'MA'})
+                worker._objective(fingerprints[2], {'strategy_type': 'MA'})
+            finally:
+                worker.close()
+                server.stop()
+
+        self.assertEqual(list(worker._frames), [fingerprints[0], fingerprints[2]])
+        self.assertEqual([key[0] for key in worker._objectives], [fingerprints[0], fingerprints[2]])
+
+    def test_corrupt_cache_file_redownloaded(self):
+        """本地缓存文件损坏或指纹不一致时删除并重新下载"""
+        server = BrokerServer().start()
+        data, other = make_price_data(200, seed=1), make_price_data(200, seed=2)
+        fingerprint = data_fingerprint(data)
+        server.broker.put_data(fingerprint, encode_frame(data))
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, f"{fingerprint}.npz")
+            try:
+                for content in (encode_frame(data)[:100], encode_frame(other)):
+                    with open(path, 'wb') as f:
+                        f.write(content)
+                    worker = OptimizationWorker(server.url, cache_dir=cache_dir)
+                    try:
+                        df = worker._load_frame(fingerprint)
+                    finally:
+                        worker.close()
+                    self.assertEqual(data_fingerprint(df), fingerprint)
+                    with open(path, 'rb') as f:
+                        self.assertEqual(data_fingerprint(decode_frame(f.read())), fingerprint)
+                self.assertEqual(os.listdir(cache_dir), [f"{fingerprint}.npz"])
+            finally:
+                server.stop()
+
+
+class TestDistributedOptimization(unittest.TestCase):
+    """分布式评估端到端测试"""
+
+    PARAM_RANGES = {
+        'short_window': {'type': 'int', 'min': 2, 'max': 20, 'step': 2},
+        'long_window': {'type': 'int', 'min': 20, 'max': 100, 'step': 10}
+    }
+
+    def setUp(self):
+        """启动代理和两个工作者"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.server = BrokerServer().start()
+        self.stop = threading.Event()
+        self.workers = [
+            OptimizationWorker(self.server.url, worker_id=f'w{i}', cache_dir=self.tmpdir.name, poll_interval=0.02)
+            for i in range(2)
+        ]
+        self.threads = [
+            threading.Thread(target=worker.run, kwargs={'stop': self.stop}, daemon=True)
+            for worker in self.workers
+        ]
+        for thread in self.threads:
+            thread.start()
+        while self.server.broker.get_stats()['workers'] < 2:
+            time.sleep(0.01)
+        self.data = make_price_data(800, seed=5)
+
+    def tearDown(self):
+        """停止工作者和代理"""
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+        for worker in self.workers:
+            worker.close()
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def test_grid_search_matches_local(self):
+        """分布式网格搜索的得分与本地批量回测一致，行情在工作者本地缓存"""
+        service = OptimizationService(
+            BacktestEngine(data_provider=CountingProvider(self.data)), broker_url=self.server.url
+        )
+        result = asyncio.run(service.run_optimization(
+            strategy_type='MA', stock_code='600000', start_date='2020-01-01', end_date='2022-12-31',
+            param_ranges=self.PARAM_RANGES, objective='sharpe_ratio', executor='distributed', batch_size=30
+        ))
+
+        self.assertEqual(len(result.all_results), 10 * 9)
+        local = BacktestObjective(self.data, 'MA', objective='sharpe_ratio')
+        expected = local.evaluate_batch([item['params'] for item in result.all_results])
+        for item, score in zip(result.all_results, expected):
+            self.assertAlmostEqual(item['score'], score)
+
+        # 每批30个参数按2个在线工作者拆成2个任务
+        self.assertEqual(sum(worker.tasks_done for worker in self.workers), 3 * 2)
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir.name, f"{data_fingerprint(self.data)}.npz")))
+        # 执行器关闭时删除代理上的结果
+        self.assertEqual(self.server.broker.get_stats()['results'], 0)
+
+    def test_fixed_chunk_size(self):
+        """指定任务大小时按固定大小拆分"""
+        executor = DistributedExecutor(self.server.url, chunk_size=4)
+        objective = BacktestObjective(self.data, 'MA', objective='total_return')
+        params_list = [{'short_window': s, 'long_window': 30} for s in range(2, 12)]
+        try:
+            scores = asyncio.run(executor.evaluate(objective, params_list, float('-inf')))
+        finally:
+            executor.close()
+
+        self.assertEqual(self.server.broker.get_stats()['completed'], 3)
+        np.testing.assert_allclose(scores, objective.evaluate_batch(params_list))
+
+    def test_requires_backtest_objective(self):
+        """只支持 BacktestObjective；未配置代理时不能选择分布式评估"""
+        class Objective(BatchObjective):
+            def evaluate_batch(self, params_list, budget=None):
+                return [0.0] * len(params_list)
+
+        executor = DistributedExecutor(self.server.url)
+        with self.assertRaises(TypeError):
+            asyncio.run(executor.evaluate(Objective({}), [{'x': 1}], float('-inf')))
+        executor.close()
+
+        with self.assertRaises(ValueError):
+            OptimizationService(BacktestEngine())._create_optimizer(
+                method='grid_search', objective='sharpe_ratio', maximize=True, n_jobs=1, executor='distributed'
+            )
+
+    def test_load_error_creates_no_executor(self):
+        """行情加载失败时不创建分布式执行器"""
+        service = OptimizationService(
+            BacktestEngine(data_provider=CountingProvider(pd.DataFrame())), broker_url=self.server.url
+        )
+        with mock.patch('services.optimization_service.DistributedExecutor') as executor_cls:
+            with self.assertRaises(ValueError):
+                asyncio.run(service.run_optimization(
+                    strategy_type='MA', stock_code='600000', start_date='2020-01-01', end_date='2022-12-31',
+                    param_ranges=self.PARAM_RANGES, executor='distributed'
+                ))
+        executor_cls.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
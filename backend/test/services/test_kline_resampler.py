@@ -0,0 +1,200 @@
+"""K线合成服务单元测试"""
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+
+from services.backtest_data_provider import BacktestDataProvider
+from services.data_download_service import DataDownloadService
+from services.duckdb_storage_service import DuckDBStorageService
+from services.kline_resampler import KlineResampler, resample_minute_bars
+
+
+def make_minute_data(days: int = 5, start: str = '2024-01-02', seed: int = 0) -> pd.DataFrame:
+    """生成A股交易时段的1分钟K线（按结束时间标记，含09:30集合竞价）"""
+    rng = np.random.default_rng(seed)
+    session = (
+        [pd.Timedelta(hours=9, minutes=30)]
+        + [pd.Timedelta(hours=9, minutes=30 + i) for i in range(1, 121)]
+        + [pd.Timedelta(hours=13, minutes=i) for i in range(1, 121)]
+    )
+    trading_days = pd.bdate_range(start, periods=days)
+    index = pd.DatetimeIndex([day + offset for day in trading_days for offset in session])
+
+    close = 10 + np.cumsum(rng.normal(0, 0.01, len(index)))
+    open_ = close + rng.normal(0, 0.005, len(index))
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + rng.uniform(0, 0.01, len(index)),
+        'low': np.minimum(open_, close) - rng.uniform(0, 0.01, len(index)),
+        'close': close,
+        'volume': rng.integers(100, 10000, len(index)),
+        'amount': rng.uniform(1e4, 1e6, len(index)),
+    }, index=index)
+
+
+def reference_bars(df: pd.DataFrame, edges) -> pd.DataFrame:
+    """按给定的 (起, 止] 时间段逐段切片聚合的参考实现"""
+    rows, labels = [], []
+    for day in df.index.normalize().unique():
+        for begin, end in edges:
+            part = df[(df.index > day + pd.Timedelta(begin)) & (df.index <= day + pd.Timedelta(end))]
+            if begin == '09:31:00':
+                part = df[(df.index >= day + pd.Timedelta('09:30:00')) & (df.index <= day + pd.Timedelta(end))]
+            if len(part) == 0:
+                continue
+            labels.append(day + pd.Timedelta(end))
+            rows.append({
+                'open': part['open'].iloc[0], 'high': part['high'].max(), 'low': part['low'].min(),
+                'close': part['close'].iloc[-1], 'volume': part['volume'].sum(), 'amount': part['amount'].sum()
+            })
+    return pd.DataFrame(rows, index=pd.DatetimeIndex(labels, name='date'))
+
+
+class TestResampleMinuteBars(unittest.TestCase):
+    """1分钟K线合成测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.minute = make_minute_data()
+
+    def test_hourly_bars_respect_lunch_break(self):
+        """60分钟线为 10:30/11:30/14:00/15:00，不跨越午休"""
+        bars = resample_minute_bars(self.minute, '60min')
+        edges = [('09:31:00', '10:30:00'), ('10:30:00', '11:30:00'), ('13:00:00', '14:00:00'), ('14:00:00', '15:00:00')]
+        expected = reference_bars(self.minute, edges)
+
+        self.assertEqual(len(bars), 4 * 5)
+        self.assertEqual(
+            sorted(set(bars.index.strftime('%H:%M'))), ['10:30', '11:30', '14:00', '15:00']
+        )
+        pd.testing.assert_frame_equal(bars, expected[bars.columns], check_dtype=False, check_index_type=False, check_freq=False)
+
+    def test_intraday_frequencies_match_reference(self):
+        """5/15/30分钟线与逐段切片的结果一致，集合竞价并入第一根"""
+        for minutes in (5, 15, 30):
+            with self.subTest(minutes=minutes):
+                bars = resample_minute_bars(self.minute, f'{minutes}min')
+                ends = pd.date_range('2000-01-01 09:30', '2000-01-01 11:30', freq=f'{minutes}min').append(
+                    pd.date_range('2000-01-01 13:00', '2000-01-01 15:00', freq=f'{minutes}min'))
+                edges = [
+                    (begin.strftime('%H:%M:%S'), end.strftime('%H:%M:%S'))
+                    for begin, end in zip(ends[:-1], ends[1:]) if end.hour != 13 or end.minute != 0
+                ]
+                edges[0] = ('09:31:00', edges[0][1])
+                expected = reference_bars(self.minute, edges)
+
+                self.assertEqual(len(bars), 240 // minutes * 5)
+                pd.testing.assert_frame_equal(bars, expected[bars.columns], check_dtype=False, check_index_type=False, check_freq=False)
+
+    def test_daily_bars(self):
+        """日线按交易日聚合，标记为当日零点"""
+        bars = resample_minute_bars(self.minute, 'daily')
+        grouped = self.minute.groupby(self.minute.index.normalize())
+
+        self.assertTrue((bars.index == bars.index.normalize()).all())
+        np.testing.assert_allclose(bars['open'], grouped['open'].first())
+        np.testing.assert_allclose(bars['high'], grouped['high'].max())
+        np.testing.assert_allclose(bars['low'], grouped['low'].min())
+        np.testing.assert_allclose(bars['close'], grouped['close'].last())
+        np.testing.assert_array_equal(bars['volume'], grouped['volume'].sum())
+
+    def test_unsupported_frequency(self):
+        """不能由1分钟K线合成的频率报错"""
+        with self.assertRaises(ValueError):
+            resample_minute_bars(self.minute, 'weekly')
+
+
+class TestKlineResampler(unittest.TestCase):
+    """物化合成与增量刷新测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.storage = DuckDBStorageService(db_path=os.path.join(self.tmpdir.name, 'test.duckdb'))
+        self.resampler = KlineResampler(self.storage)
+        self.minute = make_minute_data(days=6, seed=3)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.storage.close()
+        self.tmpdir.cleanup()
+
+    def _stored(self, frequency: str) -> pd.DataFrame:
+        df = self.storage.load_kline_data('600000', datetime(2000, 1, 1), datetime(2100, 1, 1), frequency)
+        return df[['open', 'high', 'low', 'close', 'volume', 'amount']]
+
+    def test_incremental_refresh_matches_full_rebuild(self):
+        """追加1分钟K线后只重算水位所在交易日及之后的K线，结果与全量合成一致"""
+        # 前3天加第4天上午
+        cutoff = pd.Timestamp('2024-01-05 11:30')
+        self.storage.save_kline_data(self.minute[self.minute.index <= cutoff], '600000', '1min')
+        first = self.resampler.refresh_all('600000')
+        self.assertEqual(first['60min'], 3 * 4 + 2)
+        self.assertEqual(first['daily'], 4)
+
+        # 没有新数据时不重算
+        self.assertEqual(self.resampler.refresh('600000', '60min'), 0)
+
+        self.storage.upsert_kline_data(self.minute[self.minute.index > cutoff], '600000', '1min')
+        second = self.resampler.refresh_all('600000')
+        # 从第4天开始重算：第4、5、6天
+        self.assertEqual(second['60min'], 3 * 4)
+        self.assertEqual(second['daily'], 3)
+
+        for frequency in ('5min', '60min', 'daily'):
+            with self.subTest(frequency=frequency):
+                expected = resample_minute_bars(self.minute, frequency)
+                stored = self._stored(frequency)
+                self.assertEqual(len(stored), len(expected))
+                np.testing.assert_allclose(stored.to_numpy(dtype=float), expected.to_numpy(dtype=float))
+
+    def test_backfill_rewinds_watermark(self):
+        """补写更早的1分钟K线后从补写的交易日开始重算"""
+        self.storage.save_kline_data(self.minute, '600000', '1min')
+        self.resampler.refresh('600000', 'daily')
+
+        patched = self.minute.loc['2024-01-03'].copy()
+        patched['high'] += 1.0
+        self.storage.upsert_kline_data(patched, '600000', '1min')
+
+        self.assertEqual(self.resampler.refresh('600000', 'daily'), 5)
+        stored = self._stored('daily')
+        self.assertAlmostEqual(stored.loc['2024-01-03', 'high'], patched['high'].max())
+
+    def test_provider_serves_derived_frequency_without_remote(self):
+        """1分钟K线覆盖请求区间时，回测数据提供器不访问远程"""
+        class FailingFetcher:
+            async def get_data(self, **kwargs):
+                raise AssertionError('不应访问远程数据源')
+
+        self.storage.save_kline_data(self.minute, '600000', '1min')
+        provider = BacktestDataProvider(storage=self.storage, data_fetcher=FailingFetcher())
+        df = asyncio.run(provider.get_data('600000', datetime(2024, 1, 2), datetime(2024, 1, 9, 15), '30min'))
+
+        self.assertEqual(len(df), 8 * 6)
+
+    def test_download_service_derives_instead_of_downloading(self):
+        """下载更粗频率时直接由本地1分钟K线合成"""
+        service = DataDownloadService(use_duckdb=False)
+        service.storage, service.use_duckdb, service.resampler = self.storage, True, self.resampler
+        self.storage.save_kline_data(self.minute, '600000', '1min')
+
+        result = asyncio.run(service.download_stock_data(
+            '600000', datetime(2024, 1, 2), datetime(2024, 1, 9), frequency='15min'
+        ))
+
+        self.assertEqual(result['status'], 'completed')
+        self.assertEqual(result['source'], 'resampled')
+        self.assertEqual(result['data_count'], 16 * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
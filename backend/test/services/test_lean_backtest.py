@@ -0,0 +1,99 @@
+"""低内存回测单元测试"""
+import unittest
+import sys
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_service import BacktestEngine
+from services.lean_backtest import lean_signals, run_lean_backtest, to_lean_frame
+from test_backtest_kernel import make_price_data
+
+
+STRATEGIES = [
+    {'type': 'MA', 'short_window': 5, 'long_window': 20},
+    {'type': 'RSI', 'rsi_window': 14, 'oversold': 40, 'overbought': 60},
+    {'type': 'BOLL', 'boll_window': 20, 'num_std': 1.5},
+    {'type': 'MACD', 'fast': 12, 'slow': 26, 'signal': 9},
+]
+
+
+class TestLeanBacktest(unittest.TestCase):
+    """低内存回测测试"""
+
+    def setUp(self):
+        """测试前初始化：标准模式使用同样的float32价格，只比较分块带来的差异"""
+        self.df = to_lean_frame(make_price_data(3000, seed=11))
+        self.reference_df = self.df.astype({col: np.float64 for col in ('open', 'high', 'low', 'close')})
+
+    def run_standard(self, params):
+        engine = BacktestEngine(initial_capital=100000.0)
+        df = engine._calculate_indicators(self.reference_df, params)
+        engine.portfolio = engine._run_backtest_simulation(df)
+        return engine, engine._calculate_metrics()
+
+    def test_price_columns_float32(self):
+        """价格列为float32，成交量保持原类型"""
+        self.assertEqual(self.df['close'].dtype, np.float32)
+        self.assertEqual(self.df['volume'].dtype, make_price_data(10)['volume'].dtype)
+
+    def test_signals_match_standard_across_chunks(self):
+        """分块信号与整段计算一致（块大小不整除数据长度）"""
+        close = self.df['close'].to_numpy()
+        for params in STRATEGIES:
+            expected = BacktestEngine()._calculate_indicators(self.reference_df, params)['signal'].to_numpy()
+            for chunk_size in (3000, 257, 31):
+                signals = lean_signals(close, params, chunk_size=chunk_size)
+                np.testing.assert_array_equal(signals, expected, err_msg=f"{params['type']} chunk={chunk_size}")
+
+    def test_results_match_standard(self):
+        """分块模拟的总市值、成交和指标与标准模式一致"""
+        for params in STRATEGIES:
+            engine, expected = self.run_standard(params)
+            result = run_lean_backtest(self.df, params, 100000.0, 0.0003, 0.001, chunk_size=250)
+
+            np.testing.assert_allclose(
+                result['portfolio']['total_value'].to_numpy(),
+                engine.portfolio['total_value'].to_numpy(), rtol=1e-12
+            )
+            expected_trades = engine.portfolio[engine.portfolio['trade_type'] != 0]
+            self.assertListEqual(list(result['trades'].index), list(expected_trades.index))
+            for name, value in expected.items():
+                self.assertAlmostEqual(result['metrics'][name], value, places=9, msg=name)
+
+    def test_intermediates_dropped_unless_requested(self):
+        """默认不保留中间列，需要时与标准模式一致"""
+        params = STRATEGIES[0]
+        lean = run_lean_backtest(self.df, params, 100000.0, 0.0003, 0.001, chunk_size=500)
+        self.assertNotIn('drawdown_pct', lean['portfolio'].columns)
+        self.assertNotIn('signal', lean['portfolio'].columns)
+
+        engine, _ = self.run_standard(params)
+        full = run_lean_backtest(self.df, params, 100000.0, 0.0003, 0.001, chunk_size=500, keep_intermediates=True)
+        for col in ('cash', 'shares', 'position_value', 'cumulative_returns', 'drawdown_pct'):
+            np.testing.assert_allclose(
+                full['portfolio'][col].to_numpy(), engine.portfolio[col].to_numpy(), rtol=1e-12, err_msg=col
+            )
+
+    def test_engine_outputs_match_standard(self):
+        """引擎的净值曲线和交易明细在两种模式下一致"""
+        params = STRATEGIES[3]
+        engine, _ = self.run_standard(params)
+        lean_engine = BacktestEngine(initial_capital=100000.0)
+        lean_engine.run_lean(self.df, params, chunk_size=400)
+
+        expected_trades = engine._get_trade_details(columnar=True)
+        trades = lean_engine._get_trade_details(columnar=True)
+        self.assertListEqual(trades['timestamp'], expected_trades['timestamp'])
+        np.testing.assert_allclose(trades['total_value'], expected_trades['total_value'], rtol=1e-12)
+
+        expected_curve = engine._generate_equity_curve(columnar=True)
+        curve = lean_engine._generate_equity_curve(columnar=True)
+        for key in ('total_value', 'cumulative_return', 'drawdown', 'close'):
+            np.testing.assert_allclose(curve[key], expected_curve[key], rtol=1e-9, atol=1e-12, err_msg=key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""蒙特卡洛稳健性分析单元测试"""
+import unittest
+import sys
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_service import BacktestEngine
+from services.monte_carlo import monte_carlo_analysis
+from test_backtest_kernel import make_price_data
+
+
+class TestMonteCarlo(unittest.TestCase):
+    """蒙特卡洛分析测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.engine = BacktestEngine(initial_capital=100000.0)
+        params = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+        df = self.engine._calculate_indicators(make_price_data(500, seed=2), params)
+        self.engine.portfolio = self.engine._run_backtest_simulation(df)
+        self.total_value = self.engine.portfolio['total_value'].to_numpy()
+
+    def test_original_matches_backtest_metrics(self):
+        """原始序列的指标与回测指标一致"""
+        metrics = self.engine._calculate_metrics()
+        result = self.engine.run_monte_carlo(n_paths=100, seed=0)
+        for name in ('total_return', 'max_drawdown', 'sharpe_ratio'):
+            self.assertAlmostEqual(result['metrics'][name]['original'], metrics[name], places=10)
+
+    def test_shuffle_preserves_total_return(self):
+        """打乱顺序不改变总收益和夏普，只改变回撤"""
+        result = monte_carlo_analysis(self.total_value, n_paths=500, method='shuffle', seed=1)
+        total_return = result['metrics']['total_return']
+        self.assertAlmostEqual(total_return['ci_lower'], total_return['original'], places=9)
+        self.assertAlmostEqual(total_return['ci_upper'], total_return['original'], places=9)
+        self.assertAlmostEqual(result['metrics']['sharpe_ratio']['std'], 0.0, places=9)
+        self.assertGreater(result['metrics']['max_drawdown']['std'], 0.0)
+
+    def test_bootstrap_interval(self):
+        """自助法置信区间有序且覆盖原始夏普"""
+        result = monte_carlo_analysis(self.total_value, n_paths=2000, seed=2)
+        for stats in result['metrics'].values():
+            self.assertLessEqual(stats['ci_lower'], stats['median'])
+            self.assertLessEqual(stats['median'], stats['ci_upper'])
+        sharpe = result['metrics']['sharpe_ratio']
+        self.assertTrue(sharpe['ci_lower'] <= sharpe['original'] <= sharpe['ci_upper'])
+        self.assertTrue(0 <= result['probability_of_loss'] <= 1)
+
+    def test_chunking_matches_single_matrix(self):
+        """分块计算与单块计算结果一致"""
+        full = monte_carlo_analysis(self.total_value, n_paths=300, seed=3)
+        chunked = monte_carlo_analysis(self.total_value, n_paths=300, seed=3, max_matrix_mb=0.05)
+        for name, stats in full['metrics'].items():
+            for key, value in stats.items():
+                self.assertAlmostEqual(chunked['metrics'][name][key], value, places=12)
+
+    def test_block_bootstrap(self):
+        """块自助法路径长度与原序列一致"""
+        result = monte_carlo_analysis(self.total_value, n_paths=200, block_size=20, seed=4)
+        self.assertEqual(result['block_size'], 20)
+        self.assertTrue(np.isfinite(result['metrics']['sharpe_ratio']['mean']))
+
+    def test_invalid_arguments(self):
+        """非法参数报错"""
+        with self.assertRaises(ValueError):
+            monte_carlo_analysis(self.total_value, method='unknown')
+        with self.assertRaises(ValueError):
+            monte_carlo_analysis(self.total_value[:2])
+        with self.assertRaises(ValueError):
+            BacktestEngine().run_monte_carlo()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""优化服务单元测试"""
+import unittest
+import asyncio
+import sys
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_service import BacktestEngine
+from services.optimization_objective import BacktestObjective
+from services.optimization_service import OptimizationService
+from test_backtest_kernel import make_price_data
+
+
+class CountingProvider:
+    """返回固定数据并记录获取次数的数据提供器"""
+
+    def __init__(self, data):
+        self.data = data
+        self.calls = 0
+
+    async def get_data(self, code, start_date, end_date, freq='daily'):
+        self.calls += 1
+        return self.data
+
+
+class TestOptimizationService(unittest.TestCase):
+    """优化服务测试"""
+
+    PARAM_RANGES = {
+        'short_window': {'type': 'int', 'min': 2, 'max': 40, 'step': 2},
+        'long_window': {'type': 'int', 'min': 20, 'max': 260, 'step': 10}
+    }
+
+    def setUp(self):
+        """测试前初始化"""
+        self.data = make_price_data(800, seed=5)
+        self.provider = CountingProvider(self.data)
+        self.service = OptimizationService(BacktestEngine(data_provider=self.provider))
+
+    def _run(self, **kwargs):
+        options = dict(
+            strategy_type='MA', stock_code='600000', start_date='2020-01-01', end_date='2022-12-31',
+            param_ranges=self.PARAM_RANGES, objective='total_return'
+        )
+        options.update(kwargs)
+        return asyncio.run(self.service.run_optimization(**options))
+
+    def test_grid_search_fetches_data_once(self):
+        """500个参数组合的网格搜索只获取一次数据，得分与批量回测一致"""
+        result = self._run()
+        params_list = [item['params'] for item in result.all_results]
+        expected = [m['total_return'] for m in BacktestEngine().run_batch(self.data, 'MA', params_list)]
+
+        self.assertEqual(len(params_list), 20 * 25)
+        self.assertEqual(self.provider.calls, 1)
+        np.testing.assert_allclose([item['score'] for item in result.all_results], expected)
+        self.assertEqual(result.best_score, max(expected))
+
+    def test_genetic_in_process_pool(self):
+        """遗传算法在进程池中评估时同样只获取一次数据"""
+        result = self._run(
+            optimization_method='genetic', n_jobs=2, executor='process', population_size=10, generations=3
+        )
+        expected = BacktestEngine().run_batch(self.data, 'MA', [result.best_params])[0]['total_return']
+
+        self.assertEqual(self.provider.calls, 1)
+        self.assertAlmostEqual(result.best_score, expected)
+
+    def test_objective_func(self):
+        """目标函数使用回测引擎的费率，未知目标退回total_return，无效指标记为最差得分"""
+        engine = BacktestEngine(commission=0.001, slippage=0.002)
+        service = OptimizationService(engine)
+        objective_func = service._create_objective_func(self.data, 'MA', 50000, 'unknown', maximize=True)
+
+        self.assertIsInstance(objective_func, BacktestObjective)
+        self.assertEqual((objective_func.commission, objective_func.slippage), (0.001, 0.002))
+        self.assertEqual(objective_func.objective, 'total_return')
+
+        minimize = service._create_objective_func(self.data, 'MA', 50000, 'max_drawdown', maximize=False)
+        self.assertEqual(minimize._score({'max_drawdown': float('nan')}), float('inf'))
+
+    def test_empty_data(self):
+        """获取不到数据时报错"""
+        self.provider.data = self.data.iloc[:0]
+        with self.assertRaises(ValueError):
+            self._run()
+
+
+if __name__ == '__main__':
+    unittest.main()
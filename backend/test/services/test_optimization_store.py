@@ -0,0 +1,139 @@
+"""参数优化持久化单元测试"""
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_service import BacktestEngine
+from services.duckdb_storage_service import DuckDBStorageService
+from services.optimization_service import OptimizationService
+from services.optimization_store import OptimizationStore
+from test_backtest_kernel import make_price_data
+from test_optimization_service import CountingProvider
+
+
+class Interrupted(BaseException):
+    """模拟进程被终止（不被评估执行器当作普通的评估失败处理）"""
+
+
+class TestOptimizationStore(unittest.TestCase):
+    """参数优化存储测试"""
+
+    PARAM_RANGES = {
+        'short_window': {'type': 'int', 'min': 2, 'max': 40, 'step': 2},
+        'long_window': {'type': 'int', 'min': 20, 'max': 260, 'step': 10}
+    }
+
+    def setUp(self):
+        """测试前初始化"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.storage = DuckDBStorageService(db_path=os.path.join(self.tmpdir.name, 'test.duckdb'))
+        self.store = OptimizationStore(storage=self.storage)
+        self.data = make_price_data(800, seed=5)
+        self.provider = CountingProvider(self.data)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.storage.close()
+        self.tmpdir.cleanup()
+
+    def _service(self):
+        return OptimizationService(BacktestEngine(data_provider=self.provider), store=self.store)
+
+    def _run(self, service=None, **kwargs):
+        options = dict(
+            strategy_type='MA', stock_code='600000', start_date='2020-01-01', end_date='2022-12-31',
+            param_ranges=self.PARAM_RANGES, objective='total_return', executor='serial'
+        )
+        options.update(kwargs)
+        return asyncio.run((service or self._service()).run_optimization(**options))
+
+    def test_evaluations_roundtrip(self):
+        """得分按参数组合写入，与参数顺序无关，重复写入覆盖，失败得分不参与热启动"""
+        self.store.save('s', [{'a': 1, 'b': 2.5}, {'a': 2, 'b': 0.5}, {'a': 3, 'b': 0.0}], [0.3, 0.1, float('-inf')])
+        self.store.save('s', [{'b': 0.5, 'a': 2}], [0.4])
+
+        self.assertEqual(self.store.lookup('s', [{'b': 2.5, 'a': 1}, {'a': 9, 'b': 0.0}, {'a': 2, 'b': 0.5}]),
+                         [0.3, None, 0.4])
+        self.assertEqual(self.store.lookup('other', [{'a': 1, 'b': 2.5}]), [None])
+        self.assertEqual(self.store.lookup('s', [{'a': 3, 'b': 0.0}]), [float('-inf')])
+        self.assertEqual(self.store.best('s', 5), [
+            {'params': {'a': 2, 'b': 0.5}, 'score': 0.4}, {'params': {'a': 1, 'b': 2.5}, 'score': 0.3}
+        ])
+        self.assertEqual(self.store.best('s', 1, maximize=False)[0]['score'], 0.3)
+        self.assertEqual(self.store.count('s'), 3)
+
+    def test_repeat_run_uses_stored_evaluations(self):
+        """同一研究的再次运行全部取自存储；目标或数据不同时是新的研究"""
+        first = self._run()
+        with mock.patch.object(BacktestEngine, 'run_batch', side_effect=AssertionError('不应回测')):
+            second = self._run()
+
+        self.assertEqual(first.stats['store_hits'], 0)
+        self.assertEqual(second.stats['store_hits'], 20 * 25)
+        self.assertEqual(second.best_params, first.best_params)
+        self.assertEqual(second.best_score, first.best_score)
+
+        third = self._run(objective='sharpe_ratio')
+        self.assertEqual(third.stats['store_hits'], 0)
+
+        self.provider.data = make_price_data(800, seed=6)
+        self.assertEqual(self._run().stats['store_hits'], 0)
+
+    def test_resume_interrupted_run(self):
+        """中断的运行保持running状态，恢复时只评估剩余参数组合"""
+        service = self._service()
+        calls = []
+        original = BacktestEngine.run_batch
+
+        def interrupt_after_two_batches(engine, df, strategy_type, params_list, **kwargs):
+            calls.append(len(params_list))
+            if len(calls) > 2:
+                raise Interrupted()
+            return original(engine, df, strategy_type, params_list, **kwargs)
+
+        with mock.patch.object(BacktestEngine, 'run_batch', interrupt_after_two_batches):
+            with self.assertRaises(Interrupted):
+                self._run(service, run_id='overnight', batch_size=100)
+
+        run = service.get_optimization_run('overnight')
+        self.assertEqual(run['status'], 'running')
+        self.assertFalse(run['active'])
+        self.assertEqual(run['stored_evaluations'], 200)
+
+        # 服务重启后按运行记录恢复
+        restarted = self._service()
+        result = asyncio.run(restarted.resume_optimization('overnight'))
+        self.assertEqual(result.stats['store_hits'], 200)
+        self.assertEqual(result.stats['run_id'], 'overnight')
+        self.assertEqual(len(result.all_results), 20 * 25)
+
+        run = restarted.get_optimization_run('overnight')
+        self.assertEqual(run['status'], 'completed')
+        self.assertEqual(run['evaluations'], 20 * 25)
+        self.assertEqual(run['best_params'], result.best_params)
+        self.assertEqual([r['run_id'] for r in restarted.list_optimization_runs('completed')], ['overnight'])
+
+        with self.assertRaises(ValueError):
+            asyncio.run(restarted.resume_optimization('missing'))
+
+    def test_genetic_warm_start(self):
+        """新的遗传算法运行用历史最优点初始化种群"""
+        self._run()
+        result = self._run(optimization_method='genetic', population_size=20, generations=2)
+
+        self.assertEqual(result.stats['warm_start_points'], 10)
+        self.assertGreaterEqual(result.stats['store_hits'], 10)
+        # 网格全部评估过，历史最优点在初始种群中
+        study_key = self.store.get_run(result.stats['run_id'])['study_key']
+        grid_best = self.store.best(study_key, 1)[0]
+        self.assertEqual(result.best_score, grid_best['score'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""组合回测（共享现金）单元测试"""
+import unittest
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_service import BacktestEngine
+from services.backtest_kernel import simulate_portfolio
+from test_backtest_kernel import make_price_data
+
+
+class TestPortfolioBacktest(unittest.TestCase):
+    """组合回测测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.engine = BacktestEngine(initial_capital=100000.0, commission=0.0003, slippage=0.001)
+        self.params = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+
+    def test_single_symbol_matches_single_backtest(self):
+        """单标的组合回测与单标的回测一致"""
+        df = make_price_data(500, seed=1)
+        result = self.engine.run_portfolio(df[['close']].rename(columns={'close': '600000'}), self.params)
+
+        single = self.engine._run_backtest_simulation(self.engine._calculate_indicators(df, self.params))
+        expected = single['total_value'].to_numpy()
+        actual = np.array([p['total_value'] for p in result['equity_curve']])
+
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-9)
+        self.assertEqual(result['metrics']['trade_count'], self.engine.trade_count)
+        self.assertEqual(result['symbols'][0]['trade_count'], self.engine.trade_count)
+        # 默认不返回逐标的曲线
+        self.assertNotIn('symbol_equity_curves', result)
+
+    def test_shared_cash_split_between_flat_symbols(self):
+        """同一根K线的买入平分可用现金的80%"""
+        signals = np.array([[0, 0], [1, 1], [0, 0]], dtype=np.int8)
+        close = np.array([[10.0, 20.0], [10.0, 20.0], [11.0, 22.0]])
+        tradable = np.ones_like(close, dtype=bool)
+
+        sim = simulate_portfolio(signals, close, tradable, 1000.0, 0.0, 0.0)
+
+        self.assertAlmostEqual(sim['cash'][1], 200.0)
+        self.assertEqual(sim['event_symbol'].tolist(), [0, 1])
+        np.testing.assert_allclose(sim['event_shares'], [40.0, 20.0])
+
+    def test_sell_proceeds_available_same_bar(self):
+        """同一根K线先卖出再买入"""
+        signals = np.array([[0, 0], [1, 0], [-1, 1]], dtype=np.int8)
+        close = np.array([[10.0, 10.0], [10.0, 10.0], [10.0, 10.0]])
+        tradable = np.ones_like(close, dtype=bool)
+
+        sim = simulate_portfolio(signals, close, tradable, 1000.0, 0.0, 0.0)
+
+        # 第1根K线：两只都空仓，0号买入 1000*0.8/2；第2根：卖出后现金回到1000，
+        # 两只再次都空仓，1号买入 1000*0.8/2
+        self.assertAlmostEqual(sim['cash'][1], 600.0)
+        self.assertAlmostEqual(sim['cash'][2], 600.0)
+        self.assertEqual(sim['trade_count'].tolist(), [2, 1])
+
+    def test_unaligned_symbols(self):
+        """不同上市时间和停牌的标的按统一时间轴对齐"""
+        a = make_price_data(300, seed=2)['close'].rename('A')
+        b = make_price_data(200, seed=3)['close'].rename('B')
+        b.index = a.index[100:]
+        b = b.drop(b.index[50:60])  # 停牌10天
+
+        close_df = pd.concat([a, b], axis=1)
+        result = self.engine.run_portfolio(close_df, self.params, include_symbol_curves=True)
+
+        self.assertEqual(result['data_points'], 300)
+        self.assertEqual(result['symbols'][1]['data_points'], 190)
+        curves = result['symbol_equity_curves']
+        self.assertTrue(all(v == 0 for v in curves['B'][:100]))
+        self.assertTrue(np.all(np.isfinite([p['total_value'] for p in result['equity_curve']])))
+
+        totals = np.array([p['total_value'] for p in result['equity_curve']])
+        cash = np.array([p['cash'] for p in result['equity_curve']])
+        np.testing.assert_allclose(totals, cash + np.array(curves['A']) + np.array(curves['B']))
+
+    def test_float32_and_chunking(self):
+        """float32精度和分块重建与默认结果接近"""
+        close_df = pd.concat(
+            [make_price_data(400, seed=s)['close'].rename(str(s)) for s in range(12)], axis=1
+        )
+        full = self.engine.run_portfolio(close_df, self.params)
+        lean = self.engine.run_portfolio(
+            close_df, self.params, include_symbol_curves=False, dtype=np.float32, max_matrix_mb=0.01
+        )
+        self.assertNotIn('symbol_equity_curves', lean)
+        self.assertAlmostEqual(
+            lean['final_capital'] / full['final_capital'], 1.0, places=3
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""流式回测引擎单元测试"""
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_service import BacktestEngine
+from services.duckdb_storage_service import DuckDBStorageService
+from services.streaming_backtest import Bar, StreamingBacktestEngine, create_streaming_strategy
+from test_backtest_kernel import make_price_data
+
+
+def to_bars(df):
+    """DataFrame转换为K线列表"""
+    return [
+        Bar(date, o, h, l, c, v)
+        for date, o, h, l, c, v in zip(
+            df.index, df['open'], df['high'], df['low'], df['close'], df['volume']
+        )
+    ]
+
+
+class TestStreamingBacktest(unittest.TestCase):
+    """流式回测测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.df = make_price_data(800, seed=9)
+        self.engine = BacktestEngine(initial_capital=100000.0, commission=0.0003, slippage=0.001)
+
+    def _streaming(self, params, **kwargs):
+        return StreamingBacktestEngine(
+            create_streaming_strategy(params), initial_capital=100000.0,
+            commission=0.0003, slippage=0.001, **kwargs
+        )
+
+    def _assert_matches_vectorized(self, params):
+        df = self.engine._calculate_indicators(self.df, params)
+        self.engine.portfolio = self.engine._run_backtest_simulation(df)
+        expected_metrics = self.engine._calculate_metrics()
+        expected_trades = self.engine._get_trade_details()
+
+        result = self._streaming(params).run(to_bars(self.df))
+
+        self.assertEqual(len(result['trades']), len(expected_trades))
+        for actual, expected in zip(result['trades'], expected_trades):
+            self.assertEqual(actual['type'], expected['type'])
+            self.assertEqual(actual['date'].strftime('%Y-%m-%d %H:%M:%S'), expected['date'])
+            self.assertAlmostEqual(actual['total_value'], expected['total_value'], places=6)
+        self.assertAlmostEqual(result['final_capital'], float(self.engine.portfolio['total_value'].iloc[-1]), places=6)
+        for key, value in expected_metrics.items():
+            self.assertAlmostEqual(result['metrics'][key], value, places=8, msg=key)
+
+    def test_ma_matches_vectorized(self):
+        """双均线与向量化回测一致"""
+        self._assert_matches_vectorized({'type': 'MA', 'short_window': 5, 'long_window': 20})
+
+    def test_rsi_matches_vectorized(self):
+        """RSI与向量化回测一致"""
+        self._assert_matches_vectorized({'type': 'RSI', 'rsi_window': 14, 'oversold': 40, 'overbought': 60})
+
+    def test_boll_matches_vectorized(self):
+        """布林带与向量化回测一致"""
+        self._assert_matches_vectorized({'type': 'BOLL', 'boll_window': 20, 'num_std': 1.5})
+
+    def test_macd_matches_vectorized(self):
+        """MACD与向量化回测一致"""
+        self._assert_matches_vectorized({'type': 'MACD', 'fast': 12, 'slow': 26, 'signal': 9})
+
+    def test_duckdb_chunks_match_in_memory(self):
+        """分块读取DuckDB与内存回放结果一致"""
+        params = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            storage = DuckDBStorageService(db_path=os.path.join(tmpdir, 'test.duckdb'))
+            try:
+                storage.save_kline_data(self.df, '600000', 'daily')
+                result = self._streaming(params).run_duckdb(
+                    storage, '600000', self.df.index[0], self.df.index[-1], 'daily', chunk_size=64
+                )
+            finally:
+                storage.close()
+
+        expected = self._streaming(params).run(to_bars(self.df))
+        self.assertEqual(result['data_points'], len(self.df))
+        self.assertEqual(len(result['trades']), len(expected['trades']))
+        self.assertAlmostEqual(result['final_capital'], expected['final_capital'], places=4)
+
+    def test_live_stream_and_trade_callback(self):
+        """异步实时K线流驱动同一策略并回调成交"""
+        params = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+        bars = to_bars(self.df)
+        received = []
+
+        async def feed():
+            for bar in bars:
+                yield bar
+
+        engine = self._streaming(params, record_equity=True, on_trade=received.append)
+        result = asyncio.run(engine.run_async(feed()))
+
+        self.assertEqual(received, result['trades'])
+        self.assertEqual(len(result['equity_curve']), len(bars))
+        np.testing.assert_allclose(
+            result['final_capital'], self._streaming(params).run(bars)['final_capital']
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+"""全市场回测单元测试"""
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest import mock
+
+import pandas as pd
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_service import BacktestEngine
+from services.duckdb_storage_service import DuckDBStorageService
+from services.universe_backtest import UniverseBacktestService
+from test_backtest_kernel import make_price_data
+
+
+class TestUniverseBacktest(unittest.TestCase):
+    """全市场回测测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        """写入测试股票数据"""
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.storage = DuckDBStorageService(db_path=os.path.join(cls.tmpdir.name, 'test.duckdb'))
+        cls.data = {}
+        for i in range(12):
+            code = f'6000{i:02d}'
+            df = make_price_data(300 + 10 * i, seed=i)
+            cls.storage.save_kline_data(df, code, 'daily')
+            cls.data[code] = df
+        cls.params = {'type': 'MA', 'short_window': 5, 'long_window': 20}
+
+    @classmethod
+    def tearDownClass(cls):
+        """清理"""
+        cls.storage.close()
+        cls.tmpdir.cleanup()
+
+    def _run(self, **kwargs):
+        service = UniverseBacktestService(storage=self.storage)
+        progress = []
+        summary = asyncio.run(service.run(
+            self.params, datetime(2019, 1, 1), datetime(2030, 1, 1),
+            batch_size=5, progress_callback=progress.append, **kwargs
+        ))
+        return service, summary, progress
+
+    def test_all_symbols_ranked(self):
+        """所有股票写入结果表并按指标排名"""
+        service, summary, progress = self._run(n_jobs=1)
+        self.assertEqual(summary['status'], 'completed')
+        self.assertEqual(summary['completed'], 12)
+        self.assertEqual([p['completed'] for p in progress], [5, 10, 12])
+
+        results = service.get_results(summary['run_id'], order_by='total_return', limit=None)
+        self.assertEqual(len(results), 12)
+        returns = [r['total_return'] for r in results]
+        self.assertEqual(returns, sorted(returns, reverse=True))
+
+    def test_matches_single_backtest(self):
+        """单只股票结果与单独回测一致"""
+        service, summary, _ = self._run(n_jobs=1)
+        results = {r['stock_code']: r for r in service.get_results(summary['run_id'], limit=None)}
+
+        engine = BacktestEngine()
+        code = '600003'
+        df = engine._calculate_indicators(self.data[code], self.params)
+        engine.portfolio = engine._run_backtest_simulation(df)
+        expected = engine._calculate_metrics()
+        self.assertEqual(results[code]['data_points'], len(self.data[code]))
+        self.assertEqual(results[code]['trade_count'], expected['trade_count'])
+        self.assertAlmostEqual(results[code]['sharpe_ratio'], expected['sharpe_ratio'], places=10)
+
+    def test_process_pool_matches_serial(self):
+        """进程池与串行结果一致"""
+        service, serial, _ = self._run(n_jobs=1)
+        _, parallel, _ = self._run(n_jobs=3)
+        a = service.get_results(serial['run_id'], order_by='stock_code', ascending=True, limit=None)
+        b = service.get_results(parallel['run_id'], order_by='stock_code', ascending=True, limit=None)
+        self.assertEqual(
+            [(r['stock_code'], r['total_return']) for r in a],
+            [(r['stock_code'], r['total_return']) for r in b]
+        )
+
+    def test_missing_symbols_skipped(self):
+        """没有数据的股票跳过"""
+        _, summary, _ = self._run(n_jobs=1, stock_codes=['600000', '999999'])
+        self.assertEqual(summary['completed'], 1)
+        self.assertEqual(summary['skipped'], 1)
+
+    def test_failed_symbol_skipped(self):
+        """单只股票回测出错时跳过该股票，其余股票照常完成"""
+        original = BacktestEngine.run_batch
+
+        def fail_on_600003(engine, df, *args, **kwargs):
+            if len(df) == len(self.data['600003']):
+                raise ValueError('数据异常')
+            return original(engine, df, *args, **kwargs)
+
+        with mock.patch.object(BacktestEngine, 'run_batch', fail_on_600003):
+            service, summary, _ = self._run(n_jobs=1)
+
+        self.assertEqual(summary['status'], 'completed')
+        self.assertEqual(summary['completed'], 11)
+        self.assertEqual(summary['skipped'], 1)
+        codes = {r['stock_code'] for r in service.get_results(summary['run_id'], limit=None)}
+        self.assertNotIn('600003', codes)
+
+    def test_plugin_with_ohlc_columns(self):
+        """需要最高价/最低价的策略插件按所需列加载数据，与单独回测一致"""
+        service = UniverseBacktestService(storage=self.storage)
+        params = {'type': 'KDJ', 'k_period': 9, 'd_period': 3}
+        summary = asyncio.run(service.run(
+            params, datetime(2019, 1, 1), datetime(2030, 1, 1), batch_size=5, n_jobs=1
+        ))
+        self.assertEqual(summary['completed'], 12)
+        self.assertEqual(summary['skipped'], 0)
+
+        results = {r['stock_code']: r for r in service.get_results(summary['run_id'], limit=None)}
+        expected = BacktestEngine().run_batch(self.data['600003'], 'KDJ', [{'k_period': 9, 'd_period': 3}])[0]
+        self.assertAlmostEqual(results['600003']['total_return'], expected['total_return'], places=10)
+
+    def test_formula_columns(self):
+        """公式策略按公式中引用的数据列加载"""
+        service = UniverseBacktestService(storage=self.storage)
+        params = {'type': 'FORMULA', 'formula': 'BUY: CROSS(C, HHV(REF(H,1),10)); SELL: CROSS(LLV(REF(L,1),10), C)'}
+        summary = asyncio.run(service.run(
+            params, datetime(2019, 1, 1), datetime(2030, 1, 1), batch_size=5, n_jobs=1
+        ))
+        self.assertEqual(summary['completed'], 12)
+
+    def test_load_kline_batch(self):
+        """批量加载指定数据列，非法列名报错"""
+        frames = self.storage.load_kline_batch(
+            ['600001', '600002'], datetime(2019, 1, 1), datetime(2030, 1, 1), columns=('high', 'low', 'close')
+        )
+        self.assertEqual(sorted(frames), ['600001', '600002'])
+        self.assertEqual(list(frames['600001'].columns), ['high', 'low', 'close'])
+        self.assertEqual(len(frames['600002']), len(self.data['600002']))
+        with self.assertRaises(ValueError):
+            self.storage.load_kline_batch(['600001'], datetime(2019, 1, 1), datetime(2030, 1, 1), columns=('close; --',))
+
+    def test_threaded_batch_access(self):
+        """线程池中的批量读写与主连接上的查询并发时结果正确"""
+        codes = ['600001', '600002', '600003']
+        expected = {code: len(self.data[code]) for code in codes}
+
+        def read(i):
+            frames = self.storage.load_kline_batch(codes, datetime(2019, 1, 1), datetime(2030, 1, 1))
+            rows = pd.DataFrame([{'run_id': f'threaded-{i}', 'stock_code': code} for code in codes])
+            self.storage.save_universe_results(rows)
+            return {code: len(df) for code, df in frames.items()}
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(read, i) for i in range(100)]
+            for _ in range(100):
+                self.storage.get_universe_results('threaded-0')
+            for future in futures:
+                self.assertEqual(future.result(), expected)
+        self.assertEqual(len(self.storage.get_universe_results('threaded-99')), 3)
+
+    def test_invalid_order_by(self):
+        """非法排序字段报错"""
+        with self.assertRaises(ValueError):
+            self.storage.get_universe_results('x', order_by='1; DROP TABLE kline_data')
+
+
+if __name__ == '__main__':
+    unittest.main()
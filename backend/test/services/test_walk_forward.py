@@ -0,0 +1,127 @@
+"""滚动前推优化单元测试"""
+import unittest
+import asyncio
+import sys
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.append('test/services')
+
+from services.backtest_kernel import simulate_signals
+from services.backtest_service import BacktestEngine
+from services.walk_forward import run_walk_forward, split_walk_forward_folds
+from test_backtest_kernel import make_price_data
+
+
+class TestWalkForward(unittest.TestCase):
+    """滚动前推优化测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.df = make_price_data(700, seed=21)
+        self.param_ranges = {
+            'short_window': {'type': 'int', 'min': 3, 'max': 9, 'step': 3},
+            'long_window': {'type': 'int', 'min': 20, 'max': 40, 'step': 10},
+        }
+
+    def _run(self, **kwargs):
+        options = dict(
+            strategy_type='MA', param_ranges=self.param_ranges,
+            train_bars=250, test_bars=100, objective='total_return'
+        )
+        options.update(kwargs)
+        return asyncio.run(run_walk_forward(self.df, **options))
+
+    def test_split_rolling_and_anchored(self):
+        """滚动和锚定窗口划分"""
+        folds = split_walk_forward_folds(700, 250, 100)
+        self.assertEqual(len(folds), 5)
+        self.assertEqual(folds[1], {'train_start': 100, 'train_end': 350, 'test_start': 350, 'test_end': 450})
+        self.assertEqual(folds[-1]['test_end'], 700)
+
+        anchored = split_walk_forward_folds(700, 250, 100, anchored=True)
+        self.assertTrue(all(f['train_start'] == 0 for f in anchored))
+        self.assertEqual(split_walk_forward_folds(100, 250, 50), [])
+
+    def test_process_pool_matches_serial(self):
+        """进程池并行与串行结果一致"""
+        serial = self._run(n_jobs=1)
+        parallel = self._run(n_jobs=3)
+        self.assertEqual(
+            [f['best_params'] for f in serial['folds']],
+            [f['best_params'] for f in parallel['folds']]
+        )
+        self.assertAlmostEqual(serial['final_capital'], parallel['final_capital'], places=6)
+
+    def test_best_params_maximize_train_score(self):
+        """每个窗口的最优参数是训练段上的最优"""
+        result = self._run()
+        engine = BacktestEngine()
+        fold = result['folds'][0]
+        train_df = self.df.iloc[0:250]
+        grid = [{'short_window': s, 'long_window': l} for s in (3, 6, 9) for l in (20, 30, 40)]
+        scores = [m['total_return'] for m in engine.run_batch(train_df, 'MA', grid)]
+        self.assertAlmostEqual(fold['train_score'], max(scores))
+
+    def test_stitched_equity(self):
+        """样本外净值覆盖所有测试段并首尾相接"""
+        result = self._run()
+        curve = result['oos_equity_curve']
+        self.assertEqual(len(curve), 700 - 250)
+        self.assertEqual(curve[0]['date'], self.df.index[250].strftime('%Y-%m-%d %H:%M:%S'))
+        self.assertAlmostEqual(curve[-1]['total_value'], result['final_capital'])
+
+        # 各段收益率连乘等于总收益率
+        growth = np.prod([1 + f['test_metrics']['total_return'] for f in result['folds']])
+        self.assertAlmostEqual(result['oos_metrics']['total_return'], growth - 1, places=10)
+
+    def test_carries_open_position(self):
+        """测试段沿用训练段末尾的持仓，参数固定时与连续回测的净值一致"""
+        fixed = {
+            'short_window': {'type': 'choice', 'choices': [5]},
+            'long_window': {'type': 'choice', 'choices': [20]},
+        }
+        result = self._run(param_ranges=fixed, anchored=True)
+
+        engine = BacktestEngine()
+        signals = engine._calculate_indicators(self.df, {'type': 'MA', 'short_window': 5, 'long_window': 20})['signal']
+        close = self.df['close'].to_numpy()
+        sim = simulate_signals(signals.to_numpy(dtype=np.float64), close, 1.0, 0.0003, 0.001)
+        total = sim['cash'] + sim['shares'] * close
+        expected = total[250:] / total[249] * 100000.0
+
+        actual = np.array([p['total_value'] for p in result['oos_equity_curve']])
+        np.testing.assert_allclose(actual, expected, rtol=1e-9)
+
+    def test_plugin_with_ohlc_columns(self):
+        """需要最高价/最低价的策略插件在各窗口中使用完整数据列"""
+        ranges = {
+            'k_period': {'type': 'int', 'min': 5, 'max': 15, 'step': 5},
+            'd_period': {'type': 'choice', 'choices': [3]},
+        }
+        serial = self._run(strategy_type='KDJ', param_ranges=ranges, n_jobs=1)
+        parallel = self._run(strategy_type='KDJ', param_ranges=ranges, n_jobs=2)
+        self.assertEqual(len(serial['oos_equity_curve']), 700 - 250)
+        self.assertAlmostEqual(serial['final_capital'], parallel['final_capital'], places=6)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run_walk_forward(
+                self.df[['close']], 'KDJ', ranges, train_bars=250, test_bars=100
+            ))
+
+    def test_overlapping_folds(self):
+        """步长小于测试窗口时样本外净值不重复计算重叠部分"""
+        result = self._run(step_bars=50)
+        dates = [p['date'] for p in result['oos_equity_curve']]
+        self.assertEqual(len(dates), 700 - 250)
+        self.assertEqual(len(set(dates)), len(dates))
+
+    def test_insufficient_data(self):
+        """数据不足时报错"""
+        with self.assertRaises(ValueError):
+            self._run(train_bars=1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""公式策略单元测试"""
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append('.')
+sys.path.append('test/strategies')
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / '3rdparty' / 'Ashare'))
+
+from indicators.graph import IndicatorGraph
+from services.backtest_service import BacktestEngine
+from strategies.formula import (
+    FormulaError, FormulaPlanCache, compile_formula, formula_hash, get_formula_cache, parse_formula
+)
+from test_registry import make_ohlcv_data
+
+import MyTT
+
+
+MA_CROSS = 'BUY: CROSS(MA(C,5),MA(C,20)); SELL: CROSS(MA(C,20),MA(C,5))'
+
+
+class TestFormulaStrategy(unittest.TestCase):
+    """公式策略测试"""
+
+    def setUp(self):
+        """测试前初始化"""
+        self.df = make_ohlcv_data(600)
+        self.graph = IndicatorGraph(self.df)
+
+    def test_ma_cross_matches_ma_strategy(self):
+        """均线交叉公式与内置双均线策略的信号一致"""
+        engine = BacktestEngine()
+        expected = engine._calculate_indicators(self.df, {'type': 'MA', 'short_window': 5, 'long_window': 20})
+        signal = compile_formula(MA_CROSS).signals(self.graph)
+        np.testing.assert_array_equal(signal, np.sign(expected['signal'].to_numpy()))
+
+        result = engine.run_batch(self.df, 'FORMULA', [{'formula': MA_CROSS}])[0]
+        self.assertGreater(result['trade_count'], 0)
+
+    def test_matches_mytt(self):
+        """变量、运算符和函数的结果与直接调用MyTT一致"""
+        plan = parse_formula("""
+            {中轨} MID := MA(CLOSE, 20);
+            UP: MID + 2 * STD(CLOSE, 20);
+            K: SMA((C - LLV(L, 9)) / (HHV(H, 9) - LLV(L, 9)) * 100, 3, 1);
+            BUY: C > UP AND K < 80 AND NOT(V < REF(V, 1));
+            SELL: C < MID || EVERY(C < REF(C, 1), 3)
+        """)
+        outputs = plan.evaluate(self.graph)
+        c, h, l, v = (self.df[col].to_numpy() for col in ('close', 'high', 'low', 'volume'))
+        mid = MyTT.MA(c, 20)
+        up = mid + 2 * MyTT.STD(c, 20)
+        k = MyTT.SMA((c - MyTT.LLV(l, 9)) / (MyTT.HHV(h, 9) - MyTT.LLV(l, 9)) * 100, 3, 1)
+        np.testing.assert_allclose(outputs['UP'], up)
+        np.testing.assert_allclose(outputs['K'], k)
+        np.testing.assert_array_equal(outputs['BUY'], (c > up) & (k < 80) & ~(v < MyTT.REF(v, 1)))
+        np.testing.assert_array_equal(outputs['SELL'], (c < mid) | MyTT.EVERY(c < MyTT.REF(c, 1), 3))
+
+    def test_common_subexpressions_compiled_once(self):
+        """相同的子表达式只生成一步，包括经不同变量名引用的"""
+        plan = parse_formula('A := MA(C,20); B := MA(CLOSE,20); BUY: C > A AND A > REF(B,1); SELL: C < MA(C,20)')
+        calls = [step for step in plan.steps if step[0] == 'CALL']
+        self.assertEqual(sum(1 for step in calls if step[1] == 'MA'), 1)
+        self.assertEqual(plan.columns, ['close'])
+
+    def test_plan_cached_by_hash(self):
+        """相同公式（忽略大小写和空白）只解析一次"""
+        cache = FormulaPlanCache()
+        first = cache.get(MA_CROSS)
+        self.assertIs(cache.get('buy: cross(ma(c,5),ma(c,20));  SELL: CROSS(MA(C,20),MA(C,5))'), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(first.formula_hash, formula_hash(MA_CROSS))
+
+        # 换行是语句结束，不能与空格视为相同
+        self.assertEqual(formula_hash('BUY: C>O\nSELL: C<O'), formula_hash('BUY: C > O; SELL: C < O'))
+        self.assertNotEqual(formula_hash('BUY: C>O\nSELL: C<O'), formula_hash('BUY: C>O SELL: C<O'))
+        cache.get('BUY: C>O\nSELL: C<O')
+        with self.assertRaises(FormulaError):
+            cache.get('BUY: C>O SELL: C<O')
+
+        shared = get_formula_cache()
+        before = shared.misses
+        for _ in range(3):
+            BacktestEngine().run_batch(self.df, 'FORMULA', [{'formula': 'BUY: C > MA(C,10); SELL: C < MA(C,10)'}])
+        self.assertEqual(shared.misses, before + 1)
+
+    def test_errors(self):
+        """语法错误、未知函数、缺少输出和缺少数据列给出明确错误"""
+        for formula in (
+            'BUY: MA(C,5) >; SELL: 0',
+            'BUY: FOO(C); SELL: 0',
+            'BUY: MA(C, X); SELL: 0',
+            'BUY: C > 1',
+            'BUY: C > Y; SELL: 0',
+            'BUY: C > 1 $; SELL: 0',
+        ):
+            with self.subTest(formula=formula), self.assertRaises(FormulaError):
+                parse_formula(formula)
+
+        close_only = IndicatorGraph({'close': self.df['close'].to_numpy()})
+        with self.assertRaises(ValueError):
+            parse_formula('BUY: H > REF(H,1); SELL: 0').signals(close_only)
+
+
+if __name__ == '__main__':
+    unittest.main()